@@ -0,0 +1,669 @@
+"""
+Asynchronous jobs for long-running simulations.
+
+Submitting a job stores its record and sends a message to a queue; workers
+receive messages, run the simulation with progress reporting and store the
+result once as encoded JSON, which is then served as-is on every fetch.
+
+The queue has an SQS-style interface (send/receive/delete with a visibility
+timeout). The default backend is an in-process queue drained by a bounded
+pool of local worker processes, which send progress back to the API process
+over a queue; once JOB_LOCAL_MAX_DEPTH jobs are queued or running,
+submissions are rejected with 429. With JOB_QUEUE_URL set, jobs go to SQS
+and are run by sqs_handler.
+
+A running job holds a lease recorded on its job record. While it runs, a
+heartbeat renews the lease and extends its message's visibility, so a job
+outliving the visibility timeout is not picked up again; a redelivered
+message for a job whose lease is still live is left for later.
+"""
+
+import os
+import json
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+import boto3
+
+from api import serialization, workers
+from data_pipeline.utils import open_storage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+REGION = os.environ.get("REGION", "us-west-2")
+JOB_QUEUE_URL = os.environ.get("JOB_QUEUE_URL", "")
+JOB_STORE_URI = os.environ.get("JOB_STORE_URI", "")
+JOB_LOCAL_WORKERS = int(os.environ.get("JOB_LOCAL_WORKERS", "2"))
+JOB_LOCAL_MAX_DEPTH = int(os.environ.get("JOB_LOCAL_MAX_DEPTH", "16"))
+JOB_POOL_MODE = os.environ.get("JOB_POOL_MODE", "process")
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.environ.get("JOB_VISIBILITY_TIMEOUT_SECONDS", "900"))
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.environ.get("JOB_PROGRESS_INTERVAL_SECONDS", "1"))
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", str(JOB_VISIBILITY_TIMEOUT_SECONDS / 3)))
+
+# Encoded results kept in memory for repeated fetches
+JOB_RESULT_CACHE_SIZE = 32
+
+# Finished jobs kept by the in-process store, by count and by age
+JOB_MEMORY_MAX_FINISHED = int(os.environ.get("JOB_MEMORY_MAX_FINISHED", "256"))
+JOB_MEMORY_FINISHED_TTL_SECONDS = float(os.environ.get("JOB_MEMORY_FINISHED_TTL_SECONDS", "3600"))
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class MemoryStore:
+    """Objects kept in process memory, with the data_pipeline.utils storage interface."""
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def write(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Write an object."""
+        with self._lock:
+            self._objects[key] = data
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Read an object, or None if it does not exist."""
+        with self._lock:
+            return self._objects.get(key)
+
+    def delete(self, key: str):
+        """Remove an object if it exists."""
+        with self._lock:
+            self._objects.pop(key, None)
+
+    def list(self, prefix: str) -> List[str]:
+        """List object keys directly under a prefix."""
+        with self._lock:
+            return sorted(key for key in self._objects if key.rpartition("/")[0] == prefix)
+
+
+class LocalQueue:
+    """
+    In-process queue with the subset of the SQS API used by the job runner.
+
+    Received messages stay invisible for the visibility timeout and are
+    delivered again unless deleted, as with SQS. With a maximum depth, sends
+    are rejected once that many messages are waiting or in flight.
+    """
+
+    def __init__(self, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT_SECONDS, max_depth: Optional[int] = None):
+        self.visibility_timeout = visibility_timeout
+        self.max_depth = max_depth
+        self._messages = deque()
+        self._in_flight = {}
+        self._condition = threading.Condition()
+
+    def send_message(self, body: str) -> str:
+        """
+        Queue a message and return its ID.
+
+        Raises:
+            workers.PoolSaturated: 429 if the queue is at its maximum depth
+        """
+        message_id = str(uuid.uuid4())
+        with self._condition:
+            if self.max_depth is not None and len(self._messages) + len(self._in_flight) >= self.max_depth:
+                raise workers.PoolSaturated("jobs", 429, f"{self.max_depth} jobs are already queued or running")
+            self._messages.append((message_id, body))
+            self._condition.notify()
+        return message_id
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        for receipt, (message_id, body, visible_at) in list(self._in_flight.items()):
+            if visible_at <= now:
+                del self._in_flight[receipt]
+                self._messages.append((message_id, body))
+
+    def receive_messages(self, max_messages: int = 1, wait_seconds: float = 0) -> List[Dict[str, str]]:
+        """
+        Receive up to max_messages, waiting up to wait_seconds for the first.
+
+        Returns:
+            List of dicts with MessageId, ReceiptHandle and Body
+        """
+        deadline = time.monotonic() + wait_seconds
+        with self._condition:
+            self._requeue_expired()
+            while not self._messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._condition.wait(min(remaining, 1.0))
+                self._requeue_expired()
+
+            received = []
+            while self._messages and len(received) < max_messages:
+                message_id, body = self._messages.popleft()
+                receipt = str(uuid.uuid4())
+                self._in_flight[receipt] = (message_id, body, time.monotonic() + self.visibility_timeout)
+                received.append({"MessageId": message_id, "ReceiptHandle": receipt, "Body": body})
+            return received
+
+    def delete_message(self, receipt_handle: str):
+        """Acknowledge a received message."""
+        with self._condition:
+            self._in_flight.pop(receipt_handle, None)
+
+    def change_message_visibility(self, receipt_handle: str, timeout: float):
+        """Keep a received message invisible for timeout seconds from now."""
+        with self._condition:
+            if receipt_handle in self._in_flight:
+                message_id, body, _ = self._in_flight[receipt_handle]
+                self._in_flight[receipt_handle] = (message_id, body, time.monotonic() + timeout)
+
+    def depth(self) -> int:
+        """Number of messages waiting or in flight."""
+        with self._condition:
+            return len(self._messages) + len(self._in_flight)
+
+
+class SQSQueue:
+    """Amazon SQS queue with the LocalQueue interface."""
+
+    def __init__(self, queue_url: str, client: Any = None):
+        self.queue_url = queue_url
+        self.client = client or boto3.client("sqs", region_name=REGION)
+
+    def send_message(self, body: str) -> str:
+        """Queue a message and return its ID."""
+        return self.client.send_message(QueueUrl=self.queue_url, MessageBody=body)["MessageId"]
+
+    def receive_messages(self, max_messages: int = 1, wait_seconds: float = 0) -> List[Dict[str, str]]:
+        """Receive up to max_messages with long polling."""
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, 10),
+            WaitTimeSeconds=int(min(wait_seconds, 20))
+        )
+        return response.get("Messages", [])
+
+    def delete_message(self, receipt_handle: str):
+        """Acknowledge a received message."""
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
+
+    def change_message_visibility(self, receipt_handle: str, timeout: float):
+        """Keep a received message invisible for timeout seconds from now."""
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=receipt_handle, VisibilityTimeout=int(timeout)
+        )
+
+
+class JobStore:
+    """
+    Job records and results in a blob store.
+
+    Durable stores keep finished jobs until their own lifecycle rules remove
+    them. With a retention limit, the oldest finished jobs are deleted once
+    there are more than max_finished of them or they are older than
+    finished_ttl, so an in-process store stays bounded.
+    """
+
+    def __init__(self, store: Any, max_finished: Optional[int] = None, finished_ttl: Optional[float] = None):
+        """
+        Initialize the job store.
+
+        Args:
+            store: MemoryStore, or storage from data_pipeline.utils.open_storage
+            max_finished: Finished jobs to keep, or None for no limit
+            finished_ttl: Seconds to keep finished jobs, or None for no limit
+        """
+        self.store = store
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self._results = OrderedDict()
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create and store a queued job record."""
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": QUEUED,
+            "params": params,
+            "progress": {"step": 0, "total_steps": None, "percent": 0.0, "eta_seconds": None},
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        self.save(job)
+        return job
+
+    def save(self, job: Dict[str, Any]):
+        """Store a job record, expiring old finished jobs when it finishes."""
+        self.store.write(f"jobs/{job['job_id']}.json", json.dumps(job).encode("utf-8"), "application/json")
+        if job["status"] in (SUCCEEDED, FAILED) and (self.max_finished is not None or self.finished_ttl is not None):
+            with self._lock:
+                self._finished[job["job_id"]] = time.monotonic()
+                self._finished.move_to_end(job["job_id"])
+            self._expire_finished()
+
+    def delete(self, job_id: str):
+        """Remove a job record and its result."""
+        with self._lock:
+            self._finished.pop(job_id, None)
+            self._results.pop(job_id, None)
+        self.store.delete(f"jobs/{job_id}.json")
+        self.store.delete(f"jobs/{job_id}/result.json")
+
+    def _expire_finished(self):
+        """Delete the oldest finished jobs beyond the retention limits."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            while self._finished:
+                job_id, finished_at = next(iter(self._finished.items()))
+                over_count = self.max_finished is not None and len(self._finished) > self.max_finished
+                too_old = self.finished_ttl is not None and now - finished_at > self.finished_ttl
+                if not (over_count or too_old):
+                    break
+                expired.append(job_id)
+                del self._finished[job_id]
+        for job_id in expired:
+            self.delete(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job record, or None if it does not exist."""
+        data = self.store.read(f"jobs/{job_id}.json")
+        return json.loads(data) if data is not None else None
+
+    def put_result(self, job_id: str, result: Dict[str, Any]) -> bytes:
+        """Encode and store a job result once."""
+        data = serialization.dumps(result)
+        self.store.write(f"jobs/{job_id}/result.json", data, "application/json")
+        return data
+
+    def get_result(self, job_id: str) -> Optional[bytes]:
+        """Load an encoded job result, keeping recent results in memory."""
+        with self._lock:
+            if job_id in self._results:
+                self._results.move_to_end(job_id)
+                return self._results[job_id]
+
+        data = self.store.read(f"jobs/{job_id}/result.json")
+        if data is not None:
+            with self._lock:
+                self._results[job_id] = data
+                while len(self._results) > JOB_RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        return data
+
+
+class ProgressReporter:
+    """Turns simulation step callbacks into throttled job progress updates."""
+
+    def __init__(self, jobs: JobStore, job: Dict[str, Any], interval: float = JOB_PROGRESS_INTERVAL_SECONDS):
+        self.jobs = jobs
+        self.job = job
+        self.interval = interval
+        self.start = time.monotonic()
+        self._saved_at = 0.0
+
+    def __call__(self, step: int, total_steps: int):
+        now = time.monotonic()
+        elapsed = now - self.start
+        self.job["progress"] = {
+            "step": step,
+            "total_steps": total_steps,
+            "percent": round(100.0 * step / total_steps, 1) if total_steps else 0.0,
+            "eta_seconds": round(elapsed / step * (total_steps - step), 1) if step else None
+        }
+        if now - self._saved_at >= self.interval:
+            self._saved_at = now
+            self.jobs.save(self.job)
+
+
+class Heartbeat:
+    """Renews a running job's lease, and optionally its message's visibility, until stopped."""
+
+    def __init__(self, jobs: JobStore, job: Dict[str, Any], extend: Optional[Callable[[float], None]] = None):
+        """
+        Initialize the heartbeat.
+
+        Args:
+            jobs: JobStore holding the job record
+            job: Running job record, shared with its progress reporter
+            extend: Called with JOB_VISIBILITY_TIMEOUT_SECONDS to extend the message's visibility
+        """
+        self.jobs = jobs
+        self.job = job
+        self.extend = extend
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"job-heartbeat-{job['job_id'][:8]}", daemon=True)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _beat(self):
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                if self.extend is not None:
+                    self.extend(JOB_VISIBILITY_TIMEOUT_SECONDS)
+                self.job["lease_expires_at"] = time.time() + JOB_VISIBILITY_TIMEOUT_SECONDS
+                self.jobs.save(self.job)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {self.job['job_id']} failed: {str(e)}")
+
+
+# Functions running each kind of job, called with (params, progress_callback)
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Callable[[int, int], None]], Dict[str, Any]]] = {
+    "spread": workers.run_fire_spread
+}
+
+# Progress queue of a local job worker, set by the pool initializer
+_progress_queue = None
+
+
+def init_job_worker(progress_queue: Any):
+    """Keep the queue a local job worker sends progress on."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def run_handler(kind: str, job_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a job handler in a local job worker.
+
+    Progress is sent to the API process as (job_id, step, total_steps).
+
+    Args:
+        kind: Job kind from JOB_HANDLERS
+        job_id: Job being run
+        params: Job parameters
+
+    Returns:
+        The handler's result
+    """
+    return JOB_HANDLERS[kind](params, lambda step, total_steps: _progress_queue.put((job_id, step, total_steps)))
+
+
+def run_handler_inline(job: Dict[str, Any], progress_callback: Callable[[int, int], None]) -> Dict[str, Any]:
+    """Run a job's handler in the calling thread."""
+    return JOB_HANDLERS[job["kind"]](job["params"], progress_callback)
+
+
+def run_job(
+    jobs: JobStore,
+    job_id: str,
+    extend: Optional[Callable[[float], None]] = None,
+    execute: Callable[[Dict[str, Any], Callable[[int, int], None]], Dict[str, Any]] = run_handler_inline
+) -> bool:
+    """
+    Run one job and store its result or error.
+
+    Args:
+        jobs: JobStore holding the job record
+        job_id: Job to run
+        extend: Extends the visibility of the job's message while it runs
+        execute: Runs the job record's handler with a progress callback
+
+    Returns:
+        False if another worker holds the job's lease and its message should
+        be left for redelivery, otherwise True
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        logger.error(f"Job {job_id} not found")
+        return True
+    if job["status"] in (SUCCEEDED, FAILED):
+        # Redelivered message for a job that already finished
+        return True
+    if job["status"] == RUNNING and job.get("lease_expires_at", 0) > time.time():
+        logger.info(f"Job {job_id} is running elsewhere; leaving its message for later")
+        return False
+
+    job["status"] = RUNNING
+    job["started_at"] = datetime.utcnow().isoformat() + "Z"
+    job["lease_expires_at"] = time.time() + JOB_VISIBILITY_TIMEOUT_SECONDS
+    jobs.save(job)
+    logger.info(f"Running {job['kind']} job {job_id}")
+
+    try:
+        reporter = ProgressReporter(jobs, job)
+        with Heartbeat(jobs, job, extend):
+            result = execute(job, reporter)
+        jobs.put_result(job_id, result)
+        job["status"] = SUCCEEDED
+        job["progress"]["percent"] = 100.0
+        job["progress"]["eta_seconds"] = 0.0
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {str(e)}")
+        job["status"] = FAILED
+        job["error"] = str(e)
+
+    job["finished_at"] = datetime.utcnow().isoformat() + "Z"
+    job["lease_expires_at"] = None
+    jobs.save(job)
+    return True
+
+
+class JobRunner:
+    """
+    Drains a job queue into a bounded pool of local workers.
+
+    One dispatch thread per worker receives a message and waits for its job,
+    which runs in a worker process (threads with mode "thread"), so at most
+    `concurrency` simulations run at once and none holds the API process's
+    GIL. Progress comes back over a queue read by one more thread, which
+    saves it on the job record.
+    """
+
+    def __init__(self, queue: Any, jobs: JobStore, concurrency: int = JOB_LOCAL_WORKERS, mode: str = JOB_POOL_MODE):
+        """
+        Initialize the runner.
+
+        Args:
+            queue: LocalQueue to drain
+            jobs: JobStore for records and results
+            concurrency: Maximum jobs running at once
+            mode: "process" or "thread"
+        """
+        self.queue = queue
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self.mode = mode
+        self.pool = None
+        self._progress = None
+        self._progress_thread = None
+        self._reporters: Dict[str, Callable[[int, int], None]] = {}
+        self._drained: Dict[str, threading.Event] = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker pool and dispatch threads if they are not running."""
+        with self._lock:
+            if self.pool is None:
+                if self.mode == "process":
+                    self._progress = multiprocessing.get_context(workers.WORKER_START_METHOD).SimpleQueue()
+                else:
+                    self._progress = queue.SimpleQueue()
+                self.pool = workers.WorkerPool(
+                    "jobs", self.concurrency, 0, mode=self.mode,
+                    initializer=init_job_worker, initargs=(self._progress,)
+                )
+                self._progress_thread = threading.Thread(target=self._read_progress, name="job-progress", daemon=True)
+                self._progress_thread.start()
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            self._stop.clear()
+            while len(self._threads) < self.concurrency:
+                thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the dispatch threads after their current job and shut down the pool."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        with self._lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self._progress.put(None)
+                self._progress_thread.join(timeout)
+                self.pool = None
+
+    def _read_progress(self):
+        """Pass progress from the workers to the reporters of running jobs."""
+        progress = self._progress
+        while True:
+            item = progress.get()
+            if item is None:
+                return
+            job_id, step, total_steps = item
+            if step is None:
+                # Everything the job's worker sent has been read
+                self._drained.pop(job_id).set()
+                continue
+            reporter = self._reporters.get(job_id)
+            if reporter is not None:
+                reporter(step, total_steps)
+
+    def _execute(self, job: Dict[str, Any], progress_callback: Callable[[int, int], None]) -> Dict[str, Any]:
+        """Run a job in the worker pool, restarting the pool if a worker process dies."""
+        job_id = job["job_id"]
+        executor = self.pool.executor()
+        self._reporters[job_id] = progress_callback
+        drained = self._drained[job_id] = threading.Event()
+        try:
+            return executor.submit(run_handler, job["kind"], job_id, job["params"]).result()
+        except workers.BrokenProcessPool:
+            if self.pool._executor is executor:
+                logger.error("A job worker process died, restarting the job pool")
+                self.pool.shutdown()
+            raise RuntimeError("The job worker process died")
+        finally:
+            # The worker's progress was sent before its result, so this marker is read after it
+            self._progress.put((job_id, None, None))
+            drained.wait(5.0)
+            self._reporters.pop(job_id, None)
+
+    def _work(self):
+        while not self._stop.is_set():
+            for message in self.queue.receive_messages(max_messages=1, wait_seconds=1):
+                job_id = json.loads(message["Body"])["job_id"]
+                receipt = message["ReceiptHandle"]
+                extend = lambda timeout, receipt=receipt: self.queue.change_message_visibility(receipt, timeout)
+                if run_job(self.jobs, job_id, extend, self._execute):
+                    self.queue.delete_message(receipt)
+
+
+class JobService:
+    """Submits jobs and answers status and result queries."""
+
+    def __init__(self, queue: Any, jobs: JobStore, runner: Optional[JobRunner] = None):
+        """
+        Initialize the service.
+
+        Args:
+            queue: LocalQueue or SQSQueue
+            jobs: JobStore for records and results
+            runner: Local runner draining the queue, if jobs run in this process
+        """
+        self.queue = queue
+        self.jobs = jobs
+        self.runner = runner
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Create a job record and queue it for execution.
+
+        Raises:
+            ValueError: For an unknown job kind
+            workers.PoolSaturated: If the local queue is full
+        """
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = self.jobs.create(kind, params)
+        try:
+            self.queue.send_message(json.dumps({"job_id": job["job_id"]}))
+        except workers.PoolSaturated:
+            self.jobs.delete(job["job_id"])
+            raise
+        if self.runner is not None:
+            self.runner.start()
+        return job
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job record without its parameters, or None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if key not in ("params", "lease_expires_at")}
+
+    def result(self, job_id: str) -> Optional[bytes]:
+        """Encoded result of a finished job, or None if there is none yet."""
+        return self.jobs.get_result(job_id)
+
+
+def create_job_service() -> JobService:
+    """
+    Create the job service from the environment.
+
+    Returns:
+        JobService using SQS and a shared store if configured, otherwise an
+        in-process queue, memory store and local worker pool
+    """
+    if JOB_STORE_URI:
+        jobs = JobStore(open_storage(JOB_STORE_URI))
+    else:
+        jobs = JobStore(MemoryStore(), JOB_MEMORY_MAX_FINISHED, JOB_MEMORY_FINISHED_TTL_SECONDS)
+    if JOB_QUEUE_URL:
+        runner = None
+        queue = SQSQueue(JOB_QUEUE_URL)
+        if JOB_STORE_URI == "":
+            logger.warning("JOB_QUEUE_URL is set without JOB_STORE_URI; queue consumers cannot see job records")
+    else:
+        queue = LocalQueue(max_depth=JOB_LOCAL_MAX_DEPTH)
+        runner = JobRunner(queue, jobs)
+    return JobService(queue, jobs, runner)
+
+
+def sqs_handler(event, context):
+    """
+    AWS Lambda handler running jobs delivered by an SQS event source.
+
+    Args:
+        event: SQS event with job messages
+        context: AWS Lambda context
+
+    Returns:
+        Dict with the number of jobs run and, as batchItemFailures, the
+        messages of jobs leased by another invocation
+    """
+    jobs = JobStore(open_storage(JOB_STORE_URI))
+    queue = SQSQueue(JOB_QUEUE_URL) if JOB_QUEUE_URL else None
+    records = event.get("Records", [])
+    retry = []
+    for record in records:
+        extend = None
+        if queue is not None:
+            extend = lambda timeout, receipt=record["receiptHandle"]: queue.change_message_visibility(receipt, timeout)
+        if not run_job(jobs, json.loads(record["body"])["job_id"], extend):
+            retry.append({"itemIdentifier": record["messageId"]})
+    return {"jobs": len(records), "batchItemFailures": retry}
@@ -1,15 +1,27 @@
 import os
 import json
 import logging
-from typing import Dict, Any, List, Optional
-
-from fastapi import FastAPI, HTTPException, Depends, Query, Request
+import asyncio
+import bisect
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from pydantic import BaseModel, Field
 import boto3
 from boto3.dynamodb.conditions import Key
 
+from api import jobs, metrics, response_cache, serialization, workers
+from data_pipeline import fire_index
+from models import risk_prediction, risk_tiles, warmup, zonal_stats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,6 +47,24 @@ STAGE = os.environ.get("STAGE", "dev")
 REGION = os.environ.get("REGION", "us-west-2")
 S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
 
+# Risk request micro-batching
+RISK_BATCH_WINDOW_MS = float(os.environ.get("RISK_BATCH_WINDOW_MS", "5"))
+RISK_BATCH_MAX_SIZE = int(os.environ.get("RISK_BATCH_MAX_SIZE", "32"))
+RISK_BATCH_MAX_QUEUE = int(os.environ.get("RISK_BATCH_MAX_QUEUE", "256"))
+
+# Seconds each route's responses stay fresh in the response cache
+RESPONSE_CACHE_TTL_SECONDS = {
+    "recent_fires": float(os.environ.get("RECENT_FIRES_CACHE_TTL_SECONDS", "60")),
+    "high_risk_areas": float(os.environ.get("HIGH_RISK_AREAS_CACHE_TTL_SECONDS", "300")),
+    "predict_risk": float(os.environ.get("PREDICT_RISK_CACHE_TTL_SECONDS", "60"))
+}
+
+# Detections encoded per chunk of an NDJSON recent-fires stream
+RECENT_FIRES_NDJSON_CHUNK = 5000
+
+# Seconds between checks for a newer nightly risk tile build
+RISK_INDEX_REFRESH_SECONDS = float(os.environ.get("RISK_INDEX_REFRESH_SECONDS", "300"))
+
 # Initialize AWS clients
 s3_client = boto3.client("s3", region_name=REGION)
 
@@ -53,6 +83,9 @@ class RiskPredictionRequest(BaseModel):
     radius_km: float = Field(10.0, gt=0, description="Radius in kilometers for the prediction area")
     start_date: str = Field(..., description="Start date for prediction (YYYY-MM-DD)")
     end_date: str = Field(..., description="End date for prediction (YYYY-MM-DD)")
+    top_k_factors: Optional[int] = Field(None, ge=1, description="Return only the k largest contributing factors")
+    model_version: Optional[str] = Field(None, description="Model version to score with (defaults to the active version)")
+    shadow_version: Optional[str] = Field(None, description="Candidate model version to score alongside")
 
 
 class RiskPredictionResponse(BaseModel):
@@ -65,6 +98,7 @@ class RiskPredictionResponse(BaseModel):
     )
     forecast_dates: List[str] = Field(..., description="Dates for the forecast")
     forecast_values: List[float] = Field(..., description="Risk score for each date")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Model version and feature source timings")
 
 
 class FirePoint(BaseModel):
@@ -114,6 +148,264 @@ class DamageAssessmentResponse(BaseModel):
     map_url: str = Field(..., description="URL to damage assessment map")
 
 
+# ------ Risk Micro-Batching ------
+
+
+class RiskMicroBatcher:
+    """
+    Coalesces concurrent risk requests into one model call.
+    
+    Requests are collected for up to `window_ms` milliseconds or `max_batch`
+    requests, whichever comes first, stacked into one feature matrix and scored
+    by risk_prediction.score_requests in the risk worker pool. Requests pinned to
+    different model versions are scored in separate calls within the batch.
+    Each caller gets its own slice of the results back. Once `max_queue`
+    requests are waiting to be batched, further requests are rejected.
+    """
+    
+    # Upper bounds of the batch size histogram buckets
+    BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+    
+    def __init__(self, window_ms: float, max_batch: int, pool: workers.WorkerPool, max_queue: int = RISK_BATCH_MAX_QUEUE):
+        """
+        Initialize the batcher.
+        
+        Args:
+            window_ms: Maximum time to wait for more requests once one arrives
+            max_batch: Maximum number of requests scored together
+            pool: Worker pool running the model calls
+            max_queue: Maximum requests waiting to be batched
+        """
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.pool = pool
+        self.max_queue = max_queue
+        self._queue = None
+        self._loop = None
+        self._collector = None
+        # The loop only holds tasks weakly, so in-flight batches are kept here
+        self._scoring = set()
+        self.batch_size_counts = [0] * (len(self.BATCH_SIZE_BUCKETS) + 1)
+        self.batches = 0
+        self.requests = 0
+        self.max_queue_depth = 0
+        self.rejected = 0
+    
+    def _ensure_running(self):
+        """Start the collector on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._collector is None or self._collector.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._collector = loop.create_task(self._collect())
+    
+    async def submit(
+        self,
+        features: np.ndarray,
+        top_k: Optional[int] = None,
+        version: Optional[str] = None,
+        shadow_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue one request's feature matrix and wait for its scores.
+        
+        Args:
+            features: Matrix from risk_prediction.build_request_features
+            top_k: Return only the k largest contributing factors
+            version: Model version the matrix was built for
+            shadow_version: Candidate model version to score alongside
+            
+        Returns:
+            Result dict from risk_prediction.score_requests
+            
+        Raises:
+            workers.PoolSaturated: 429 if the batching queue is full
+        """
+        self._ensure_running()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((features, top_k, (version, shadow_version), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise workers.PoolSaturated(self.pool.name, 429, f"{self.max_queue} risk requests are already waiting")
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+    
+    async def _collect(self):
+        """Gather queued requests into batches and dispatch them."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.window_ms / 1000
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            self._record(len(batch))
+            task = self._loop.create_task(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+    
+    async def _score(self, batch: List[Tuple[np.ndarray, Optional[int], Tuple, asyncio.Future]]):
+        """Score one batch in the worker pool and fan the results back out."""
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[2], []).append(item)
+        
+        for (version, shadow_version), items in groups.items():
+            matrices = [features for features, _, _, _ in items]
+            top_ks = [top_k for _, top_k, _, _ in items]
+            try:
+                results = await self.pool.run(
+                    risk_prediction.score_requests, matrices, top_ks, version, shadow_version
+                )
+            except Exception as e:
+                for _, _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, _, _, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+    
+    def _record(self, batch_size: int):
+        """Update batch counters and the batch size histogram."""
+        self.batches += 1
+        self.requests += batch_size
+        self.batch_size_counts[bisect.bisect_left(self.BATCH_SIZE_BUCKETS, batch_size)] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and batch size statistics.
+        
+        Returns:
+            Dict with current and maximum queue depth and a batch size histogram
+        """
+        labels = [str(bound) for bound in self.BATCH_SIZE_BUCKETS] + ["+Inf"]
+        return {
+            "window_ms": self.window_ms,
+            "max_batch": self.max_batch,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "batch_size_histogram": dict(zip(labels, self.batch_size_counts))
+        }
+
+
+risk_batcher = RiskMicroBatcher(RISK_BATCH_WINDOW_MS, RISK_BATCH_MAX_SIZE, workers.risk_pool)
+
+# Long-running simulation jobs
+job_service = jobs.create_job_service()
+
+# Cache for read-heavy routes polled by dashboards
+api_cache = response_cache.create_response_cache()
+
+
+@app.on_event("startup")
+def start_warmup():
+    """
+    Warm up model artifacts and code paths without blocking startup.
+
+    Artifacts already preloaded before fork (see gunicorn.conf.py) are shared
+    copy-on-write and skipped here; each worker then runs the synthetic
+    prediction and simulation itself. /ready reports 503 until this finishes.
+    """
+    warmup.warm_up_in_background()
+    if warmup.WARMUP_STEPS and workers.simulation_pool.mode == "process":
+        workers.simulation_pool.prestart()
+
+
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    """Stop the model worker pools and local job workers with the app."""
+    workers.risk_pool.shutdown()
+    workers.simulation_pool.shutdown()
+    if job_service.runner is not None:
+        job_service.runner.stop()
+
+
+def pool_unavailable(e: workers.PoolSaturated) -> HTTPException:
+    """Convert a worker pool rejection into an HTTP error with Retry-After."""
+    logger.warning(f"Rejected request for the {e.pool} pool: {str(e)}")
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+# ------ Request Metrics ------
+
+
+def route_template(request: Request) -> str:
+    """Path template of the route a request matches, to keep metric labels bounded."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record latency, in-flight count and payload sizes, and add Server-Timing."""
+    start = time.perf_counter()
+    timings = metrics.start_request()
+    route = route_template(request)
+    method = request.method
+    
+    if request.headers.get("content-length"):
+        metrics.REQUEST_SIZE.observe(int(request.headers["content-length"]), method=method, route=route)
+    
+    metrics.REQUESTS_IN_FLIGHT.inc(route=route)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        duration = time.perf_counter() - start
+        metrics.REQUESTS_IN_FLIGHT.dec(route=route)
+        metrics.REQUEST_LATENCY.observe(duration, method=method, route=route, status=str(status))
+        for phase, seconds in timings.items():
+            metrics.PHASE_LATENCY.observe(seconds, route=route, phase=phase)
+    
+    if response.headers.get("content-length"):
+        metrics.RESPONSE_SIZE.observe(int(response.headers["content-length"]), method=method, route=route)
+    response.headers["Server-Timing"] = metrics.server_timing_header(timings, duration)
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+def collect_component_metrics():
+    """Worker pool, batcher, response cache and fire index state at scrape time."""
+    for name, pool in (("risk", workers.risk_pool), ("simulation", workers.simulation_pool)):
+        stats = pool.stats()
+        labels = {"pool": name}
+        yield "worker_pool_in_flight", "gauge", "Calls running in the worker pool", labels, stats["in_flight"]
+        yield "worker_pool_queued", "gauge", "Calls waiting for a worker", labels, stats["queued"]
+        yield "worker_pool_rejected_total", "counter", "Calls rejected because the queue was full", labels, stats["rejected"]
+        yield "worker_pool_timed_out_total", "counter", "Calls rejected after waiting for a worker", labels, stats["timed_out"]
+    
+    batching = risk_batcher.stats()
+    yield "risk_batcher_queue_depth", "gauge", "Risk requests waiting to be batched", {}, batching["queue_depth"]
+    yield "risk_batcher_batches_total", "counter", "Risk model batches scored", {}, batching["batches"]
+    
+    cache = api_cache.stats()
+    for outcome in ("hits", "shared_hits", "misses", "coalesced", "not_modified"):
+        yield "response_cache_requests_total", "counter", "Response cache lookups by outcome", {"outcome": outcome}, cache[outcome]
+    
+    detections = recent_fires.index
+    yield "fire_index_detections", "gauge", "Fire detections in the recent-fires index", {}, len(detections)
+    yield "fire_index_version", "gauge", "Version of the recent-fires index", {}, detections.version
+
+
+metrics.registry.register_collector(collect_component_metrics)
+
+
 # ------ API Routes ------
 
 
@@ -129,103 +421,210 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness endpoint reporting whether this worker has finished warm-up.
+
+    Returns 503 until model artifacts are loaded and the warm-up prediction
+    and simulation have run, so load balancers only route to warm workers.
+    """
+    ready_state = warmup.state.to_dict()
+    if not ready_state["ready"]:
+        response.status_code = 503
+    return ready_state
+
+
 @app.post("/predict/risk", response_model=RiskPredictionResponse)
-async def predict_risk(request: RiskPredictionRequest):
+async def predict_risk(request: RiskPredictionRequest, http_request: Request):
     """
     Predict wildfire risk for a specific location and time period.
     
     This endpoint uses historical weather data, vegetation indices,
     topographical information, and other features to assess wildfire risk.
+    Concurrent requests are scored together by the risk micro-batcher, and
+    repeated requests are served from the response cache.
     """
     logger.info(f"Risk prediction request for {request.location}")
+    # Requests without a pinned version depend on the active one
+    params = {**request.dict(), "active_version": risk_prediction.model_registry.active_version}
+    return await api_cache.respond(
+        http_request, "predict_risk", params, RESPONSE_CACHE_TTL_SECONDS["predict_risk"],
+        lambda: compute_risk_prediction(request),
+        # Responses built on simulated fallback weather are not reused
+        cacheable=lambda response: all(
+            source["status"] == "ok" for source in response.metadata["sources"].values()
+        )
+    )
+
+
+async def compute_risk_prediction(request: RiskPredictionRequest) -> RiskPredictionResponse:
+    """Acquire features and score one risk prediction request."""
+    lat = request.location.latitude
+    lon = request.location.longitude
     try:
-        # This is a placeholder - in a real implementation, this would call the model function
-        # from the Lambda models.risk_prediction module
+        # Pin the model version for the whole request; loading a version
+        # that is not in memory yet blocks, so it runs off the event loop
+        await run_in_threadpool(risk_prediction.model_registry.refresh_active)
+        version = request.model_version or risk_prediction.model_registry.active_version
+        shadow_version = request.shadow_version or risk_prediction.SHADOW_MODEL_VERSION or None
+        # Client-selected versions must already be loaded or published
+        for requested in (request.model_version, request.shadow_version):
+            if requested:
+                await run_in_threadpool(risk_prediction.model_registry.resolve, requested)
+        await run_in_threadpool(risk_prediction.model_registry.get, version)
+        
+        # Feature acquisition blocks on I/O, so keep it off the event loop
+        with metrics.timed("feature-fetch"):
+            data, sources = await run_in_threadpool(
+                risk_prediction.acquire_features,
+                lat, lon, request.radius_km, request.start_date, request.end_date
+            )
+        features, forecast_dates = risk_prediction.build_request_features(
+            lat, lon, data["weather"], data["terrain"], data["vegetation"], version
+        )
+        
+        with metrics.timed("model"):
+            result = await risk_batcher.submit(features, request.top_k_factors, version, shadow_version)
         
-        # Simulated response for demonstration
-        response = RiskPredictionResponse(
+        metadata = {
+            "model_version": result["model_version"],
+            "sources": sources
+        }
+        if "shadow" in result:
+            metadata["shadow"] = result["shadow"]
+        
+        return RiskPredictionResponse(
             location=request.location,
-            risk_score=0.75,
-            confidence=0.85,
-            factors={
-                "vegetation_dryness": 0.4,
-                "wind_speed": 0.3,
-                "temperature": 0.2,
-                "topography": 0.1
-            },
-            forecast_dates=[
-                "2023-05-01", "2023-05-02", "2023-05-03", "2023-05-04", "2023-05-05"
-            ],
-            forecast_values=[0.65, 0.70, 0.75, 0.80, 0.70]
+            risk_score=round(result["risk_score"], 3),
+            confidence=round(result["confidence"], 3),
+            factors=result["factors"],
+            forecast_dates=forecast_dates,
+            forecast_values=[round(v, 3) for v in result["forecast_values"]],
+            metadata=metadata
         )
-        return response
+    except risk_prediction.UnknownModelVersion as e:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {e.args[0]}")
+    except risk_prediction.FeatureDeadlineExceeded as e:
+        logger.error(f"Feature acquisition deadline exceeded: {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
+    except workers.PoolSaturated as e:
+        raise pool_unavailable(e)
     except Exception as e:
         logger.error(f"Error in risk prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 
+@app.get("/models/risk")
+async def risk_model_versions():
+    """Active, loaded and published risk model versions."""
+    registry = risk_prediction.model_registry
+    published = await run_in_threadpool(registry.published_versions)
+    return {
+        "active_version": registry.active_version,
+        "loaded_versions": registry.versions(),
+        "published_versions": published,
+        "shadow_version": risk_prediction.SHADOW_MODEL_VERSION or None
+    }
+
+
+@app.get("/metrics/risk-batching")
+async def risk_batching_metrics():
+    """Queue depth and batch size histogram of the risk request batcher."""
+    return risk_batcher.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request and component metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/response-cache")
+async def response_cache_metrics():
+    """Hit, miss and coalesced counters of the response cache."""
+    return api_cache.stats()
+
+
+@app.get("/metrics/workers")
+async def worker_pool_metrics():
+    """Occupancy and rejection counters of the model worker pools."""
+    return {
+        "risk": workers.risk_pool.stats(),
+        "simulation": workers.simulation_pool.stats()
+    }
+
+
 @app.post("/simulate/spread", response_model=FireSpreadResponse)
-async def simulate_fire_spread(request: FireSpreadRequest):
+async def simulate_fire_spread(request: FireSpreadRequest, http_request: Request):
     """
     Simulate wildfire spread from ignition points over time.
     
     This endpoint uses cellular automata simulation based on Rothermel's
     fire spread equations, accounting for terrain, weather, and fuel conditions.
+    Results are encoded in the worker and returned without per-vertex validation.
     """
     logger.info(f"Fire spread simulation request with {len(request.ignition_points)} ignition points")
     try:
-        # Placeholder for actual simulation logic
-        # In a real implementation, this would call the fire spread model
-        
-        # Simulated response for demonstration
-        perimeters = {
-            "2023-05-01T12:00:00": [
-                [
-                    GeoPoint(latitude=37.7749, longitude=-122.4194),
-                    GeoPoint(latitude=37.7750, longitude=-122.4194),
-                    GeoPoint(latitude=37.7750, longitude=-122.4195),
-                    GeoPoint(latitude=37.7749, longitude=-122.4195),
-                    GeoPoint(latitude=37.7749, longitude=-122.4194)
-                ]
-            ],
-            "2023-05-01T18:00:00": [
-                [
-                    GeoPoint(latitude=37.7749, longitude=-122.4194),
-                    GeoPoint(latitude=37.7752, longitude=-122.4194),
-                    GeoPoint(latitude=37.7752, longitude=-122.4197),
-                    GeoPoint(latitude=37.7749, longitude=-122.4197),
-                    GeoPoint(latitude=37.7749, longitude=-122.4194)
-                ]
-            ]
-        }
-        
-        # Simplified intensity grid for demonstration
-        intensity_grid = {
-            "2023-05-01T12:00:00": [[0.5, 0.6], [0.7, 0.8]],
-            "2023-05-01T18:00:00": [[0.7, 0.8], [0.9, 1.0]]
-        }
-        
-        response = FireSpreadResponse(
-            perimeters=perimeters,
-            intensity_grid=intensity_grid,
-            metadata={
-                "model_version": "1.0.0",
-                "weather_conditions": {
-                    "wind_speed": 10,
-                    "wind_direction": 45,
-                    "temperature": 30,
-                    "humidity": 15
-                },
-                "terrain_effect": "moderate",
-                "simulation_resolution": request.resolution_meters
-            }
-        )
-        return response
+        with metrics.timed("model"):
+            body = await workers.simulation_pool.run(workers.run_fire_spread_encoded, request.dict())
+        return serialization.encoded_response(http_request, body)
+    except workers.PoolSaturated as e:
+        raise pool_unavailable(e)
     except Exception as e:
         logger.error(f"Error in fire spread simulation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Simulation error: {str(e)}")
 
 
+@app.post("/simulate/spread/jobs", status_code=202)
+async def submit_fire_spread_job(request: FireSpreadRequest):
+    """
+    Queue a fire spread simulation and return its job ID immediately.
+    
+    Use this for simulations that run longer than an API request may take.
+    Poll the job for progress and fetch the result once it has succeeded.
+    """
+    try:
+        job = await run_in_threadpool(job_service.submit, "spread", request.dict())
+    except workers.PoolSaturated as e:
+        raise pool_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error submitting fire spread job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Job submission error: {str(e)}")
+    
+    job_id = job["job_id"]
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "status_url": f"/simulate/spread/jobs/{job_id}",
+        "result_url": f"/simulate/spread/jobs/{job_id}/result"
+    }
+
+
+@app.get("/simulate/spread/jobs/{job_id}")
+async def get_fire_spread_job(job_id: str):
+    """Get the status and progress (current step and ETA) of a simulation job."""
+    job = await run_in_threadpool(job_service.status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@app.get("/simulate/spread/jobs/{job_id}/result")
+async def get_fire_spread_job_result(job_id: str, request: Request):
+    """Get the result of a finished simulation job."""
+    job = await run_in_threadpool(job_service.status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] != jobs.SUCCEEDED:
+        detail = job["error"] if job["status"] == jobs.FAILED else f"Job is {job['status']}"
+        raise HTTPException(status_code=409, detail=detail)
+    
+    # The result was encoded once when the job finished and is served as-is
+    result = await run_in_threadpool(job_service.result, job_id)
+    return serialization.encoded_response(request, result)
+
+
 @app.post("/assess/damage", response_model=DamageAssessmentResponse)
 async def assess_damage(request: DamageAssessmentRequest):
     """
@@ -235,107 +634,232 @@ async def assess_damage(request: DamageAssessmentRequest):
     """
     logger.info(f"Damage assessment request for fire area with {len(request.fire_area)} points")
     try:
-        # Placeholder for actual damage assessment logic
-        
-        # Simulated response for demonstration
-        response = DamageAssessmentResponse(
-            burned_area_sqkm=25.5,
-            vegetation_damage={
-                "forest": 15.3,
-                "shrubland": 7.2,
-                "grassland": 3.0
-            },
-            infrastructure_impact={
-                "buildings": 12,
-                "roads_km": 5,
-                "power_lines_km": 3
-            },
-            recovery_estimate_months=36.5,
-            map_url=f"https://{S3_BUCKET}.s3.amazonaws.com/damage-assessments/assessment-123456.html"
-        )
-        return response
+        with metrics.timed("model"):
+            results = await workers.simulation_pool.run(workers.run_damage_assessment, request.dict())
+        if "error" in results:
+            raise RuntimeError(results["error"])
+        return DamageAssessmentResponse(**results)
+    except workers.PoolSaturated as e:
+        raise pool_unavailable(e)
     except Exception as e:
         logger.error(f"Error in damage assessment: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Assessment error: {str(e)}")
 
 
+# Recent fire detections, indexed in memory and refreshed as new files are ingested
+recent_fires = fire_index.FireIndexFeed()
+
+
 @app.get("/data/recent-fires")
 async def get_recent_fires(
-    days: int = Query(7, ge=1, le=30, description="Number of days to look back")
+    request: Request,
+    days: int = Query(7, ge=1, le=30, description="Number of days to look back"),
+    start: Optional[datetime] = Query(None, description="Earliest detection time (overrides days)"),
+    end: Optional[datetime] = Query(None, description="Latest detection time (default now)"),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180, description="Bounding box west edge"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90, description="Bounding box south edge"),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180, description="Bounding box east edge"),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90, description="Bounding box north edge"),
+    latitude: Optional[float] = Query(None, ge=-90, le=90, description="Radius filter center latitude"),
+    longitude: Optional[float] = Query(None, ge=-180, le=180, description="Radius filter center longitude"),
+    radius_km: Optional[float] = Query(None, gt=0, le=1000, description="Radius filter in kilometers"),
+    min_confidence: Optional[str] = Query(None, regex="^(low|nominal|high)$", description="Lowest confidence class"),
+    min_frp: Optional[float] = Query(None, ge=0, description="Lowest fire radiative power (MW)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum detections per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    format: str = Query("json", regex="^(json|ndjson)$", description="json pages or an ndjson stream of all matches")
 ):
-    """Get recent fire detections from NASA FIRMS data."""
-    try:
-        # Placeholder implementation
-        # In a real world scenario, this would query the database
-        
-        recent_fires = [
-            {
-                "id": "FIRMS_123456",
-                "latitude": 37.7749,
-                "longitude": -122.4194,
-                "detection_time": "2023-05-01T12:00:00Z",
-                "confidence": "high",
-                "frp": 25.5  # Fire Radiative Power
-            },
-            {
-                "id": "FIRMS_123457",
-                "latitude": 34.0522,
-                "longitude": -118.2437,
-                "detection_time": "2023-05-02T14:30:00Z",
-                "confidence": "nominal",
-                "frp": 15.2
-            }
-        ]
-        
-        return {"fires": recent_fires, "count": len(recent_fires), "days": days}
-    except Exception as e:
-        logger.error(f"Error fetching recent fires: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Data retrieval error: {str(e)}")
+    """
+    Get recent fire detections from NASA FIRMS data.
+
+    Detections are served from an in-memory spatial index. JSON responses are
+    paginated newest first with `next_cursor`; `format=ndjson` streams every
+    match as newline-delimited JSON instead.
+    """
+    bbox_params = [min_lon, min_lat, max_lon, max_lat]
+    if any(value is not None for value in bbox_params) and not all(value is not None for value in bbox_params):
+        raise HTTPException(status_code=400, detail="Bounding box requires min_lon, min_lat, max_lon and max_lat")
+    if min_lon is not None and (min_lon > max_lon or min_lat > max_lat):
+        raise HTTPException(status_code=400, detail="Bounding box edges are out of order")
+    radius_params = [latitude, longitude, radius_km]
+    if any(value is not None for value in radius_params) and not all(value is not None for value in radius_params):
+        raise HTTPException(status_code=400, detail="Radius filter requires latitude, longitude and radius_km")
+
+    # Without an explicit end the window moves with the clock; FIRMS times are
+    # to the minute, so flooring to the minute lets repeated polls share a cache entry
+    if end is None:
+        end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    elif end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start is None:
+        start = end - timedelta(days=days)
+    elif start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    filters = {
+        "bbox": tuple(bbox_params) if min_lon is not None else None,
+        "center": (latitude, longitude) if latitude is not None else None,
+        "radius_km": radius_km,
+        "start": start,
+        "end": end,
+        "min_confidence": min_confidence,
+        "min_frp": min_frp,
+        "cursor": cursor
+    }
+
+    index = await run_in_threadpool(recent_fires.get)
+    if cursor is not None:
+        try:
+            fire_index.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            fire_index.iter_ndjson(index, RECENT_FIRES_NDJSON_CHUNK, serialization.dumps, **filters),
+            media_type="application/x-ndjson",
+            headers={"X-Index-Version": str(index.version)}
+        )
+
+    async def compute():
+        with metrics.timed("index-query"):
+            positions, next_cursor = index.query(limit=limit, **filters)
+            fires = index.records(positions)
+        return {
+            "fires": fires,
+            "count": len(fires),
+            "days": days,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "next_cursor": next_cursor,
+            "index_version": index.version
+        }
+
+    params = {**filters, "limit": limit, "index_version": index.version}
+    return await api_cache.respond(
+        request, "recent_fires", params, RESPONSE_CACHE_TTL_SECONDS["recent_fires"], compute
+    )
+
+
+class PrecomputedIndexCache:
+    """Keeps an index built from the latest nightly risk tile run in memory."""
+
+    def __init__(self, loader, refresh_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Callable building the index from a tile store, or returning None
+            refresh_seconds: Seconds between checks for a newer run
+        """
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self.store = None
+        self.index = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """Return the cached index, reloading it if the refresh interval has passed."""
+        now = time.monotonic()
+        if self.index is None or now - self._checked_at >= self.refresh_seconds:
+            self._checked_at = now
+            if self.store is None:
+                self.store = risk_tiles.open_tile_store()
+            try:
+                latest = self.loader(self.store)
+            except Exception as e:
+                logger.warning(f"Could not load precomputed index: {str(e)}")
+                latest = None
+            if latest is not None and (self.index is None or latest.run_id != self.index.run_id):
+                self.index = latest
+        return self.index
+
+
+high_risk_index = PrecomputedIndexCache(risk_tiles.load_latest_index, RISK_INDEX_REFRESH_SECONDS)
+zonal_index = PrecomputedIndexCache(zonal_stats.load_latest_zonal_index, RISK_INDEX_REFRESH_SECONDS)
 
 
 @app.get("/data/high-risk-areas")
 async def get_high_risk_areas(
-    threshold: float = Query(0.7, ge=0, le=1, description="Risk score threshold")
+    request: Request,
+    threshold: float = Query(0.7, ge=0, le=1, description="Risk score threshold"),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180, description="Bounding box west edge"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90, description="Bounding box south edge"),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180, description="Bounding box east edge"),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90, description="Bounding box north edge"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of areas")
 ):
-    """Get areas with high wildfire risk scores."""
-    try:
-        # Placeholder implementation
-        high_risk_areas = [
-            {
-                "id": "RISK_001",
-                "name": "Northern California Forest",
-                "center": {"latitude": 40.7128, "longitude": -122.4194},
-                "risk_score": 0.85,
-                "factors": {
-                    "drought_index": 0.9,
-                    "vegetation_dryness": 0.8,
-                    "historical_fires": 0.7
-                }
-            },
-            {
-                "id": "RISK_002",
-                "name": "Southern Arizona Desert",
-                "center": {"latitude": 33.4484, "longitude": -112.0740},
-                "risk_score": 0.75,
-                "factors": {
-                    "drought_index": 0.9,
-                    "vegetation_dryness": 0.6,
-                    "historical_fires": 0.8
-                }
+    """Get areas with high wildfire risk scores from the nightly risk index."""
+    bbox_params = [min_lon, min_lat, max_lon, max_lat]
+    if any(value is not None for value in bbox_params) and not all(value is not None for value in bbox_params):
+        raise HTTPException(status_code=400, detail="Bounding box requires min_lon, min_lat, max_lon and max_lat")
+    bbox = tuple(bbox_params) if min_lon is not None else None
+
+    async def compute():
+        index = await run_in_threadpool(high_risk_index.get)
+        if index is None:
+            raise HTTPException(status_code=503, detail="High-risk index has not been built yet")
+        try:
+            areas = index.query(threshold, bbox=bbox, limit=limit)
+            return {
+                "areas": areas,
+                "count": len(areas),
+                "threshold": threshold,
+                "run_id": index.run_id
             }
-        ]
-        
-        # Filter by threshold
-        filtered_areas = [area for area in high_risk_areas if area["risk_score"] >= threshold]
-        
-        return {
-            "areas": filtered_areas,
-            "count": len(filtered_areas),
-            "threshold": threshold
-        }
+        except Exception as e:
+            logger.error(f"Error fetching high risk areas: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Data retrieval error: {str(e)}")
+
+    params = {"threshold": threshold, "bbox": bbox, "limit": limit}
+    return await api_cache.respond(request, "high_risk_areas", params, RESPONSE_CACHE_TTL_SECONDS["high_risk_areas"], compute)
+
+
+class PolygonStatsRequest(BaseModel):
+    """Request model for polygon zonal statistics."""
+    geometry: Dict[str, Any] = Field(..., description="GeoJSON Polygon or MultiPolygon in lon/lat")
+    layers: Optional[List[str]] = Field(None, description="Raster layers to summarize (all if omitted)")
+
+
+async def get_zonal_index() -> zonal_stats.ZonalIndex:
+    """Return the zonal index, or raise 503 if no tile run exists yet."""
+    index = await run_in_threadpool(zonal_index.get)
+    if index is None:
+        raise HTTPException(status_code=503, detail="Risk rasters have not been built yet")
+    return index
+
+
+@app.get("/data/risk-stats")
+async def get_risk_stats(
+    min_lon: float = Query(..., ge=-180, le=180, description="Bounding box west edge"),
+    min_lat: float = Query(..., ge=-90, le=90, description="Bounding box south edge"),
+    max_lon: float = Query(..., ge=-180, le=180, description="Bounding box east edge"),
+    max_lat: float = Query(..., ge=-90, le=90, description="Bounding box north edge"),
+    layers: Optional[str] = Query(None, description="Comma-separated raster layers (all if omitted)")
+):
+    """Get risk and fuel statistics over a bounding box."""
+    index = await get_zonal_index()
+    try:
+        stats = index.rectangle_stats(
+            (min_lon, min_lat, max_lon, max_lat),
+            layers.split(",") if layers else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bbox": [min_lon, min_lat, max_lon, max_lat], "stats": stats, "run_id": index.run_id}
+
+
+@app.post("/data/risk-stats/polygon")
+async def get_polygon_risk_stats(request: PolygonStatsRequest):
+    """Get risk and fuel statistics over a polygon such as a county or service territory."""
+    index = await get_zonal_index()
+    try:
+        stats = await run_in_threadpool(index.polygon_stats, request.geometry, request.layers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error fetching high risk areas: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Data retrieval error: {str(e)}")
+        logger.error(f"Error computing polygon statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Statistics error: {str(e)}")
+    return {"stats": stats, "run_id": index.run_id}
 
 
 # Create Lambda handler
@@ -0,0 +1,223 @@
+"""
+Request latency metrics and Server-Timing breakdowns for the API.
+
+Metrics are kept in process and exposed in the Prometheus text format, so
+they can be scraped or inspected locally without an external collector.
+Handlers record named phases (feature fetch, model, serialization) with
+`timed`, and the middleware reports them in a Server-Timing header.
+"""
+
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Callable, Iterator, Optional, Tuple
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+# Upper bounds of the payload size histogram buckets in bytes
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216]
+
+# Phases recorded for the current request, as {name: seconds}
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Add to the counter for a label set."""
+        key = tuple((name, labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        """Exposition lines for all label sets."""
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Subtract from the gauge for a label set."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        """Set the gauge for a label set."""
+        key = tuple((name, labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: List[float], label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.label_names = label_names
+        self._values: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record one observation for a label set."""
+        key = tuple((name, labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def collect(self) -> List[str]:
+        """Exposition lines (cumulative buckets, sum and count) for all label sets."""
+        lines = []
+        with self._lock:
+            for key, (counts, totals) in self._values.items():
+                cumulative = 0
+                for bound, count in zip([*self.buckets, float("inf")], counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(totals[0])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {totals[1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Callable[[], Iterator[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def register(self, metric):
+        """Add a metric and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable):
+        """
+        Add a callback producing metrics computed at scrape time.
+
+        Args:
+            collector: Function yielding (name, kind, description, labels, value)
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+
+        seen = set()
+        for collector in self._collectors:
+            for name, kind, description, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {description}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "api_request_duration_seconds", "Request latency by route", LATENCY_BUCKETS, ("method", "route", "status")
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "api_requests_in_flight", "Requests currently being handled", ("route",)
+))
+REQUEST_SIZE = registry.register(Histogram(
+    "api_request_size_bytes", "Request body size by route", SIZE_BUCKETS, ("method", "route")
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "api_response_size_bytes", "Response body size by route", SIZE_BUCKETS, ("method", "route")
+))
+PHASE_LATENCY = registry.register(Histogram(
+    "api_phase_duration_seconds", "Time spent in request phases by route", LATENCY_BUCKETS, ("route", "phase")
+))
+
+
+def start_request() -> Dict[str, float]:
+    """Begin collecting phase timings for the current request."""
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def record_timing(phase: str, seconds: float):
+    """
+    Add time spent in a phase to the current request's timings.
+
+    Args:
+        phase: Phase name, e.g. "model" or "feature-fetch"
+        seconds: Duration in seconds
+    """
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase: str):
+    """Context manager recording the duration of a block as a request phase."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(phase, time.perf_counter() - start)
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    """
+    Format phase timings as a Server-Timing header value.
+
+    Args:
+        timings: Phase durations in seconds
+        total: Total request duration in seconds
+
+    Returns:
+        Header value with durations in milliseconds
+    """
+    entries = [f"{re.sub(r'[^A-Za-z0-9_-]', '_', phase)};dur={seconds * 1000:.1f}" for phase, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
@@ -0,0 +1,383 @@
+"""
+Two-tier response cache for read-heavy API routes.
+
+Responses are encoded once and kept in an in-process LRU tier and, when
+REDIS_URL is configured, a shared Redis tier so all API instances benefit.
+Keys are built from normalized request parameters. Concurrent misses for the
+same key share one computation, and every response carries an ETag so clients
+polling unchanged data get a 304. Identity, gzip and brotli bodies of the same
+entry are different representations, so each gets its own ETag.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+
+from api import metrics, serialization
+
+# Optional imports - only used if a Redis tier is configured
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+REDIS_URL = os.environ.get("REDIS_URL", "")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# Decimal places kept when normalizing float parameters (about 0.1 m)
+PARAM_FLOAT_DIGITS = 6
+
+
+class CachedResponse(NamedTuple):
+    """Encoded response body with its ETag and expiry time."""
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+def normalize_params(value: Any) -> Any:
+    """
+    Normalize request parameters so equivalent requests share a key.
+
+    Dict keys are sorted by the JSON encoding, None values are dropped and
+    floats are rounded, so e.g. 37.0 and 37.00000001 map to the same entry.
+
+    Args:
+        value: Parameters (dicts, lists, scalars)
+
+    Returns:
+        Normalized parameters
+    """
+    if isinstance(value, dict):
+        return {str(k): normalize_params(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [normalize_params(v) for v in value]
+    if isinstance(value, float):
+        return round(value, PARAM_FLOAT_DIGITS) + 0.0
+    return value
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for an encoded body."""
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def coded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    ETag of an entry's body sent with a content coding.
+
+    Args:
+        etag: Entry ETag from make_etag
+        encoding: Content coding from serialization.negotiate_encoding (None for identity)
+
+    Returns:
+        The entry ETag for identity, otherwise the ETag suffixed with the coding
+    """
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class RedisResponseTier:
+    """Shared response tier stored in Redis with native key expiry."""
+
+    def __init__(self, client: Any, prefix: str = "response:"):
+        """
+        Initialize the tier.
+
+        Args:
+            client: Redis client
+            prefix: Key prefix
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Get an entry, or None if it is missing."""
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        header, body = data.split(b"\n", 1)
+        expires_at, etag = header.decode("utf-8").split(" ", 1)
+        return CachedResponse(body, etag, float(expires_at))
+
+    def set(self, key: str, entry: CachedResponse):
+        """Store an entry until it expires."""
+        ttl = max(1, int(entry.expires_at - time.time() + 0.999))
+        header = f"{entry.expires_at} {entry.etag}\n".encode("utf-8")
+        self.client.set(self.prefix + key, header + entry.body, ex=ttl)
+
+
+class ResponseCache:
+    """In-process LRU response cache with an optional shared tier and single-flight misses."""
+
+    def __init__(self, max_entries: int, shared_tier: Optional[RedisResponseTier] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum responses held in memory
+            shared_tier: Optional shared tier consulted on memory misses
+        """
+        self.max_entries = max_entries
+        self.shared_tier = shared_tier
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._variants = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop = None
+        self._stats = {"hits": 0, "shared_hits": 0, "misses": 0, "coalesced": 0, "not_modified": 0}
+
+    @staticmethod
+    def key(route: str, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a route and its request parameters.
+
+        Args:
+            route: Route name
+            params: Query or body parameters
+
+        Returns:
+            Cache key string
+        """
+        canonical = json.dumps(normalize_params(params), sort_keys=True, separators=(",", ":"), default=str)
+        return f"{route}:{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+
+    def _get_memory(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry
+
+    def _store_memory(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Optional[CachedResponse]:
+        try:
+            entry = self.shared_tier.get(key)
+        except Exception as e:
+            logger.warning(f"Shared response cache unavailable: {str(e)}")
+            return None
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        self._store_memory(key, entry)
+        with self._lock:
+            self._stats["shared_hits"] += 1
+        return entry
+
+    def _set_shared(self, key: str, entry: CachedResponse):
+        try:
+            self.shared_tier.set(key, entry)
+        except Exception as e:
+            logger.warning(f"Shared response cache unavailable: {str(e)}")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[CachedResponse, str]:
+        """
+        Return the cached response for a key, computing it at most once.
+
+        Concurrent requests for a missing key wait on one shared fill, which
+        keeps running if any of them is cancelled.
+
+        Args:
+            key: Cache key from `key`
+            ttl: Seconds the response stays fresh
+            compute: Coroutine function producing the response content
+            cacheable: Optional predicate; content it rejects is returned but not stored
+
+        Returns:
+            Tuple of (entry, source) where source is "memory", "shared",
+            "coalesced" or "miss"
+        """
+        entry = self._get_memory(key)
+        if entry is not None:
+            return entry, "memory"
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = {}
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            with self._lock:
+                self._stats["coalesced"] += 1
+            entry, _ = await asyncio.shield(inflight)
+            return entry, "coalesced"
+
+        # The fill runs as its own task so a cancelled caller, e.g. on client
+        # disconnect, does not cancel it for the requests coalesced onto it
+        task = loop.create_task(self._fill(key, ttl, compute, cacheable))
+        task.add_done_callback(self._fill_done)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    def _fill_done(self, task: "asyncio.Task"):
+        """Mark a fill's exception retrieved when no request was left waiting."""
+        if not task.cancelled():
+            task.exception()
+
+    async def _fill(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]]
+    ) -> Tuple[CachedResponse, str]:
+        """Load a missing entry from the shared tier or compute and store it."""
+        try:
+            if self.shared_tier is not None:
+                entry = await run_in_threadpool(self._get_shared, key)
+                if entry is not None:
+                    return entry, "shared"
+
+            with self._lock:
+                self._stats["misses"] += 1
+            content = await compute()
+            with metrics.timed("serialization"):
+                body = serialization.dumps(jsonable_encoder(content))
+            entry = CachedResponse(body, make_etag(body), time.time() + ttl)
+
+            if cacheable is None or cacheable(content):
+                self._store_memory(key, entry)
+                if self.shared_tier is not None:
+                    await run_in_threadpool(self._set_shared, key, entry)
+            return entry, "miss"
+        finally:
+            self._inflight.pop(key, None)
+
+    def _compressed(self, entry: CachedResponse, encoding: Optional[str]) -> bytes:
+        """Compress an entry's body once per content coding."""
+        if encoding is None:
+            return entry.body
+        variant_key = (entry.etag, encoding)
+        with self._lock:
+            body = self._variants.get(variant_key)
+            if body is not None:
+                self._variants.move_to_end(variant_key)
+                return body
+        with metrics.timed("serialization"):
+            body = serialization.compress(entry.body, encoding)
+        with self._lock:
+            self._variants[variant_key] = body
+            while len(self._variants) > self.max_entries:
+                self._variants.popitem(last=False)
+        return body
+
+    async def respond(
+        self,
+        request: Request,
+        route: str,
+        params: Dict[str, Any],
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Response:
+        """
+        Serve a route through the cache with ETag revalidation.
+
+        Args:
+            request: Incoming request, for If-None-Match
+            route: Route name used in the key
+            params: Parameters the response depends on
+            ttl: Seconds the response stays fresh
+            compute: Coroutine function producing the response content
+            cacheable: Optional predicate deciding whether content is stored
+
+        Returns:
+            JSON response (compressed if the client accepts it), or 304 if
+            the client already has this version
+        """
+        entry, source = await self.get_or_compute(self.key(route, params), ttl, compute, cacheable)
+        encoding = None
+        if len(entry.body) >= serialization.COMPRESSION_MIN_BYTES:
+            encoding = serialization.negotiate_encoding(request.headers.get("accept-encoding"))
+        etag = coded_etag(entry.etag, encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"max-age={max(0, int(entry.expires_at - time.time()))}",
+            "X-Cache": source,
+            "Vary": "Accept-Encoding"
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            with self._lock:
+                self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self._compressed(entry, encoding), media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Dict with the memory tier size and counters
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "shared_tier": self.shared_tier is not None, **self._stats}
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._variants.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+def create_response_cache() -> ResponseCache:
+    """
+    Create the response cache, with a Redis tier when REDIS_URL is configured.
+
+    Returns:
+        ResponseCache instance
+    """
+    shared_tier = None
+    if REDIS_URL:
+        if REDIS_AVAILABLE:
+            shared_tier = RedisResponseTier(redis.Redis.from_url(REDIS_URL, socket_timeout=0.5))
+        else:
+            logger.warning("REDIS_URL is set but redis is not installed; using in-memory response cache only")
+
+    return ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, shared_tier)
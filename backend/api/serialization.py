@@ -0,0 +1,146 @@
+"""
+Fast JSON encoding and negotiated compression for large API responses.
+
+Trusted internal results (simulation outputs, cached responses) are encoded
+straight to bytes with orjson when it is installed, skipping per-element
+Pydantic validation, and compressed with brotli or gzip according to the
+client's Accept-Encoding.
+"""
+
+import os
+import json
+import gzip
+import logging
+from typing import Dict, Any, Optional
+
+import numpy as np
+from fastapi import Request, Response
+
+from api import metrics
+
+# Optional imports - fall back to the standard library if unavailable
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+
+# Fast levels; large simulation payloads are dominated by repeated numbers
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _default(value: Any) -> Any:
+    """Encode numpy values the standard library does not handle."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode JSON-compatible content (including numpy arrays) to bytes.
+
+    Args:
+        content: Dicts, lists, scalars and numpy values
+
+    Returns:
+        UTF-8 JSON bytes
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the supported content coding with the highest q-value (br on ties).
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br"
+
+    Returns:
+        "br", "gzip" or None for identity
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def quality(coding):
+        return accepted.get(coding, accepted.get("*", 0.0))
+
+    # Highest q wins; br is listed first so it wins ties
+    supported = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+    best = max(supported, key=quality)
+    return best if quality(best) > 0 else None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Compress a body with a content coding from negotiate_encoding.
+
+    Args:
+        body: Encoded response body
+        encoding: "br", "gzip" or None
+
+    Returns:
+        Compressed (or unchanged) body
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def encoded_response(
+    request: Request,
+    body: bytes,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Build a JSON response from encoded bytes, compressed if the client accepts it.
+
+    Args:
+        request: Incoming request, for Accept-Encoding
+        body: Encoded JSON body
+        status_code: HTTP status code
+        headers: Extra response headers
+
+    Returns:
+        Response with Content-Encoding and Vary set when compressed
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding is not None:
+        with metrics.timed("serialization"):
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,310 @@
+"""
+Worker pools for CPU-bound model work called from the API.
+
+Model calls run in executors off the event loop, so a long simulation never
+stalls other requests such as /health. Each pool has its own concurrency limit
+and a bounded queue: requests beyond the queue are rejected with 429, and
+requests that wait too long for a worker are rejected with 503.
+"""
+
+import os
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pool sizing. Risk scoring defaults to threads: the booster releases the GIL
+# and the model registry stays in the API process. Spread simulations and damage
+# assessments hold the GIL in Python loops, so they default to processes.
+RISK_POOL_MODE = os.environ.get("RISK_POOL_MODE", "thread")
+RISK_WORKERS = int(os.environ.get("RISK_WORKERS", os.environ.get("RISK_BATCH_WORKERS", "2")))
+RISK_QUEUE_SIZE = int(os.environ.get("RISK_QUEUE_SIZE", "64"))
+SIMULATION_POOL_MODE = os.environ.get("SIMULATION_POOL_MODE", "process")
+SIMULATION_WORKERS = int(os.environ.get("SIMULATION_WORKERS", "2"))
+SIMULATION_QUEUE_SIZE = int(os.environ.get("SIMULATION_QUEUE_SIZE", "4"))
+WORKER_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("WORKER_QUEUE_TIMEOUT_SECONDS", "10"))
+WORKER_START_METHOD = os.environ.get("WORKER_START_METHOD", "spawn")
+
+
+class PoolSaturated(Exception):
+    """Raised when a worker pool cannot accept or start more work."""
+
+    def __init__(self, pool: str, status_code: int, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.pool = pool
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class WorkerPool:
+    """
+    Bounded executor with admission control for one class of work.
+
+    At most `max_workers` calls run at once and at most `max_queue` more wait
+    for a worker. The executor is created on first use; a process pool that
+    cannot be created (e.g. no /dev/shm on Lambda) falls back to threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: float = WORKER_QUEUE_TIMEOUT_SECONDS,
+        mode: str = "thread",
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Tuple = ()
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            name: Pool name used in errors and stats
+            max_workers: Maximum concurrent calls
+            max_queue: Maximum calls waiting for a worker
+            queue_timeout: Seconds a call may wait for a worker before 503
+            mode: "process" or "thread"
+            initializer: Optional function run once in each worker when it starts
+            initargs: Arguments passed to the initializer
+        """
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown worker pool mode: {mode}")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.mode = mode
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[Executor] = None
+        self._slots = None
+        self._loop = None
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def executor(self) -> Executor:
+        """Return the executor, creating it on first use."""
+        if self._executor is None:
+            if self.mode == "process":
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                        initializer=self.initializer,
+                        initargs=self.initargs
+                    )
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.warning(f"Process pool unavailable for {self.name} ({str(e)}), using threads")
+                    self.mode = "thread"
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=f"{self.name}-worker",
+                    initializer=self.initializer, initargs=self.initargs
+                )
+        return self._executor
+
+    def prestart(self):
+        """
+        Start every worker now so their initializers run before the first request.
+
+        Executors start workers on demand, so one no-op call per worker is
+        submitted; the calls are not waited for.
+        """
+        executor = self.executor()
+        for _ in range(self.max_workers):
+            executor.submit(_noop)
+
+    def _ensure_slots(self):
+        """Create the concurrency semaphore on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a function in the pool.
+
+        Args:
+            fn: Function to call; must be picklable for process pools
+            *args: Positional arguments
+
+        Returns:
+            The function's return value
+
+        Raises:
+            PoolSaturated: 429 if the queue is full, 503 if no worker frees up in time
+        """
+        self._ensure_slots()
+        if self.in_flight + self.queued >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturated(self.name, 429, f"The {self.name} worker pool is at capacity")
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise PoolSaturated(
+                self.name, 503, f"No {self.name} worker became available in {self.queue_timeout:.0f} seconds",
+                retry_after=int(self.queue_timeout)
+            )
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        executor = self.executor()
+        future = self._loop.run_in_executor(executor, fn, *args)
+        # The slot is held until the call finishes, even if the caller is cancelled
+        future.add_done_callback(lambda done: self._release(done, executor))
+        try:
+            return await asyncio.shield(future)
+        except BrokenProcessPool:
+            raise PoolSaturated(self.name, 503, f"The {self.name} worker pool was restarted")
+
+    def _release(self, future: "asyncio.Future", executor: Executor):
+        """Free a call's slot and record its outcome once the executor finishes it."""
+        self.in_flight -= 1
+        self._slots.release()
+        if future.cancelled():
+            self.failed += 1
+            return
+        error = future.exception()
+        if error is None:
+            self.completed += 1
+            return
+        self.failed += 1
+        if isinstance(error, BrokenProcessPool) and self._executor is executor:
+            # A worker died (e.g. out of memory); start a fresh pool for the next call
+            logger.error(f"Worker process in the {self.name} pool died, restarting the pool")
+            self.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool occupancy and outcome counters.
+
+        Returns:
+            Dict with limits, current occupancy and counters
+        """
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+    def shutdown(self):
+        """Stop the executor without waiting for running calls."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _noop():
+    """Placeholder task used to start pool workers."""
+
+
+# ------ Tasks ------
+# Task functions are module-level so process pools can pickle them, and import
+# the models lazily so only worker processes pay for the heavy imports.
+
+
+def run_fire_spread(
+    params: Dict[str, Any],
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run a fire spread simulation.
+
+    Args:
+        params: FireSpreadRequest fields as a dict
+        progress_callback: Optional function called with (step, max steps)
+
+    Returns:
+        Simulation results from FireSpreadSimulator.run_simulation
+    """
+    from models.fire_spread import FireSpreadSimulator, get_weather_data, calculate_bounds
+
+    start_time = time.time()
+    ignition_points = params["ignition_points"]
+    first_point = ignition_points[0]["location"]
+    simulator = FireSpreadSimulator(
+        ignition_points=ignition_points,
+        bounds=calculate_bounds(ignition_points, 10.0),
+        resolution_meters=params["resolution_meters"],
+        simulation_hours=params["simulation_hours"],
+        time_step_minutes=30,
+        weather_data=get_weather_data(first_point["latitude"], first_point["longitude"])
+    )
+    results = simulator.run_simulation(progress_callback)
+    logger.info(f"Fire spread simulation completed in {time.time() - start_time:.2f} seconds")
+    return results
+
+
+def run_fire_spread_encoded(params: Dict[str, Any]) -> bytes:
+    """
+    Run a fire spread simulation and return its results as encoded JSON.
+
+    Encoding in the worker means the API process receives one bytes object
+    instead of unpickling and re-validating every perimeter vertex.
+
+    Args:
+        params: FireSpreadRequest fields as a dict
+
+    Returns:
+        JSON bytes of the simulation results
+    """
+    from api import serialization
+
+    return serialization.dumps(run_fire_spread(params))
+
+
+def run_damage_assessment(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a damage assessment.
+
+    Args:
+        params: DamageAssessmentRequest fields as a dict
+
+    Returns:
+        Assessment results from DamageAssessment.assess_damage
+    """
+    from models.damage_assessment import DamageAssessment
+
+    assessment = DamageAssessment(
+        fire_area=params["fire_area"],
+        pre_fire_date=params["pre_fire_date"],
+        post_fire_date=params["post_fire_date"]
+    )
+    return assessment.assess_damage()
+
+
+def warm_simulation_worker():
+    """Warm a simulation worker's transformers and spread code path when it starts."""
+    from models import warmup
+
+    warmup.warm_up(["transformers", "spread"])
+
+
+# Pools for cheap (risk scoring) and expensive (spread, damage) work
+risk_pool = WorkerPool("risk", RISK_WORKERS, RISK_QUEUE_SIZE, mode=RISK_POOL_MODE)
+simulation_pool = WorkerPool(
+    "simulation", SIMULATION_WORKERS, SIMULATION_QUEUE_SIZE,
+    mode=SIMULATION_POOL_MODE, initializer=warm_simulation_worker
+)
@@ -0,0 +1,178 @@
+"""
+PostgreSQL connection pooling and schema migrations for the data pipeline.
+
+Connections come from a process-wide pool, so warm Lambda containers and
+long-running workers reuse them across invocations instead of reconnecting.
+Schema changes are numbered migrations recorded in `schema_migrations`; each
+process checks once for pending migrations, and `python -m data_pipeline.db`
+applies them ahead of a deployment.
+"""
+
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+DB_CONNECTION_STRING = os.environ.get("DB_CONNECTION_STRING", "")
+DB_POOL_MAX_CONNECTIONS = int(os.environ.get("DB_POOL_MAX_CONNECTIONS", "4"))
+DB_POOL_WAIT_SECONDS = float(os.environ.get("DB_POOL_WAIT_SECONDS", "300"))
+
+# Key for the advisory lock serializing concurrent migration runs
+MIGRATION_LOCK_KEY = 72413001
+
+# Ordered (version, name, SQL) schema migrations. Never edit an applied
+# migration; add a new one instead.
+MIGRATIONS: List[Tuple[int, str, str]] = [
+    (1, "create_fire_detections", """
+        CREATE EXTENSION IF NOT EXISTS postgis;
+        CREATE TABLE IF NOT EXISTS fire_detections (
+            id SERIAL PRIMARY KEY,
+            latitude FLOAT NOT NULL,
+            longitude FLOAT NOT NULL,
+            acq_date DATE NOT NULL,
+            acq_time VARCHAR(4) NOT NULL,
+            confidence VARCHAR(20),
+            brightness FLOAT,
+            frp FLOAT,
+            acquisition_datetime TIMESTAMP NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            collection_datetime TIMESTAMP NOT NULL,
+            geom GEOMETRY(Point, 4326) NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_fire_detections_geom ON fire_detections USING GIST(geom);
+        CREATE INDEX IF NOT EXISTS idx_fire_detections_datetime ON fire_detections(acquisition_datetime);
+    """),
+    (2, "fire_detections_natural_key", """
+        DELETE FROM fire_detections a USING fire_detections b
+        WHERE a.id > b.id AND a.source = b.source AND a.latitude = b.latitude
+          AND a.longitude = b.longitude AND a.acquisition_datetime = b.acquisition_datetime;
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_fire_detections_natural_key
+        ON fire_detections (source, latitude, longitude, acquisition_datetime);
+    """)
+]
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when every connection is
+# out, so borrowers queue on a semaphore sized to the pool first
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS)
+_schema_ready = False
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use.
+
+    Returns:
+        ThreadedConnectionPool for DB_CONNECTION_STRING
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, DB_CONNECTION_STRING)
+        return _pool
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    """
+    Borrow a pooled connection for one transaction.
+
+    Commits when the block succeeds and rolls back when it raises. Connections
+    that were closed or broken are discarded rather than returned to the pool.
+    When every pooled connection is in use, waits up to DB_POOL_WAIT_SECONDS
+    for one to be returned.
+
+    Yields:
+        psycopg2 connection
+
+    Raises:
+        PoolError: If no connection became free in time
+    """
+    if not _pool_slots.acquire(timeout=DB_POOL_WAIT_SECONDS):
+        raise PoolError(f"No database connection free within {DB_POOL_WAIT_SECONDS:.0f}s")
+    try:
+        pool = get_pool()
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            broken = bool(conn.closed) or conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+            pool.putconn(conn, close=broken)
+    finally:
+        _pool_slots.release()
+
+
+def migrate(conn: Any) -> List[int]:
+    """
+    Apply pending migrations on a connection, in one transaction.
+
+    Args:
+        conn: psycopg2 connection (committed by the caller)
+
+    Returns:
+        Versions applied
+    """
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("SELECT version FROM schema_migrations")
+        done = {row[0] for row in cur.fetchall()}
+        for version, name, sql in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"Applying migration {version}: {name}")
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            applied.append(version)
+    return applied
+
+
+def ensure_schema():
+    """Apply pending migrations once per process."""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+            exists = cur.fetchone()[0]
+            latest = None
+            if exists:
+                cur.execute("SELECT max(version) FROM schema_migrations")
+                latest = cur.fetchone()[0]
+        if latest != MIGRATIONS[-1][0]:
+            migrate(conn)
+    _schema_ready = True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply pending data pipeline schema migrations")
+    parser.parse_args()
+
+    with connection() as conn:
+        versions = migrate(conn)
+    print(f"Applied migrations: {versions}" if versions else "Schema is up to date")
@@ -0,0 +1,424 @@
+"""
+Cross-sensor fusion of FIRMS detections.
+
+MODIS, VIIRS_SNPP and VIIRS_NOAA often observe the same fire pixel within
+minutes of each other. Fusion merges such overlapping detections into one
+canonical record that lists the sensors that saw it, so counts and alerts
+see each observation once.
+
+Sensors are fused finest footprint first: each detection is matched to the
+nearest canonical record from another sensor within the coarser of the two
+footprints and FUSION_TIME_TOLERANCE_MINUTES, found through a spatial hash
+at that footprint. A record takes at most one detection per sensor, so fine
+VIIRS pixels under one coarse MODIS pixel stay separate records. Unmatched
+detections start new records.
+
+Fusion is streaming: each batch is matched against a bounded window of
+recent records, whose state carries over between runs. Each run stores its
+new records, the provenance of every detection it fused, and an update row
+for each earlier record that gained sensors; read_fused applies the updates
+to the stored records. Detections already
+fused are remembered for longer than that window, long enough to recognise
+the ones each ingest run re-delivers from its lookback.
+"""
+
+import os
+import json
+import logging
+import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from . import detection_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+FUSED_STORE_URI = os.environ.get("FUSED_STORE_URI", f"s3://{S3_BUCKET}/firms_fused")
+FUSION_TIME_TOLERANCE_MINUTES = float(os.environ.get("FUSION_TIME_TOLERANCE_MINUTES", "60"))
+
+# Minutes of records kept for matching, before the newest detection
+FUSION_WINDOW_MINUTES = float(os.environ.get("FUSION_WINDOW_MINUTES", "180"))
+
+# Minutes of fused detections remembered per source, before that source's
+# newest detection. Ingest re-delivers FIRMS_LOOKBACK_HOURS behind each
+# source's high-water mark, so this must cover at least that lookback.
+FUSION_SEEN_MINUTES = float(os.environ.get(
+    "FUSION_SEEN_MINUTES", str(float(os.environ.get("FIRMS_LOOKBACK_HOURS", "6")) * 60)
+))
+
+# Nominal pixel footprint per sensor
+SENSOR_FOOTPRINT_KM = {
+    "MODIS": 1.0,
+    "VIIRS_SNPP": 0.375,
+    "VIIRS_NOAA": 0.375
+}
+DEFAULT_FOOTPRINT_KM = 1.0
+
+# Source names of fused records, their detections' provenance and later
+# sensor updates in the fused detection store
+FUSED_SOURCE = "FUSED"
+PROVENANCE_SOURCE = "FUSED_PROVENANCE"
+UPDATES_SOURCE = "FUSED_UPDATES"
+
+STATE_KEY = "fusion_state.json"
+
+# Detection columns carried onto canonical records
+RECORD_COLUMNS = ["latitude", "longitude", "acquisition_datetime", "confidence", "brightness", "frp", "source"]
+
+# Columns of FusionResult.updated; frp is the largest among the new detections
+UPDATE_COLUMNS = ["fusion_id", "latitude", "longitude", "acquisition_datetime", "frp", "sensors", "n_sensors"]
+
+MEAN_EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+class FusionResult(NamedTuple):
+    """Output of fusing one batch."""
+    records: pd.DataFrame      # New canonical records, with fusion_id, sensors and n_sensors
+    provenance: pd.DataFrame   # Every new detection with the fusion_id it was merged into
+    updated: pd.DataFrame      # Records from earlier batches that gained sensors, at their anchor location and time
+
+
+def _haversine_km(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * MEAN_EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cell_keys(lat: np.ndarray, lon: np.ndarray, cell_km: float, row_offset: int = 0, col_offset: int = 0) -> np.ndarray:
+    """
+    Spatial hash keys for cells of about cell_km on a side.
+
+    Cell columns are scaled by the cosine of their row's latitude, so cells
+    stay roughly square away from the equator.
+    """
+    cell_deg = cell_km / KM_PER_DEGREE_LAT
+    row = np.floor((lat + 90.0) / cell_deg).astype(np.int64) + row_offset
+    row_lat = np.clip(row * cell_deg - 90.0 + cell_deg / 2, -89.9, 89.9)
+    col = np.floor((lon + 180.0) * np.cos(np.radians(row_lat)) / cell_deg).astype(np.int64) + col_offset
+    return row * (1 << 32) + col
+
+
+class DetectionFuser:
+    """Merges overlapping detections from different sensors, one batch at a time."""
+
+    def __init__(
+        self,
+        time_tolerance_minutes: float = FUSION_TIME_TOLERANCE_MINUTES,
+        window_minutes: float = FUSION_WINDOW_MINUTES,
+        footprints: Optional[Dict[str, float]] = None,
+        seen_minutes: float = FUSION_SEEN_MINUTES
+    ):
+        """
+        Initialize the fuser.
+
+        Args:
+            time_tolerance_minutes: Maximum time between fused detections
+            window_minutes: Minutes of recent records kept for matching
+            footprints: Pixel footprint in km per sensor (SENSOR_FOOTPRINT_KM if None)
+            seen_minutes: Minutes of fused detections remembered per source
+                to skip re-deliveries
+        """
+        self.tolerance_seconds = int(time_tolerance_minutes * 60)
+        self.window_seconds = int(max(window_minutes, time_tolerance_minutes) * 60)
+        self.seen_seconds = int(max(seen_minutes, window_minutes, time_tolerance_minutes) * 60)
+        self.footprints = footprints or SENSOR_FOOTPRINT_KM
+        self.next_id = 1
+        self.newest = None
+        # Sensors get a bit each in a record's sensor mask
+        self.sensors: List[str] = []
+        # Recent records (one row per canonical record, at its anchor detection)
+        self.records = pd.DataFrame({
+            "fusion_id": np.zeros(0, dtype=np.int64),
+            "latitude": np.zeros(0, dtype=np.float64),
+            "longitude": np.zeros(0, dtype=np.float64),
+            "time": np.zeros(0, dtype=np.int64),
+            "footprint": np.zeros(0, dtype=np.float64),
+            "mask": np.zeros(0, dtype=np.int64)
+        })
+        # Recent detections already fused, so re-delivered ones are skipped
+        self.seen = pd.DataFrame({
+            "source": np.zeros(0, dtype=object),
+            "latitude": np.zeros(0, dtype=np.float64),
+            "longitude": np.zeros(0, dtype=np.float64),
+            "time": np.zeros(0, dtype=np.int64)
+        })
+
+    def footprint(self, sensor: str) -> float:
+        """Pixel footprint of a sensor in km."""
+        return self.footprints.get(sensor, DEFAULT_FOOTPRINT_KM)
+
+    def _bit(self, sensor: str) -> int:
+        if sensor not in self.sensors:
+            self.sensors.append(sensor)
+        return 1 << self.sensors.index(sensor)
+
+    def sensor_names(self, mask: int) -> str:
+        """Names of the sensors in a mask, joined with '+'."""
+        return "+".join(sorted(name for bit, name in enumerate(self.sensors) if mask & (1 << bit)))
+
+    def fuse(self, df: pd.DataFrame) -> FusionResult:
+        """
+        Fuse a batch of processed detections.
+
+        Args:
+            df: Detections with RECORD_COLUMNS, from one or more sensors
+
+        Returns:
+            FusionResult
+        """
+        batch = pd.DataFrame(df[RECORD_COLUMNS]).reset_index(drop=True)
+        batch["source"] = batch["source"].astype(str)
+        # MODIS confidence is a percentage, VIIRS a class letter
+        batch["confidence"] = batch["confidence"].astype(str)
+        times = pd.to_datetime(batch["acquisition_datetime"])
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+        batch["acquisition_datetime"] = times
+        batch["time"] = times.to_numpy().astype("datetime64[s]").astype(np.int64)
+
+        keys = ["source", "latitude", "longitude", "time"]
+        batch = batch.assign(latitude=batch["latitude"].astype(np.float64), longitude=batch["longitude"].astype(np.float64))
+        batch = batch.drop_duplicates(subset=keys)
+        repeated = batch.merge(self.seen, on=keys, how="left", indicator=True)["_merge"].to_numpy() == "both"
+        batch = batch[~repeated].reset_index(drop=True)
+        batch["fusion_id"] = np.int64(-1)
+        if len(batch) == 0:
+            empty = pd.DataFrame(columns=["fusion_id", *RECORD_COLUMNS, "sensors", "n_sensors"])
+            return FusionResult(empty, batch.drop(columns=["time"]), pd.DataFrame(columns=UPDATE_COLUMNS))
+
+        first_new_id = self.next_id
+        previous_masks = dict(zip(self.records["fusion_id"], self.records["mask"]))
+        self.newest = max(self.newest or 0, int(batch["time"].max()))
+        sensors = sorted(batch["source"].unique(), key=lambda name: (self.footprint(name), name))
+        for sensor in sensors:
+            rows = np.flatnonzero(batch["source"].to_numpy() == sensor)
+            batch.loc[rows, "fusion_id"] = self._fuse_sensor(batch.iloc[rows], sensor)
+
+        self.seen = pd.concat([self.seen, batch[keys]], ignore_index=True)
+
+        # New records are anchored at their first (finest-footprint) detection
+        anchors = batch[batch["fusion_id"] >= first_new_id].drop_duplicates("fusion_id")
+        masks = dict(zip(self.records["fusion_id"], self.records["mask"]))
+        records = anchors[["fusion_id", *RECORD_COLUMNS]].reset_index(drop=True)
+        frp_max = batch.groupby("fusion_id")["frp"].max()
+        records["frp"] = records["fusion_id"].map(frp_max).to_numpy()
+        records["sensors"] = [self.sensor_names(masks[fid]) for fid in records["fusion_id"]]
+        records["n_sensors"] = [bin(masks[fid]).count("1") for fid in records["fusion_id"]]
+
+        updated_ids = [fid for fid in batch.loc[batch["fusion_id"] < first_new_id, "fusion_id"].unique()
+                       if masks.get(fid, 0) != previous_masks.get(fid, 0)]
+        anchors = self.records.set_index("fusion_id").loc[updated_ids]
+        updated = pd.DataFrame({
+            "fusion_id": np.asarray(updated_ids, dtype=np.int64),
+            "latitude": anchors["latitude"].to_numpy(),
+            "longitude": anchors["longitude"].to_numpy(),
+            "acquisition_datetime": pd.to_datetime(anchors["time"].to_numpy(), unit="s"),
+            "frp": frp_max.reindex(updated_ids).to_numpy(),
+            "sensors": [self.sensor_names(masks[fid]) for fid in updated_ids],
+            "n_sensors": [bin(masks[fid]).count("1") for fid in updated_ids]
+        })
+
+        self._prune()
+
+        provenance = batch[["fusion_id", "source", "latitude", "longitude", "acquisition_datetime", "frp"]]
+        logger.info(
+            f"Fused {len(batch)} detections into {len(records)} new records "
+            f"({len(batch) - len(records)} merged, {len(updated)} earlier records gained sensors)"
+        )
+        return FusionResult(records, provenance.reset_index(drop=True), updated)
+
+    def _fuse_sensor(self, part: pd.DataFrame, sensor: str) -> np.ndarray:
+        """Match one sensor's detections to records, starting records for the rest."""
+        bit = self._bit(sensor)
+        footprint = self.footprint(sensor)
+        lat, lon, times = part["latitude"].to_numpy(), part["longitude"].to_numpy(), part["time"].to_numpy()
+        fusion_ids = np.full(len(part), -1, dtype=np.int64)
+
+        records = self.records[
+            ((self.records["mask"].to_numpy() & bit) == 0)
+            & (self.records["time"].to_numpy() >= times.min() - self.tolerance_seconds)
+            & (self.records["time"].to_numpy() <= times.max() + self.tolerance_seconds)
+        ]
+        if len(records):
+            # Hash at the coarsest footprint involved, so any match lies in the 3x3 neighbourhood
+            cell_km = max(footprint, float(records["footprint"].max()))
+            record_keys = pd.DataFrame({
+                "key": _cell_keys(records["latitude"].to_numpy(), records["longitude"].to_numpy(), cell_km),
+                "record": np.arange(len(records))
+            })
+            candidates = pd.concat([
+                pd.DataFrame({"key": _cell_keys(lat, lon, cell_km, dr, dc), "detection": np.arange(len(part))})
+                for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+            ], ignore_index=True).merge(record_keys, on="key")
+
+            d, r = candidates["detection"].to_numpy(), candidates["record"].to_numpy()
+            distance = _haversine_km(lat[d], lon[d], records["latitude"].to_numpy()[r], records["longitude"].to_numpy()[r])
+            close = (
+                (distance <= np.maximum(footprint, records["footprint"].to_numpy()[r]))
+                & (np.abs(times[d] - records["time"].to_numpy()[r]) <= self.tolerance_seconds)
+            )
+            pairs = pd.DataFrame({"detection": d[close], "record": r[close], "distance": distance[close]})
+            # Nearest record per detection, then one detection of this sensor per record
+            pairs = pairs.sort_values(["distance", "detection"], kind="stable")
+            pairs = pairs.drop_duplicates("detection").drop_duplicates("record")
+            matched = pairs["record"].to_numpy()
+            fusion_ids[pairs["detection"].to_numpy()] = records["fusion_id"].to_numpy()[matched]
+            positions = records.index.to_numpy()[matched]
+            self.records.loc[positions, "mask"] = self.records.loc[positions, "mask"].to_numpy() | bit
+
+        unmatched = np.flatnonzero(fusion_ids < 0)
+        new_ids = np.arange(self.next_id, self.next_id + len(unmatched), dtype=np.int64)
+        self.next_id += len(unmatched)
+        fusion_ids[unmatched] = new_ids
+        self.records = pd.concat([self.records, pd.DataFrame({
+            "fusion_id": new_ids,
+            "latitude": lat[unmatched],
+            "longitude": lon[unmatched],
+            "time": times[unmatched],
+            "footprint": np.full(len(unmatched), footprint),
+            "mask": np.full(len(unmatched), bit, dtype=np.int64)
+        })], ignore_index=True)
+        return fusion_ids
+
+    def _prune(self):
+        """Drop records older than the window and detections no longer re-delivered."""
+        cutoff = self.newest - self.window_seconds
+        self.records = self.records[self.records["time"].to_numpy() >= cutoff].reset_index(drop=True)
+        # Each source re-delivers relative to its own newest detection
+        source_newest = self.seen.groupby("source")["time"].transform("max").to_numpy()
+        self.seen = self.seen[self.seen["time"].to_numpy() >= source_newest - self.seen_seconds].reset_index(drop=True)
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serialize the fuser's window to a JSON-compatible dict."""
+        return {
+            "next_id": self.next_id,
+            "newest": self.newest,
+            "sensors": self.sensors,
+            "records": self.records.to_dict("list"),
+            "seen": self.seen.to_dict("list")
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs) -> "DetectionFuser":
+        """
+        Restore a fuser from to_state output.
+
+        Args:
+            state: Serialized state
+            **kwargs: Fuser parameters
+
+        Returns:
+            DetectionFuser
+        """
+        fuser = cls(**kwargs)
+        fuser.next_id = state["next_id"]
+        fuser.newest = state["newest"]
+        fuser.sensors = list(state["sensors"])
+        for frame in ("records", "seen"):
+            empty = getattr(fuser, frame)
+            if state[frame].get("time"):
+                setattr(fuser, frame, pd.DataFrame(state[frame]).astype(empty.dtypes.to_dict()))
+        return fuser
+
+
+def _points(df: pd.DataFrame) -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs="EPSG:4326")
+
+
+def fuse_stored(
+    keys: Iterable[str],
+    store: Optional[detection_store.DetectionStore] = None,
+    fused_store: Optional[detection_store.DetectionStore] = None
+) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Fuse newly stored detection files and store the results.
+
+    New canonical records, the provenance of each fused detection and the
+    sensor updates of earlier records are all written to the fused store,
+    followed by the fuser's window, so consecutive runs fuse against each
+    other.
+
+    Args:
+        keys: Detection file keys written by the ingest run
+        store: DetectionStore holding the files (DETECTION_STORE_URI if None)
+        fused_store: DetectionStore for fused records (FUSED_STORE_URI if None)
+
+    Returns:
+        Tuple of (keys of the new record files written, summary counts)
+    """
+    store = store or detection_store.DetectionStore(detection_store.DETECTION_STORE_URI)
+    fused_store = fused_store or detection_store.DetectionStore(FUSED_STORE_URI)
+    frames = [store.read_file(key, columns=RECORD_COLUMNS) for key in keys]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return [], {"detections": 0, "records": 0, "merged": 0, "earlier_records_updated": 0}
+
+    data = fused_store.storage.read(STATE_KEY)
+    fuser = DetectionFuser.from_state(json.loads(data)) if data else DetectionFuser()
+    result = fuser.fuse(pd.concat(frames, ignore_index=True))
+
+    records = result.records
+    fused_keys = fused_store.write(_points(records), FUSED_SOURCE)
+    fused_store.write(_points(result.provenance), PROVENANCE_SOURCE)
+    if len(result.updated):
+        updated_at = pd.Timestamp(datetime.datetime.utcnow())
+        fused_store.write(_points(result.updated.assign(updated_at=updated_at)), UPDATES_SOURCE)
+    fused_store.storage.write(STATE_KEY, json.dumps(fuser.to_state()).encode("utf-8"))
+    return fused_keys, {
+        "detections": len(result.provenance),
+        "records": len(records),
+        "merged": len(result.provenance) - len(records),
+        "earlier_records_updated": len(result.updated)
+    }
+
+
+def read_fused(
+    fused_store: Optional[detection_store.DetectionStore] = None,
+    start: Any = None,
+    end: Any = None,
+    bbox: Optional[detection_store.BBox] = None
+) -> pd.DataFrame:
+    """
+    Read canonical records with the sensors they gained in later runs.
+
+    Update rows are stored at their record's anchor location and time, so the
+    same query selects both.
+
+    Args:
+        fused_store: DetectionStore of fused records (FUSED_STORE_URI if None)
+        start: Earliest anchor acquisition time
+        end: Latest anchor acquisition time
+        bbox: (min_lon, min_lat, max_lon, max_lat)
+
+    Returns:
+        GeoDataFrame of records with current sensors, n_sensors and frp
+    """
+    fused_store = fused_store or detection_store.DetectionStore(FUSED_STORE_URI)
+    records = fused_store.read([FUSED_SOURCE], start, end, bbox)
+    if len(records) == 0:
+        return records
+    updates = fused_store.read(
+        [UPDATES_SOURCE], start, end, bbox, columns=["fusion_id", "frp", "sensors", "n_sensors", "updated_at"]
+    )
+    if len(updates) == 0:
+        return records
+
+    # Sensor masks only grow, so the latest update holds every sensor so far
+    updates = updates.sort_values("updated_at", kind="stable")
+    latest = updates.drop_duplicates("fusion_id", keep="last").set_index("fusion_id")
+    frp_max = updates.groupby("fusion_id")["frp"].max()
+    ids = records["fusion_id"]
+    has_update = ids.isin(latest.index).to_numpy()
+    ids = ids[has_update]
+    records.loc[has_update, "sensors"] = ids.map(latest["sensors"]).to_numpy()
+    records.loc[has_update, "n_sensors"] = ids.map(latest["n_sensors"]).to_numpy()
+    records.loc[has_update, "frp"] = np.maximum(records.loc[has_update, "frp"].to_numpy(), ids.map(frp_max).to_numpy())
+    return records
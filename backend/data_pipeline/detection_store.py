@@ -0,0 +1,271 @@
+"""
+Partitioned GeoParquet storage for processed FIRMS detections.
+
+Each ingest run writes one GeoParquet file per (source, acquisition date)
+under `source=<SOURCE>/date=<YYYY-MM-DD>/`, and records it in a per-source
+manifest with its row count, time range and bounding box. Readers select
+files from the manifests by source, time window and bbox, then read only the
+columns they need, with the same filters applied to rows inside each file.
+
+The same interface works on a local directory or an S3 prefix. Manifests
+are updated by read-modify-write under a lock held only within one process,
+and nothing coordinates writers across processes. Each store therefore
+needs a single writing process: run either the scheduled fetchNasaFirms
+function or the firms_watch watcher, never both, and give backfills their
+own store. Within that process, each source has its own manifest, so
+concurrent ingestion of different sources never contends for it.
+"""
+
+import os
+import io
+import json
+import uuid
+import logging
+import threading
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import geopandas as gpd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .utils import open_storage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+REGION = os.environ.get("REGION", "us-west-2")
+DETECTION_STORE_URI = os.environ.get("DETECTION_STORE_URI", f"s3://{S3_BUCKET}/firms_detections")
+DETECTION_STORE_COMPRESSION = os.environ.get("DETECTION_STORE_COMPRESSION", "zstd")
+
+# Rows per Parquet row group; row groups carry min/max statistics that let
+# filtered reads skip them
+DETECTION_STORE_ROW_GROUP_ROWS = int(os.environ.get("DETECTION_STORE_ROW_GROUP_ROWS", "100000"))
+
+MANIFEST_PREFIX = "_manifests"
+
+BBox = Tuple[float, float, float, float]
+
+
+def _overlaps(entry: Dict[str, Any], start: Optional[pd.Timestamp], end: Optional[pd.Timestamp], bbox: Optional[BBox]) -> bool:
+    """Whether a manifest entry may hold detections inside a time window and bbox."""
+    if start is not None and pd.Timestamp(entry["end"]) < start:
+        return False
+    if end is not None and pd.Timestamp(entry["start"]) > end:
+        return False
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = entry["bbox"]
+        if min_lon > bbox[2] or max_lon < bbox[0] or min_lat > bbox[3] or max_lat < bbox[1]:
+            return False
+    return True
+
+
+def _naive_utc(value: Any) -> Optional[pd.Timestamp]:
+    """Convert a time to a naive UTC timestamp, matching the stored column."""
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_convert("UTC").tz_localize(None) if value.tzinfo is not None else value
+
+
+class DetectionStore:
+    """Processed FIRMS detections stored as partitioned GeoParquet with per-source manifests."""
+
+    def __init__(self, uri: str = DETECTION_STORE_URI, storage: Any = None):
+        """
+        Initialize the store.
+
+        Args:
+            uri: s3://bucket/prefix or a local directory
+            storage: utils.LocalStorage or utils.S3Storage (opened from uri if not given)
+        """
+        self.uri = uri
+        self.storage = storage or open_storage(uri)
+        self._lock = threading.Lock()
+
+    def manifest(self, source: str) -> List[Dict[str, Any]]:
+        """
+        Get a source's manifest entries.
+
+        Args:
+            source: Data source
+
+        Returns:
+            List of dicts with each file's key, source, date, rows, start, end and bbox
+        """
+        data = self.storage.read(f"{MANIFEST_PREFIX}/{source}.json")
+        return json.loads(data)["files"] if data else []
+
+    def sources(self) -> List[str]:
+        """List sources with a manifest."""
+        return [
+            os.path.basename(key)[:-len(".json")]
+            for key in self.storage.list(MANIFEST_PREFIX)
+            if key.endswith(".json")
+        ]
+
+    def write(self, gdf: gpd.GeoDataFrame, source: str) -> List[str]:
+        """
+        Write detections as one GeoParquet file per acquisition date.
+
+        Files are written before the manifest, so readers never see a
+        manifest entry for a missing file.
+
+        Args:
+            gdf: Processed detections, as from nasa_firms.process_firms_data
+            source: Data source
+
+        Returns:
+            Keys of the files written
+        """
+        if len(gdf) == 0:
+            return []
+
+        run_id = f"{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        dates = gdf["acquisition_datetime"].dt.normalize()
+        entries = []
+        for date, part in gdf.groupby(dates, sort=True):
+            part = part.sort_values("acquisition_datetime", kind="stable")
+            day = date.strftime("%Y-%m-%d")
+            key = f"source={source}/date={day}/part-{run_id}.parquet"
+            buffer = io.BytesIO()
+            part.to_parquet(
+                buffer, index=False, compression=DETECTION_STORE_COMPRESSION,
+                row_group_size=DETECTION_STORE_ROW_GROUP_ROWS
+            )
+            self.storage.write(key, buffer.getvalue())
+            entries.append({
+                "key": key,
+                "source": source,
+                "date": day,
+                "rows": int(len(part)),
+                "start": part["acquisition_datetime"].iloc[0].isoformat(),
+                "end": part["acquisition_datetime"].iloc[-1].isoformat(),
+                "bbox": [
+                    float(part["longitude"].min()), float(part["latitude"].min()),
+                    float(part["longitude"].max()), float(part["latitude"].max())
+                ]
+            })
+
+        with self._lock:
+            files = self.manifest(source) + entries
+            body = json.dumps({"source": source, "updated_at": datetime.datetime.utcnow().isoformat(), "files": files})
+            self.storage.write(f"{MANIFEST_PREFIX}/{source}.json", body.encode("utf-8"))
+
+        logger.info(f"Stored {len(gdf)} {source} detections in {len(entries)} partitions under {self.uri}")
+        return [entry["key"] for entry in entries]
+
+    def files(
+        self,
+        sources: Optional[Sequence[str]] = None,
+        start: Any = None,
+        end: Any = None,
+        bbox: Optional[BBox] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Select the manifest entries of files that may match a query.
+
+        Args:
+            sources: Data sources (all if None)
+            start: Earliest acquisition time
+            end: Latest acquisition time
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+
+        Returns:
+            Matching manifest entries
+        """
+        start, end = _naive_utc(start), _naive_utc(end)
+        selected = []
+        for source in (sources if sources is not None else self.sources()):
+            selected.extend(entry for entry in self.manifest(source) if _overlaps(entry, start, end, bbox))
+        return selected
+
+    def read_file(
+        self,
+        key: str,
+        columns: Optional[Sequence[str]] = None,
+        start: Any = None,
+        end: Any = None,
+        bbox: Optional[BBox] = None
+    ) -> pd.DataFrame:
+        """
+        Read matching detections from one file.
+
+        Args:
+            key: File key from the manifest
+            columns: Columns to read (all if None)
+            start: Earliest acquisition time
+            end: Latest acquisition time
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+
+        Returns:
+            DataFrame, or GeoDataFrame when the geometry column is read
+        """
+        start, end = _naive_utc(start), _naive_utc(end)
+        conditions = []
+        if bbox is not None:
+            conditions += [
+                ds.field("longitude") >= bbox[0], ds.field("longitude") <= bbox[2],
+                ds.field("latitude") >= bbox[1], ds.field("latitude") <= bbox[3]
+            ]
+        if start is not None:
+            conditions.append(ds.field("acquisition_datetime") >= pc.scalar(start.to_pydatetime()))
+        if end is not None:
+            conditions.append(ds.field("acquisition_datetime") <= pc.scalar(end.to_pydatetime()))
+        filters = None
+        for condition in conditions:
+            filters = condition if filters is None else filters & condition
+
+        # A seekable file lets Parquet fetch only the footer, the selected
+        # columns and the row groups whose statistics match the filters
+        try:
+            source = self.storage.open_input(key)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Detection file not found: {key}")
+        with source:
+            table = pq.read_table(source, columns=list(columns) if columns is not None else None, filters=filters)
+        df = table.to_pandas()
+        if "geometry" in df.columns:
+            return gpd.GeoDataFrame(df, geometry=gpd.GeoSeries.from_wkb(df["geometry"].to_numpy()), crs="EPSG:4326")
+        return df
+
+    def read(
+        self,
+        sources: Optional[Sequence[str]] = None,
+        start: Any = None,
+        end: Any = None,
+        bbox: Optional[BBox] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read detections matching a query.
+
+        Args:
+            sources: Data sources (all if None)
+            start: Earliest acquisition time
+            end: Latest acquisition time
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            columns: Columns to read (all if None)
+
+        Returns:
+            DataFrame, or GeoDataFrame when the geometry column is read
+        """
+        frames = [
+            self.read_file(entry["key"], columns, start, end, bbox)
+            for entry in self.files(sources, start, end, bbox)
+        ]
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return pd.DataFrame(columns=list(columns) if columns is not None else None)
+        df = pd.concat(frames, ignore_index=True)
+        for column in df.columns:
+            if column != "geometry" and df[column].dtype == object and isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype("category")
+        if isinstance(frames[0], gpd.GeoDataFrame):
+            return gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326")
+        return df
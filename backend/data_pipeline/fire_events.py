@@ -0,0 +1,513 @@
+"""
+Spatio-temporal clustering of FIRMS detections into fire events.
+
+Two detections belong to the same event when they are within
+FIRE_EVENT_LINK_KM of each other (haversine distance) and acquired within
+FIRE_EVENT_LINK_HOURS, chained transitively. Detections are clustered in
+time-ordered batches: each batch is linked against the detections still able
+to join an event (the "active" window) through a BallTree radius query, and
+connected components of the resulting graph extend, merge or create events.
+Each batch only touches its own detections and the active window, so a full
+season clusters in near-linear time, and the tracker's state carries over
+between ingest runs.
+
+Each event keeps running aggregates (detection count, FRP totals, centroid,
+bbox), a convex hull, and its most recent high-FRP detections as ignition
+points in the schema FireSpreadSimulator expects.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import BallTree
+
+from . import detection_store, utils
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+FIRE_EVENTS_URI = os.environ.get("FIRE_EVENTS_URI", f"s3://{S3_BUCKET}/fire_events")
+FIRE_EVENT_LINK_KM = float(os.environ.get("FIRE_EVENT_LINK_KM", "2.0"))
+FIRE_EVENT_LINK_HOURS = float(os.environ.get("FIRE_EVENT_LINK_HOURS", "48"))
+FIRE_EVENT_BATCH_HOURS = float(os.environ.get("FIRE_EVENT_BATCH_HOURS", "24"))
+FIRE_EVENT_IGNITION_HOURS = float(os.environ.get("FIRE_EVENT_IGNITION_HOURS", "12"))
+FIRE_EVENT_MAX_IGNITION_POINTS = int(os.environ.get("FIRE_EVENT_MAX_IGNITION_POINTS", "25"))
+FIRE_EVENT_RETENTION_DAYS = float(os.environ.get("FIRE_EVENT_RETENTION_DAYS", "365"))
+
+# Stored detection columns clustering needs
+EVENT_COLUMNS = ["latitude", "longitude", "acquisition_datetime", "frp", "source"]
+
+STATE_KEY = "state.json"
+EVENTS_KEY = "events.geojson"
+
+MEAN_EARTH_RADIUS_KM = 6371.0088
+
+# Per-event running aggregates, and the ufunc combining two partial values
+EVENT_AGGREGATES = {
+    "first_seen": np.minimum,
+    "last_seen": np.maximum,
+    "detections": np.add,
+    "frp_total": np.add,
+    "frp_max": np.maximum,
+    "lat_sum": np.add,
+    "lon_sum": np.add,
+    "min_lat": np.minimum,
+    "min_lon": np.minimum,
+    "max_lat": np.maximum,
+    "max_lon": np.maximum
+}
+INTEGER_AGGREGATES = ("first_seen", "last_seen", "detections")
+
+DETECTION_KEYS = ["source", "latitude", "longitude", "time"]
+
+
+def _empty_detections() -> pd.DataFrame:
+    return pd.DataFrame({
+        "latitude": np.zeros(0, dtype=np.float64),
+        "longitude": np.zeros(0, dtype=np.float64),
+        "time": np.zeros(0, dtype=np.int64),
+        "frp": np.zeros(0, dtype=np.float64),
+        "source": np.zeros(0, dtype=object),
+        "event": np.zeros(0, dtype=np.int64)
+    })
+
+
+def _identity(name: str, size: int) -> np.ndarray:
+    """Aggregate values that leave a combined value unchanged."""
+    dtype = np.int64 if name in INTEGER_AGGREGATES else np.float64
+    combine = EVENT_AGGREGATES[name]
+    if combine is np.add:
+        return np.zeros(size, dtype=dtype)
+    info = np.iinfo(dtype) if dtype == np.int64 else np.finfo(dtype)
+    return np.full(size, info.max if combine is np.minimum else info.min, dtype=dtype)
+
+
+def normalize_detections(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce processed detections to the columns clustering uses.
+
+    Args:
+        df: Detections with latitude, longitude, acquisition_datetime, frp and source
+
+    Returns:
+        DataFrame with float64 coordinates, epoch-second times and string sources
+    """
+    times = pd.to_datetime(df["acquisition_datetime"])
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    return pd.DataFrame({
+        "latitude": df["latitude"].to_numpy(dtype=np.float64),
+        "longitude": df["longitude"].to_numpy(dtype=np.float64),
+        "time": times.to_numpy().astype("datetime64[s]").astype(np.int64),
+        "frp": pd.to_numeric(df["frp"], errors="coerce").fillna(0).to_numpy(dtype=np.float64),
+        "source": df["source"].astype(str).to_numpy(dtype=object)
+    })
+
+
+def format_event_id(event: int) -> str:
+    """Format an internal event number as its public id."""
+    return f"FE{int(event):07d}"
+
+
+def _isoformat(seconds: int) -> str:
+    return datetime.utcfromtimestamp(int(seconds)).isoformat() + "Z"
+
+
+class FireEventTracker:
+    """Clusters detections into fire events incrementally across runs."""
+
+    def __init__(
+        self,
+        link_km: float = FIRE_EVENT_LINK_KM,
+        link_hours: float = FIRE_EVENT_LINK_HOURS,
+        batch_hours: float = FIRE_EVENT_BATCH_HOURS,
+        ignition_hours: float = FIRE_EVENT_IGNITION_HOURS,
+        max_ignition_points: int = FIRE_EVENT_MAX_IGNITION_POINTS,
+        retention_days: float = FIRE_EVENT_RETENTION_DAYS
+    ):
+        """
+        Initialize an empty tracker.
+
+        Args:
+            link_km: Maximum distance between linked detections
+            link_hours: Maximum time between linked detections
+            batch_hours: Hours of detections clustered per batch
+            ignition_hours: Hours before an event's last detection its ignition points are drawn from
+            max_ignition_points: Ignition points kept per event, highest FRP first
+            retention_days: Days after its last detection an event is kept
+        """
+        self.link_km = link_km
+        self.link_seconds = int(link_hours * 3600)
+        self.batch_seconds = max(int(batch_hours * 3600), 1)
+        self.ignition_seconds = int(ignition_hours * 3600)
+        self.max_ignition_points = max_ignition_points
+        self.retention_seconds = int(retention_days * 86400)
+
+        self.active = _empty_detections()
+        self.ignitions = _empty_detections()
+        self.next_event = 1
+        self.newest = None
+
+        # Events are numbered sequentially, so their aggregates and hulls are
+        # arrays indexed by event number; merged and expired events are not alive
+        self.aggregates = {name: _identity(name, 0) for name in EVENT_AGGREGATES}
+        self.alive = np.zeros(0, dtype=bool)
+        self.hulls = np.empty(0, dtype=object)
+        self._updated = np.zeros(0, dtype=bool)
+
+    def _reserve(self, size: int):
+        """Grow the per-event arrays to hold event numbers below size."""
+        capacity = len(self.alive)
+        if size <= capacity:
+            return
+        grown = max(size, 2 * capacity, 1024)
+        for name, values in self.aggregates.items():
+            self.aggregates[name] = np.concatenate([values, _identity(name, grown - capacity)])
+        self.alive = np.concatenate([self.alive, np.zeros(grown - capacity, dtype=bool)])
+        self.hulls = np.concatenate([self.hulls, np.empty(grown - capacity, dtype=object)])
+        self._updated = np.concatenate([self._updated, np.zeros(grown - capacity, dtype=bool)])
+
+    @property
+    def events(self) -> pd.DataFrame:
+        """Aggregates of tracked events, indexed by event number."""
+        ids = np.flatnonzero(self.alive)
+        events = pd.DataFrame({name: values[ids] for name, values in self.aggregates.items()}, index=ids)
+        events.index.name = "event"
+        return events
+
+    @property
+    def updated_event_ids(self) -> List[str]:
+        """IDs of tracked events created, extended or merged into by the last update."""
+        return [format_event_id(event) for event in np.flatnonzero(self._updated & self.alive)]
+
+    # ------ Clustering ------
+
+    def update(self, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Cluster new detections into events.
+
+        Detections already clustered (same source, location and time) are
+        skipped, so overlapping ingest runs can pass their full output.
+        Detections older than the active window can only form or join
+        events among themselves.
+
+        Args:
+            df: Processed detections (see EVENT_COLUMNS)
+
+        Returns:
+            Dict with counts of detections added and events created, merged and updated
+        """
+        summary = {"detections": 0, "events_created": 0, "events_merged": 0, "events_updated": 0}
+        if len(df) == 0:
+            return summary
+
+        new = normalize_detections(df).drop_duplicates(subset=DETECTION_KEYS)
+        seen = new.merge(self.active[DETECTION_KEYS], on=DETECTION_KEYS, how="left", indicator=True)["_merge"]
+        new = new[(seen == "left_only").to_numpy()].sort_values("time", kind="stable").reset_index(drop=True)
+        if len(new) == 0:
+            return summary
+
+        self._updated[:] = False
+        batch_ids = (new["time"].to_numpy() - new["time"].iloc[0]) // self.batch_seconds
+        for _, batch in new.groupby(batch_ids, sort=True):
+            created, merged = self._add_batch(batch.reset_index(drop=True))
+            summary["events_created"] += created
+            summary["events_merged"] += merged
+
+        summary["detections"] = len(new)
+        summary["events_updated"] = int((self._updated & self.alive).sum())
+        self._prune()
+        logger.info(
+            f"Clustered {len(new)} detections: {summary['events_created']} events created, "
+            f"{summary['events_merged']} merged, {summary['events_updated']} updated, {int(self.alive.sum())} tracked"
+        )
+        return summary
+
+    def _add_batch(self, batch: pd.DataFrame):
+        """Link one batch against the active window and update the events it touches."""
+        self.newest = max(self.newest or 0, int(batch["time"].max()))
+        # Batches arrive in time order, so older detections can no longer link
+        self.active = self.active[self.active["time"].to_numpy() >= batch["time"].iloc[0] - self.link_seconds]
+        active = self.active
+        n_active, n_batch = len(active), len(batch)
+
+        # Detection-to-detection links within the distance and time limits
+        points = np.radians(np.concatenate([
+            active[["latitude", "longitude"]].to_numpy(), batch[["latitude", "longitude"]].to_numpy()
+        ]))
+        times = np.concatenate([active["time"].to_numpy(), batch["time"].to_numpy()])
+        neighbors = BallTree(points, metric="haversine").query_radius(
+            points[n_active:], r=self.link_km / MEAN_EARTH_RADIUS_KM
+        )
+        counts = np.fromiter((len(found) for found in neighbors), dtype=np.int64, count=n_batch)
+        src = np.repeat(np.arange(n_active, n_active + n_batch), counts)
+        dst = np.concatenate(neighbors).astype(np.int64)
+        linked = (np.abs(times[src] - times[dst]) <= self.link_seconds) & (src != dst)
+        src, dst = src[linked], dst[linked]
+
+        # Active detections link to a node per existing event, so components
+        # that reach an event extend it and components reaching several merge them
+        events, event_nodes = np.unique(active["event"].to_numpy(), return_inverse=True)
+        n_nodes = n_active + n_batch + len(events)
+        rows = np.concatenate([src, np.arange(n_active)])
+        cols = np.concatenate([dst, n_active + n_batch + event_nodes])
+        graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n_nodes, n_nodes))
+        n_labels, labels = connected_components(graph, directed=False)
+        batch_labels = labels[n_active:n_active + n_batch]
+        event_labels = labels[n_active + n_batch:]
+
+        # The earliest event in a component absorbs the others
+        order = np.lexsort((events, self.aggregates["first_seen"][events], event_labels))
+        events, event_labels = events[order], event_labels[order]
+        head = np.ones(len(events), dtype=bool)
+        head[1:] = event_labels[1:] != event_labels[:-1]
+        merged_old = events[~head]
+        merged_new = events[head][np.cumsum(head)[~head] - 1]
+        label_event = np.full(n_labels, -1, dtype=np.int64)
+        label_event[event_labels[head]] = events[head]
+
+        # Components reaching no event start new ones
+        unassigned = np.unique(batch_labels[label_event[batch_labels] < 0])
+        label_event[unassigned] = np.arange(self.next_event, self.next_event + len(unassigned))
+        self.next_event += len(unassigned)
+        self._reserve(self.next_event)
+        assigned = label_event[batch_labels]
+        batch = batch.assign(event=assigned)
+
+        if len(merged_old):
+            self._merge(merged_old, merged_new)
+        time, frp = batch["time"].to_numpy(), batch["frp"].to_numpy()
+        lat, lon = batch["latitude"].to_numpy(), batch["longitude"].to_numpy()
+        values = {
+            "first_seen": time, "last_seen": time, "detections": np.ones(n_batch, dtype=np.int64),
+            "frp_total": frp, "frp_max": frp, "lat_sum": lat, "lon_sum": lon,
+            "min_lat": lat, "min_lon": lon, "max_lat": lat, "max_lon": lon
+        }
+        for name, combine in EVENT_AGGREGATES.items():
+            combine.at(self.aggregates[name], assigned, values[name])
+        self.alive[assigned] = True
+        self._updated[assigned] = True
+
+        touched = np.unique(np.concatenate([assigned, merged_new]))
+        self._update_hulls(batch, touched, merged_old, merged_new)
+        self.active = pd.concat([self.active, batch], ignore_index=True)
+        self._update_ignitions(touched)
+        return len(unassigned), len(merged_old)
+
+    def _merge(self, merged_old: np.ndarray, merged_new: np.ndarray):
+        """Fold merged events into their absorbing events and relabel their detections."""
+        for name, combine in EVENT_AGGREGATES.items():
+            values = self.aggregates[name]
+            combine.at(values, merged_new, values[merged_old])
+            values[merged_old] = _identity(name, len(merged_old))
+        self.alive[merged_old] = False
+        self._updated[merged_new] |= self._updated[merged_old]
+        self._updated[merged_old] = False
+
+        remap = np.arange(self.next_event, dtype=np.int64)
+        remap[merged_old] = merged_new
+        for frame in ("active", "ignitions"):
+            detections = getattr(self, frame)
+            setattr(self, frame, detections.assign(event=remap[detections["event"].to_numpy()]))
+
+    def _update_hulls(self, batch: pd.DataFrame, touched: np.ndarray, merged_old: np.ndarray, merged_new: np.ndarray):
+        """Recompute hulls of touched events from their previous hulls and new detections."""
+        owners = np.concatenate([touched, merged_new])
+        vertices, index = shapely.get_coordinates(self.hulls[np.concatenate([touched, merged_old])], return_index=True)
+        events = np.concatenate([owners[index], batch["event"].to_numpy()])
+        coords = np.concatenate([vertices, batch[["longitude", "latitude"]].to_numpy()])
+        order = np.argsort(events, kind="stable")
+        keys, codes = np.unique(events[order], return_inverse=True)
+        self.hulls[keys] = shapely.convex_hull(shapely.multipoints(coords[order], indices=codes))
+        self.hulls[merged_old] = None
+
+    def _update_ignitions(self, touched: np.ndarray):
+        """Keep each touched event's highest-FRP detections near its last detection."""
+        candidates = self.active[np.isin(self.active["event"].to_numpy(), touched)]
+        last_seen = self.aggregates["last_seen"][candidates["event"].to_numpy()]
+        candidates = candidates[candidates["time"].to_numpy() >= last_seen - self.ignition_seconds]
+        candidates = candidates.sort_values(["event", "frp", "time"], ascending=[True, False, False], kind="stable")
+        selected = candidates[candidates.groupby("event").cumcount().to_numpy() < self.max_ignition_points]
+        kept = self.ignitions[~np.isin(self.ignitions["event"].to_numpy(), touched)]
+        self.ignitions = pd.concat([kept, selected], ignore_index=True)
+
+    def _prune(self):
+        """Drop detections that can no longer link and events past retention."""
+        self.active = self.active[self.active["time"].to_numpy() >= self.newest - self.link_seconds].reset_index(drop=True)
+        expired = np.flatnonzero(self.alive & (self.aggregates["last_seen"] < self.newest - self.retention_seconds))
+        if len(expired):
+            self.alive[expired] = False
+            self.hulls[expired] = None
+            self.ignitions = self.ignitions[~np.isin(self.ignitions["event"].to_numpy(), expired)].reset_index(drop=True)
+
+    # ------ Output ------
+
+    def summaries(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Summarize tracked events, most recently active first.
+
+        Args:
+            status: "active" or "inactive" to filter events (all if None)
+
+        Returns:
+            List of event dicts with id, status, times, detection count, FRP,
+            centroid, bbox, hull (GeoJSON geometry) and ignition_points
+            ({"location": {"latitude", "longitude"}, "intensity", "detection_time"})
+        """
+        events = self.events.sort_values("last_seen", ascending=False)
+        active = self.newest - events["last_seen"].to_numpy() <= self.link_seconds
+        if status is not None:
+            events, active = events[active == (status == "active")], active[active == (status == "active")]
+        # Only the selected events' ignition points are grouped; a long
+        # retention keeps many more inactive events than active ones
+        selected = self.ignitions[np.isin(self.ignitions["event"].to_numpy(), events.index.to_numpy())]
+        ignitions = {event: group for event, group in selected.groupby("event")}
+        results = []
+        for (event, row), is_active in zip(events.iterrows(), active):
+            event_status = "active" if is_active else "inactive"
+            points = ignitions.get(event)
+            results.append({
+                "event_id": format_event_id(event),
+                "status": event_status,
+                "first_seen": _isoformat(row["first_seen"]),
+                "last_seen": _isoformat(row["last_seen"]),
+                "detections": int(row["detections"]),
+                "frp_total": round(float(row["frp_total"]), 2),
+                "frp_max": round(float(row["frp_max"]), 2),
+                "centroid": {
+                    "latitude": float(row["lat_sum"] / row["detections"]),
+                    "longitude": float(row["lon_sum"] / row["detections"])
+                },
+                "bbox": [float(row["min_lon"]), float(row["min_lat"]), float(row["max_lon"]), float(row["max_lat"])],
+                "hull": json.loads(shapely.to_geojson(self.hulls[event])),
+                "ignition_points": [] if points is None else [
+                    {
+                        "location": {"latitude": float(lat), "longitude": float(lon)},
+                        "intensity": float(frp),
+                        "detection_time": _isoformat(seconds)
+                    }
+                    for lat, lon, frp, seconds in zip(points["latitude"], points["longitude"], points["frp"], points["time"])
+                ]
+            })
+        return results
+
+    def to_geojson(self, status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Events as a GeoJSON FeatureCollection of hulls.
+
+        Args:
+            status: "active" or "inactive" to filter events (all if None)
+
+        Returns:
+            FeatureCollection dict
+        """
+        features = []
+        for summary in self.summaries(status):
+            properties = {key: value for key, value in summary.items() if key != "hull"}
+            features.append({"type": "Feature", "id": summary["event_id"], "geometry": summary["hull"], "properties": properties})
+        return {"type": "FeatureCollection", "features": features}
+
+    # ------ Persistence ------
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serialize the tracker's state to a JSON-compatible dict."""
+        return {
+            "next_event": self.next_event,
+            "newest": self.newest,
+            "active": self.active.to_dict("list"),
+            "ignitions": self.ignitions.to_dict("list"),
+            "events": self.events.reset_index().to_dict("list"),
+            "hulls": shapely.to_wkb(self.hulls[self.alive], hex=True).tolist()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], **kwargs) -> "FireEventTracker":
+        """
+        Restore a tracker from to_state output.
+
+        Args:
+            state: Serialized state
+            **kwargs: Tracker parameters
+
+        Returns:
+            FireEventTracker
+        """
+        tracker = cls(**kwargs)
+        tracker.next_event = state["next_event"]
+        tracker.newest = state["newest"]
+        empty = _empty_detections()
+        for frame in ("active", "ignitions"):
+            df = pd.DataFrame(state[frame]) if state[frame].get("time") else empty
+            setattr(tracker, frame, df.astype(empty.dtypes.to_dict()))
+        tracker._reserve(tracker.next_event)
+        ids = np.asarray(state["events"]["event"], dtype=np.int64)
+        for name, values in tracker.aggregates.items():
+            values[ids] = np.asarray(state["events"][name], dtype=values.dtype)
+        tracker.alive[ids] = True
+        tracker.hulls[ids] = shapely.from_wkb(np.asarray(state["hulls"], dtype=object))
+        return tracker
+
+
+def load_tracker(uri: str = FIRE_EVENTS_URI) -> FireEventTracker:
+    """
+    Load the tracker state saved under a URI, or start an empty tracker.
+
+    Args:
+        uri: s3://bucket/prefix or a local directory
+
+    Returns:
+        FireEventTracker
+    """
+    data = utils.open_storage(uri).read(STATE_KEY)
+    return FireEventTracker.from_state(json.loads(data)) if data else FireEventTracker()
+
+
+def save_tracker(tracker: FireEventTracker, uri: str = FIRE_EVENTS_URI):
+    """
+    Save the tracker state and a GeoJSON of active events under a URI.
+
+    Args:
+        tracker: Tracker to save
+        uri: s3://bucket/prefix or a local directory
+    """
+    storage = utils.open_storage(uri)
+    storage.write(EVENTS_KEY, json.dumps(tracker.to_geojson("active")).encode("utf-8"))
+    storage.write(STATE_KEY, json.dumps(tracker.to_state()).encode("utf-8"))
+
+
+def update_events(
+    keys: Iterable[str],
+    store: Optional[detection_store.DetectionStore] = None,
+    uri: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Cluster newly stored detection files into the saved fire events.
+
+    Args:
+        keys: Detection file keys written by the ingest run
+        store: DetectionStore holding the files (DETECTION_STORE_URI if None)
+        uri: s3://bucket/prefix or a local directory for the tracker state (FIRE_EVENTS_URI if None)
+
+    Returns:
+        Summary counts from FireEventTracker.update, plus events tracked and
+        the IDs of the events the update changed
+    """
+    store = store or detection_store.DetectionStore(detection_store.DETECTION_STORE_URI)
+    uri = uri or FIRE_EVENTS_URI
+    frames = [store.read_file(key, columns=EVENT_COLUMNS) for key in keys]
+    frames = [frame for frame in frames if len(frame)]
+    tracker = load_tracker(uri)
+    summary = tracker.update(pd.concat(frames, ignore_index=True)) if frames else {}
+    save_tracker(tracker, uri)
+    return {**summary, "events_tracked": len(tracker.events), "updated_event_ids": tracker.updated_event_ids}
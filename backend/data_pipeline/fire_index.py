@@ -0,0 +1,498 @@
+"""
+In-memory spatial index over ingested FIRMS fire detections.
+
+Detections are held as numpy columns sorted by grid cell, so a bounding box
+query reads one contiguous slice of the arrays per row of cells instead of
+scanning every detection. Filters (exact bbox, radius, time window, confidence,
+FRP) are vectorized over those candidates, and results are ordered newest first
+with a cursor for pagination. Cursors and detection ids are built from each
+detection's source, location and acquisition time rather than anything local
+to the index, so they stay valid across refreshes and API instances.
+
+The index is immutable; new detections produce a new index that replaces the
+old one in a single reference swap, so queries never wait on a refresh.
+"""
+
+import os
+import base64
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable, Iterator, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import detection_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+FIRE_INDEX_URI = os.environ.get("FIRE_INDEX_URI", detection_store.DETECTION_STORE_URI)
+FIRE_INDEX_CELL_DEGREES = float(os.environ.get("FIRE_INDEX_CELL_DEGREES", "0.5"))
+FIRE_INDEX_RETENTION_DAYS = float(os.environ.get("FIRE_INDEX_RETENTION_DAYS", "30"))
+FIRE_INDEX_REFRESH_SECONDS = float(os.environ.get("FIRE_INDEX_REFRESH_SECONDS", "300"))
+
+# Normalized confidence classes, lowest first
+CONFIDENCE_LEVELS = ["low", "nominal", "high"]
+
+# VIIRS reports confidence as a letter; MODIS as a 0-100 percentage
+VIIRS_CONFIDENCE = {"l": 0, "low": 0, "n": 1, "nominal": 1, "h": 2, "high": 2}
+MODIS_NOMINAL_MIN = 30
+MODIS_HIGH_MIN = 80
+
+# Columns hashed into a detection's stable key, the tiebreak after acquisition time
+KEY_COLUMNS = ["source", "latitude", "longitude", "time"]
+
+# Stored detection columns the index is built from
+INDEX_COLUMNS = ["latitude", "longitude", "acquisition_datetime", "confidence", "brightness", "frp", "source"]
+
+MEAN_EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def confidence_codes(values: pd.Series) -> np.ndarray:
+    """
+    Map FIRMS confidence values to indexes into CONFIDENCE_LEVELS.
+
+    Args:
+        values: VIIRS letters ("l", "n", "h"), MODIS percentages, or normalized names
+
+    Returns:
+        int8 array of confidence codes
+    """
+    values = values.astype(str)
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    codes = values.str.lower().map(VIIRS_CONFIDENCE).fillna(1).to_numpy(dtype=np.int8)
+    is_numeric = ~np.isnan(numeric)
+    codes[is_numeric] = np.where(
+        numeric[is_numeric] >= MODIS_HIGH_MIN, 2,
+        np.where(numeric[is_numeric] >= MODIS_NOMINAL_MIN, 1, 0)
+    )
+    return codes
+
+
+def detection_keys(sources: pd.Series, latitude: np.ndarray, longitude: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Hash detections into keys that are the same in every process.
+
+    Args:
+        sources: Source names
+        latitude: Latitudes
+        longitude: Longitudes
+        times: Acquisition times in epoch seconds
+
+    Returns:
+        uint64 array of detection keys
+    """
+    frame = pd.DataFrame({
+        "source": sources.to_numpy(dtype=object),
+        "latitude": latitude,
+        "longitude": longitude,
+        "time": times
+    }, columns=KEY_COLUMNS)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+
+
+def encode_cursor(detected: int, key: int) -> str:
+    """Encode the acquisition time and key of the last returned detection as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{int(detected)}:{int(key)}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a cursor from encode_cursor.
+
+    Returns:
+        Tuple of (acquisition time in epoch seconds, detection key)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        detected, key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii").split(":")
+        return int(detected), int(key)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class FireDetectionIndex:
+    """Immutable grid-bucket index over fire detections."""
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        sources: List[str],
+        cell_degrees: float = FIRE_INDEX_CELL_DEGREES,
+        version: int = 0
+    ):
+        """
+        Initialize the index from detection columns.
+
+        Args:
+            columns: "key", "latitude", "longitude", "time" (epoch seconds),
+                "confidence", "frp", "brightness" and "source" arrays
+            sources: Source names indexed by the "source" column
+            cell_degrees: Grid cell size in degrees
+            version: Version number, increased whenever detections change
+        """
+        self.cell_degrees = cell_degrees
+        self.n_cols = int(np.ceil(360.0 / cell_degrees))
+        self.sources = list(sources)
+        self.version = version
+
+        rows = np.floor((columns["latitude"] + 90.0) / cell_degrees).astype(np.int64)
+        cols = np.clip(np.floor((columns["longitude"] + 180.0) / cell_degrees).astype(np.int64), 0, self.n_cols - 1)
+        cell = rows * self.n_cols + cols
+
+        sort = np.lexsort((columns["key"], -columns["time"], cell))
+        self.columns = {name: np.ascontiguousarray(values[sort]) for name, values in columns.items()}
+        self.columns["cell"] = cell[sort]
+
+    @classmethod
+    def empty(cls, cell_degrees: float = FIRE_INDEX_CELL_DEGREES) -> "FireDetectionIndex":
+        """Create an index with no detections."""
+        columns = {
+            "key": np.zeros(0, dtype=np.uint64),
+            "latitude": np.zeros(0, dtype=np.float64),
+            "longitude": np.zeros(0, dtype=np.float64),
+            "time": np.zeros(0, dtype=np.int64),
+            "confidence": np.zeros(0, dtype=np.int8),
+            "frp": np.zeros(0, dtype=np.float32),
+            "brightness": np.zeros(0, dtype=np.float32),
+            "source": np.zeros(0, dtype=np.int16)
+        }
+        return cls(columns, [], cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self.columns["key"])
+
+    @property
+    def latest_time(self) -> Optional[datetime]:
+        """Acquisition time of the newest detection, or None if empty."""
+        if len(self) == 0:
+            return None
+        return datetime.fromtimestamp(int(self.columns["time"].max()), tz=timezone.utc)
+
+    def extend(self, df: pd.DataFrame, retention_days: float = FIRE_INDEX_RETENTION_DAYS) -> "FireDetectionIndex":
+        """
+        Build a new index with additional detections.
+
+        Detections already indexed (same source, location and acquisition
+        time) are skipped, and detections older than the retention window
+        before the newest detection are dropped.
+
+        Args:
+            df: Detections with the columns produced by nasa_firms.process_firms_data
+                (latitude, longitude, acquisition_datetime, confidence, frp,
+                brightness, source)
+            retention_days: Days of detections kept
+
+        Returns:
+            New FireDetectionIndex (self if nothing changed)
+        """
+        if len(df) == 0:
+            return self
+
+        sources = list(self.sources)
+        source_names = df["source"].astype(str)
+        for name in source_names.unique():
+            if name not in sources:
+                sources.append(name)
+
+        times = pd.to_datetime(df["acquisition_datetime"], utc=True)
+        latitude = df["latitude"].to_numpy(dtype=np.float64)
+        longitude = df["longitude"].to_numpy(dtype=np.float64)
+        seconds = times.dt.tz_localize(None).to_numpy().astype("datetime64[s]").astype(np.int64)
+        new = {
+            "key": detection_keys(source_names, latitude, longitude, seconds),
+            "latitude": latitude,
+            "longitude": longitude,
+            "time": seconds,
+            "confidence": confidence_codes(df["confidence"]),
+            "frp": pd.to_numeric(df["frp"], errors="coerce").to_numpy(dtype=np.float32),
+            "brightness": pd.to_numeric(df["brightness"], errors="coerce").to_numpy(dtype=np.float32),
+            "source": source_names.map({name: code for code, name in enumerate(sources)}).to_numpy(dtype=np.int16)
+        }
+
+        combined = {name: np.concatenate([self.columns[name], new[name]]) for name in new}
+        keys = pd.DataFrame({name: combined[name] for name in KEY_COLUMNS})
+        keep = ~keys.duplicated(keep="first").to_numpy()
+        cutoff = combined["time"][keep].max() - int(retention_days * 86400)
+        keep &= combined["time"] >= cutoff
+
+        if keep[:len(self)].all() and not keep[len(self):].any():
+            return self
+        combined = {name: values[keep] for name, values in combined.items()}
+        return FireDetectionIndex(combined, sources, self.cell_degrees, self.version + 1)
+
+    def _candidates(self, bbox: Optional[Tuple[float, float, float, float]]) -> np.ndarray:
+        """Positions of detections in the grid cells overlapping a bbox."""
+        if bbox is None:
+            return np.arange(len(self))
+
+        min_lon, min_lat, max_lon, max_lat = bbox
+        r0 = int(np.floor((max(min_lat, -90.0) + 90.0) / self.cell_degrees))
+        r1 = int(np.floor((min(max_lat, 90.0) + 90.0) / self.cell_degrees))
+        c0 = max(0, int(np.floor((min_lon + 180.0) / self.cell_degrees)))
+        c1 = min(self.n_cols - 1, int(np.floor((max_lon + 180.0) / self.cell_degrees)))
+        if r1 < r0 or c1 < c0:
+            return np.zeros(0, dtype=np.int64)
+
+        row_starts = np.arange(r0, r1 + 1, dtype=np.int64) * self.n_cols
+        cells = self.columns["cell"]
+        lo = np.searchsorted(cells, row_starts + c0, side="left")
+        hi = np.searchsorted(cells, row_starts + c1, side="right")
+        slices = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(slices) if slices else np.zeros(0, dtype=np.int64)
+
+    def query(
+        self,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        center: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        min_confidence: Optional[str] = None,
+        min_frp: Optional[float] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Find detections matching the filters, newest first.
+
+        Args:
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            center: (latitude, longitude) of a radius filter
+            radius_km: Radius around center in kilometers
+            start: Earliest acquisition time (inclusive)
+            end: Latest acquisition time (inclusive)
+            min_confidence: Lowest confidence class from CONFIDENCE_LEVELS
+            min_frp: Lowest fire radiative power in MW
+            cursor: Cursor returned with the previous page
+            limit: Maximum detections returned (all if None)
+
+        Returns:
+            Tuple of (positions, next_cursor). Positions index the columns and
+            are ordered newest first; next_cursor is None on the last page.
+
+        Raises:
+            ValueError: For an unknown confidence class or invalid cursor
+        """
+        if center is not None and radius_km is not None:
+            lat, lon = center
+            dlat = radius_km / KM_PER_DEGREE_LAT
+            dlon = radius_km / (KM_PER_DEGREE_LAT * max(np.cos(np.radians(lat)), 1e-6))
+            circle_bbox = (lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+            if bbox is not None:
+                circle_bbox = (
+                    max(bbox[0], circle_bbox[0]), max(bbox[1], circle_bbox[1]),
+                    min(bbox[2], circle_bbox[2]), min(bbox[3], circle_bbox[3])
+                )
+            bbox = circle_bbox
+
+        positions = self._candidates(bbox)
+        c = self.columns
+        mask = np.ones(len(positions), dtype=bool)
+
+        if bbox is not None:
+            lats = c["latitude"][positions]
+            lons = c["longitude"][positions]
+            mask &= (lons >= bbox[0]) & (lons <= bbox[2]) & (lats >= bbox[1]) & (lats <= bbox[3])
+        if center is not None and radius_km is not None:
+            lat1, lon1 = np.radians(center[0]), np.radians(center[1])
+            lat2 = np.radians(c["latitude"][positions])
+            lon2 = np.radians(c["longitude"][positions])
+            a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+            mask &= 2 * MEAN_EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0))) <= radius_km
+        if start is not None:
+            mask &= c["time"][positions] >= int(start.timestamp())
+        if end is not None:
+            mask &= c["time"][positions] <= int(end.timestamp())
+        if min_confidence is not None:
+            if min_confidence not in CONFIDENCE_LEVELS:
+                raise ValueError(f"Unknown confidence class: {min_confidence}")
+            mask &= c["confidence"][positions] >= CONFIDENCE_LEVELS.index(min_confidence)
+        if min_frp is not None:
+            mask &= c["frp"][positions] >= min_frp
+        if cursor is not None:
+            after_time, after_key = decode_cursor(cursor)
+            times = c["time"][positions]
+            mask &= (times < after_time) | ((times == after_time) & (c["key"][positions] > np.uint64(after_key)))
+
+        positions = positions[mask]
+        ages = -c["time"][positions]
+        if limit is not None and len(positions) > limit:
+            # Only detections as new as the limit-th newest can be on this page
+            positions = positions[ages <= np.partition(ages, limit - 1)[limit - 1]]
+            ages = -c["time"][positions]
+            positions = positions[np.lexsort((c["key"][positions], ages))][:limit]
+            last = positions[-1]
+            return positions, encode_cursor(c["time"][last], c["key"][last])
+
+        return positions[np.lexsort((c["key"][positions], ages))], None
+
+    def records(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Build response records for detections.
+
+        Args:
+            positions: Positions returned by query
+
+        Returns:
+            List of detection dicts
+        """
+        c = self.columns
+        times = np.datetime_as_string(c["time"][positions].astype("datetime64[s]"), unit="s")
+        return [
+            {
+                "id": f"FIRMS_{key:016x}",
+                "latitude": lat,
+                "longitude": lon,
+                "detection_time": f"{detected}Z",
+                "confidence": CONFIDENCE_LEVELS[confidence],
+                "frp": None if np.isnan(frp) else round(frp, 2),
+                "brightness": None if np.isnan(brightness) else round(brightness, 2),
+                "source": self.sources[source]
+            }
+            for key, lat, lon, detected, confidence, frp, brightness, source in zip(
+                c["key"][positions].tolist(),
+                c["latitude"][positions].tolist(),
+                c["longitude"][positions].tolist(),
+                times.tolist(),
+                c["confidence"][positions].tolist(),
+                c["frp"][positions].tolist(),
+                c["brightness"][positions].tolist(),
+                c["source"][positions].tolist()
+            )
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index size and coverage.
+
+        Returns:
+            Dict with detection count, occupied cells, version and newest time
+        """
+        latest = self.latest_time
+        return {
+            "detections": len(self),
+            "cells": int(len(np.unique(self.columns["cell"]))),
+            "version": self.version,
+            "latest_detection": latest.isoformat() if latest else None
+        }
+
+
+class FireIndexFeed:
+    """Keeps a FireDetectionIndex in memory and adds newly stored detection files to it."""
+
+    def __init__(self, store: Any = None, refresh_seconds: float = FIRE_INDEX_REFRESH_SECONDS):
+        """
+        Initialize the feed.
+
+        Args:
+            store: DetectionStore (opened from FIRE_INDEX_URI on first use if None)
+            refresh_seconds: Seconds between checks for new files
+        """
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        self.index = FireDetectionIndex.empty()
+        self._loaded_keys: Set[str] = set()
+        self._checked_at = None
+        self._refresh_lock = threading.Lock()
+
+    def add(self, df: pd.DataFrame) -> FireDetectionIndex:
+        """
+        Add detections, e.g. from nasa_firms.process_firms_data.
+
+        Args:
+            df: Processed detections
+
+        Returns:
+            The updated index
+        """
+        self.index = self.index.extend(df)
+        return self.index
+
+    def refresh(self) -> FireDetectionIndex:
+        """
+        Load files not yet indexed and swap in the extended index.
+
+        Files whose detections all fall outside the retention window are
+        skipped using their manifest time ranges, and only INDEX_COLUMNS
+        are read from the rest.
+        """
+        if self.store is None:
+            self.store = detection_store.DetectionStore(FIRE_INDEX_URI)
+        new_entries = [entry for entry in self.store.files() if entry["key"] not in self._loaded_keys]
+        if not new_entries:
+            return self.index
+
+        start_time = time.time()
+        latest = self.index.latest_time
+        newest = max([pd.Timestamp(entry["end"]) for entry in new_entries] +
+                     ([pd.Timestamp(latest).tz_localize(None)] if latest else []))
+        cutoff = newest - pd.Timedelta(days=FIRE_INDEX_RETENTION_DAYS)
+        frames = []
+        for entry in new_entries:
+            if pd.Timestamp(entry["end"]) < cutoff:
+                self._loaded_keys.add(entry["key"])
+                continue
+            try:
+                frames.append(self.store.read_file(entry["key"], columns=INDEX_COLUMNS, start=cutoff))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable detection file {entry['key']}: {str(e)}")
+                continue
+            self._loaded_keys.add(entry["key"])
+        frames = [frame for frame in frames if len(frame)]
+        if frames:
+            self.add(pd.concat(frames, ignore_index=True))
+        logger.info(
+            f"Indexed {len(frames)} of {len(new_entries)} new detection files in "
+            f"{time.time() - start_time:.2f} seconds, {len(self.index)} detections"
+        )
+        return self.index
+
+    def get(self) -> FireDetectionIndex:
+        """
+        Return the current index, checking for new files if the refresh interval has passed.
+
+        Only one caller refreshes at a time; others keep using the current index.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+            return self.index
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Could not refresh fire detection index: {str(e)}")
+            finally:
+                self._refresh_lock.release()
+        return self.index
+
+
+def iter_ndjson(index: FireDetectionIndex, chunk_size: int, encode: Callable[[Any], bytes], **filters) -> Iterator[bytes]:
+    """
+    Yield every matching detection as newline-delimited JSON, one chunk at a time.
+
+    The query runs once against the given snapshot, so a refresh mid-stream
+    cannot change the results; records are built and encoded per chunk.
+
+    Args:
+        index: Index snapshot to read
+        chunk_size: Detections encoded per yielded chunk
+        encode: Function encoding one record to JSON bytes
+        **filters: Filters accepted by FireDetectionIndex.query, except limit
+
+    Yields:
+        NDJSON bytes
+    """
+    positions, _ = index.query(**filters)
+    for offset in range(0, len(positions), chunk_size):
+        records = index.records(positions[offset:offset + chunk_size])
+        yield b"".join(encode(record) + b"\n" for record in records)
@@ -0,0 +1,390 @@
+"""
+Resumable backfill of historical FIRMS archive files.
+
+Archive CSVs (local files, globs or URLs, such as FIRMS archive downloads)
+go through the same stages as the rolling ingest: each file is parsed with
+nasa_firms.read_firms_csv, split into chunks of BACKFILL_CHUNK_DAYS, and
+each chunk is processed and stored in parallel. Once every file is stored,
+the chunks are fused and clustered into fire events in date order, since
+both carry state forward in time.
+
+Progress is checkpointed as each chunk is stored, fused and clustered, so an
+interrupted backfill resumes where it stopped without repeating a step. Point the detection store,
+fused store and event state at their own locations to keep a backfill apart
+from the live pipeline, which is the only writer of its own stores:
+
+    python -m data_pipeline.firms_backfill --job 2023 \\
+        --archive MODIS=archives/fire_archive_M-C61_2023.csv \\
+        --archive VIIRS_SNPP=archives/fire_archive_SV-C2_2023.csv \\
+        --start 2023-01-01 --end 2024-01-01 --region western_us \\
+        --detections-uri backfill/detections --fused-uri backfill/fused \\
+        --events-uri backfill/events
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import detection_fusion, detection_store, fire_events, nasa_firms, utils
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+BACKFILL_STATE_URI = os.environ.get("BACKFILL_STATE_URI", f"s3://{S3_BUCKET}/firms_backfill")
+BACKFILL_CHUNK_DAYS = int(os.environ.get("BACKFILL_CHUNK_DAYS", "7"))
+BACKFILL_WORKERS = int(os.environ.get("BACKFILL_WORKERS", str(os.cpu_count() or 4)))
+
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+class BackfillCheckpoint:
+    """Progress of one backfill job, saved as JSON after every step."""
+
+    def __init__(self, job: str, uri: str = BACKFILL_STATE_URI):
+        """
+        Initialize the checkpoint, loading any saved progress.
+
+        Args:
+            job: Backfill job name
+            uri: s3://bucket/prefix or a local directory
+        """
+        self.key = f"{job}.json"
+        self.storage = utils.open_storage(uri)
+        self._lock = threading.Lock()
+        data = self.storage.read(self.key)
+        self.state = json.loads(data) if data else {"job": job, "files": {}, "fused": {}, "clustered": []}
+        self.state.setdefault("fused", {})
+
+    def _save(self):
+        self.state["updated_at"] = datetime.datetime.utcnow().isoformat()
+        self.storage.write(self.key, json.dumps(self.state).encode("utf-8"))
+
+    def file(self, name: str) -> Dict[str, Any]:
+        """Progress of an archive file: its stored chunks and whether it is complete."""
+        with self._lock:
+            return json.loads(json.dumps(self.state["files"].get(name, {"chunks": {}, "complete": False})))
+
+    def chunk_stored(self, name: str, chunk: str, keys: List[str], rows: int):
+        """Record a stored chunk of an archive file."""
+        with self._lock:
+            progress = self.state["files"].setdefault(name, {"chunks": {}, "complete": False})
+            progress["chunks"][chunk] = {"keys": keys, "rows": rows}
+            self._save()
+
+    def file_complete(self, name: str):
+        """Record that every chunk of an archive file is stored."""
+        with self._lock:
+            self.state["files"].setdefault(name, {"chunks": {}, "complete": False})["complete"] = True
+            self._save()
+
+    def fused_keys(self, chunk: str) -> Optional[List[str]]:
+        """Keys of a chunk's fused records, or None if it is not fused yet."""
+        with self._lock:
+            keys = self.state["fused"].get(chunk)
+            return list(keys) if keys is not None else None
+
+    def chunk_fused(self, chunk: str, keys: List[str]):
+        """Record that a chunk was fused, with the keys of its fused records."""
+        with self._lock:
+            self.state["fused"][chunk] = keys
+            self._save()
+
+    def chunk_clustered(self, chunk: str):
+        """Record that a chunk was clustered into fire events."""
+        with self._lock:
+            self.state["clustered"].append(chunk)
+            self._save()
+
+
+def expand_archives(archives: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Expand local globs in (source, path or URL) archive specs.
+
+    Args:
+        archives: (source, path, glob or URL) pairs
+
+    Returns:
+        (source, path or URL) pairs
+    """
+    expanded = []
+    for source, location in archives:
+        if source not in nasa_firms.FIRMS_SOURCES:
+            raise ValueError(f"Invalid source: {source}. Must be one of {list(nasa_firms.FIRMS_SOURCES.keys())}")
+        if location.startswith(("http://", "https://", "file://")):
+            expanded.append((source, location))
+            continue
+        paths = sorted(glob.glob(location))
+        if not paths:
+            raise FileNotFoundError(f"No archive files match {location}")
+        expanded.extend((source, path) for path in paths)
+    return expanded
+
+
+def chunk_label(dates: pd.Series, chunk_days: int) -> np.ndarray:
+    """Start date (YYYY-MM-DD) of the epoch-aligned chunk holding each date."""
+    days = (dates - EPOCH).dt.days.to_numpy()
+    starts = EPOCH + pd.to_timedelta(days // chunk_days * chunk_days, unit="D")
+    return np.asarray(starts.strftime("%Y-%m-%d"))
+
+
+def parse_archive(
+    source: str,
+    location: str,
+    bbox: Optional[Tuple[float, float, float, float]],
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp]
+) -> pd.DataFrame:
+    """
+    Parse an archive file, keeping detections inside a bbox and date range.
+
+    Args:
+        source: Data source
+        location: Local path or URL
+        bbox: (min_lon, min_lat, max_lon, max_lat), or None to keep everything
+        start: First acquisition date to keep
+        end: Acquisition date to stop before
+
+    Returns:
+        DataFrame of raw FIRMS rows
+    """
+    with nasa_firms.host_limiter.slot(location):
+        stream, response, _ = nasa_firms.open_firms_stream(location)
+        try:
+            df = nasa_firms.read_firms_csv(stream, source, bbox)
+        finally:
+            stream.close()
+            if response is not None:
+                response.close()
+    if len(df) and (start is not None or end is not None):
+        dates = pd.to_datetime(df["acq_date"].astype(str), format="%Y-%m-%d")
+        keep = np.ones(len(df), dtype=bool)
+        if start is not None:
+            keep &= (dates >= start).to_numpy()
+        if end is not None:
+            keep &= (dates < end).to_numpy()
+        df = df[keep].reset_index(drop=True)
+    return df
+
+
+def store_chunk(
+    df: pd.DataFrame,
+    source: str,
+    store: detection_store.DetectionStore
+) -> Tuple[List[str], int]:
+    """
+    Process and store one chunk of raw FIRMS rows.
+
+    Args:
+        df: Raw FIRMS rows
+        source: Data source
+        store: DetectionStore to write to
+
+    Returns:
+        Tuple of (keys of the files written, database rows inserted)
+    """
+    gdf = nasa_firms.process_firms_data(df, source)
+    keys = nasa_firms.store_in_s3(gdf, source, store)
+    return keys, nasa_firms.insert_into_database(gdf)
+
+
+def backfill(
+    job: str,
+    archives: List[Tuple[str, str]],
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    start: Any = None,
+    end: Any = None,
+    store: Optional[detection_store.DetectionStore] = None,
+    fused_store: Optional[detection_store.DetectionStore] = None,
+    events_uri: Optional[str] = None,
+    state_uri: Optional[str] = None,
+    chunk_days: Optional[int] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Backfill archive files, resuming from the job's checkpoint.
+
+    Chunks are stored in parallel. Fusion and fire events then run chunk by
+    chunk in date order, and only once every file is stored, so a failed
+    file is retried by rerunning the job before later chunks are clustered.
+    Fusion and clustering are checkpointed separately: the fuser's state
+    moves forward with every chunk it fuses, so a chunk whose clustering
+    failed is clustered from its checkpointed fused records, not fused again.
+
+    Args:
+        job: Backfill job name, keying its checkpoint
+        archives: (source, path, glob or URL) pairs
+        bbox: (min_lon, min_lat, max_lon, max_lat) to keep, or None for everything
+        start: First acquisition date to keep
+        end: Acquisition date to stop before
+        store: DetectionStore for detections (DETECTION_STORE_URI if None)
+        fused_store: DetectionStore for fused records (FUSED_STORE_URI if None)
+        events_uri: Fire event state location (FIRE_EVENTS_URI if None)
+        state_uri: Checkpoint location (BACKFILL_STATE_URI if None)
+        chunk_days: Days per chunk (BACKFILL_CHUNK_DAYS if None)
+        workers: Parallel parse and store tasks (BACKFILL_WORKERS if None)
+
+    Returns:
+        Dict with row counts, throughput and any failed files
+    """
+    store = store or detection_store.DetectionStore(detection_store.DETECTION_STORE_URI)
+    fused_store = fused_store or detection_store.DetectionStore(detection_fusion.FUSED_STORE_URI)
+    chunk_days = chunk_days or BACKFILL_CHUNK_DAYS
+    checkpoint = BackfillCheckpoint(job, state_uri or BACKFILL_STATE_URI)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    files = expand_archives(archives)
+
+    started = time.time()
+    rows_stored = 0
+    failed: Dict[str, str] = {}
+    pending = [(source, location) for source, location in files if not checkpoint.file(f"{source}|{location}")["complete"]]
+    logger.info(f"Backfill {job}: {len(files)} archive files, {len(files) - len(pending)} already stored")
+
+    with ThreadPoolExecutor(max_workers=workers or BACKFILL_WORKERS, thread_name_prefix="firms-backfill") as executor:
+        parses = {
+            executor.submit(parse_archive, source, location, bbox, start, end): (source, location)
+            for source, location in pending
+        }
+        stores = {}
+        for future in as_completed(parses):
+            source, location = parses[future]
+            name = f"{source}|{location}"
+            try:
+                df = future.result()
+            except Exception as e:
+                logger.error(f"Error parsing {location}: {str(e)}")
+                failed[name] = str(e)
+                continue
+            done = checkpoint.file(name)["chunks"]
+            chunks = []
+            if len(df):
+                labels = chunk_label(pd.to_datetime(df["acq_date"].astype(str), format="%Y-%m-%d"), chunk_days)
+                chunks = [(label, np.flatnonzero(labels == label)) for label in np.unique(labels) if label not in done]
+            stores[name] = [
+                (executor.submit(store_chunk, df.iloc[rows], source, store), label, len(rows))
+                for label, rows in chunks
+            ]
+            logger.info(f"Parsed {len(df)} {source} detections from {location} into {len(chunks)} pending chunks")
+
+        for name, chunk_futures in stores.items():
+            complete = True
+            for future, label, rows in chunk_futures:
+                try:
+                    keys, _ = future.result()
+                except Exception as e:
+                    logger.error(f"Error storing chunk {label} of {name}: {str(e)}")
+                    failed[name] = str(e)
+                    complete = False
+                    continue
+                checkpoint.chunk_stored(name, label, keys, rows)
+                rows_stored += rows
+            if complete:
+                checkpoint.file_complete(name)
+    store_seconds = time.time() - started
+
+    # Fusion and events need every source's detections, in date order
+    fusion_totals: Dict[str, int] = {}
+    chunks_clustered = 0
+    if not failed:
+        keys_by_chunk: Dict[str, List[str]] = {}
+        for source, location in files:
+            for label, chunk in checkpoint.file(f"{source}|{location}")["chunks"].items():
+                keys_by_chunk.setdefault(label, []).extend(chunk["keys"])
+        clustered = set(checkpoint.state["clustered"])
+        for label in sorted(set(keys_by_chunk) - clustered):
+            event_keys, event_store = keys_by_chunk[label], store
+            if nasa_firms.DETECTION_FUSION_ENABLED:
+                fused_keys = checkpoint.fused_keys(label)
+                if fused_keys is None:
+                    try:
+                        fused_keys, fusion = detection_fusion.fuse_stored(
+                            keys_by_chunk[label], store=store, fused_store=fused_store
+                        )
+                    except Exception as e:
+                        logger.error(f"Error fusing chunk {label}: {str(e)}")
+                        failed[f"fuse|{label}"] = str(e)
+                        break
+                    checkpoint.chunk_fused(label, fused_keys)
+                    for key, value in fusion.items():
+                        fusion_totals[key] = fusion_totals.get(key, 0) + value
+                event_keys, event_store = fused_keys, fused_store
+            if nasa_firms.FIRE_EVENTS_ENABLED:
+                try:
+                    fire_events.update_events(event_keys, store=event_store, uri=events_uri)
+                except Exception as e:
+                    logger.error(f"Error clustering chunk {label}: {str(e)}")
+                    failed[f"cluster|{label}"] = str(e)
+                    break
+            checkpoint.chunk_clustered(label)
+            chunks_clustered += 1
+
+    elapsed = time.time() - started
+    summary = {
+        "job": job,
+        "files": len(files),
+        "rows_stored": rows_stored,
+        "rows_total": sum(
+            chunk["rows"]
+            for source, location in files
+            for chunk in checkpoint.file(f"{source}|{location}")["chunks"].values()
+        ),
+        "chunks_clustered": chunks_clustered,
+        "fusion": fusion_totals,
+        "store_rows_per_second": rows_stored / store_seconds if store_seconds > 0 else 0.0,
+        "rows_per_second": rows_stored / elapsed if elapsed > 0 else 0.0,
+        "elapsed_seconds": elapsed,
+        "failed": failed
+    }
+    logger.info(
+        f"Backfill {job}: stored {rows_stored} rows at {summary['store_rows_per_second']:.0f} rows/s, "
+        f"clustered {chunks_clustered} chunks, {summary['rows_per_second']:.0f} rows/s overall"
+        + (f"; failed: {', '.join(failed)}" if failed else "")
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill historical FIRMS archive files")
+    parser.add_argument("--job", required=True, help="Job name; rerun with the same name to resume")
+    parser.add_argument("--archive", action="append", required=True, metavar="SOURCE=PATH",
+                        help="Archive file, glob or URL for a source (repeatable)")
+    parser.add_argument("--start", help="First acquisition date to keep (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Acquisition date to stop before (YYYY-MM-DD)")
+    parser.add_argument("--bbox", help="min_lon,min_lat,max_lon,max_lat to keep")
+    parser.add_argument("--region", help=f"Region to keep, one of {list(nasa_firms.FIRMS_REGIONS.keys())}")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS)
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--detections-uri", default=detection_store.DETECTION_STORE_URI,
+                        help="Detection store to write to")
+    parser.add_argument("--fused-uri", default=detection_fusion.FUSED_STORE_URI,
+                        help="Store for fused records and fusion state")
+    parser.add_argument("--events-uri", help="Fire event state location (FIRE_EVENTS_URI if not given)")
+    parser.add_argument("--state-uri", default=BACKFILL_STATE_URI, help="Checkpoint location")
+    args = parser.parse_args()
+
+    region_bbox = tuple(float(value) for value in args.bbox.split(",")) if args.bbox else None
+    if region_bbox is None and args.region:
+        region_bbox = nasa_firms.get_region_bbox(args.region)
+    specs = [tuple(spec.split("=", 1)) for spec in args.archive]
+    result = backfill(
+        args.job, specs, bbox=region_bbox, start=args.start, end=args.end,
+        store=detection_store.DetectionStore(args.detections_uri),
+        fused_store=detection_store.DetectionStore(args.fused_uri),
+        events_uri=args.events_uri, state_uri=args.state_uri,
+        chunk_days=args.chunk_days, workers=args.workers
+    )
+    print(json.dumps(result, indent=2))
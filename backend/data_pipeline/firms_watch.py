@@ -0,0 +1,361 @@
+"""
+Continuous low-latency watch mode for NASA FIRMS detections.
+
+Instead of the twice-daily schedule, a long-running watcher polls the FIRMS
+sources every FIRMS_WATCH_INTERVAL_SECONDS. Each poll reuses the scheduled
+ingest: conditional requests skip unchanged files, only detections past each
+source's high-water mark are stored, and new detections are fused and
+clustered into fire events. The poll then queues a message for every fire
+event they changed.
+
+Pending messages are kept per event, so when an event changes again before
+its message is handled the newer message replaces the older one in place.
+Queueing never blocks the poller: at most FIRMS_WATCH_QUEUE_SIZE events are
+pending, and beyond that the longest-waiting one is dropped.
+
+Consumer threads drain the pending events. For each they refresh the risk
+grid around the event and run a short spread simulation from its ignition
+points, storing both under FIRMS_WATCH_OUTPUT_URI. Each result records the
+time from the poll that fetched the detections to the first simulated
+perimeter.
+
+Run it in place of the fetchNasaFirms schedule, never alongside it. Both
+read and rewrite the same ingest state, manifests, fusion state and fire
+event state without cross-process coordination, so deploy with
+`--firms-schedule false` to disable the scheduled fetch:
+
+    python -m data_pipeline.firms_watch --sources VIIRS_SNPP VIIRS_NOAA MODIS --interval 60
+"""
+
+import os
+import json
+import time
+import logging
+import datetime
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import detection_fusion, detection_store, fire_events, nasa_firms, utils
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+FIRMS_WATCH_OUTPUT_URI = os.environ.get("FIRMS_WATCH_OUTPUT_URI", f"s3://{S3_BUCKET}/firms_watch")
+FIRMS_WATCH_INTERVAL_SECONDS = float(os.environ.get("FIRMS_WATCH_INTERVAL_SECONDS", "60"))
+FIRMS_WATCH_WORKERS = int(os.environ.get("FIRMS_WATCH_WORKERS", "2"))
+# Maximum number of events with pending work
+FIRMS_WATCH_QUEUE_SIZE = int(os.environ.get("FIRMS_WATCH_QUEUE_SIZE", "256"))
+
+# First-look spread simulation run for every changed event
+FIRMS_WATCH_SIMULATION_HOURS = int(os.environ.get("FIRMS_WATCH_SIMULATION_HOURS", "6"))
+FIRMS_WATCH_SIMULATION_RESOLUTION_METERS = int(os.environ.get("FIRMS_WATCH_SIMULATION_RESOLUTION_METERS", "1000"))
+
+# Risk grid refreshed around every changed event
+FIRMS_WATCH_RISK_RESOLUTION_DEGREES = float(os.environ.get("FIRMS_WATCH_RISK_RESOLUTION_DEGREES", "0.01"))
+FIRMS_WATCH_RISK_BUFFER_DEGREES = float(os.environ.get("FIRMS_WATCH_RISK_BUFFER_DEGREES", "0.1"))
+
+# Latencies kept for stats
+LATENCY_HISTORY = 1000
+
+
+def refresh_area_risk(bbox: List[float], resolution: float = FIRMS_WATCH_RISK_RESOLUTION_DEGREES) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Score the risk grid around an area with the active model.
+
+    Args:
+        bbox: (min_lon, min_lat, max_lon, max_lat) of the area
+        resolution: Cell size in degrees
+
+    Returns:
+        Tuple of (summary dict, risk raster)
+    """
+    from models import risk_tiles
+
+    buffer = FIRMS_WATCH_RISK_BUFFER_DEGREES
+    min_lon, min_lat, max_lon, max_lat = bbox
+    bounds = (min_lat - buffer, min_lon - buffer, max_lat + buffer, max_lon + buffer)
+    grid = risk_tiles.RiskGrid([{"state": "", "name": "watch", "bounds": bounds}], resolution)
+    mask = grid.region_mask()
+    features = risk_tiles.generate_feature_grids(grid, seed=int(datetime.datetime.utcnow().strftime("%Y%m%d")))
+    risk, _, _ = risk_tiles.score_grid(grid, features, mask)
+    return {
+        "bounds": [grid.min_lon, grid.min_lat, grid.max_lon, grid.max_lat],
+        "shape": [grid.height, grid.width],
+        "resolution_degrees": resolution,
+        "mean_risk": float(np.nanmean(risk)),
+        "max_risk": float(np.nanmax(risk)),
+        "high_risk_fraction": float(np.mean(risk[mask] >= risk_tiles.HIGH_RISK_LEVELS[0]))
+    }, risk
+
+
+def simulate_event_spread(event: Dict[str, Any]) -> bytes:
+    """
+    Run a first-look spread simulation from an event's ignition points.
+
+    Args:
+        event: Event properties from the fire events GeoJSON
+
+    Returns:
+        JSON bytes of the simulation results
+    """
+    from api import workers
+
+    return workers.run_fire_spread_encoded({
+        "ignition_points": event["ignition_points"],
+        "simulation_hours": FIRMS_WATCH_SIMULATION_HOURS,
+        "resolution_meters": FIRMS_WATCH_SIMULATION_RESOLUTION_METERS
+    })
+
+
+class FirmsWatcher:
+    """Polls FIRMS sources and reacts to new detections and changed fire events."""
+
+    def __init__(
+        self,
+        sources: List[str],
+        state_store: Optional[nasa_firms.IngestStateStore] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        region: Optional[str] = None,
+        interval: float = FIRMS_WATCH_INTERVAL_SECONDS,
+        workers: int = FIRMS_WATCH_WORKERS,
+        store: Optional[detection_store.DetectionStore] = None,
+        fused_store: Optional[detection_store.DetectionStore] = None,
+        events_uri: Optional[str] = None,
+        output_uri: Optional[str] = None,
+        queue_size: int = FIRMS_WATCH_QUEUE_SIZE
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            sources: FIRMS sources to poll
+            state_store: Ingestion state store (FIRMS_STATE_URI if None)
+            bbox: (min_lon, min_lat, max_lon, max_lat) to keep; overrides region
+            region: Name from FIRMS_REGIONS
+            interval: Seconds between the starts of consecutive polls
+            workers: Consumer threads running risk refreshes and simulations
+            store: DetectionStore for detections (DETECTION_STORE_URI if None)
+            fused_store: DetectionStore for fused records (FUSED_STORE_URI if None)
+            events_uri: Fire event state location (FIRE_EVENTS_URI if None)
+            output_uri: Location for risk and simulation results (FIRMS_WATCH_OUTPUT_URI if None)
+            queue_size: Maximum number of events with pending work
+        """
+        self.sources = sources
+        self.state_store = state_store or nasa_firms.IngestStateStore(nasa_firms.FIRMS_STATE_URI)
+        self.bbox = bbox
+        self.region = region
+        self.interval = interval
+        self.workers = workers
+        self.store = store or detection_store.DetectionStore(detection_store.DETECTION_STORE_URI)
+        self.fused_store = fused_store or detection_store.DetectionStore(detection_fusion.FUSED_STORE_URI)
+        self.events_uri = events_uri or fire_events.FIRE_EVENTS_URI
+        self.output = utils.open_storage(output_uri or FIRMS_WATCH_OUTPUT_URI)
+
+        self.queue_size = max(1, queue_size)
+        self.polls = 0
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.handled = 0
+        self.superseded = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        # Latest pending message per event id, oldest event first
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending_ready = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # ------ Polling ------
+
+    def poll(self) -> Dict[str, Any]:
+        """
+        Ingest changed sources once and queue a message for each changed event.
+
+        Returns:
+            Dict with the poll number, ingest results, fusion and event summaries
+        """
+        self.polls += 1
+        observed_at = time.time()
+        results = nasa_firms.ingest_sources(
+            self.sources, self.state_store, bbox=self.bbox, region=self.region, store=self.store
+        )
+        keys = [key for result in results.values() for key in result.get("s3_keys", [])]
+        fusion, events = nasa_firms.fuse_and_cluster(keys, self.store, self.fused_store, self.events_uri)
+
+        if keys:
+            records = {source: result.get("records_stored_s3", 0) for source, result in results.items()}
+            logger.info(f"New detections from poll {self.polls}: {records}")
+        updated = events.get("updated_event_ids", [])
+        if updated:
+            data = utils.open_storage(self.events_uri).read(fire_events.EVENTS_KEY)
+            features = {feature["id"]: feature for feature in json.loads(data)["features"]} if data else {}
+            for event_id in updated:
+                if event_id not in features:
+                    # Changed by old detections, but no longer active
+                    continue
+                self._publish({
+                    "poll": self.polls,
+                    "observed_at": observed_at,
+                    "event": features[event_id]["properties"]
+                })
+
+        logger.info(f"Watch poll {self.polls}: {len(keys)} new detection files, {len(updated)} events changed")
+        return {"poll": self.polls, "results": results, "fusion": fusion, "events": events}
+
+    def _publish(self, message: Dict[str, Any]):
+        """Queue an event message without blocking, replacing any pending one for the event."""
+        message["queued_at"] = time.time()
+        event_id = message["event"]["event_id"]
+        with self._pending_ready:
+            if event_id in self._pending:
+                # Latest wins; the event keeps its place in line
+                self._pending[event_id] = message
+                self.superseded += 1
+                return
+            if len(self._pending) >= self.queue_size:
+                dropped_id, _ = self._pending.popitem(last=False)
+                self.dropped += 1
+                logger.warning(f"Watch queue full; dropped pending work for {dropped_id}")
+            self._pending[event_id] = message
+            self._pending_ready.notify()
+
+    def run(self, max_polls: Optional[int] = None):
+        """
+        Poll until stopped, starting the consumers first.
+
+        A failed poll is logged and retried at the next interval.
+
+        Args:
+            max_polls: Stop after this many polls (run until stop() if None)
+        """
+        self.start_consumers()
+        polls = 0
+        while not self._stop.is_set() and (max_polls is None or polls < max_polls):
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Watch poll failed: {str(e)}")
+            polls += 1
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0.0))
+
+    # ------ Consumers ------
+
+    def start_consumers(self):
+        """Start the consumer threads if they are not running."""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._consume, name=f"firms-watch-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop polling and the consumers after their current message."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _consume(self):
+        while not self._stop.is_set():
+            with self._pending_ready:
+                if not self._pending:
+                    self._pending_ready.wait(0.5)
+                    continue
+                _, message = self._pending.popitem(last=False)
+            try:
+                self.handle(message)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"Error handling watch message for {message['event']['event_id']}: {str(e)}")
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Refresh the risk around a changed event and simulate its spread.
+
+        Args:
+            message: Event message from the queue
+
+        Returns:
+            Stored result
+        """
+        event = message["event"]
+        event_id = event["event_id"]
+
+        from models import risk_tiles
+
+        risk, raster = refresh_area_risk(event["bbox"])
+        perimeters = simulate_event_spread(event)
+        perimeter_at = time.time()
+
+        prefix = f"events/{event_id}/poll-{message['poll']}"
+        self.output.write(f"{prefix}/risk.npy", risk_tiles.array_to_bytes(raster))
+        self.output.write(f"{prefix}/spread.json", perimeters)
+        result = {
+            "event_id": event_id,
+            "poll": message["poll"],
+            "observed_at": message["observed_at"],
+            "queued_at": message["queued_at"],
+            "perimeter_at": perimeter_at,
+            "detection_to_perimeter_seconds": perimeter_at - message["observed_at"],
+            "risk": {**risk, "key": f"{prefix}/risk.npy"},
+            "spread_key": f"{prefix}/spread.json"
+        }
+        self.output.write(f"events/{event_id}/latest.json", json.dumps(result).encode("utf-8"))
+        with self._lock:
+            self.handled += 1
+            self.latencies.append(result["detection_to_perimeter_seconds"])
+        logger.info(f"Simulated {event_id} {result['detection_to_perimeter_seconds']:.2f} seconds after its detections were fetched")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get polling, queue and latency counters.
+
+        Returns:
+            Dict with counts and detection-to-perimeter latency percentiles
+        """
+        with self._lock:
+            latencies = np.asarray(self.latencies, dtype=float)
+            queued = len(self._pending)
+        return {
+            "polls": self.polls,
+            "queued": queued,
+            "handled": self.handled,
+            "superseded": self.superseded,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "latency_seconds": {
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "max": float(latencies.max())
+            } if len(latencies) else None
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch NASA FIRMS sources and react to new fire detections")
+    parser.add_argument("--sources", nargs="+", default=["VIIRS_SNPP"], choices=list(nasa_firms.FIRMS_SOURCES.keys()))
+    parser.add_argument("--region", help=f"Region to keep, one of {list(nasa_firms.FIRMS_REGIONS.keys())}")
+    parser.add_argument("--interval", type=float, default=FIRMS_WATCH_INTERVAL_SECONDS, help="Seconds between polls")
+    parser.add_argument("--workers", type=int, default=FIRMS_WATCH_WORKERS)
+    args = parser.parse_args()
+
+    watcher = FirmsWatcher(args.sources, region=args.region, interval=args.interval, workers=args.workers)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        print(json.dumps(watcher.stats(), indent=2))
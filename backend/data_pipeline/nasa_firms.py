@@ -1,69 +1,404 @@
 import os
+import io
 import logging
 import json
 import requests
 import datetime
 import time
-from typing import Dict, List, Optional, Union
-import boto3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, IO
+from urllib.parse import urlparse
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point
-import psycopg2
-from psycopg2.extras import execute_values
+from requests.adapters import HTTPAdapter
+
+from . import db, detection_fusion, detection_store, fire_events, utils
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Environment variables
-DB_CONNECTION_STRING = os.environ.get("DB_CONNECTION_STRING", "")
+DB_CONNECTION_STRING = db.DB_CONNECTION_STRING
 S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
 REGION = os.environ.get("REGION", "us-west-2")
 
 # NASA FIRMS API information
 # Note: Using the publicly available FIRMS data download
 # This doesn't require API key for the publicly available datasets
-FIRMS_BASE_URL = "https://firms.modaps.eosdis.nasa.gov/data/active_fire"
+# FIRMS_BASE_URL may point at a stub server or a local directory (path or file://) for testing
+FIRMS_BASE_URL = os.environ.get("FIRMS_BASE_URL", "https://firms.modaps.eosdis.nasa.gov/data/active_fire")
 FIRMS_SOURCES = {
     "MODIS": "c6/csv/MODIS_C6_Global_24h.csv",
     "VIIRS_SNPP": "suomi-npp-viirs-c2/csv/SUOMI_VIIRS_C2_Global_24h.csv",
     "VIIRS_NOAA": "noaa-20-viirs-c2/csv/J1_VIIRS_C2_Global_24h.csv"
 }
 
-# Initialize AWS clients
-s3_client = boto3.client("s3", region_name=REGION)
+# Regions detections are kept for, as (min_lon, min_lat, max_lon, max_lat); None keeps everything
+FIRMS_REGIONS = {
+    "western_us": (-125.0, 31.0, -102.0, 49.5),
+    "global": None
+}
+FIRMS_REGION = os.environ.get("FIRMS_REGION", "western_us")
+
+# Optional explicit bbox "min_lon,min_lat,max_lon,max_lat", overriding FIRMS_REGION
+FIRMS_BBOX = os.environ.get("FIRMS_BBOX", "")
+
+# Rows parsed per chunk while streaming the CSV
+FIRMS_CSV_CHUNK_ROWS = int(os.environ.get("FIRMS_CSV_CHUNK_ROWS", "50000"))
+
+# Compact column types for the FIRMS CSV products. Columns a product does not
+# have are ignored; unlisted columns keep pandas' inferred type.
+FIRMS_DTYPES = {
+    "latitude": "float32",
+    "longitude": "float32",
+    "brightness": "float32",
+    "bright_ti4": "float32",
+    "bright_ti5": "float32",
+    "bright_t31": "float32",
+    "scan": "float32",
+    "track": "float32",
+    "acq_date": "category",
+    "acq_time": "int16",
+    "satellite": "category",
+    "instrument": "category",
+    "version": "category",
+    "frp": "float32",
+    "daynight": "category"
+}
+
+# MODIS confidence is a 0-100 percentage; VIIRS uses the letters l, n and h
+FIRMS_CONFIDENCE_DTYPES = {
+    "MODIS": "int8",
+    "VIIRS_SNPP": "category",
+    "VIIRS_NOAA": "category"
+}
+
+# Per-source ingestion state (HTTP validators and high-water mark): s3://bucket/prefix or a local directory
+FIRMS_STATE_URI = os.environ.get("FIRMS_STATE_URI", f"s3://{S3_BUCKET}/firms_state")
+
+# Detections acquired this long before the high-water mark are still considered,
+# since FIRMS NRT files can pick up late-processed granules
+FIRMS_LOOKBACK_HOURS = float(os.environ.get("FIRMS_LOOKBACK_HOURS", "6"))
+
+# Sources are downloaded concurrently, but FIRMS serves them all from one
+# host: at most this many downloads per host run at once, and their starts
+# are spaced by at least the minimum interval
+FIRMS_HOST_CONCURRENCY = int(os.environ.get("FIRMS_HOST_CONCURRENCY", "3"))
+FIRMS_HOST_MIN_INTERVAL_SECONDS = float(os.environ.get("FIRMS_HOST_MIN_INTERVAL_SECONDS", "0.25"))
+
+# Connect/read timeout for FIRMS downloads
+FIRMS_REQUEST_TIMEOUT_SECONDS = float(os.environ.get("FIRMS_REQUEST_TIMEOUT_SECONDS", "30"))
+
+# Time kept back from the Lambda deadline to report results of sources
+# that did not finish
+FIRMS_DEADLINE_MARGIN_SECONDS = float(os.environ.get("FIRMS_DEADLINE_MARGIN_SECONDS", "1"))
+
+# Time kept back from source ingestion for fusing and clustering the run's
+# detections before the Lambda deadline
+FIRMS_POST_INGEST_SECONDS = float(os.environ.get("FIRMS_POST_INGEST_SECONDS", "3"))
+
+# Fuse each run's detections across sensors before clustering them
+DETECTION_FUSION_ENABLED = os.environ.get("DETECTION_FUSION_ENABLED", "true").lower() == "true"
+
+# Cluster each run's stored detections into fire events
+FIRE_EVENTS_ENABLED = os.environ.get("FIRE_EVENTS_ENABLED", "true").lower() == "true"
+
+# Pooled HTTP session shared by concurrent source downloads, reused across invocations
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=len(FIRMS_SOURCES)))
+http_session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=len(FIRMS_SOURCES)))
+
+
+class HostLimiter:
+    """Per-host politeness limits for concurrent downloads."""
+    
+    def __init__(self, concurrency: int = FIRMS_HOST_CONCURRENCY, min_interval: float = FIRMS_HOST_MIN_INTERVAL_SECONDS):
+        """
+        Initialize the limiter.
+        
+        Args:
+            concurrency: Maximum concurrent downloads per host
+            min_interval: Minimum seconds between download starts per host
+        """
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+    
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """
+        Hold one of a host's download slots for the duration of the block.
+        
+        Args:
+            url: URL being downloaded; local paths are not limited
+        """
+        host = urlparse(url).netloc
+        if not host or url.startswith("file://"):
+            yield
+            return
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.concurrency))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+host_limiter = HostLimiter()
+
+
+class IngestDeadlineExceeded(Exception):
+    """Raised when a source's ingestion reaches its deadline before writing."""
+
+
+class IngestDeadline:
+    """
+    Deadline shared by a source's ingestion thread and the caller waiting on it.
+    
+    The ingestion checks it while parsing and before each write, and raises
+    IngestDeadlineExceeded once it has passed or the caller has abandoned the
+    source. Saving the source's state is the commit point: once that has
+    begun, the source can no longer be abandoned and the caller waits for it.
+    """
+    
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Initialize the deadline.
+        
+        Args:
+            timeout: Seconds from now, or None for no deadline
+        """
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._committed = False
+    
+    def _check(self, step: str):
+        if self._abandoned or (self.expires_at is not None and time.monotonic() >= self.expires_at):
+            self._abandoned = True
+            raise IngestDeadlineExceeded(f"Deadline passed before {step}")
+    
+    def check(self, step: str):
+        """Raise IngestDeadlineExceeded if the deadline has passed."""
+        with self._lock:
+            self._check(step)
+    
+    def commit(self, step: str):
+        """Check the deadline and, if it has not passed, keep the source from being abandoned."""
+        with self._lock:
+            self._check(step)
+            self._committed = True
+    
+    def abandon(self) -> bool:
+        """
+        Stop the source from writing anything more.
+        
+        Returns:
+            False if the source is already saving its state
+        """
+        with self._lock:
+            if self._committed:
+                return False
+            self._abandoned = True
+            return True
+
+
+def get_region_bbox(region: Optional[str] = None) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Get the bbox detections are filtered to.
+    
+    Args:
+        region: Name from FIRMS_REGIONS (FIRMS_BBOX or FIRMS_REGION if None)
+        
+    Returns:
+        (min_lon, min_lat, max_lon, max_lat), or None to keep every detection
+    """
+    if region is None:
+        if FIRMS_BBOX:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in FIRMS_BBOX.split(","))
+            return (min_lon, min_lat, max_lon, max_lat)
+        region = FIRMS_REGION
+    if region not in FIRMS_REGIONS:
+        raise ValueError(f"Invalid region: {region}. Must be one of {list(FIRMS_REGIONS.keys())}")
+    return FIRMS_REGIONS[region]
 
 
-def fetch_firms_data(source: str = "VIIRS_SNPP") -> pd.DataFrame:
+def open_firms_stream(
+    url: str,
+    validators: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[IO[bytes]], Optional[requests.Response], Dict[str, str]]:
+    """
+    Open a FIRMS CSV for streaming reads, unless it is unchanged.
+    
+    HTTP sources are requested conditionally with If-None-Match and
+    If-Modified-Since; local files compare their modification time.
+    
+    Args:
+        url: http(s) URL, file:// URL or local path
+        validators: "etag" and "last_modified" from the previous fetch
+        
+    Returns:
+        Tuple of (binary file object or None if not modified, HTTP response
+        to close or None, validators of the current version)
+    """
+    validators = validators or {}
+    if url.startswith(("http://", "https://")):
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = http_session.get(url, timeout=FIRMS_REQUEST_TIMEOUT_SECONDS, stream=True, headers=headers)
+        if response.status_code == 304:
+            response.close()
+            return None, None, validators
+        response.raise_for_status()
+        current = {
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", "")
+        }
+        # Let urllib3 undo any gzip/deflate transfer compression while streaming
+        response.raw.decode_content = True
+        return response.raw, response, current
+    
+    path = url[len("file://"):] if url.startswith("file://") else url
+    current = {"etag": "", "last_modified": str(os.stat(path).st_mtime_ns)}
+    if validators.get("last_modified") == current["last_modified"]:
+        return None, None, validators
+    return open(path, "rb"), None, current
+
+
+def read_firms_csv(
+    stream: IO[bytes],
+    source: str,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    chunk_rows: int = FIRMS_CSV_CHUNK_ROWS,
+    deadline: Optional[IngestDeadline] = None
+) -> pd.DataFrame:
+    """
+    Parse a FIRMS CSV in chunks, keeping only detections inside a bbox.
+    
+    Only one chunk of the full file is held at a time, so peak memory scales
+    with the detections kept rather than the global file.
+    
+    Args:
+        stream: Binary file object with the CSV
+        source: Data source, for its column types
+        bbox: (min_lon, min_lat, max_lon, max_lat), or None to keep everything
+        chunk_rows: Rows parsed per chunk
+        deadline: Checked before each chunk
+        
+    Returns:
+        DataFrame of kept detections
+    """
+    dtypes = {**FIRMS_DTYPES, "confidence": FIRMS_CONFIDENCE_DTYPES.get(source, "category")}
+    kept = []
+    empty = pd.DataFrame()
+    total_rows = 0
+    for chunk in pd.read_csv(stream, dtype=dtypes, chunksize=chunk_rows):
+        if deadline is not None:
+            deadline.check("parsing the whole file")
+        if total_rows == 0:
+            empty = chunk.iloc[0:0]
+        total_rows += len(chunk)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            inside = (
+                chunk["longitude"].between(min_lon, max_lon).to_numpy()
+                & chunk["latitude"].between(min_lat, max_lat).to_numpy()
+            )
+            chunk = chunk[inside]
+        if len(chunk):
+            kept.append(chunk)
+    
+    if not kept:
+        logger.info(f"Kept 0 of {total_rows} detections inside {bbox}")
+        return empty
+    
+    # Chunks with different categories concatenate to object columns
+    df = pd.concat(kept, ignore_index=True)
+    for column, dtype in dtypes.items():
+        if dtype == "category" and column in df.columns and df[column].dtype != "category":
+            df[column] = df[column].astype("category")
+    logger.info(f"Kept {len(df)} of {total_rows} detections inside {bbox}")
+    return df
+
+
+def fetch_firms_data(
+    source: str = "VIIRS_SNPP",
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    region: Optional[str] = None
+) -> pd.DataFrame:
     """
     Fetch active fire data from NASA FIRMS.
     
+    The CSV is parsed while it downloads and filtered to the configured region,
+    without staging the global file on disk or in memory.
+    
     Args:
         source: Data source (MODIS, VIIRS_SNPP, or VIIRS_NOAA)
+        bbox: (min_lon, min_lat, max_lon, max_lat) to keep; overrides region
+        region: Name from FIRMS_REGIONS (FIRMS_BBOX or FIRMS_REGION if both are None)
         
     Returns:
         DataFrame with fire detection data
     """
+    df, _ = fetch_firms_updates(source, None, bbox, region)
+    return df
+
+
+def fetch_firms_updates(
+    source: str,
+    validators: Optional[Dict[str, str]],
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    region: Optional[str] = None,
+    deadline: Optional[IngestDeadline] = None
+) -> Tuple[Optional[pd.DataFrame], Dict[str, str]]:
+    """
+    Fetch active fire data from NASA FIRMS if it changed since the last fetch.
+    
+    Args:
+        source: Data source (MODIS, VIIRS_SNPP, or VIIRS_NOAA)
+        validators: "etag" and "last_modified" from the previous fetch, or None
+        bbox: (min_lon, min_lat, max_lon, max_lat) to keep; overrides region
+        region: Name from FIRMS_REGIONS (FIRMS_BBOX or FIRMS_REGION if both are None)
+        deadline: Checked while the file is parsed
+        
+    Returns:
+        Tuple of (DataFrame, or None if the file is unchanged, current validators)
+    """
     if source not in FIRMS_SOURCES:
         raise ValueError(f"Invalid source: {source}. Must be one of {list(FIRMS_SOURCES.keys())}")
+    if bbox is None:
+        bbox = get_region_bbox(region)
     
     url = f"{FIRMS_BASE_URL}/{FIRMS_SOURCES[source]}"
     logger.info(f"Fetching FIRMS data from {url}")
     
     try:
-        # Download CSV file
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        # Save to temporary CSV and load as DataFrame
-        with open("/tmp/firms_data.csv", "wb") as f:
-            f.write(response.content)
-        
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv("/tmp/firms_data.csv")
+        with host_limiter.slot(url):
+            stream, response, current = open_firms_stream(url, validators)
+            if stream is None:
+                logger.info(f"FIRMS {source} file has not changed since the last fetch")
+                return None, current
+            try:
+                df = read_firms_csv(stream, source, bbox, deadline=deadline)
+            finally:
+                stream.close()
+                if response is not None:
+                    response.close()
         logger.info(f"Successfully fetched {len(df)} fire detections from {source}")
-        return df
+        return df, current
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching FIRMS data: {str(e)}")
@@ -120,29 +455,31 @@ def process_firms_data(df: pd.DataFrame, source: str) -> gpd.GeoDataFrame:
     # Standardize column names
     cols = column_mapping[source]
     
-    # Select and rename columns
+    # Select and rename columns (the mapping is product column -> standard name)
     try:
-        df = df[[
-            cols["latitude"], cols["longitude"], 
-            cols["acq_date"], cols["acq_time"],
-            cols["confidence"], cols["brightness"], cols["frp"]
-        ]]
-        
-        df.columns = ["latitude", "longitude", "acq_date", "acq_time", 
-                    "confidence", "brightness", "frp"]
-        
-        # Convert acquisition date and time to datetime
-        df["acquisition_datetime"] = pd.to_datetime(
-            df["acq_date"] + " " + df["acq_time"].astype(str).str.zfill(4),
-            format="%Y-%m-%d %H%M"
+        df = df[list(cols.keys())].rename(columns=cols)
+        
+        # Compact numeric columns
+        for column in ("latitude", "longitude", "brightness", "frp"):
+            df[column] = df[column].astype(np.float32)
+        
+        # Parse each distinct date once, then add HHMM acquisition times as minutes
+        acq_date = df["acq_date"].astype("category")
+        dates = pd.to_datetime(acq_date.cat.categories.astype(str), format="%Y-%m-%d")
+        acq_time = df["acq_time"].to_numpy(dtype=np.int64)
+        df["acquisition_datetime"] = (
+            dates.values[acq_date.cat.codes.to_numpy()]
+            + ((acq_time // 100) * 60 + acq_time % 100).astype("timedelta64[m]")
         )
+        df["acq_date"] = acq_date
+        df["confidence"] = df["confidence"].astype("category")
         
         # Add source information
-        df["source"] = source
+        df["source"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[source])
         df["collection_datetime"] = datetime.datetime.utcnow().isoformat()
         
         # Create geometry column for GeoPandas
-        geometry = [Point(xy) for xy in zip(df.longitude, df.latitude)]
+        geometry = gpd.points_from_xy(df["longitude"], df["latitude"], crs="EPSG:4326")
         gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
         
         logger.info(f"Successfully processed {len(gdf)} fire detections")
@@ -153,134 +490,344 @@ def process_firms_data(df: pd.DataFrame, source: str) -> gpd.GeoDataFrame:
         raise
 
 
-def store_in_s3(gdf: gpd.GeoDataFrame, source: str) -> str:
+def store_in_s3(
+    gdf: gpd.GeoDataFrame,
+    source: str,
+    store: Optional[detection_store.DetectionStore] = None
+) -> List[str]:
     """
-    Store the GeoDataFrame in S3 as GeoJSON.
+    Store detections as GeoParquet partitioned by source and acquisition date.
     
     Args:
         gdf: GeoDataFrame with fire detection data
         source: Data source name
+        store: DetectionStore to write to (DETECTION_STORE_URI if None)
         
     Returns:
-        S3 key where data was stored
+        Keys of the files written
     """
-    # Create timestamp for filename
-    timestamp = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    s3_key = f"firms_data/{source}_{timestamp}.geojson"
-    
-    logger.info(f"Storing {len(gdf)} records in S3: {s3_key}")
+    store = store or detection_store.DetectionStore(detection_store.DETECTION_STORE_URI)
+    logger.info(f"Storing {len(gdf)} records in {store.uri}")
     
     try:
-        # Convert to GeoJSON and store in S3
-        geo_json = gdf.to_json()
-        s3_client.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=geo_json,
-            ContentType="application/json"
-        )
-        logger.info(f"Successfully stored data in S3: s3://{S3_BUCKET}/{s3_key}")
-        return s3_key
+        return store.write(gdf, source)
         
     except Exception as e:
-        logger.error(f"Error storing data in S3: {str(e)}")
+        logger.error(f"Error storing detections: {str(e)}")
         raise
 
 
+# Columns streamed to the staging table, in COPY order
+COPY_COLUMNS = [
+    "latitude", "longitude", "acq_date", "acq_time", "confidence",
+    "brightness", "frp", "acquisition_datetime", "source", "collection_datetime"
+]
+
+# Rows formatted per COPY chunk, bounding the text buffer's size
+COPY_CHUNK_ROWS = int(os.environ.get("COPY_CHUNK_ROWS", "100000"))
+
+
+def copy_buffers(gdf: gpd.GeoDataFrame, chunk_rows: int = COPY_CHUNK_ROWS) -> Iterator[io.StringIO]:
+    """
+    Format detections as CSV buffers for COPY FROM STDIN.
+    
+    Columns are formatted a chunk at a time by pandas' CSV writer rather than
+    per row in Python; geometries are rebuilt from longitude and latitude in
+    the database, so they are not serialized.
+    
+    Args:
+        gdf: Processed detections
+        chunk_rows: Rows per buffer
+        
+    Yields:
+        StringIO positioned at the start of each chunk's CSV
+    """
+    frame = pd.DataFrame(gdf[COPY_COLUMNS])
+    for start in range(0, len(frame), chunk_rows):
+        buffer = io.StringIO()
+        frame.iloc[start:start + chunk_rows].to_csv(buffer, header=False, index=False, date_format="%Y-%m-%d %H:%M:%S")
+        buffer.seek(0)
+        yield buffer
+
+
 def insert_into_database(gdf: gpd.GeoDataFrame) -> int:
     """
     Insert fire detection data into PostgreSQL with PostGIS.
     
+    Rows are streamed with COPY into a temporary staging table and moved
+    into fire_detections with one INSERT ... SELECT, which builds the point
+    geometries and skips detections already stored.
+    
     Args:
         gdf: GeoDataFrame with fire detection data
         
     Returns:
-        Number of records inserted
+        Number of new records inserted; detections already stored (same
+        source, location and acquisition time) are skipped
     """
     if not DB_CONNECTION_STRING:
         logger.warning("Database connection string not provided. Skipping database insertion.")
         return 0
     
     logger.info(f"Inserting {len(gdf)} records into database")
+    start_time = time.time()
     
     try:
-        conn = psycopg2.connect(DB_CONNECTION_STRING)
-        cur = conn.cursor()
-        
-        # Create table if it doesn't exist
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS fire_detections (
-            id SERIAL PRIMARY KEY,
-            latitude FLOAT NOT NULL,
-            longitude FLOAT NOT NULL,
-            acq_date DATE NOT NULL,
-            acq_time VARCHAR(4) NOT NULL,
-            confidence VARCHAR(20),
-            brightness FLOAT,
-            frp FLOAT,
-            acquisition_datetime TIMESTAMP NOT NULL,
-            source VARCHAR(20) NOT NULL,
-            collection_datetime TIMESTAMP NOT NULL,
-            geom GEOMETRY(Point, 4326) NOT NULL
-        );
-        CREATE INDEX IF NOT EXISTS idx_fire_detections_geom ON fire_detections USING GIST(geom);
-        CREATE INDEX IF NOT EXISTS idx_fire_detections_datetime ON fire_detections(acquisition_datetime);
-        """
-        cur.execute(create_table_sql)
-        
-        # Prepare data for insertion
-        columns = [
-            "latitude", "longitude", "acq_date", "acq_time", 
-            "confidence", "brightness", "frp", 
-            "acquisition_datetime", "source", "collection_datetime", "geom"
-        ]
-        
-        values = []
-        for _, row in gdf.iterrows():
-            values.append((
-                float(row.latitude),
-                float(row.longitude),
-                row.acq_date,
-                row.acq_time,
-                row.confidence,
-                float(row.brightness),
-                float(row.frp),
-                row.acquisition_datetime,
-                row.source,
-                datetime.datetime.fromisoformat(row.collection_datetime),
-                f"SRID=4326;POINT({row.longitude} {row.latitude})"
-            ))
-        
-        # Insert data using execute_values for better performance
-        insert_sql = f"""
-        INSERT INTO fire_detections 
-        (latitude, longitude, acq_date, acq_time, confidence, brightness, frp, 
-         acquisition_datetime, source, collection_datetime, geom)
-        VALUES %s
-        """
-        execute_values(cur, insert_sql, values)
-        
-        # Commit changes
-        conn.commit()
-        logger.info(f"Successfully inserted {len(values)} records into database")
-        
-        # Close connection
-        cur.close()
-        conn.close()
+        db.ensure_schema()
+        with db.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                CREATE TEMP TABLE fire_detections_stage (
+                    latitude FLOAT, longitude FLOAT, acq_date DATE, acq_time INTEGER,
+                    confidence VARCHAR(20), brightness FLOAT, frp FLOAT,
+                    acquisition_datetime TIMESTAMP, source VARCHAR(20), collection_datetime TIMESTAMP
+                ) ON COMMIT DROP
+                """)
+                copy_sql = f"COPY fire_detections_stage ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+                for buffer in copy_buffers(gdf, COPY_CHUNK_ROWS):
+                    cur.copy_expert(copy_sql, buffer)
+                
+                cur.execute("""
+                INSERT INTO fire_detections
+                (latitude, longitude, acq_date, acq_time, confidence, brightness, frp,
+                 acquisition_datetime, source, collection_datetime, geom)
+                SELECT latitude, longitude, acq_date, lpad(acq_time::text, 4, '0'), confidence, brightness, frp,
+                       acquisition_datetime, source, collection_datetime,
+                       ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+                FROM fire_detections_stage
+                ON CONFLICT (source, latitude, longitude, acquisition_datetime) DO NOTHING
+                """)
+                inserted = cur.rowcount
         
-        return len(values)
+        elapsed = time.time() - start_time
+        logger.info(
+            f"Successfully inserted {inserted} new records into database ({len(gdf) - inserted} already stored) "
+            f"in {elapsed:.2f} seconds"
+        )
+        return inserted
         
     except Exception as e:
         logger.error(f"Error inserting data into database: {str(e)}")
-        if 'conn' in locals() and conn is not None:
-            conn.close()
         raise
 
 
+class IngestStateStore:
+    """Per-source ingestion state, stored as JSON in S3 or a local directory."""
+    
+    def __init__(self, uri: str = FIRMS_STATE_URI):
+        """
+        Initialize the store.
+        
+        Args:
+            uri: s3://bucket/prefix or a local directory
+        """
+        self.uri = uri
+        self.storage = utils.open_storage(uri)
+    
+    def get(self, source: str) -> Dict[str, str]:
+        """Get a source's state, or an empty dict before its first run."""
+        data = self.storage.read(f"{source}.json")
+        return json.loads(data) if data is not None else {}
+    
+    def put(self, source: str, state: Dict[str, str]):
+        """Save a source's state."""
+        self.storage.write(f"{source}.json", json.dumps(state).encode("utf-8"), "application/json")
+
+
+def ingest_source(
+    source: str,
+    state_store: IngestStateStore,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    region: Optional[str] = None,
+    store: Optional[detection_store.DetectionStore] = None,
+    deadline: Optional[IngestDeadline] = None
+) -> Dict[str, Union[int, str, List[str], None]]:
+    """
+    Ingest detections from one source that are new since its last run.
+    
+    Unchanged files are skipped with a conditional request. Otherwise only
+    detections after the source's high-water mark (less FIRMS_LOOKBACK_HOURS)
+    are stored, and the database's natural key drops any that remain
+    duplicates. State is saved only after the detections are stored, so a
+    failed run is retried in full. With a deadline, nothing is stored or
+    saved once it has passed; IngestDeadlineExceeded is raised instead.
+    
+    Args:
+        source: Data source
+        state_store: Ingestion state store
+        bbox: (min_lon, min_lat, max_lon, max_lat) to keep; overrides region
+        region: Name from FIRMS_REGIONS
+        store: DetectionStore to write to (DETECTION_STORE_URI if None)
+        deadline: Checked while parsing and before each write
+        
+    Returns:
+        Dict with the run's record counts, stored file keys and high-water mark
+    """
+    deadline = deadline or IngestDeadline()
+    state = state_store.get(source)
+    df, validators = fetch_firms_updates(source, state, bbox, region, deadline)
+    if df is None:
+        return {
+            "status": "not_modified",
+            "records_processed": 0,
+            "records_stored_s3": 0,
+            "records_stored_db": 0,
+            "s3_keys": [],
+            "high_water_mark": state.get("high_water_mark")
+        }
+    
+    gdf = process_firms_data(df, source)
+    fetched = len(gdf)
+    high_water_mark = state.get("high_water_mark")
+    if high_water_mark:
+        cutoff = pd.Timestamp(high_water_mark) - pd.Timedelta(hours=FIRMS_LOOKBACK_HOURS)
+        gdf = gdf[gdf["acquisition_datetime"] > cutoff]
+    
+    s3_keys = []
+    db_records = 0
+    if len(gdf):
+        deadline.check("storing detections")
+        s3_keys = store_in_s3(gdf, source, store)
+        deadline.check("inserting detections into the database")
+        db_records = insert_into_database(gdf)
+        newest = gdf["acquisition_datetime"].max().isoformat()
+        high_water_mark = max(high_water_mark, newest) if high_water_mark else newest
+    deadline.commit("saving ingest state")
+    state_store.put(source, {
+        **validators,
+        "high_water_mark": high_water_mark,
+        "updated_at": datetime.datetime.utcnow().isoformat()
+    })
+    logger.info(f"{source}: {fetched} detections fetched, {len(gdf)} after the high-water mark, {db_records} new in database")
+    
+    return {
+        "status": "updated",
+        "records_processed": fetched,
+        "records_stored_s3": len(gdf),
+        "records_stored_db": db_records,
+        "s3_keys": s3_keys,
+        "high_water_mark": high_water_mark
+    }
+
+
+def ingest_sources(
+    sources: List[str],
+    state_store: IngestStateStore,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    region: Optional[str] = None,
+    timeout: Optional[float] = None,
+    store: Optional[detection_store.DetectionStore] = None
+) -> Dict[str, Dict[str, Union[int, str, List[str], None]]]:
+    """
+    Ingest several sources concurrently.
+    
+    Each source is fetched, processed and stored on its own thread, so a run
+    takes about as long as its slowest source. A source that fails or is
+    still running at the timeout is reported with status "error" or
+    "timeout" without affecting the others. A timed-out source is abandoned:
+    its thread stops at its next deadline check and never saves its state,
+    so the next run fetches it again and stores, fuses and clusters its
+    detections, as with any lookback overlap. A source already saving its
+    state at the timeout is waited for and reported normally.
+    
+    Args:
+        sources: Data sources
+        state_store: Ingestion state store
+        bbox: (min_lon, min_lat, max_lon, max_lat) to keep; overrides region
+        region: Name from FIRMS_REGIONS
+        timeout: Seconds to wait for the sources, or None to wait for all
+        store: DetectionStore to write to (DETECTION_STORE_URI if None)
+        
+    Returns:
+        Dict mapping each source to its ingest_source result or failure
+    """
+    results = {}
+    valid = []
+    for source in sources:
+        if source not in FIRMS_SOURCES:
+            logger.warning(f"Skipping invalid source: {source}")
+            results[source] = {"status": "error", "error": f"Invalid source: {source}"}
+        elif source not in valid:
+            valid.append(source)
+    if not valid:
+        return results
+    
+    deadlines = {source: IngestDeadline(timeout) for source in valid}
+    executor = ThreadPoolExecutor(max_workers=len(valid), thread_name_prefix="firms-ingest")
+    try:
+        futures = {
+            executor.submit(ingest_source, source, state_store, bbox, region, store, deadlines[source]): source
+            for source in valid
+        }
+        wait(futures, timeout=timeout)
+        for future, source in futures.items():
+            # exception() below waits for a source that is saving its state
+            if not future.done() and deadlines[source].abandon():
+                logger.error(f"{source}: still running after {timeout:.1f} seconds")
+                results[source] = {"status": "timeout"}
+            elif isinstance(future.exception(), IngestDeadlineExceeded):
+                logger.error(f"{source}: {future.exception()}")
+                results[source] = {"status": "timeout"}
+            elif future.exception() is not None:
+                logger.error(f"{source}: ingestion failed: {future.exception()}")
+                results[source] = {"status": "error", "error": str(future.exception())}
+            else:
+                results[source] = future.result()
+    finally:
+        # Don't block on sources that overran; they stop at their next deadline check
+        executor.shutdown(wait=False)
+    return results
+
+
+def fuse_and_cluster(
+    keys: List[str],
+    store: Optional[detection_store.DetectionStore] = None,
+    fused_store: Optional[detection_store.DetectionStore] = None,
+    events_uri: Optional[str] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Fuse newly stored detections across sensors, then group them into fire events.
+    
+    Failures here leave the stored detections and ingest state intact; they
+    are logged and reported as {"error": ...}. If fusion fails, events are
+    clustered from the raw detections.
+    
+    Args:
+        keys: Detection file keys written by the run
+        store: DetectionStore holding the files (DETECTION_STORE_URI if None)
+        fused_store: DetectionStore for fused records (FUSED_STORE_URI if None)
+        events_uri: Fire event state location (FIRE_EVENTS_URI if None)
+        
+    Returns:
+        Tuple of (fusion summary, fire event summary)
+    """
+    fusion, events = {}, {}
+    event_keys, event_store = keys, store
+    if keys and DETECTION_FUSION_ENABLED:
+        try:
+            fused_store = fused_store or detection_store.DetectionStore(detection_fusion.FUSED_STORE_URI)
+            fused_keys, fusion = detection_fusion.fuse_stored(keys, store=store, fused_store=fused_store)
+            event_keys, event_store = fused_keys, fused_store
+        except Exception as e:
+            logger.error(f"Error fusing detections: {str(e)}")
+            fusion = {"error": str(e)}
+    if event_keys and FIRE_EVENTS_ENABLED:
+        try:
+            events = fire_events.update_events(event_keys, store=event_store, uri=events_uri)
+        except Exception as e:
+            logger.error(f"Error updating fire events: {str(e)}")
+            events = {"error": str(e)}
+    return fusion, events
+
+
 def handler(event, context):
     """
     AWS Lambda handler function to fetch and process NASA FIRMS data.
     
+    Sources are ingested within the invocation's remaining time less
+    FIRMS_POST_INGEST_SECONDS, kept for fusing and clustering the stored
+    detections, and FIRMS_DEADLINE_MARGIN_SECONDS for reporting.
+    
     Args:
         event: AWS Lambda event data
         context: AWS Lambda context
@@ -292,53 +839,41 @@ def handler(event, context):
     
     results = {}
     sources = event.get("sources", ["VIIRS_SNPP"])  # Default to VIIRS_SNPP if not specified
+    bbox = tuple(event["bbox"]) if event.get("bbox") else None
+    region = event.get("region")
     
     start_time = time.time()
-    total_records = 0
+    timeout = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        timeout = max(
+            context.get_remaining_time_in_millis() / 1000 - FIRMS_DEADLINE_MARGIN_SECONDS - FIRMS_POST_INGEST_SECONDS,
+            0.0
+        )
     
     try:
-        for source in sources:
-            if source not in FIRMS_SOURCES:
-                logger.warning(f"Skipping invalid source: {source}")
-                continue
-                
-            logger.info(f"Processing source: {source}")
-            
-            # Fetch data
-            df = fetch_firms_data(source)
-            
-            # Process data
-            gdf = process_firms_data(df, source)
-            
-            # Store in S3
-            s3_key = store_in_s3(gdf, source)
-            
-            # Insert into database
-            db_records = insert_into_database(gdf)
-            
-            # Record results
-            results[source] = {
-                "records_processed": len(gdf),
-                "records_stored_s3": len(gdf),
-                "records_stored_db": db_records,
-                "s3_key": s3_key
-            }
-            
-            total_records += len(gdf)
-            
-            # Small delay to avoid hitting rate limits
-            time.sleep(1)
+        results = ingest_sources(sources, IngestStateStore(FIRMS_STATE_URI), bbox=bbox, region=region, timeout=timeout)
+        total_records = sum(result.get("records_stored_s3", 0) for result in results.values())
+        failed = [source for source, result in results.items() if result["status"] in ("error", "timeout")]
+        
+        keys = [key for result in results.values() for key in result.get("s3_keys", [])]
+        fusion, events = fuse_and_cluster(keys)
         
         processing_time = time.time() - start_time
         logger.info(f"NASA FIRMS data processing completed in {processing_time:.2f} seconds, {total_records} records processed")
         
+        # Partial success still returns 200; failed sources are listed and retried next run
+        succeeded = len(results) - len(failed)
         return {
-            "statusCode": 200,
+            "statusCode": 200 if succeeded or not results else 500,
             "body": json.dumps({
-                "message": "Successfully processed NASA FIRMS data",
+                "message": "Successfully processed NASA FIRMS data" if not failed
+                           else f"Processed NASA FIRMS data; failed sources: {', '.join(failed)}",
                 "total_records": total_records,
                 "processing_time_seconds": processing_time,
-                "results": results
+                "failed_sources": failed,
+                "results": results,
+                "fusion": fusion,
+                "events": events
             })
         }
         
@@ -350,4 +885,4 @@ def handler(event, context):
                 "message": f"Error processing NASA FIRMS data: {str(e)}",
                 "results": results
             })
-        } 
\ No newline at end of file
+        } 
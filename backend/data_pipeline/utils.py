@@ -5,6 +5,7 @@ Utility functions for data pipeline operations.
 import os
 import logging
 import json
+import uuid
 import boto3
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
@@ -126,4 +127,141 @@ def format_date(date: datetime, format_str: str = '%Y-%m-%d') -> str:
     Returns:
         Formatted date string
     """
-    return date.strftime(format_str) 
\ No newline at end of file
+    return date.strftime(format_str) 
+
+
+class LocalStorage:
+    """
+    Objects stored as files under a local directory.
+    
+    This and S3Storage are the one object storage interface shared by the
+    detection store, ingest state, risk tiles and simulation jobs.
+    """
+    
+    def __init__(self, root: str):
+        """
+        Initialize the storage.
+        
+        Args:
+            root: Directory holding the objects
+        """
+        self.root = root
+    
+    def read(self, key: str) -> Optional[bytes]:
+        """Read an object, or None if it does not exist."""
+        try:
+            with open(os.path.join(self.root, key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def write(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Write an object atomically."""
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def open_input(self, key: str) -> Any:
+        """
+        Open an object as a seekable binary file.
+        
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        return open(os.path.join(self.root, key), "rb")
+    
+    def delete(self, key: str):
+        """Remove an object if it exists."""
+        try:
+            os.remove(os.path.join(self.root, key))
+        except FileNotFoundError:
+            pass
+    
+    def list(self, prefix: str) -> List[str]:
+        """List object keys directly under a prefix."""
+        directory = os.path.join(self.root, prefix)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            f"{prefix}/{name}" for name in os.listdir(directory)
+            if not name.endswith(".tmp") and os.path.isfile(os.path.join(directory, name))
+        )
+
+
+class S3Storage:
+    """Objects stored under an S3 prefix, with the LocalStorage interface."""
+    
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None):
+        """
+        Initialize the storage.
+        
+        Args:
+            bucket: S3 bucket name
+            prefix: Key prefix
+            client: boto3 S3 client (created if not given)
+        """
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = client or boto3.client("s3", region_name=os.environ.get("REGION", "us-west-2"))
+        self._filesystem = None
+    
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+    
+    def read(self, key: str) -> Optional[bytes]:
+        """Read an object, or None if it does not exist."""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+    
+    def write(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Write an object."""
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ContentType=content_type)
+    
+    def open_input(self, key: str) -> Any:
+        """
+        Open an object as a seekable binary file.
+        
+        Reads become ranged GETs, so readers that seek, such as Parquet
+        footers and selected column chunks, fetch only the bytes they use.
+        
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        if self._filesystem is None:
+            from pyarrow import fs
+            self._filesystem = fs.S3FileSystem(region=self.client.meta.region_name)
+        return self._filesystem.open_input_file(f"{self.bucket}/{self._key(key)}")
+    
+    def delete(self, key: str):
+        """Remove an object if it exists."""
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+    
+    def list(self, prefix: str) -> List[str]:
+        """List object keys directly under a prefix."""
+        keys = []
+        start = len(self._key(""))
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix) + "/", Delimiter="/"):
+            keys.extend(obj["Key"][start:] for obj in page.get("Contents", []))
+        return sorted(keys)
+
+
+def open_storage(uri: str):
+    """
+    Open object storage for a URI.
+    
+    Args:
+        uri: s3://bucket/prefix or a local directory
+        
+    Returns:
+        LocalStorage or S3Storage
+    """
+    if uri.startswith("s3://"):
+        bucket, _, prefix = uri[len("s3://"):].partition("/")
+        return S3Storage(bucket, prefix)
+    return LocalStorage(uri)
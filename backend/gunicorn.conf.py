@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for running the API with multiple worker processes.
+
+Usage (from the backend directory):
+    gunicorn api.main:app -c gunicorn.conf.py
+
+The app and its model artifacts are loaded once in the master process before
+workers are forked, so every worker shares the same model memory pages
+copy-on-write instead of holding its own copy. Only loading happens before the
+fork: the warm-up prediction and simulation start xgboost/OpenMP threads,
+which do not survive a fork, so each worker runs them from the app's startup
+hook and reports readiness on /ready.
+"""
+
+import gc
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", str(min(4, multiprocessing.cpu_count()))))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.environ.get("WORKER_TIMEOUT_SECONDS", "60"))
+
+# Import the app in the master so module-level state is inherited by workers
+preload_app = True
+
+
+def on_starting(server):
+    """Load model artifacts in the master before any worker is forked."""
+    from models import warmup
+
+    result = warmup.warm_up([step for step in warmup.PRELOAD_STEPS if step in warmup.WARMUP_STEPS])
+    server.log.info(f"Preloaded before fork: {sorted(result['steps'])}")
+
+    # Move everything loaded so far out of the collector's generations, so
+    # collections in the workers do not write to (and un-share) these pages
+    gc.freeze()
@@ -0,0 +1,12 @@
+"""
+Lambda entry point for the nightly risk tile build.
+
+Loads the model artifacts during Lambda initialization, then builds tiles
+with risk_tiles.handler.
+"""
+
+from models import risk_tiles, warmup
+
+warmup.warm_lambda(["models"])
+
+handler = risk_tiles.handler
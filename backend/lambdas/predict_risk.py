@@ -0,0 +1,12 @@
+"""
+Lambda entry point for wildfire risk prediction.
+
+Loads the model artifacts and warms the scoring code path during Lambda
+initialization, then serves requests with risk_prediction.handler.
+"""
+
+from models import risk_prediction, warmup
+
+warmup.warm_lambda(["models", "risk"])
+
+handler = risk_prediction.handler
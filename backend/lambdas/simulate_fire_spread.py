@@ -0,0 +1,12 @@
+"""
+Lambda entry point for fire spread simulation.
+
+Builds the UTM transformers and warms the simulation code path during Lambda
+initialization, then serves requests with fire_spread.handler.
+"""
+
+from models import fire_spread, warmup
+
+warmup.warm_lambda(["transformers", "spread"])
+
+handler = fire_spread.handler
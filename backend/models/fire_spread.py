@@ -3,8 +3,9 @@ import json
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Tuple, Optional, Union
+from typing import Dict, List, Any, Tuple, Optional, Union, Callable
 import math
+import functools
 
 import boto3
 import numpy as np
@@ -27,6 +28,31 @@ WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "")
 # Initialize AWS clients
 s3_client = boto3.client("s3", region_name=REGION)
 
+# UTM zones grid_setup picks for simulations across the Western US (-125 to -102 longitude)
+WESTERN_US_UTM_ZONES = sorted({int(lon / 6) + 31 for lon in range(-125, -101)})
+
+
+@functools.lru_cache(maxsize=64)
+def get_utm_transformers(utm_zone: int) -> Tuple[Transformer, Transformer]:
+    """
+    Get WGS84 <-> UTM transformers for a zone, built once per process.
+    
+    Constructing a Transformer parses the CRS definitions and searches the PROJ
+    database, which costs far more than the transforms a simulation runs.
+    
+    Args:
+        utm_zone: UTM zone number
+        
+    Returns:
+        Tuple of (to_utm, to_wgs84) transformers, both with lon/lat axis order
+    """
+    proj_wgs84 = pyproj.CRS("EPSG:4326")  # WGS84 lat/lon
+    proj_utm = pyproj.CRS(f"+proj=utm +zone={utm_zone} +datum=WGS84 +units=m +no_defs")
+    return (
+        Transformer.from_crs(proj_wgs84, proj_utm, always_xy=True),
+        Transformer.from_crs(proj_utm, proj_wgs84, always_xy=True)
+    )
+
 
 class FireSpreadSimulator:
     """Cellular automata based fire spread simulator."""
@@ -74,11 +100,7 @@ class FireSpreadSimulator:
         """Set up the simulation grid based on geographic bounds and resolution."""
         # Convert lat/lon bounds to UTM for a regular grid
         self.utm_zone = int((self.bounds["min_lon"] + self.bounds["max_lon"]) / 2 / 6) + 31
-        self.proj_wgs84 = pyproj.CRS("EPSG:4326")  # WGS84 lat/lon
-        self.proj_utm = pyproj.CRS(f"+proj=utm +zone={self.utm_zone} +datum=WGS84 +units=m +no_defs")
-        
-        self.transformer_to_utm = Transformer.from_crs(self.proj_wgs84, self.proj_utm, always_xy=True)
-        self.transformer_to_wgs84 = Transformer.from_crs(self.proj_utm, self.proj_wgs84, always_xy=True)
+        self.transformer_to_utm, self.transformer_to_wgs84 = get_utm_transformers(self.utm_zone)
         
         # Convert bounds to UTM
         min_x, min_y = self.transformer_to_utm.transform(self.bounds["min_lon"], self.bounds["min_lat"])
@@ -118,9 +140,6 @@ class FireSpreadSimulator:
         # Fuel moisture grid (simplified for MVP: uniform value)
         self.moisture_grid = np.full((self.y_size, self.x_size), 0.1, dtype=np.float32)
         
-        # Add ignition points to the grid
-        self.add_ignition_points()
-        
         # History of fire state at each time step
         self.history = {}
         
@@ -128,6 +147,9 @@ class FireSpreadSimulator:
         self.current_step = 0
         self.current_time = None
         
+        # Add ignition points to the grid (sets the simulation start time)
+        self.add_ignition_points()
+        
     def latlon_to_grid(self, lat: float, lon: float) -> Tuple[int, int]:
         """
         Convert lat/lon coordinates to grid indices.
@@ -441,10 +463,14 @@ class FireSpreadSimulator:
         
         return still_burning
     
-    def run_simulation(self) -> Dict[str, Any]:
+    def run_simulation(self, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         """
         Run the full simulation for the specified number of hours.
         
+        Args:
+            progress_callback: Optional function called after each step with
+                (steps completed, maximum number of steps)
+        
         Returns:
             Dict with simulation results
         """
@@ -453,10 +479,13 @@ class FireSpreadSimulator:
         
         # Run simulation steps until fire stops or time limit is reached
         step_count = 0
+        max_steps = math.ceil(self.simulation_hours * 60 / self.time_step_minutes)
         still_burning = True
-        while still_burning and step_count < (self.simulation_hours * 60 / self.time_step_minutes):
+        while still_burning and step_count < max_steps:
             still_burning = self.step()
             step_count += 1
+            if progress_callback is not None:
+                progress_callback(step_count, max_steps)
         
         simulation_time = time.time() - start_time
         logger.info(f"Completed {step_count} simulation steps in {simulation_time:.2f} seconds")
@@ -619,7 +648,7 @@ class FireSpreadSimulator:
             "fuel_parameters": {
                 "fuel_depth": self.fuel_depth,
                 "fuel_load": self.fuel_load,
-                "moisture": self.moisture_grid[0, 0]  # Just use the first cell as an example
+                "moisture": float(self.moisture_grid[0, 0])  # Just use the first cell as an example
             },
             "fire_statistics": {
                 "initial_burning_cells": int(initial_burning),
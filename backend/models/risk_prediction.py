@@ -1,22 +1,33 @@
 import os
 import json
 import logging
+import math
+import threading
 import time
 import pickle
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple, Optional
 
 import boto3
-import pandas as pd
 import numpy as np
 import geopandas as gpd
 import xgboost as xgb
 from sklearn.preprocessing import StandardScaler
 import requests
+from requests.adapters import HTTPAdapter
 from shapely.geometry import Point, Polygon
 import rasterio
 from rasterio.features import geometry_mask
 
+# Optional imports - only used if a shared feature cache is configured
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,41 +36,70 @@ logger = logging.getLogger(__name__)
 S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
 REGION = os.environ.get("REGION", "us-west-2")
 WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "")
-MODEL_VERSION = "v1.0.0"
+MODEL_VERSION = os.environ.get("MODEL_VERSION", "v1.0.0")
+
+# Model registry settings
+SHADOW_MODEL_VERSION = os.environ.get("SHADOW_MODEL_VERSION", "")
+MODEL_REGISTRY_SIZE = int(os.environ.get("MODEL_REGISTRY_SIZE", "3"))
+MODEL_REFRESH_SECONDS = float(os.environ.get("MODEL_REFRESH_SECONDS", "60"))
+
+# Overall time budget for fetching all feature sources of one request
+FEATURE_DEADLINE_SECONDS = float(os.environ.get("FEATURE_DEADLINE_SECONDS", "8.0"))
+
+# Feature cache settings
+REDIS_URL = os.environ.get("REDIS_URL", "")
+FEATURE_CACHE_MAX_ENTRIES = int(os.environ.get("FEATURE_CACHE_MAX_ENTRIES", "10000"))
+
+# Spatial tile size and lifetime of cached features for each source, matched
+# to how coarse the source is and how often it changes
+FEATURE_CACHE_CONFIG = {
+    "weather": {"tile_degrees": 0.1, "ttl_seconds": 60 * 60},
+    "terrain": {"tile_degrees": 0.01, "ttl_seconds": 30 * 24 * 60 * 60},
+    "vegetation": {"tile_degrees": 0.01, "ttl_seconds": 7 * 24 * 60 * 60}
+}
 
 # Initialize AWS clients
 s3_client = boto3.client("s3", region_name=REGION)
 
+# Pooled HTTP session and worker pools, reused across invocations.
+# Weather sub-requests get their own pool so a saturated feature pool
+# can never wait on itself.
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+FEATURE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="risk-features")
+HTTP_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="risk-http")
+
 # Model artifact paths in S3
-MODEL_S3_KEY = f"models/risk_prediction/xgboost_model_{MODEL_VERSION}.pkl"
-SCALER_S3_KEY = f"models/risk_prediction/scaler_{MODEL_VERSION}.pkl"
-FEATURE_IMPORTANCE_S3_KEY = f"models/risk_prediction/feature_importance_{MODEL_VERSION}.json"
+MODEL_S3_KEY_TEMPLATE = "models/risk_prediction/xgboost_model_{version}.pkl"
+SCALER_S3_KEY_TEMPLATE = "models/risk_prediction/scaler_{version}.pkl"
+FEATURE_IMPORTANCE_S3_KEY_TEMPLATE = "models/risk_prediction/feature_importance_{version}.json"
 
-# Cache for model and scaler to avoid reloading between invocations
-MODEL_CACHE = None
-SCALER_CACHE = None
-FEATURE_IMPORTANCE_CACHE = None
+# Object holding the version string that should be active; rollouts and
+# rollbacks only need to rewrite this key
+ACTIVE_VERSION_S3_KEY = "models/risk_prediction/active_version"
 
 
-def load_model() -> xgb.Booster:
+def _load_model_artifact(version: str, fallback: bool = True) -> xgb.Booster:
     """
-    Load the XGBoost model from S3 or cache.
+    Load the XGBoost model of one version from S3.
     
+    Args:
+        version: Model version
+        fallback: Whether to return an untrained demo model when loading fails
+        
     Returns:
         XGBoost model
     """
-    global MODEL_CACHE
-    if MODEL_CACHE is not None:
-        return MODEL_CACHE
-    
+    model_s3_key = MODEL_S3_KEY_TEMPLATE.format(version=version)
     try:
-        logger.info(f"Loading model from S3: {MODEL_S3_KEY}")
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=MODEL_S3_KEY)
+        logger.info(f"Loading model from S3: {model_s3_key}")
+        response = s3_client.get_object(Bucket=S3_BUCKET, Key=model_s3_key)
         model_bytes = response['Body'].read()
-        MODEL_CACHE = pickle.loads(model_bytes)
-        return MODEL_CACHE
+        return pickle.loads(model_bytes)
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
+        if not fallback:
+            raise
         
         # Fallback to a simple model for demonstration purposes only
         # In production, you would want to handle this error differently
@@ -70,59 +110,61 @@ def load_model() -> xgb.Booster:
             'learning_rate': 0.1,
             'n_estimators': 100
         }
-        MODEL_CACHE = xgb.XGBClassifier(**params)
-        return MODEL_CACHE
+        return xgb.XGBClassifier(**params)
 
 
-def load_scaler() -> StandardScaler:
+def _load_scaler_artifact(version: str, fallback: bool = True) -> StandardScaler:
     """
-    Load the StandardScaler from S3 or cache.
+    Load the StandardScaler of one version from S3.
     
+    Args:
+        version: Model version
+        fallback: Whether to return an unfitted scaler when loading fails
+        
     Returns:
         StandardScaler object
     """
-    global SCALER_CACHE
-    if SCALER_CACHE is not None:
-        return SCALER_CACHE
-    
+    scaler_s3_key = SCALER_S3_KEY_TEMPLATE.format(version=version)
     try:
-        logger.info(f"Loading scaler from S3: {SCALER_S3_KEY}")
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=SCALER_S3_KEY)
+        logger.info(f"Loading scaler from S3: {scaler_s3_key}")
+        response = s3_client.get_object(Bucket=S3_BUCKET, Key=scaler_s3_key)
         scaler_bytes = response['Body'].read()
-        SCALER_CACHE = pickle.loads(scaler_bytes)
-        return SCALER_CACHE
+        return pickle.loads(scaler_bytes)
     except Exception as e:
         logger.error(f"Error loading scaler: {str(e)}")
+        if not fallback:
+            raise
         
         # Fallback to a new scaler
         logger.warning("Using fallback scaler")
-        SCALER_CACHE = StandardScaler()
-        return SCALER_CACHE
+        return StandardScaler()
 
 
-def load_feature_importance() -> Dict[str, float]:
+def _load_feature_importance_artifact(version: str, fallback: bool = True) -> Dict[str, float]:
     """
-    Load feature importance from S3 or cache.
+    Load the feature importance of one version from S3.
     
+    Args:
+        version: Model version
+        fallback: Whether to return default importances when loading fails
+        
     Returns:
         Dict mapping feature names to importance scores
     """
-    global FEATURE_IMPORTANCE_CACHE
-    if FEATURE_IMPORTANCE_CACHE is not None:
-        return FEATURE_IMPORTANCE_CACHE
-    
+    feature_importance_s3_key = FEATURE_IMPORTANCE_S3_KEY_TEMPLATE.format(version=version)
     try:
-        logger.info(f"Loading feature importance from S3: {FEATURE_IMPORTANCE_S3_KEY}")
-        response = s3_client.get_object(Bucket=S3_BUCKET, Key=FEATURE_IMPORTANCE_S3_KEY)
+        logger.info(f"Loading feature importance from S3: {feature_importance_s3_key}")
+        response = s3_client.get_object(Bucket=S3_BUCKET, Key=feature_importance_s3_key)
         feature_importance_bytes = response['Body'].read()
-        FEATURE_IMPORTANCE_CACHE = json.loads(feature_importance_bytes)
-        return FEATURE_IMPORTANCE_CACHE
+        return json.loads(feature_importance_bytes)
     except Exception as e:
         logger.error(f"Error loading feature importance: {str(e)}")
+        if not fallback:
+            raise
         
         # Fallback to default feature importance
         logger.warning("Using fallback feature importance")
-        FEATURE_IMPORTANCE_CACHE = {
+        return {
             "ndvi": 0.2,
             "erc": 0.15,
             "vpd": 0.1,
@@ -135,21 +177,533 @@ def load_feature_importance() -> Dict[str, float]:
             "slope": 0.03,
             "aspect": 0.02
         }
-        return FEATURE_IMPORTANCE_CACHE
 
 
-def get_weather_data(lat: float, lon: float, start_date: str, end_date: str) -> Dict[str, Any]:
+class FeatureSchema:
+    """
+    Compiled mapping from named model inputs to column positions.
+    
+    Built once from the model's training feature list so that per-request
+    feature assembly writes straight into a preallocated float32 row or matrix
+    instead of going through a single-row DataFrame. Inputs the model was not
+    trained on are ignored and training features without an input stay at zero.
+    """
+    
+    def __init__(self, feature_names: List[str]):
+        """
+        Initialize the schema.
+        
+        Args:
+            feature_names: Feature names in the column order used for training
+        """
+        self.feature_names = list(feature_names)
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+    
+    @property
+    def n_features(self) -> int:
+        """Number of model input columns."""
+        return len(self.feature_names)
+    
+    def empty(self, n_rows: int = 1) -> np.ndarray:
+        """
+        Allocate a zero-filled feature matrix.
+        
+        Args:
+            n_rows: Number of rows
+            
+        Returns:
+            float32 array of shape (n_rows, n_features)
+        """
+        return np.zeros((n_rows, self.n_features), dtype=np.float32)
+    
+    def fill(self, out: np.ndarray, row: int, values: Dict[str, float]) -> np.ndarray:
+        """
+        Write named values into one row of a preallocated matrix.
+        
+        Args:
+            out: Matrix from `empty`
+            row: Row index to fill
+            values: Dict mapping feature names to values
+            
+        Returns:
+            The same matrix, for chaining
+        """
+        index = self.index
+        for name, value in values.items():
+            col = index.get(name)
+            if col is not None:
+                out[row, col] = value
+        return out
+    
+    def row(self, values: Dict[str, float]) -> np.ndarray:
+        """
+        Build a single-row feature matrix.
+        
+        Args:
+            values: Dict mapping feature names to values
+            
+        Returns:
+            float32 array of shape (1, n_features)
+        """
+        return self.fill(self.empty(1), 0, values)
+    
+    def columns(self, values: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        """
+        Build a feature matrix from named column arrays, e.g. raster bands.
+        
+        Args:
+            values: Dict mapping feature names to 1D arrays of length n_rows
+            n_rows: Number of rows
+            
+        Returns:
+            float32 array of shape (n_rows, n_features)
+        """
+        out = self.empty(n_rows)
+        for name, column in values.items():
+            col = self.index.get(name)
+            if col is not None:
+                out[:, col] = column
+        return out
+    
+    def project(self, features: np.ndarray, source: "FeatureSchema") -> np.ndarray:
+        """
+        Reorder a matrix built with another schema into this schema's columns.
+        
+        Args:
+            features: Matrix in the source schema's column order
+            source: Schema the matrix was built with
+            
+        Returns:
+            float32 matrix in this schema's column order
+        """
+        if source.feature_names == self.feature_names:
+            return features
+        
+        out = self.empty(len(features))
+        for name, col in self.index.items():
+            source_col = source.index.get(name)
+            if source_col is not None:
+                out[:, col] = features[:, source_col]
+        return out
+    
+    def matrix(self, rows: List[Dict[str, float]]) -> np.ndarray:
+        """
+        Build a feature matrix with one row per input dict.
+        
+        Args:
+            rows: List of dicts mapping feature names to values
+            
+        Returns:
+            float32 array of shape (len(rows), n_features)
+        """
+        out = self.empty(len(rows))
+        for i, values in enumerate(rows):
+            self.fill(out, i, values)
+        return out
+
+
+def _model_feature_names(model: Any) -> Optional[List[str]]:
+    """
+    Get the training feature names stored in an XGBoost model, if any.
+    
+    Args:
+        model: XGBoost Booster or XGBClassifier
+        
+    Returns:
+        List of feature names, or None if the model does not record them
+    """
+    booster = model
+    if hasattr(model, "get_booster"):
+        try:
+            booster = model.get_booster()
+        except Exception:
+            # Unfitted sklearn wrapper (e.g. the fallback model)
+            return None
+    
+    feature_names = getattr(booster, "feature_names", None)
+    return list(feature_names) if feature_names else None
+
+
+class ModelBundle:
+    """Model, scaler and feature metadata of one model version."""
+    
+    def __init__(
+        self,
+        version: str,
+        model: Any,
+        scaler: StandardScaler,
+        feature_importance: Dict[str, float]
+    ):
+        """
+        Initialize the bundle and compile its feature schema.
+        
+        The column order comes from the model itself when it records feature
+        names, otherwise from the feature importance artifact it was exported with.
+        
+        Args:
+            version: Model version
+            model: XGBoost Booster or XGBClassifier
+            scaler: Fitted StandardScaler
+            feature_importance: Dict mapping feature names to importance scores
+        """
+        self.version = version
+        self.model = model
+        self.scaler = scaler
+        self.feature_importance = feature_importance
+        
+        feature_names = _model_feature_names(model)
+        if feature_names is None:
+            feature_names = list(feature_importance.keys())
+        self.schema = FeatureSchema(feature_names)
+    
+    @classmethod
+    def load(cls, version: str, fallback: bool = True) -> "ModelBundle":
+        """
+        Load all artifacts of a version from S3.
+        
+        Args:
+            version: Model version
+            fallback: Whether missing artifacts fall back to demo defaults;
+                explicitly selected versions load without fallback
+            
+        Returns:
+            ModelBundle instance
+        """
+        return cls(
+            version,
+            _load_model_artifact(version, fallback),
+            _load_scaler_artifact(version, fallback),
+            _load_feature_importance_artifact(version, fallback)
+        )
+
+
+class UnknownModelVersion(KeyError):
+    """Raised when a requested model version is neither loaded nor published."""
+
+
+def list_model_versions() -> List[str]:
+    """
+    List the model versions published to S3.
+    
+    Returns:
+        Sorted list of versions that have a model artifact
+    """
+    prefix, suffix = MODEL_S3_KEY_TEMPLATE.split("{version}")
+    versions = set()
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(suffix):
+                versions.add(key[len(prefix):len(key) - len(suffix)])
+    return sorted(versions)
+
+
+class ModelRegistry:
+    """
+    LRU-bounded in-memory registry of loaded model versions.
+    
+    One version is active at a time. Switching the active version replaces a
+    single reference under a lock, so requests already holding a bundle finish
+    on the version they started with while new requests see the new one.
+    Other versions stay loaded for explicit selection and shadow scoring.
+    """
+    
+    def __init__(self, active_version: str, max_versions: int = 3):
+        """
+        Initialize the registry.
+        
+        Args:
+            active_version: Version served when a request does not pick one
+            max_versions: Maximum number of versions held in memory
+        """
+        self.max_versions = max(1, max_versions)
+        self._active_version = active_version
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._last_refresh = 0.0
+        self._published = []
+        self._last_listing = None
+    
+    @property
+    def active_version(self) -> str:
+        """Currently active model version."""
+        return self._active_version
+    
+    def versions(self) -> List[str]:
+        """Loaded versions, least recently used first."""
+        with self._lock:
+            return list(self._bundles.keys())
+    
+    def published_versions(self, force: bool = False) -> List[str]:
+        """
+        Versions published to S3, listed at most every MODEL_REFRESH_SECONDS.
+        
+        Args:
+            force: List regardless of when the bucket was last listed
+            
+        Returns:
+            Sorted list of published versions (the last known list if listing fails)
+        """
+        now = time.monotonic()
+        if not force and self._last_listing is not None and now - self._last_listing < MODEL_REFRESH_SECONDS:
+            return list(self._published)
+        self._last_listing = now
+        
+        try:
+            self._published = list_model_versions()
+        except Exception as e:
+            logger.warning(f"Could not list published model versions: {str(e)}")
+        return list(self._published)
+    
+    def resolve(self, version: str) -> ModelBundle:
+        """
+        Get a client-selected version, accepting only known versions.
+        
+        Versions that are neither loaded nor published are rejected before
+        anything is fetched or registered, and published versions are loaded
+        without falling back to demo artifacts.
+        
+        Args:
+            version: Model version
+            
+        Returns:
+            ModelBundle instance
+            
+        Raises:
+            UnknownModelVersion: If the version is not loaded or published
+        """
+        with self._lock:
+            bundle = self._bundles.get(version)
+            if bundle is not None:
+                self._bundles.move_to_end(version)
+                return bundle
+        
+        if version not in self.published_versions():
+            raise UnknownModelVersion(version)
+        try:
+            return self.get(version, fallback=False)
+        except Exception as e:
+            raise UnknownModelVersion(version) from e
+    
+    def register(self, bundle: ModelBundle, activate: bool = False):
+        """
+        Add an already loaded bundle.
+        
+        Args:
+            bundle: ModelBundle to add
+            activate: Whether to make it the active version
+        """
+        with self._lock:
+            self._bundles[bundle.version] = bundle
+            self._bundles.move_to_end(bundle.version)
+            if activate:
+                self._active_version = bundle.version
+            self._evict()
+    
+    def get(self, version: Optional[str] = None, fallback: bool = True) -> ModelBundle:
+        """
+        Get a version's bundle, loading it on first use.
+        
+        Args:
+            version: Model version (the active version if None)
+            fallback: Whether a failed load falls back to demo artifacts
+            
+        Returns:
+            ModelBundle instance
+        """
+        with self._lock:
+            version = version or self._active_version
+            bundle = self._bundles.get(version)
+            if bundle is not None:
+                self._bundles.move_to_end(version)
+                return bundle
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+        
+        # Load outside the registry lock so other versions keep serving;
+        # the per-version lock stops concurrent requests loading it twice
+        with load_lock:
+            with self._lock:
+                bundle = self._bundles.get(version)
+            if bundle is None:
+                try:
+                    bundle = ModelBundle.load(version, fallback=fallback)
+                except Exception:
+                    with self._lock:
+                        self._load_locks.pop(version, None)
+                    raise
+                self.register(bundle)
+        
+        return bundle
+    
+    def activate(self, version: str) -> ModelBundle:
+        """
+        Make a version active, loading it before the switch.
+        
+        The version must load without fallback, so a bad rollout keeps the
+        current version active instead of switching to a demo model.
+        
+        Args:
+            version: Model version
+            
+        Returns:
+            The newly active ModelBundle
+        """
+        bundle = self.get(version, fallback=False)
+        with self._lock:
+            previous = self._active_version
+            self._active_version = version
+        
+        if previous != version:
+            logger.info(f"Activated risk model {version} (was {previous})")
+        return bundle
+    
+    def refresh_active(self, force: bool = False) -> str:
+        """
+        Pick up a new active version from the S3 pointer object.
+        
+        Checks at most every MODEL_REFRESH_SECONDS unless forced.
+        
+        Args:
+            force: Check regardless of when the pointer was last read
+            
+        Returns:
+            The active version after the check
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < MODEL_REFRESH_SECONDS:
+            return self._active_version
+        self._last_refresh = now
+        
+        try:
+            response = s3_client.get_object(Bucket=S3_BUCKET, Key=ACTIVE_VERSION_S3_KEY)
+            version = response['Body'].read().decode("utf-8").strip()
+        except Exception as e:
+            logger.debug(f"No active model pointer available: {str(e)}")
+            return self._active_version
+        
+        if version and version != self._active_version:
+            try:
+                self.activate(version)
+            except Exception as e:
+                logger.error(f"Could not activate risk model {version}: {str(e)}")
+        return self._active_version
+    
+    def _evict(self):
+        """Drop least recently used versions beyond the limit, never the active one."""
+        for version in list(self._bundles.keys()):
+            if len(self._bundles) <= self.max_versions:
+                break
+            if version != self._active_version:
+                del self._bundles[version]
+                self._load_locks.pop(version, None)
+                logger.info(f"Evicted risk model {version} from registry")
+
+
+# Model versions loaded in this process, reused between invocations
+model_registry = ModelRegistry(MODEL_VERSION, MODEL_REGISTRY_SIZE)
+
+
+def load_model(version: Optional[str] = None) -> xgb.Booster:
+    """
+    Load the XGBoost model from the registry.
+    
+    Args:
+        version: Model version (the active version if None)
+        
+    Returns:
+        XGBoost model
+    """
+    return model_registry.get(version).model
+
+
+def load_scaler(version: Optional[str] = None) -> StandardScaler:
+    """
+    Load the StandardScaler from the registry.
+    
+    Args:
+        version: Model version (the active version if None)
+        
+    Returns:
+        StandardScaler object
+    """
+    return model_registry.get(version).scaler
+
+
+def load_feature_importance(version: Optional[str] = None) -> Dict[str, float]:
+    """
+    Load feature importance from the registry.
+    
+    Args:
+        version: Model version (the active version if None)
+        
+    Returns:
+        Dict mapping feature names to importance scores
+    """
+    return model_registry.get(version).feature_importance
+
+
+def get_feature_schema(version: Optional[str] = None) -> FeatureSchema:
+    """
+    Get the compiled feature schema of a model version.
+    
+    Args:
+        version: Model version (the active version if None)
+        
+    Returns:
+        FeatureSchema instance
+    """
+    return model_registry.get(version).schema
+
+
+def _fetch_json(url: str, timeout: float) -> Dict[str, Any]:
+    """
+    GET a JSON document through the shared HTTP session.
+    
+    Args:
+        url: URL to fetch
+        timeout: Request timeout in seconds
+        
+    Returns:
+        Parsed JSON response
+    """
+    response = http_session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+class WeatherUnavailable(Exception):
+    """Raised when real weather data cannot be fetched and fallback is disabled."""
+
+
+def get_weather_data(
+    lat: float,
+    lon: float,
+    start_date: str,
+    end_date: str,
+    timeout: float = 10.0,
+    fallback: bool = True
+) -> Dict[str, Any]:
     """
     Get weather data for a location and time period from OpenWeatherMap API.
     
+    The current conditions and forecast are requested concurrently.
+    
     Args:
         lat: Latitude
         lon: Longitude
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
+        timeout: Request timeout in seconds for each API call
+        fallback: Whether to return simulated weather instead of raising when
+            there is no API key or the API call fails
         
     Returns:
         Dict with weather data
+        
+    Raises:
+        WeatherUnavailable: If fallback is False and no real weather is available
     """
     logger.info(f"Fetching weather data for {lat}, {lon} from {start_date} to {end_date}")
     
@@ -161,13 +715,10 @@ def get_weather_data(lat: float, lon: float, start_date: str, end_date: str) ->
             current_url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={WEATHER_API_KEY}&units=metric"
             forecast_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&appid={WEATHER_API_KEY}&units=metric"
             
-            current_response = requests.get(current_url, timeout=10)
-            current_response.raise_for_status()
-            current_data = current_response.json()
-            
-            forecast_response = requests.get(forecast_url, timeout=10)
-            forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
+            current_future = HTTP_EXECUTOR.submit(_fetch_json, current_url, timeout)
+            forecast_future = HTTP_EXECUTOR.submit(_fetch_json, forecast_url, timeout)
+            current_data = current_future.result()
+            forecast_data = forecast_future.result()
             
             # Extract the needed weather parameters
             weather_data = {
@@ -195,11 +746,17 @@ def get_weather_data(lat: float, lon: float, start_date: str, end_date: str) ->
             
             return weather_data
         else:
+            if not fallback:
+                raise WeatherUnavailable("No OpenWeatherMap API key provided")
             # If no API key, generate simulated weather data for demonstration
             logger.warning("No OpenWeatherMap API key provided, using simulated weather data")
             return generate_simulated_weather_data(start_date, end_date)
+    except WeatherUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error fetching weather data: {str(e)}")
+        if not fallback:
+            raise WeatherUnavailable(str(e)) from e
         logger.warning("Using simulated weather data due to API error")
         return generate_simulated_weather_data(start_date, end_date)
 
@@ -331,44 +888,342 @@ def get_vegetation_indices(lat: float, lon: float, radius_km: float) -> Dict[str
     }
 
 
-def prepare_features(
-    lat: float, 
-    lon: float, 
+class RedisFeatureTier:
+    """Shared feature cache tier backed by Redis (or any client with get/setex)."""
+    
+    def __init__(self, client: Any, prefix: str = "risk-features"):
+        """
+        Initialize the shared tier.
+        
+        Args:
+            client: Redis client or a stand-in implementing get and setex
+            prefix: Key prefix for cached entries
+        """
+        self.client = client
+        self.prefix = prefix
+    
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        """
+        Get a cached entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Tuple of (expires_at, value), or None if absent
+        """
+        payload = self.client.get(f"{self.prefix}:{key}")
+        if payload is None:
+            return None
+        entry = json.loads(payload)
+        return entry["expires_at"], entry["value"]
+    
+    def set(self, key: str, value: Any, expires_at: float):
+        """
+        Store an entry until the given wall-clock time.
+        
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            expires_at: Expiry as a UNIX timestamp
+        """
+        ttl = max(1, int(expires_at - time.time()))
+        payload = json.dumps({"expires_at": expires_at, "value": value})
+        self.client.setex(f"{self.prefix}:{key}", ttl, payload)
+
+
+class FeatureCache:
+    """
+    Two-tier TTL cache for feature source data, keyed by spatial tile.
+    
+    Requests falling in the same tile of a source's grid share one entry, so
+    nearby points reuse terrain, vegetation and weather instead of refetching
+    them. The in-memory tier is LRU-bounded; the optional shared tier lets
+    several workers reuse each other's fetches.
+    """
+    
+    def __init__(
+        self,
+        config: Dict[str, Dict[str, float]],
+        max_entries: int = 10000,
+        shared_tier: Optional[RedisFeatureTier] = None
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            config: Per-source tile_degrees and ttl_seconds
+            max_entries: Maximum entries held in memory across all sources
+            shared_tier: Optional shared tier consulted on memory misses
+        """
+        self.config = config
+        self.max_entries = max_entries
+        self.shared_tier = shared_tier
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            source: {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0}
+            for source in config
+        }
+    
+    def key(self, source: str, lat: float, lon: float, params: Tuple = ()) -> str:
+        """
+        Build the cache key for a point within a source's tile grid.
+        
+        Args:
+            source: Feature source name
+            lat: Latitude
+            lon: Longitude
+            params: Extra request parameters the data depends on
+            
+        Returns:
+            Cache key string
+        """
+        tile = self.config[source]["tile_degrees"]
+        # Small epsilon keeps points on a tile edge from flipping tiles on float error
+        row = math.floor(lat / tile + 1e-9)
+        col = math.floor(lon / tile + 1e-9)
+        suffix = ":".join(str(param) for param in params)
+        return f"{source}:{tile}:{row}:{col}:{suffix}"
+    
+    def get(self, source: str, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Look up an entry in memory, then in the shared tier.
+        
+        Args:
+            source: Feature source name
+            key: Cache key from `key`
+            
+        Returns:
+            Tuple of (value, tier) where tier is "memory" or "shared",
+            or (None, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats[source]["hits"] += 1
+                    return entry[1], "memory"
+                del self._entries[key]
+        
+        if self.shared_tier is not None:
+            try:
+                shared = self.shared_tier.get(key)
+            except Exception as e:
+                logger.warning(f"Shared feature cache unavailable: {str(e)}")
+                shared = None
+            if shared is not None and shared[0] > now:
+                self._store(source, key, shared[1], shared[0])
+                with self._lock:
+                    self._stats[source]["shared_hits"] += 1
+                return shared[1], "shared"
+        
+        with self._lock:
+            self._stats[source]["misses"] += 1
+        return None, None
+    
+    def set(self, source: str, key: str, value: Any):
+        """
+        Store an entry in both tiers with the source's TTL.
+        
+        Args:
+            source: Feature source name
+            key: Cache key from `key`
+            value: JSON-serializable value
+        """
+        expires_at = time.time() + self.config[source]["ttl_seconds"]
+        self._store(source, key, value, expires_at)
+        
+        if self.shared_tier is not None:
+            try:
+                self.shared_tier.set(key, value, expires_at)
+            except Exception as e:
+                logger.warning(f"Shared feature cache unavailable: {str(e)}")
+    
+    def _store(self, source: str, key: str, value: Any, expires_at: float):
+        """Insert into the memory tier, evicting least recently used entries."""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                evicted_source = evicted_key.split(":", 1)[0]
+                self._stats[evicted_source]["evictions"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+        
+        Returns:
+            Dict with the memory tier size and per-source counters
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "sources": {source: dict(counts) for source, counts in self._stats.items()}
+            }
+    
+    def clear(self):
+        """Drop all in-memory entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            for counts in self._stats.values():
+                for name in counts:
+                    counts[name] = 0
+
+
+def create_feature_cache() -> FeatureCache:
+    """
+    Create the feature cache, with a Redis tier when REDIS_URL is configured.
+    
+    Returns:
+        FeatureCache instance
+    """
+    shared_tier = None
+    if REDIS_URL:
+        if REDIS_AVAILABLE:
+            shared_tier = RedisFeatureTier(redis.Redis.from_url(REDIS_URL, socket_timeout=0.5))
+        else:
+            logger.warning("REDIS_URL is set but redis is not installed; using in-memory feature cache only")
+    
+    return FeatureCache(FEATURE_CACHE_CONFIG, FEATURE_CACHE_MAX_ENTRIES, shared_tier)
+
+
+# Feature cache shared by all requests handled by this process
+feature_cache = create_feature_cache()
+
+
+class FeatureDeadlineExceeded(Exception):
+    """Raised when a required feature source misses the request deadline."""
+
+
+def _timed_call(func, *args, **kwargs) -> Tuple[Any, float]:
+    """
+    Call a function and measure its latency.
+    
+    Returns:
+        Tuple of (result, latency in milliseconds)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def acquire_features(
+    lat: float,
+    lon: float,
     radius_km: float,
-    weather_data: Dict[str, Any],
+    start_date: str,
+    end_date: str,
+    deadline_seconds: Optional[float] = None
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Fetch weather, terrain and vegetation data concurrently under one deadline.
+    
+    Latency is bounded by the slowest source rather than the sum of all of
+    them, and sources already in the feature cache are not fetched at all.
+    Weather that misses the deadline or fails falls back to simulated data,
+    which is flagged in its status and never cached; terrain and vegetation
+    are required and raise FeatureDeadlineExceeded instead.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius_km: Radius in kilometers
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+        deadline_seconds: Overall time budget (defaults to FEATURE_DEADLINE_SECONDS)
+        
+    Returns:
+        Tuple of (data, sources) where data maps "weather", "terrain" and
+        "vegetation" to their dicts and sources holds per-source latency,
+        status and cache tier
+    """
+    budget = FEATURE_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+    deadline = time.monotonic() + budget
+    submitted_at = time.perf_counter()
+    
+    fetchers = {
+        "weather": (get_weather_data, (lat, lon, start_date, end_date), {"timeout": budget, "fallback": False}, (start_date, end_date)),
+        "terrain": (get_terrain_data, (lat, lon, radius_km), {}, (radius_km,)),
+        "vegetation": (get_vegetation_indices, (lat, lon, radius_km), {}, (radius_km,))
+    }
+    
+    data = {}
+    sources = {}
+    futures = {}
+    cache_keys = {}
+    for name, (fetch, args, kwargs, params) in fetchers.items():
+        cache_keys[name] = feature_cache.key(name, lat, lon, params)
+        cached, tier = feature_cache.get(name, cache_keys[name])
+        if cached is not None:
+            data[name] = cached
+            sources[name] = {"latency_ms": 0.0, "status": "ok", "cache": tier}
+        else:
+            futures[name] = FEATURE_EXECUTOR.submit(_timed_call, fetch, *args, **kwargs)
+    
+    for name, future in futures.items():
+        try:
+            data[name], latency_ms = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            status = "ok"
+        except FutureTimeoutError:
+            latency_ms = (time.perf_counter() - submitted_at) * 1000
+            status = "timeout"
+        except WeatherUnavailable as e:
+            logger.warning(f"Weather data unavailable: {str(e)}")
+            latency_ms = (time.perf_counter() - submitted_at) * 1000
+            status = "unavailable"
+        except Exception as e:
+            logger.error(f"Error fetching {name} data: {str(e)}")
+            latency_ms = (time.perf_counter() - submitted_at) * 1000
+            status = "error"
+        
+        sources[name] = {"latency_ms": round(latency_ms, 1), "status": status, "cache": "miss"}
+        
+        if status == "ok":
+            feature_cache.set(name, cache_keys[name], data[name])
+        else:
+            if name != "weather":
+                raise FeatureDeadlineExceeded(f"{name} data unavailable ({status}) within {budget:.1f}s")
+            logger.warning(f"Using simulated weather data after {status}")
+            data[name] = generate_simulated_weather_data(start_date, end_date)
+            sources[name]["status"] = f"{status}_simulated"
+    
+    return data, sources
+
+
+def build_feature_values(
+    lat: float,
+    lon: float,
+    weather: Dict[str, float],
     terrain_data: Dict[str, float],
     vegetation_data: Dict[str, float]
-) -> pd.DataFrame:
+) -> Dict[str, float]:
     """
-    Prepare features for risk prediction.
+    Collect named model inputs for one location and weather snapshot.
     
     Args:
         lat: Latitude
         lon: Longitude
-        radius_km: Radius in kilometers
-        weather_data: Weather data dict
+        weather: Weather values (current conditions or a daily average)
         terrain_data: Terrain data dict
         vegetation_data: Vegetation data dict
         
     Returns:
-        DataFrame with features
+        Dict mapping feature names to values
     """
-    logger.info("Preparing features for risk prediction")
-    
-    # Get current weather
-    current_weather = weather_data["current"]
-    
-    # Create feature dict
-    features = {
+    return {
         # Location features
         "latitude": lat,
         "longitude": lon,
         
         # Weather features
-        "temperature": current_weather["temperature"],
-        "relative_humidity": current_weather["relative_humidity"],
-        "wind_speed": current_weather["wind_speed"],
-        "precipitation": current_weather["precipitation"],
+        "temperature": weather["temperature"],
+        "relative_humidity": weather["relative_humidity"],
+        "wind_speed": weather["wind_speed"],
+        "precipitation": weather["precipitation"],
         
         # Terrain features
         "elevation": terrain_data["elevation"],
@@ -381,73 +1236,248 @@ def prepare_features(
         "vpd": vegetation_data["vpd"],
         "pdsi": vegetation_data["pdsi"]
     }
+
+
+def prepare_features(
+    lat: float, 
+    lon: float, 
+    radius_km: float,
+    weather_data: Dict[str, Any],
+    terrain_data: Dict[str, float],
+    vegetation_data: Dict[str, float]
+) -> np.ndarray:
+    """
+    Prepare features for risk prediction.
     
-    # Create DataFrame
-    df = pd.DataFrame([features])
+    Args:
+        lat: Latitude
+        lon: Longitude
+        radius_km: Radius in kilometers
+        weather_data: Weather data dict
+        terrain_data: Terrain data dict
+        vegetation_data: Vegetation data dict
+        
+    Returns:
+        float32 array of shape (1, n_features) in the model's column order
+    """
+    logger.info("Preparing features for risk prediction")
     
-    # Select only features that the model was trained on
-    feature_importance = load_feature_importance()
-    model_features = list(feature_importance.keys())
+    features = build_feature_values(lat, lon, weather_data["current"], terrain_data, vegetation_data)
+    return get_feature_schema().row(features)
+
+
+def _get_booster(model: Any) -> xgb.Booster:
+    """
+    Get the underlying Booster from an XGBoost model.
     
-    # Fill missing features with zeros
-    for feature in model_features:
-        if feature not in df.columns:
-            df[feature] = 0
+    Args:
+        model: XGBoost Booster or XGBClassifier
+        
+    Returns:
+        XGBoost Booster
+    """
+    return model.get_booster() if hasattr(model, "get_booster") else model
+
+
+def score_with_bundle(
+    bundle: ModelBundle,
+    features: np.ndarray,
+    explain: bool = False
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Score a feature matrix with one model version's artifacts.
+    
+    Attribution uses XGBoost's TreeSHAP (`pred_contribs`) over the whole matrix
+    in one call, so explaining a batch or raster costs one extra tree pass
+    rather than one per row.
+    
+    Args:
+        bundle: ModelBundle to score with
+        features: float32 array of shape (n_rows, n_features) in the bundle's schema
+        explain: Whether to compute per-row feature contributions
+        
+    Returns:
+        Tuple of (risk_scores, contributions). Contributions has shape
+        (n_rows, n_features) in log-odds units with the bias term dropped,
+        or is None when explain is False.
+    """
+    model = bundle.model
+    
+    # Scale features
+    scaled_features = bundle.scaler.transform(features)
+    dmatrix = None
+    
+    if hasattr(model, 'predict_proba'):
+        # For sklearn XGBClassifier with predict_proba method
+        scores = model.predict_proba(scaled_features)[:, 1]
+    else:
+        # For xgboost Booster with predict method
+        dmatrix = xgb.DMatrix(scaled_features, feature_names=bundle.schema.feature_names)
+        scores = model.predict(dmatrix)
+    
+    if not explain:
+        return scores, None
+    
+    if dmatrix is None:
+        dmatrix = xgb.DMatrix(scaled_features, feature_names=bundle.schema.feature_names)
+    contributions = _get_booster(model).predict(dmatrix, pred_contribs=True)
+    
+    return scores, contributions[:, :-1]
+
+
+def score_features(
+    features: np.ndarray,
+    explain: bool = False,
+    version: Optional[str] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Score a feature matrix and optionally attribute each score to its inputs.
+    
+    Args:
+        features: float32 array of shape (n_rows, n_features) from FeatureSchema
+        explain: Whether to compute per-row feature contributions
+        version: Model version (the active version if None)
+        
+    Returns:
+        Tuple of (risk_scores, contributions) as from score_with_bundle
+    """
+    return score_with_bundle(model_registry.get(version), features, explain)
+
+
+def predict_risk_batch(features: np.ndarray, version: Optional[str] = None) -> np.ndarray:
+    """
+    Score a feature matrix with the XGBoost model in a single call.
+    
+    Args:
+        features: float32 array of shape (n_rows, n_features) from FeatureSchema
+        version: Model version (the active version if None)
+        
+    Returns:
+        Array of risk scores, one per row
+    """
+    scores, _ = score_features(features, version=version)
+    return scores
+
+
+def contributions_to_factors(
+    contributions: np.ndarray,
+    feature_names: List[str],
+    top_k: Optional[int] = None
+) -> List[Dict[str, float]]:
+    """
+    Convert a contribution matrix into per-row factor dicts.
+    
+    Factors are ordered by absolute contribution, largest first.
     
-    # Select and order features according to the model
-    df = df[model_features]
+    Args:
+        contributions: Array of shape (n_rows, n_features) from score_features
+        feature_names: Feature names in column order
+        top_k: Keep only the k largest factors per row (all if None)
+        
+    Returns:
+        List of dicts mapping feature names to rounded contributions
+    """
+    order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+    if top_k is not None:
+        order = order[:, :top_k]
     
-    return df
+    ranked = np.take_along_axis(contributions, order, axis=1).round(3).tolist()
+    return [
+        {feature_names[col]: value for col, value in zip(cols, values)}
+        for cols, values in zip(order.tolist(), ranked)
+    ]
 
 
-def predict_risk(features: pd.DataFrame) -> Tuple[float, float, Dict[str, float]]:
+def global_importance_factors(
+    top_k: Optional[int] = None,
+    version: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Get normalized global feature importances as factors.
+    
+    Used when per-location contributions are not available for the model.
+    
+    Args:
+        top_k: Keep only the k most important features (all if None)
+        version: Model version (the active version if None)
+        
+    Returns:
+        Dict mapping feature names to importance shares
+    """
+    bundle = model_registry.get(version)
+    feature_importance = bundle.feature_importance
+    schema = bundle.schema
+    
+    factors = {}
+    total_importance = sum(feature_importance.values())
+    
+    for feature, importance in sorted(feature_importance.items(), key=lambda item: -item[1]):
+        if feature in schema.index:
+            # Normalize importance to sum to 1
+            factors[feature] = round(importance / total_importance, 3)
+    
+    if top_k is not None:
+        factors = dict(list(factors.items())[:top_k])
+    
+    return factors
+
+
+def explain_risk_batch(
+    features: np.ndarray,
+    top_k: Optional[int] = None,
+    version: Optional[str] = None
+) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+    """
+    Score a feature matrix and return per-row factor attributions.
+    
+    Args:
+        features: float32 array of shape (n_rows, n_features) from FeatureSchema
+        top_k: Keep only the k largest factors per row (all if None)
+        version: Model version (the active version if None)
+        
+    Returns:
+        Tuple of (risk_scores, factors) with one factor dict per row
+    """
+    bundle = model_registry.get(version)
+    try:
+        scores, contributions = score_with_bundle(bundle, features, explain=True)
+        return scores, contributions_to_factors(contributions, bundle.schema.feature_names, top_k)
+    except Exception as e:
+        logger.warning(f"Per-location attribution unavailable, using global importance: {str(e)}")
+        scores, _ = score_with_bundle(bundle, features)
+        factors = global_importance_factors(top_k, bundle.version)
+        return scores, [dict(factors) for _ in range(len(scores))]
+
+
+def predict_risk(
+    features: np.ndarray,
+    top_k: Optional[int] = None,
+    version: Optional[str] = None
+) -> Tuple[float, float, Dict[str, float]]:
     """
     Predict wildfire risk using the XGBoost model.
     
     Args:
-        features: DataFrame with features
+        features: float32 array of shape (1, n_features) from prepare_features
+        top_k: Return only the k largest contributing factors (all if None)
+        version: Model version (the active version if None)
         
     Returns:
-        Tuple of (risk_score, confidence, factors)
+        Tuple of (risk_score, confidence, factors). Factors are the signed
+        contributions of each feature to this location's risk log-odds.
     """
     logger.info("Predicting wildfire risk")
     
     try:
-        # Load model and scaler
-        model = load_model()
-        scaler = load_scaler()
-        feature_importance = load_feature_importance()
-        
-        # Scale features
-        scaled_features = scaler.transform(features)
-        
         # Make prediction
-        if hasattr(model, 'predict_proba'):
-            # For sklearn XGBClassifier with predict_proba method
-            probabilities = model.predict_proba(scaled_features)
-            risk_score = float(probabilities[0][1])  # Probability of positive class
-        else:
-            # For xgboost Booster with predict method
-            dmatrix = xgb.DMatrix(scaled_features)
-            risk_score = float(model.predict(dmatrix)[0])
+        scores, factors = explain_risk_batch(features, top_k, version)
+        risk_score = float(scores[0])
         
         # Calculate confidence based on feature distribution
         # This is a simplified approach - in a real system you would use a more sophisticated method
         confidence = 0.85  # Fixed confidence for demo
         
-        # Calculate contribution of each factor
-        factors = {}
-        total_importance = sum(feature_importance.values())
-        
-        for feature, importance in feature_importance.items():
-            if feature in features.columns:
-                # Normalize importance to sum to 1
-                normalized_importance = importance / total_importance
-                
-                # Calculate factor contribution (simplified)
-                factors[feature] = round(normalized_importance, 3)
-        
-        return risk_score, confidence, factors
+        return risk_score, confidence, factors[0]
         
     except Exception as e:
         logger.error(f"Error predicting risk: {str(e)}")
@@ -456,15 +1486,15 @@ def predict_risk(features: pd.DataFrame) -> Tuple[float, float, Dict[str, float]
         return 0.5, 0.5, {"error": 1.0}
 
 
-def generate_forecast(
-    lat: float, 
-    lon: float, 
+def forecast_feature_rows(
+    lat: float,
+    lon: float,
     weather_data: Dict[str, Any],
     terrain_data: Dict[str, float],
     vegetation_data: Dict[str, float]
-) -> Tuple[List[str], List[float]]:
+) -> Tuple[List[str], List[Dict[str, float]]]:
     """
-    Generate risk forecast for future days.
+    Build one set of named features per forecast day.
     
     Args:
         lat: Latitude
@@ -474,12 +1504,10 @@ def generate_forecast(
         vegetation_data: Vegetation data dict
         
     Returns:
-        Tuple of (dates, risk_scores)
+        Tuple of (dates, feature dicts)
     """
-    logger.info("Generating risk forecast")
-    
     forecast_dates = []
-    forecast_values = []
+    rows = []
     
     # Get forecast weather data
     forecast = weather_data.get("forecast", [])
@@ -492,63 +1520,167 @@ def generate_forecast(
             daily_forecast[date_str] = []
         daily_forecast[date_str].append(item)
     
-    # For each day, make a prediction
     for date_str, items in daily_forecast.items():
         if not items:
             continue
             
         # Average the weather data for the day
-        avg_temp = sum(item["temperature"] for item in items) / len(items)
-        avg_humidity = sum(item["relative_humidity"] for item in items) / len(items)
-        avg_wind = sum(item["wind_speed"] for item in items) / len(items)
-        avg_precip = sum(item["precipitation"] for item in items) / len(items)
-        
-        # Create feature dict for this day
-        features = {
-            # Location features
-            "latitude": lat,
-            "longitude": lon,
-            
-            # Weather features
-            "temperature": avg_temp,
-            "relative_humidity": avg_humidity,
-            "wind_speed": avg_wind,
-            "precipitation": avg_precip,
-            
-            # Terrain features
-            "elevation": terrain_data["elevation"],
-            "slope": terrain_data["slope"],
-            "aspect": terrain_data["aspect"],
-            
-            # Vegetation features (simplified assumption - vegetation doesn't change day to day)
-            "ndvi": vegetation_data["ndvi"],
-            "erc": vegetation_data["erc"],
-            "vpd": vegetation_data["vpd"],
-            "pdsi": vegetation_data["pdsi"]
+        avg_weather = {
+            "temperature": sum(item["temperature"] for item in items) / len(items),
+            "relative_humidity": sum(item["relative_humidity"] for item in items) / len(items),
+            "wind_speed": sum(item["wind_speed"] for item in items) / len(items),
+            "precipitation": sum(item["precipitation"] for item in items) / len(items)
         }
         
-        # Create DataFrame
-        df = pd.DataFrame([features])
+        # Vegetation is assumed constant over the forecast window (simplification)
+        rows.append(build_feature_values(lat, lon, avg_weather, terrain_data, vegetation_data))
+        forecast_dates.append(date_str)
+    
+    return forecast_dates, rows
+
+
+def generate_forecast(
+    lat: float, 
+    lon: float, 
+    weather_data: Dict[str, Any],
+    terrain_data: Dict[str, float],
+    vegetation_data: Dict[str, float]
+) -> Tuple[List[str], List[float]]:
+    """
+    Generate risk forecast for future days.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        weather_data: Weather data dict
+        terrain_data: Terrain data dict
+        vegetation_data: Vegetation data dict
         
-        # Select only features that the model was trained on
-        feature_importance = load_feature_importance()
-        model_features = list(feature_importance.keys())
+    Returns:
+        Tuple of (dates, risk_scores)
+    """
+    logger.info("Generating risk forecast")
+    
+    forecast_dates, rows = forecast_feature_rows(lat, lon, weather_data, terrain_data, vegetation_data)
+    if not rows:
+        return forecast_dates, []
+    
+    try:
+        scores = predict_risk_batch(get_feature_schema().matrix(rows))
+        forecast_values = [float(score) for score in scores]
+    except Exception as e:
+        logger.error(f"Error predicting forecast risk: {str(e)}")
         
-        # Fill missing features with zeros
-        for feature in model_features:
-            if feature not in df.columns:
-                df[feature] = 0
+        # Fallback values for demonstration, matching predict_risk
+        forecast_values = [0.5] * len(forecast_dates)
+    
+    return forecast_dates, forecast_values
+
+
+def build_request_features(
+    lat: float,
+    lon: float,
+    weather_data: Dict[str, Any],
+    terrain_data: Dict[str, float],
+    vegetation_data: Dict[str, float],
+    version: Optional[str] = None
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Build the full feature matrix for one risk request.
+    
+    Row 0 holds the current conditions and each following row one forecast
+    day, so a request can be scored with a single model call.
+    
+    Args:
+        lat: Latitude
+        lon: Longitude
+        weather_data: Weather data dict
+        terrain_data: Terrain data dict
+        vegetation_data: Vegetation data dict
+        version: Model version whose column order to use (the active version if None)
         
-        # Select and order features according to the model
-        df = df[model_features]
+    Returns:
+        Tuple of (feature matrix, forecast dates)
+    """
+    current = build_feature_values(lat, lon, weather_data["current"], terrain_data, vegetation_data)
+    forecast_dates, rows = forecast_feature_rows(lat, lon, weather_data, terrain_data, vegetation_data)
+    return get_feature_schema(version).matrix([current] + rows), forecast_dates
+
+
+def score_requests(
+    matrices: List[np.ndarray],
+    top_ks: Optional[List[Optional[int]]] = None,
+    version: Optional[str] = None,
+    shadow_version: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Score the feature matrices of several requests as one stacked matrix.
+    
+    When a shadow version is given, the same stacked matrix is also scored by
+    that model and its results are attached under "shadow"; shadow failures
+    are logged and never affect the primary result.
+    
+    Args:
+        matrices: Matrices from build_request_features, built for `version`
+        top_ks: Per-request factor limits (all factors if None)
+        version: Model version to serve (the active version if None)
+        shadow_version: Candidate model version to score alongside
         
-        # Make prediction
-        risk_score, _, _ = predict_risk(df)
+    Returns:
+        List of dicts with model_version, risk_score, confidence, factors and
+        forecast_values (plus shadow when requested), one per request
+    """
+    top_ks = top_ks or [None] * len(matrices)
+    offsets = np.cumsum([0] + [len(matrix) for matrix in matrices])
+    bundle = model_registry.get(version)
+    stacked = np.vstack(matrices)
+    
+    try:
+        scores, _ = score_with_bundle(bundle, stacked)
+        # Factors explain each request's current conditions only, so
+        # TreeSHAP runs on those rows rather than every forecast day
+        _, contributions = score_with_bundle(bundle, stacked[offsets[:-1]], explain=True)
+        factors = contributions_to_factors(contributions, bundle.schema.feature_names)
+    except Exception as e:
+        logger.error(f"Error predicting risk: {str(e)}")
         
-        forecast_dates.append(date_str)
-        forecast_values.append(risk_score)
+        # Fallback values for demonstration, matching predict_risk
+        scores = np.full(offsets[-1], 0.5)
+        factors = [{"error": 1.0} for _ in matrices]
+        confidence = 0.5
+    else:
+        confidence = 0.85  # Fixed confidence for demo, as in predict_risk
     
-    return forecast_dates, forecast_values
+    shadow_scores = None
+    if shadow_version and shadow_version != bundle.version:
+        try:
+            # A candidate that cannot be loaded is skipped, never replaced by demo artifacts
+            shadow_bundle = model_registry.get(shadow_version, fallback=False)
+            shadow_features = shadow_bundle.schema.project(stacked, bundle.schema)
+            shadow_scores, _ = score_with_bundle(shadow_bundle, shadow_features)
+        except Exception as e:
+            logger.error(f"Error in shadow scoring with {shadow_version}: {str(e)}")
+    
+    results = []
+    for i, top_k in enumerate(top_ks):
+        start, end = offsets[i], offsets[i + 1]
+        row_factors = factors[i] if top_k is None else dict(list(factors[i].items())[:top_k])
+        result = {
+            "model_version": bundle.version,
+            "risk_score": float(scores[start]),
+            "confidence": confidence,
+            "factors": row_factors,
+            "forecast_values": [float(score) for score in scores[start + 1:end]]
+        }
+        if shadow_scores is not None:
+            result["shadow"] = {
+                "model_version": shadow_version,
+                "risk_score": float(shadow_scores[start]),
+                "forecast_values": [float(score) for score in shadow_scores[start + 1:end]]
+            }
+        results.append(result)
+    
+    return results
 
 
 def handler(event, context):
@@ -578,35 +1710,56 @@ def handler(event, context):
         radius_km = float(body.get("radius_km", 10.0))
         start_date = body.get("start_date", datetime.now().strftime("%Y-%m-%d"))
         end_date = body.get("end_date", (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d"))
+        top_k = body.get("top_k_factors")
+        top_k = int(top_k) if top_k is not None else None
         
-        # Get data
-        weather_data = get_weather_data(lat, lon, start_date, end_date)
-        terrain_data = get_terrain_data(lat, lon, radius_km)
-        vegetation_data = get_vegetation_indices(lat, lon, radius_km)
+        # Pin the model version for the whole request so a concurrent
+        # rollout cannot change the column order mid-request
+        model_registry.refresh_active()
+        version = body.get("model_version") or model_registry.active_version
+        shadow_version = body.get("shadow_version") or SHADOW_MODEL_VERSION or None
+        for requested in (body.get("model_version"), body.get("shadow_version")):
+            if requested:
+                model_registry.resolve(requested)
         
-        # Prepare features
-        features = prepare_features(lat, lon, radius_km, weather_data, terrain_data, vegetation_data)
+        # Stay inside the Lambda timeout, keeping a margin for scoring
+        deadline_seconds = FEATURE_DEADLINE_SECONDS
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            remaining_seconds = context.get_remaining_time_in_millis() / 1000
+            deadline_seconds = max(0.5, min(deadline_seconds, remaining_seconds - 2.0))
         
-        # Predict risk
-        risk_score, confidence, factors = predict_risk(features)
+        # Get data
+        data, sources = acquire_features(lat, lon, radius_km, start_date, end_date, deadline_seconds)
+        weather_data = data["weather"]
+        terrain_data = data["terrain"]
+        vegetation_data = data["vegetation"]
         
-        # Generate forecast
-        forecast_dates, forecast_values = generate_forecast(
-            lat, lon, weather_data, terrain_data, vegetation_data
+        # Prepare features for the current conditions and each forecast day
+        features, forecast_dates = build_request_features(
+            lat, lon, weather_data, terrain_data, vegetation_data, version
         )
         
+        # Predict risk and forecast in one model call
+        result = score_requests([features], [top_k], version, shadow_version)[0]
+        
         # Prepare response
         response = {
             "location": {
                 "latitude": lat,
                 "longitude": lon
             },
-            "risk_score": round(risk_score, 3),
-            "confidence": round(confidence, 3),
-            "factors": factors,
+            "risk_score": round(result["risk_score"], 3),
+            "confidence": round(result["confidence"], 3),
+            "factors": result["factors"],
             "forecast_dates": forecast_dates,
-            "forecast_values": [round(v, 3) for v in forecast_values]
+            "forecast_values": [round(v, 3) for v in result["forecast_values"]],
+            "metadata": {
+                "model_version": result["model_version"],
+                "sources": sources
+            }
         }
+        if "shadow" in result:
+            response["metadata"]["shadow"] = result["shadow"]
         
         processing_time = time.time() - start_time
         logger.info(f"Risk prediction completed in {processing_time:.2f} seconds")
@@ -619,6 +1772,29 @@ def handler(event, context):
             }
         }
         
+    except UnknownModelVersion as e:
+        return {
+            "statusCode": 404,
+            "body": json.dumps({
+                "error": f"Unknown model version: {e.args[0]}"
+            }),
+            "headers": {
+                "Content-Type": "application/json"
+            }
+        }
+        
+    except FeatureDeadlineExceeded as e:
+        logger.error(f"Feature acquisition deadline exceeded: {str(e)}")
+        return {
+            "statusCode": 504,
+            "body": json.dumps({
+                "error": str(e)
+            }),
+            "headers": {
+                "Content-Type": "application/json"
+            }
+        }
+        
     except Exception as e:
         logger.error(f"Error in risk prediction: {str(e)}")
         return {
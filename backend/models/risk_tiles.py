@@ -0,0 +1,566 @@
+"""
+Nightly wildfire risk raster, tile pyramid and high-risk region index.
+
+The batch job scores the Western US states covered by the data pipeline on a
+regular lat/lon grid, stores a multi-resolution tile pyramid of the result and
+indexes connected high-risk regions so that /data/high-risk-areas can answer
+threshold and bbox queries without calling the model.
+"""
+
+import os
+import io
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Tuple, Optional
+
+import numpy as np
+from scipy import ndimage
+
+from data_pipeline.utils import open_storage
+from models import risk_prediction
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables
+S3_BUCKET = os.environ.get("S3_BUCKET", "wildfire-data-dev-us-west-2")
+REGION = os.environ.get("REGION", "us-west-2")
+RISK_TILES_URI = os.environ.get("RISK_TILES_URI", f"s3://{S3_BUCKET}/risk_tiles")
+RISK_TILE_RESOLUTION_DEGREES = float(os.environ.get("RISK_TILE_RESOLUTION_DEGREES", "0.05"))
+
+# Tile edge length in cells for every pyramid level
+TILE_SIZE = 256
+
+# Rows scored per model call
+SCORING_CHUNK_ROWS = 65536
+
+# Risk thresholds at which connected high-risk regions are indexed
+HIGH_RISK_LEVELS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+# Regions smaller than this many cells are not indexed
+MIN_REGION_CELLS = 4
+
+# Western US states processed by the data pipeline, with approximate bounds
+WESTERN_US_REGIONS = [
+    {"state": "CA", "name": "California", "bounds": (32.5, -124.5, 42.0, -114.1)},
+    {"state": "OR", "name": "Oregon", "bounds": (42.0, -124.6, 46.3, -116.5)},
+    {"state": "WA", "name": "Washington", "bounds": (45.5, -124.8, 49.0, -116.9)},
+    {"state": "ID", "name": "Idaho", "bounds": (42.0, -117.2, 49.0, -111.0)},
+    {"state": "NV", "name": "Nevada", "bounds": (35.0, -120.0, 42.0, -114.0)},
+    {"state": "AZ", "name": "Arizona", "bounds": (31.3, -114.8, 37.0, -109.0)},
+    {"state": "UT", "name": "Utah", "bounds": (37.0, -114.1, 42.0, -109.0)},
+    {"state": "CO", "name": "Colorado", "bounds": (37.0, -109.1, 41.0, -102.0)},
+    {"state": "NM", "name": "New Mexico", "bounds": (31.3, -109.1, 37.0, -103.0)},
+    {"state": "MT", "name": "Montana", "bounds": (44.4, -116.1, 49.0, -104.0)},
+    {"state": "WY", "name": "Wyoming", "bounds": (41.0, -111.1, 45.0, -104.0)}
+]
+
+
+def open_tile_store(uri: str = RISK_TILES_URI):
+    """
+    Open a tile store from a URI.
+
+    Args:
+        uri: "s3://bucket/prefix" or a local directory
+
+    Returns:
+        LocalStorage or S3Storage from data_pipeline.utils
+    """
+    return open_storage(uri)
+
+
+def array_to_bytes(array: np.ndarray) -> bytes:
+    """Serialize an array in .npy format."""
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def array_from_bytes(data: bytes) -> np.ndarray:
+    """Deserialize an array from .npy bytes."""
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+class RiskGrid:
+    """Regular lat/lon grid covering a set of regions, north-up."""
+
+    def __init__(self, regions: List[Dict[str, Any]], resolution: float):
+        """
+        Initialize the grid.
+
+        Args:
+            regions: Regions with (min_lat, min_lon, max_lat, max_lon) bounds
+            resolution: Cell size in degrees
+        """
+        self.regions = regions
+        self.resolution = resolution
+        self.min_lat = min(region["bounds"][0] for region in regions)
+        self.min_lon = min(region["bounds"][1] for region in regions)
+        self.max_lat = max(region["bounds"][2] for region in regions)
+        self.max_lon = max(region["bounds"][3] for region in regions)
+        self.height = int(np.ceil((self.max_lat - self.min_lat) / resolution))
+        self.width = int(np.ceil((self.max_lon - self.min_lon) / resolution))
+
+        # Cell center coordinates; row 0 is the northern edge
+        self.lats = self.max_lat - (np.arange(self.height) + 0.5) * resolution
+        self.lons = self.min_lon + (np.arange(self.width) + 0.5) * resolution
+
+    @property
+    def transform(self) -> List[float]:
+        """Affine transform (a, b, c, d, e, f) mapping (col, row) to (lon, lat)."""
+        return [self.resolution, 0.0, self.min_lon, 0.0, -self.resolution, self.max_lat]
+
+    def mesh(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell center latitude and longitude arrays of shape (height, width)."""
+        return np.meshgrid(self.lats, self.lons, indexing="ij")
+
+    def region_mask(self) -> np.ndarray:
+        """Boolean mask of cells inside at least one region."""
+        lat, lon = self.mesh()
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        for region in self.regions:
+            min_lat, min_lon, max_lat, max_lon = region["bounds"]
+            mask |= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return mask
+
+    def cell_to_latlon(self, row: np.ndarray, col: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert fractional cell indices to cell center coordinates."""
+        return self.max_lat - (row + 0.5) * self.resolution, self.min_lon + (col + 0.5) * self.resolution
+
+    def region_name(self, lat: float, lon: float) -> str:
+        """Name of the first region containing a point."""
+        for region in self.regions:
+            min_lat, min_lon, max_lat, max_lon = region["bounds"]
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                return region["name"]
+        return "Western US"
+
+
+def _smooth_field(shape: Tuple[int, int], rng: np.random.Generator, sigma: float) -> np.ndarray:
+    """Spatially correlated noise scaled to [0, 1]."""
+    field = ndimage.gaussian_filter(rng.normal(0, 1, shape), sigma)
+    return (field - field.min()) / (field.max() - field.min())
+
+
+def generate_feature_grids(grid: RiskGrid, seed: int) -> Dict[str, np.ndarray]:
+    """
+    Generate model input rasters for the grid.
+
+    In a real implementation, these would come from the terrain, vegetation and
+    weather pipeline outputs. For the MVP, we simulate spatially correlated
+    fields with the same ranges used by the per-point risk_prediction inputs.
+
+    Args:
+        grid: RiskGrid to cover
+        seed: Random seed, so a run is reproducible
+
+    Returns:
+        Dict mapping feature names to float32 arrays of shape (height, width)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (grid.height, grid.width)
+    lat, lon = grid.mesh()
+
+    elevation = 500 + 1000 * np.exp(-(lat - 40) ** 2 / 400) + 1500 * _smooth_field(shape, rng, 4) - 500
+    dryness = _smooth_field(shape, rng, 8)
+
+    features = {
+        "latitude": lat,
+        "longitude": lon,
+        "elevation": elevation,
+        "slope": 30 * _smooth_field(shape, rng, 2),
+        "aspect": 360 * _smooth_field(shape, rng, 2),
+        "ndvi": 0.8 - 0.6 * dryness,
+        "erc": 30 + 50 * dryness,
+        "vpd": 0.5 + 2.5 * dryness,
+        "pdsi": 4 - 8 * dryness,
+        "temperature": 40 - 0.4 * (lat - 31) - elevation / 300 + 4 * _smooth_field(shape, rng, 6),
+        "relative_humidity": 20 + 50 * (1 - dryness) * _smooth_field(shape, rng, 6),
+        "wind_speed": 2 + 8 * _smooth_field(shape, rng, 10),
+        "precipitation": np.clip(2 * (_smooth_field(shape, rng, 10) - 0.7), 0, None)
+    }
+    return {name: values.astype(np.float32) for name, values in features.items()}
+
+
+def fuel_load_grid(features: Dict[str, np.ndarray], mask: np.ndarray) -> np.ndarray:
+    """
+    Relative fuel load raster (0-1) from vegetation greenness and dryness.
+
+    Args:
+        features: Feature rasters from generate_feature_grids
+        mask: Cells inside the covered regions; others are NaN
+
+    Returns:
+        float32 array of shape (height, width)
+    """
+    fuel = np.clip(features["ndvi"], 0, 1) * np.clip(features["erc"] / 80.0, 0, 1)
+    return np.where(mask, fuel, np.nan).astype(np.float32)
+
+
+def score_grid(
+    grid: RiskGrid,
+    features: Dict[str, np.ndarray],
+    mask: np.ndarray,
+    version: Optional[str] = None
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Score every cell of the grid with the risk model.
+
+    Args:
+        grid: RiskGrid being scored
+        features: Feature rasters from generate_feature_grids
+        mask: Cells to score; others are left as NaN
+        version: Model version (the active version if None)
+
+    Returns:
+        Tuple of (risk raster, contribution rasters of shape
+        (height, width, n_features), feature names)
+    """
+    bundle = risk_prediction.model_registry.get(version)
+    schema = bundle.schema
+    cells = np.flatnonzero(mask)
+
+    risk = np.full(grid.height * grid.width, np.nan, dtype=np.float32)
+    contributions = np.zeros((grid.height * grid.width, schema.n_features), dtype=np.float32)
+
+    for start in range(0, len(cells), SCORING_CHUNK_ROWS):
+        chunk = cells[start:start + SCORING_CHUNK_ROWS]
+        matrix = schema.columns({name: values.ravel()[chunk] for name, values in features.items()}, len(chunk))
+        scores, chunk_contributions = risk_prediction.score_with_bundle(bundle, matrix, explain=True)
+        risk[chunk] = scores
+        contributions[chunk] = chunk_contributions
+
+    return (
+        risk.reshape(grid.height, grid.width),
+        contributions.reshape(grid.height, grid.width, schema.n_features),
+        schema.feature_names
+    )
+
+
+def build_pyramid(risk: np.ndarray) -> List[np.ndarray]:
+    """
+    Build a multi-resolution pyramid by 2x2 max pooling.
+
+    Max pooling keeps small high-risk areas visible at coarse zoom levels.
+    Level 0 is the full-resolution raster; the last level fits in one tile.
+
+    Args:
+        risk: Full-resolution risk raster (NaN outside the scored area)
+
+    Returns:
+        List of rasters, finest first
+    """
+    levels = [risk]
+    while max(levels[-1].shape) > TILE_SIZE:
+        previous = levels[-1]
+        height, width = previous.shape
+        padded = np.full((height + height % 2, width + width % 2), np.nan, dtype=np.float32)
+        padded[:height, :width] = previous
+        blocks = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+
+        # nanmax warns on all-NaN blocks; fill with -inf and restore NaN after
+        pooled = np.where(np.isnan(blocks), -np.inf, blocks).max(axis=(1, 3))
+        pooled[np.isneginf(pooled)] = np.nan
+        levels.append(pooled.astype(np.float32))
+
+    return levels
+
+
+def find_high_risk_regions(
+    grid: RiskGrid,
+    risk: np.ndarray,
+    contributions: np.ndarray,
+    feature_names: List[str],
+    level: float
+) -> List[Dict[str, Any]]:
+    """
+    Index connected regions at or above a risk level.
+
+    Args:
+        grid: RiskGrid of the raster
+        risk: Full-resolution risk raster
+        contributions: Contribution rasters from score_grid
+        feature_names: Feature names of the contribution bands
+        level: Risk threshold
+
+    Returns:
+        List of region dicts, highest max risk first
+    """
+    labels, count = ndimage.label(np.nan_to_num(risk, nan=0.0) >= level, structure=np.ones((3, 3)))
+    if count == 0:
+        return []
+
+    flat_labels = labels.ravel()
+    flat_risk = np.nan_to_num(risk, nan=0.0).ravel()
+    rows, cols = np.indices(risk.shape)
+
+    # Per-region statistics in one pass each
+    n_cells = np.bincount(flat_labels, minlength=count + 1)
+    risk_sum = np.bincount(flat_labels, weights=flat_risk, minlength=count + 1)
+    row_sum = np.bincount(flat_labels, weights=rows.ravel(), minlength=count + 1)
+    col_sum = np.bincount(flat_labels, weights=cols.ravel(), minlength=count + 1)
+    risk_max = ndimage.maximum(flat_risk, flat_labels, np.arange(count + 1))
+    flat_contributions = contributions.reshape(-1, len(feature_names))
+    contribution_sums = np.stack([
+        np.bincount(flat_labels, weights=flat_contributions[:, i], minlength=count + 1)
+        for i in range(len(feature_names))
+    ], axis=1)
+
+    cell_km = grid.resolution * 111.32
+    regions = []
+    for label, slices in enumerate(ndimage.find_objects(labels), start=1):
+        if slices is None or n_cells[label] < MIN_REGION_CELLS:
+            continue
+
+        center_lat, center_lon = grid.cell_to_latlon(row_sum[label] / n_cells[label], col_sum[label] / n_cells[label])
+        north, west = grid.cell_to_latlon(slices[0].start - 0.5, slices[1].start - 0.5)
+        south, east = grid.cell_to_latlon(slices[0].stop - 0.5, slices[1].stop - 0.5)
+        mean_contributions = contribution_sums[label] / n_cells[label]
+        top = np.argsort(-np.abs(mean_contributions))[:3]
+
+        regions.append({
+            "level": level,
+            "name": grid.region_name(center_lat, center_lon),
+            "center": {"latitude": round(float(center_lat), 4), "longitude": round(float(center_lon), 4)},
+            "bbox": [round(float(west), 4), round(float(south), 4), round(float(east), 4), round(float(north), 4)],
+            "risk_score": round(float(risk_max[label]), 3),
+            "mean_risk": round(float(risk_sum[label] / n_cells[label]), 3),
+            "area_sqkm": round(float(n_cells[label] * cell_km ** 2 * np.cos(np.radians(center_lat))), 1),
+            "factors": {feature_names[i]: round(float(mean_contributions[i]), 3) for i in top}
+        })
+
+    regions.sort(key=lambda region: -region["risk_score"])
+    for i, region in enumerate(regions):
+        region["id"] = f"RISK_{int(round(level * 100))}_{i + 1:04d}"
+
+    return regions
+
+
+def build_risk_tiles(
+    store: Any,
+    run_date: Optional[datetime] = None,
+    resolution: float = RISK_TILE_RESOLUTION_DEGREES,
+    regions: Optional[List[Dict[str, Any]]] = None,
+    version: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Score the regions, then store the tile pyramid and high-risk index.
+
+    Args:
+        store: Tile store from open_tile_store
+        run_date: Date the run represents (defaults to now)
+        resolution: Cell size in degrees
+        regions: Regions to cover (defaults to WESTERN_US_REGIONS)
+        version: Model version (the active version if None)
+
+    Returns:
+        The stored index document
+    """
+    start_time = time.time()
+    run_date = run_date or datetime.utcnow()
+    run_id = run_date.strftime("%Y%m%d")
+    grid = RiskGrid(regions or WESTERN_US_REGIONS, resolution)
+    logger.info(f"Building risk tiles {run_id} on a {grid.height} x {grid.width} grid")
+
+    mask = grid.region_mask()
+    features = generate_feature_grids(grid, seed=int(run_id))
+    risk, contributions, feature_names = score_grid(grid, features, mask, version)
+
+    # Tile pyramid
+    pyramid = []
+    for z, level in enumerate(build_pyramid(risk)):
+        tiles = []
+        for ty in range(0, level.shape[0], TILE_SIZE):
+            for tx in range(0, level.shape[1], TILE_SIZE):
+                tile = level[ty:ty + TILE_SIZE, tx:tx + TILE_SIZE]
+                if np.isnan(tile).all():
+                    continue
+                key = f"{run_id}/pyramid/{z}/{ty // TILE_SIZE}/{tx // TILE_SIZE}.npy"
+                store.write(key, array_to_bytes(tile))
+                tiles.append([ty // TILE_SIZE, tx // TILE_SIZE])
+        pyramid.append({
+            "z": z,
+            "shape": list(level.shape),
+            "resolution_degrees": resolution * 2 ** z,
+            "tiles": tiles
+        })
+
+    # Full-resolution rasters for zonal statistics
+    rasters = {"risk": risk, "fuel": fuel_load_grid(features, mask)}
+    for name, raster in rasters.items():
+        store.write(f"{run_id}/rasters/{name}.npy", array_to_bytes(raster))
+
+    index = {
+        "run_id": run_id,
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "model_version": risk_prediction.model_registry.get(version).version,
+        "resolution_degrees": resolution,
+        "bounds": [grid.min_lon, grid.min_lat, grid.max_lon, grid.max_lat],
+        "transform": grid.transform,
+        "shape": [grid.height, grid.width],
+        "tile_size": TILE_SIZE,
+        "pyramid": pyramid,
+        "rasters": {name: f"{run_id}/rasters/{name}.npy" for name in rasters},
+        "levels": HIGH_RISK_LEVELS,
+        "regions": {
+            str(level): find_high_risk_regions(grid, risk, contributions, feature_names, level)
+            for level in HIGH_RISK_LEVELS
+        }
+    }
+    store.write(f"{run_id}/index.json", json.dumps(index).encode("utf-8"), "application/json")
+    store.write("latest.json", json.dumps({"run_id": run_id}).encode("utf-8"), "application/json")
+
+    logger.info(f"Built risk tiles {run_id} in {time.time() - start_time:.2f} seconds")
+    return index
+
+
+class HighRiskIndex:
+    """Query interface over a stored high-risk region index."""
+
+    def __init__(self, index: Dict[str, Any]):
+        """
+        Initialize the index and precompute per-level arrays for filtering.
+
+        Args:
+            index: Index document from build_risk_tiles
+        """
+        self.index = index
+        self.run_id = index["run_id"]
+        self.levels = sorted(float(level) for level in index["levels"])
+        self._regions = {}
+        for level in self.levels:
+            regions = index["regions"][str(level)]
+            bboxes = np.array([region["bbox"] for region in regions], dtype=np.float64).reshape(-1, 4)
+            scores = np.array([region["risk_score"] for region in regions], dtype=np.float64)
+            self._regions[level] = (regions, bboxes, scores)
+
+    def query(
+        self,
+        threshold: float,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find high-risk regions.
+
+        Regions come from the highest indexed level not above the threshold and
+        are kept if their peak risk reaches the threshold.
+
+        Args:
+            threshold: Minimum peak risk score
+            bbox: Optional (min_lon, min_lat, max_lon, max_lat) the region must intersect
+            limit: Maximum number of regions
+
+        Returns:
+            List of region dicts, highest risk first
+        """
+        candidates = [level for level in self.levels if level <= threshold + 1e-9]
+        level = candidates[-1] if candidates else self.levels[0]
+        regions, bboxes, scores = self._regions[level]
+
+        keep = scores >= threshold
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            keep &= (
+                (bboxes[:, 0] <= max_lon) & (bboxes[:, 2] >= min_lon) &
+                (bboxes[:, 1] <= max_lat) & (bboxes[:, 3] >= min_lat)
+            )
+
+        selected = np.flatnonzero(keep)
+        if limit is not None:
+            selected = selected[:limit]
+        return [regions[i] for i in selected]
+
+
+def load_latest_document(store: Any) -> Optional[Dict[str, Any]]:
+    """
+    Load the index document of the most recent run from a tile store.
+
+    Args:
+        store: Tile store from open_tile_store
+
+    Returns:
+        Index document, or None if no run has been stored yet
+    """
+    latest = store.read("latest.json")
+    if latest is None:
+        return None
+    run_id = json.loads(latest)["run_id"]
+    index = store.read(f"{run_id}/index.json")
+    if index is None:
+        return None
+    return json.loads(index)
+
+
+def load_latest_index(store: Any) -> Optional[HighRiskIndex]:
+    """
+    Load the most recent high-risk index from a tile store.
+
+    Args:
+        store: Tile store from open_tile_store
+
+    Returns:
+        HighRiskIndex, or None if no run has been stored yet
+    """
+    document = load_latest_document(store)
+    return HighRiskIndex(document) if document is not None else None
+
+
+def handler(event, context):
+    """
+    AWS Lambda handler for the nightly risk tile build.
+
+    Args:
+        event: AWS Lambda event
+        context: AWS Lambda context
+
+    Returns:
+        Dict with build results
+    """
+    logger.info("Starting risk tile build")
+    start_time = time.time()
+
+    try:
+        store = open_tile_store(event.get("output_uri", RISK_TILES_URI))
+        resolution = float(event.get("resolution_degrees", RISK_TILE_RESOLUTION_DEGREES))
+
+        risk_prediction.model_registry.refresh_active(force=True)
+        index = build_risk_tiles(store, resolution=resolution)
+
+        processing_time = time.time() - start_time
+        return {
+            "statusCode": 200,
+            "body": json.dumps({
+                "message": "Successfully built risk tiles",
+                "run_id": index["run_id"],
+                "model_version": index["model_version"],
+                "pyramid_levels": len(index["pyramid"]),
+                "regions": {level: len(regions) for level, regions in index["regions"].items()},
+                "processing_time_seconds": processing_time
+            })
+        }
+
+    except Exception as e:
+        logger.error(f"Error building risk tiles: {str(e)}")
+        return {
+            "statusCode": 500,
+            "body": json.dumps({
+                "message": f"Error building risk tiles: {str(e)}"
+            })
+        }
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the risk tile pyramid and high-risk index")
+    parser.add_argument("--output", default=RISK_TILES_URI, help="Local directory or s3://bucket/prefix")
+    parser.add_argument("--resolution", type=float, default=RISK_TILE_RESOLUTION_DEGREES, help="Cell size in degrees")
+    args = parser.parse_args()
+
+    result = build_risk_tiles(open_tile_store(args.output), resolution=args.resolution)
+    print(json.dumps({"run_id": result["run_id"], "regions": {k: len(v) for k, v in result["regions"].items()}}))
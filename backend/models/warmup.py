@@ -0,0 +1,229 @@
+"""
+Startup warm-up for API workers and Lambda functions.
+
+The first request to a fresh worker otherwise pays for downloading model
+artifacts, loading the scaler, building pyproj transformers and the first
+numpy and xgboost calls. Warm-up runs those steps once at startup: it preloads
+the declared artifacts, then scores a tiny synthetic feature matrix and runs a
+one-hour simulation so later requests start on warm code paths.
+
+Preloading only touches files and memory, so it is safe to run in a parent
+process before forking workers. The synthetic prediction and simulation start
+xgboost and OpenMP threads and must run in each worker after the fork.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Extra model versions to load besides the active and shadow versions
+WARMUP_MODEL_VERSIONS = [v for v in os.environ.get("WARMUP_MODEL_VERSIONS", "").split(",") if v]
+
+# Steps run by default; set WARMUP_STEPS="" to disable warm-up
+WARMUP_STEPS = [s for s in os.environ.get("WARMUP_STEPS", "models,transformers,risk,spread").split(",") if s]
+
+# Steps that only load data and are safe to run before forking workers
+PRELOAD_STEPS = ["models", "transformers"]
+
+# Synthetic ignition point for the warm-up simulation (Sierra Nevada foothills)
+WARMUP_LOCATION = {"latitude": 38.5, "longitude": -120.5}
+
+
+class WarmupState:
+    """Outcome of each warm-up step in this process, reported by /ready."""
+
+    def __init__(self, required: Optional[List[str]] = None):
+        """
+        Initialize the state.
+
+        Args:
+            required: Steps that must succeed before the process is ready
+        """
+        self.required = list(WARMUP_STEPS if required is None else required)
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, step: str, duration: float, error: Optional[str] = None):
+        """
+        Record a finished step.
+
+        Args:
+            step: Step name
+            duration: Seconds the step took
+            error: Error message if the step failed
+        """
+        with self._lock:
+            self.steps[step] = {"ok": error is None, "duration_ms": round(duration * 1000, 1), "error": error}
+
+    def done(self, step: str) -> bool:
+        """Whether a step already succeeded."""
+        with self._lock:
+            return self.steps.get(step, {}).get("ok", False)
+
+    @property
+    def ready(self) -> bool:
+        """Whether every required step succeeded."""
+        return all(self.done(step) for step in self.required)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the warm-up state for the readiness endpoint.
+
+        Returns:
+            Dict with the ready flag, timestamps and per-step results
+        """
+        with self._lock:
+            steps = {name: dict(result) for name, result in self.steps.items()}
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": steps
+        }
+
+
+# Warm-up state of this process
+state = WarmupState()
+_warmup_lock = threading.Lock()
+
+
+def preload_models() -> List[str]:
+    """
+    Load the active, shadow and declared extra model versions into the registry.
+
+    Returns:
+        Loaded model versions
+    """
+    from models import risk_prediction
+
+    registry = risk_prediction.model_registry
+    registry.refresh_active(force=True)
+    versions = [registry.active_version]
+    for version in [risk_prediction.SHADOW_MODEL_VERSION, *WARMUP_MODEL_VERSIONS]:
+        if version and version not in versions:
+            versions.append(version)
+
+    # Load the active version last so extra versions cannot evict it
+    for version in reversed(versions):
+        registry.get(version)
+    return versions
+
+
+def preload_transformers():
+    """Build the WGS84 <-> UTM transformers for the zones the pipeline serves."""
+    from models import fire_spread
+
+    for zone in fire_spread.WESTERN_US_UTM_ZONES:
+        fire_spread.get_utm_transformers(zone)
+
+
+def warm_risk_model():
+    """Score a small synthetic feature matrix with attribution on the active model."""
+    from models import risk_prediction
+
+    bundle = risk_prediction.model_registry.get()
+    features = bundle.schema.empty(2)
+    risk_prediction.score_with_bundle(bundle, features, explain=True)
+
+
+def warm_fire_spread():
+    """Run a one-hour, coarse-resolution fire spread simulation."""
+    from models import fire_spread
+
+    ignition_points = [{
+        "location": WARMUP_LOCATION,
+        "intensity": 1.0,
+        "detection_time": datetime.now(timezone.utc).isoformat()
+    }]
+    simulator = fire_spread.FireSpreadSimulator(
+        ignition_points=ignition_points,
+        bounds=fire_spread.calculate_bounds(ignition_points, 2.0),
+        resolution_meters=1000,
+        simulation_hours=1,
+        time_step_minutes=30,
+        weather_data=fire_spread.generate_simulated_weather_data()
+    )
+    simulator.run_simulation()
+
+
+WARMUP_FUNCTIONS = {
+    "models": preload_models,
+    "transformers": preload_transformers,
+    "risk": warm_risk_model,
+    "spread": warm_fire_spread
+}
+
+
+def warm_up(steps: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run warm-up steps that have not yet succeeded in this process.
+
+    Failures are logged and recorded rather than raised, so a missing
+    artifact leaves the process not ready instead of failing startup.
+
+    Args:
+        steps: Step names from WARMUP_FUNCTIONS (WARMUP_STEPS if None)
+
+    Returns:
+        Warm-up state as returned by WarmupState.to_dict
+    """
+    steps = WARMUP_STEPS if steps is None else steps
+    with _warmup_lock:
+        state.started_at = state.started_at or datetime.now(timezone.utc).isoformat()
+        for step in steps:
+            if state.done(step):
+                continue
+            start_time = time.perf_counter()
+            try:
+                WARMUP_FUNCTIONS[step]()
+            except Exception as e:
+                logger.error(f"Warm-up step {step} failed: {str(e)}")
+                state.record(step, time.perf_counter() - start_time, str(e))
+                continue
+            duration = time.perf_counter() - start_time
+            state.record(step, duration)
+            logger.info(f"Warm-up step {step} completed in {duration:.2f} seconds")
+        state.finished_at = datetime.now(timezone.utc).isoformat()
+
+    return state.to_dict()
+
+
+def warm_up_in_background(steps: Optional[List[str]] = None) -> threading.Thread:
+    """
+    Run warm-up in a daemon thread so the server can start accepting connections.
+
+    Args:
+        steps: Step names (WARMUP_STEPS if None)
+
+    Returns:
+        The started thread
+    """
+    thread = threading.Thread(target=warm_up, args=(steps,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_lambda(steps: List[str]):
+    """
+    Warm up during Lambda initialization.
+
+    Called when a Lambda entry point in lambdas/ is imported, which happens
+    in the init phase before the first invocation's timeout starts counting.
+    Model modules never call it themselves, so importing them has no side
+    effects.
+
+    Args:
+        steps: Step names the function's handler needs
+    """
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        warm_up([step for step in steps if step in WARMUP_STEPS])
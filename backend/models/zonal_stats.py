@@ -0,0 +1,296 @@
+"""
+Zonal statistics over the precomputed risk and fuel rasters.
+
+Rectangle queries (map viewports, bounding boxes) are answered in constant time
+from summed-area tables, with per-tile min/max so that extrema only scan the
+partially covered edge tiles. Polygon queries (counties, service territories)
+rasterize the polygon once over its bounding window.
+"""
+
+import logging
+import math
+from typing import Dict, List, Any, Tuple, Optional
+
+import numpy as np
+from rasterio.transform import Affine
+from rasterio.features import geometry_mask
+from shapely.geometry import shape
+
+from models import risk_tiles
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tile edge length in cells for the min/max index
+EXTREMA_TILE_SIZE = 64
+
+
+class SummedAreaTable:
+    """Integral images of a raster's values, squared values and valid cell count."""
+
+    def __init__(self, raster: np.ndarray):
+        """
+        Build the tables.
+
+        Args:
+            raster: 2D array; NaN cells are treated as no data
+        """
+        valid = ~np.isnan(raster)
+        values = np.where(valid, raster, 0.0).astype(np.float64)
+        self.shape = raster.shape
+        self.sum = self._integral(values)
+        self.sum_sq = self._integral(values * values)
+        self.count = self._integral(valid.astype(np.int64))
+
+    @staticmethod
+    def _integral(values: np.ndarray) -> np.ndarray:
+        # Leading zero row and column so any window is four lookups
+        table = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=values.dtype)
+        table[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+        return table
+
+    @staticmethod
+    def _window(table: np.ndarray, row0: int, col0: int, row1: int, col1: int):
+        return table[row1, col1] - table[row0, col1] - table[row1, col0] + table[row0, col0]
+
+    def stats(self, row0: int, col0: int, row1: int, col1: int) -> Dict[str, Optional[float]]:
+        """
+        Sum, count, mean and standard deviation of a half-open cell window.
+
+        Args:
+            row0, col0: First row and column
+            row1, col1: Row and column after the last
+
+        Returns:
+            Dict of statistics (mean and std are None if the window has no data)
+        """
+        total = float(self._window(self.sum, row0, col0, row1, col1))
+        count = int(self._window(self.count, row0, col0, row1, col1))
+        if count == 0:
+            return {"sum": 0.0, "count": 0, "mean": None, "std": None}
+        mean = total / count
+        variance = max(float(self._window(self.sum_sq, row0, col0, row1, col1)) / count - mean * mean, 0.0)
+        return {"sum": total, "count": count, "mean": mean, "std": math.sqrt(variance)}
+
+
+class TileExtrema:
+    """Per-tile min and max of a raster for fast window extrema."""
+
+    def __init__(self, raster: np.ndarray, tile_size: int = EXTREMA_TILE_SIZE):
+        """
+        Build the per-tile tables.
+
+        Args:
+            raster: 2D array; NaN cells are treated as no data
+            tile_size: Tile edge length in cells
+        """
+        self.raster = raster
+        self.tile_size = tile_size
+        n_rows = -(-raster.shape[0] // tile_size)
+        n_cols = -(-raster.shape[1] // tile_size)
+
+        padded = np.full((n_rows * tile_size, n_cols * tile_size), np.nan, dtype=np.float64)
+        padded[:raster.shape[0], :raster.shape[1]] = raster
+        blocks = padded.reshape(n_rows, tile_size, n_cols, tile_size)
+        self.min = np.where(np.isnan(blocks), np.inf, blocks).min(axis=(1, 3))
+        self.max = np.where(np.isnan(blocks), -np.inf, blocks).max(axis=(1, 3))
+
+    def extrema(self, row0: int, col0: int, row1: int, col1: int) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Min and max of a half-open cell window.
+
+        Fully covered tiles use the precomputed tables; only the cells of
+        partially covered edge tiles are scanned.
+
+        Returns:
+            Tuple of (min, max), or (None, None) if the window has no data
+        """
+        size = self.tile_size
+        inner_r0, inner_c0 = -(-row0 // size), -(-col0 // size)
+        inner_r1, inner_c1 = row1 // size, col1 // size
+
+        lo, hi = np.inf, -np.inf
+        if inner_r0 < inner_r1 and inner_c0 < inner_c1:
+            lo = self.min[inner_r0:inner_r1, inner_c0:inner_c1].min()
+            hi = self.max[inner_r0:inner_r1, inner_c0:inner_c1].max()
+
+            # Edge strips outside the fully covered tiles
+            strips = [
+                (row0, col0, inner_r0 * size, col1),
+                (inner_r1 * size, col0, row1, col1),
+                (inner_r0 * size, col0, inner_r1 * size, inner_c0 * size),
+                (inner_r0 * size, inner_c1 * size, inner_r1 * size, col1)
+            ]
+        else:
+            strips = [(row0, col0, row1, col1)]
+
+        for r0, c0, r1, c1 in strips:
+            if r0 < r1 and c0 < c1:
+                window = self.raster[r0:r1, c0:c1]
+                if not np.isnan(window).all():
+                    lo = min(lo, float(np.nanmin(window)))
+                    hi = max(hi, float(np.nanmax(window)))
+
+        if lo == np.inf:
+            return None, None
+        return float(lo), float(hi)
+
+
+class ZonalIndex:
+    """Rectangle and polygon statistics over a set of co-registered rasters."""
+
+    def __init__(self, rasters: Dict[str, np.ndarray], transform: Affine, run_id: Optional[str] = None):
+        """
+        Build the summed-area tables and tile extrema for every raster.
+
+        Args:
+            rasters: Dict mapping layer names to 2D arrays of the same shape
+            transform: Affine transform mapping (col, row) to (lon, lat)
+            run_id: Tile build the rasters come from
+        """
+        self.rasters = rasters
+        self.transform = transform
+        self.run_id = run_id
+        self.shape = next(iter(rasters.values())).shape
+        self.tables = {name: SummedAreaTable(raster) for name, raster in rasters.items()}
+        self.extrema = {name: TileExtrema(raster) for name, raster in rasters.items()}
+
+    @property
+    def layers(self) -> List[str]:
+        """Available layer names."""
+        return list(self.rasters)
+
+    def bbox_window(self, bbox: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+        """
+        Cell window of all cells intersecting a bounding box.
+
+        Args:
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+
+        Returns:
+            Half-open (row0, col0, row1, col1) clipped to the raster
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        t = self.transform
+
+        # The tile rasters are north-up, so the inverse needs no rotation terms
+        col_a, row_a = (min_lon - t.c) / t.a, (max_lat - t.f) / t.e
+        col_b, row_b = (max_lon - t.c) / t.a, (min_lat - t.f) / t.e
+        row0, row1 = sorted((row_a, row_b))
+        col0, col1 = sorted((col_a, col_b))
+        height, width = self.shape
+
+        # Tolerance keeps a bbox edge on a cell boundary from picking up the neighbour
+        return (
+            int(np.clip(math.floor(row0 + 1e-9), 0, height)),
+            int(np.clip(math.floor(col0 + 1e-9), 0, width)),
+            int(np.clip(math.ceil(row1 - 1e-9), 0, height)),
+            int(np.clip(math.ceil(col1 - 1e-9), 0, width))
+        )
+
+    def _layers(self, layers: Optional[List[str]]) -> List[str]:
+        layers = layers or self.layers
+        unknown = [name for name in layers if name not in self.rasters]
+        if unknown:
+            raise ValueError(f"Unknown layers: {', '.join(unknown)}")
+        return layers
+
+    def rectangle_stats(
+        self,
+        bbox: Tuple[float, float, float, float],
+        layers: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Statistics over a bounding box in constant time per layer.
+
+        Args:
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            layers: Layers to summarize (all if None)
+
+        Returns:
+            Dict mapping layer names to sum, count, mean, std, min and max
+        """
+        window = self.bbox_window(bbox)
+        results = {}
+        for name in self._layers(layers):
+            stats = self.tables[name].stats(*window)
+            stats["min"], stats["max"] = self.extrema[name].extrema(*window)
+            results[name] = stats
+        return results
+
+    def polygon_stats(
+        self,
+        geometry: Dict[str, Any],
+        layers: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Statistics over a polygon.
+
+        The polygon is rasterized once over its bounding window and the mask is
+        reused for every layer.
+
+        Args:
+            geometry: GeoJSON Polygon or MultiPolygon in lon/lat
+            layers: Layers to summarize (all if None)
+
+        Returns:
+            Dict mapping layer names to sum, count, mean, std, min and max
+        """
+        layers = self._layers(layers)
+        polygon = shape(geometry)
+        row0, col0, row1, col1 = self.bbox_window(polygon.bounds)
+
+        empty = {"sum": 0.0, "count": 0, "mean": None, "std": None, "min": None, "max": None}
+        if row0 >= row1 or col0 >= col1:
+            return {name: dict(empty) for name in layers}
+
+        t = self.transform
+        window_transform = Affine(t.a, t.b, t.c + col0 * t.a, t.d, t.e, t.f + row0 * t.e)
+        inside = geometry_mask(
+            [polygon], out_shape=(row1 - row0, col1 - col0), transform=window_transform, invert=True
+        )
+
+        results = {}
+        for name in layers:
+            values = self.rasters[name][row0:row1, col0:col1][inside]
+            values = values[~np.isnan(values)].astype(np.float64)
+            if values.size == 0:
+                results[name] = dict(empty)
+                continue
+            results[name] = {
+                "sum": float(values.sum()),
+                "count": int(values.size),
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max())
+            }
+        return results
+
+
+def load_latest_zonal_index(store: Any) -> Optional[ZonalIndex]:
+    """
+    Build a zonal index from the rasters of the most recent tile build.
+
+    Args:
+        store: Tile store from risk_tiles.open_tile_store
+
+    Returns:
+        ZonalIndex, or None if no run with rasters has been stored yet
+    """
+    document = risk_tiles.load_latest_document(store)
+    if document is None or "rasters" not in document:
+        return None
+
+    rasters = {}
+    for name, key in document["rasters"].items():
+        data = store.read(key)
+        if data is None:
+            logger.warning(f"Raster {key} listed in index {document['run_id']} is missing")
+            continue
+        rasters[name] = risk_tiles.array_from_bytes(data)
+    if not rasters:
+        return None
+
+    return ZonalIndex(rasters, Affine(*document["transform"]), document["run_id"])
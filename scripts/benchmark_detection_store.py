@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark GeoParquet detection storage against the previous GeoJSON blobs.
+
+Writes a synthetic global VIIRS day both ways and reports the stored size,
+write time, and the time to answer a one-day Western US query (parsing the
+whole GeoJSON vs. reading pruned partitions and a few columns).
+
+Usage:
+    python scripts/benchmark_detection_store.py [--rows 500000]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from data_pipeline import detection_store, fire_index  # noqa: E402
+
+
+def synthetic_detections(rows: int) -> gpd.GeoDataFrame:
+    """Detections shaped like nasa_firms.process_firms_data output, over three days."""
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-60, 70, rows).astype(np.float32)
+    lon = rng.uniform(-180, 180, rows).astype(np.float32)
+    times = pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, 3 * 1440, rows), unit="min")
+    df = pd.DataFrame({
+        "latitude": lat,
+        "longitude": lon,
+        "acq_date": pd.Categorical(times.strftime("%Y-%m-%d")),
+        "acq_time": (times.hour * 100 + times.minute).astype(np.int16),
+        "confidence": pd.Categorical(rng.choice(["l", "n", "h"], rows)),
+        "brightness": rng.uniform(300, 380, rows).astype(np.float32),
+        "frp": rng.exponential(10, rows).astype(np.float32),
+        "acquisition_datetime": times,
+        "source": pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), ["VIIRS_SNPP"]),
+        "collection_datetime": "2023-07-04T00:00:00"
+    })
+    return gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(lon, lat), crs="EPSG:4326")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    gdf = synthetic_detections(args.rows)
+    bbox = (-125.0, 31.0, -102.0, 49.5)
+    start, end = pd.Timestamp("2023-07-02"), pd.Timestamp("2023-07-02 23:59")
+
+    with tempfile.TemporaryDirectory() as root:
+        t0 = time.perf_counter()
+        geojson = gdf.to_json(default=str)
+        geojson_write = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        features = json.loads(geojson)["features"]
+        df = pd.DataFrame([feature["properties"] for feature in features])
+        df["acquisition_datetime"] = pd.to_datetime(df["acquisition_datetime"])
+        geojson_hits = df[df["longitude"].between(bbox[0], bbox[2]) & df["latitude"].between(bbox[1], bbox[3])
+                          & df["acquisition_datetime"].between(start, end)]
+        geojson_query = time.perf_counter() - t0
+
+        store = detection_store.DetectionStore(root)
+        t0 = time.perf_counter()
+        store.write(gdf, "VIIRS_SNPP")
+        parquet_write = time.perf_counter() - t0
+        parquet_bytes = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(root) for name in names
+        )
+
+        t0 = time.perf_counter()
+        hits = store.read(start=start, end=end, bbox=bbox, columns=fire_index.INDEX_COLUMNS)
+        parquet_query = time.perf_counter() - t0
+        assert len(hits) == len(geojson_hits)
+
+    print(f"rows: {args.rows}, query hits: {len(hits)}")
+    print(f"GeoJSON:    {len(geojson) / 1e6:7.1f} MB  write {geojson_write:6.2f} s  query {geojson_query:6.2f} s")
+    print(f"GeoParquet: {parquet_bytes / 1e6:7.1f} MB  write {parquet_write:6.2f} s  query {parquet_query:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark clustering a fire season of detections into events.
+
+Generates synthetic fires (clusters of detections that grow over several
+days) scattered over the Western US across a season, plus isolated
+detections, and reports clustering throughput at increasing sizes to show
+the near-linear scaling. Also times an incremental twice-daily update
+against the season's state.
+
+Usage:
+    python scripts/benchmark_fire_events.py [--detections 2000000] [--days 150]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from data_pipeline import fire_events  # noqa: E402
+
+
+def synthetic_season(detections: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """Detections from fires lasting 1-20 days, with 10% isolated false alarms."""
+    rng = np.random.default_rng(seed)
+    fires = max(detections // 1000, 1)
+    fire_lat = rng.uniform(32.0, 48.0, fires)
+    fire_lon = rng.uniform(-124.0, -104.0, fires)
+    fire_start = rng.uniform(0, days * 1440, fires)
+    fire_minutes = rng.uniform(1, 20, fires) * 1440
+    fire_size = rng.uniform(0.01, 0.2, fires)
+
+    n_fire = int(detections * 0.9)
+    fire = rng.integers(0, fires, n_fire)
+    progress = rng.uniform(0, 1, n_fire)
+    radius = fire_size[fire] * np.sqrt(progress) * rng.uniform(0, 1, n_fire)
+    angle = rng.uniform(0, 2 * np.pi, n_fire)
+    lat = np.concatenate([fire_lat[fire] + radius * np.sin(angle), rng.uniform(32.0, 48.0, detections - n_fire)])
+    lon = np.concatenate([fire_lon[fire] + radius * np.cos(angle), rng.uniform(-124.0, -104.0, detections - n_fire)])
+    minutes = np.concatenate([fire_start[fire] + progress * fire_minutes[fire], rng.uniform(0, days * 1440, detections - n_fire)])
+    return pd.DataFrame({
+        "latitude": lat.astype(np.float32),
+        "longitude": lon.astype(np.float32),
+        "acquisition_datetime": pd.Timestamp("2023-05-01") + pd.to_timedelta(minutes.astype(np.int64), unit="min"),
+        "frp": rng.exponential(10, detections).astype(np.float32),
+        "source": rng.choice(["VIIRS_SNPP", "VIIRS_NOAA", "MODIS"], detections)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--detections", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=150)
+    args = parser.parse_args()
+
+    for size in (args.detections // 4, args.detections // 2, args.detections):
+        season = synthetic_season(size, args.days)
+        tracker = fire_events.FireEventTracker()
+        start = time.perf_counter()
+        tracker.update(season)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>9} detections: {elapsed:6.1f} s ({size / elapsed:9,.0f}/s), {len(tracker.events)} events")
+
+    # One more half-day of detections on top of the season's state
+    latest = season["acquisition_datetime"].max()
+    update = synthetic_season(args.detections // (args.days * 2), 1, seed=1)
+    update["acquisition_datetime"] = latest + (update["acquisition_datetime"] - update["acquisition_datetime"].min()) / 2
+    start = time.perf_counter()
+    tracker.update(update)
+    print(f"incremental update of {len(update)} detections: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
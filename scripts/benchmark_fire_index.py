@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Benchmark recent-fire queries against the in-memory detection index.
+
+Indexes synthetic Western US detections and reports query latency
+percentiles for random bbox and radius queries, including building the
+response records for one page.
+
+Usage:
+    python scripts/benchmark_fire_index.py [--detections 1000000] [--queries 500] [--limit 1000]
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from data_pipeline import fire_index  # noqa: E402
+
+
+def synthetic_detections(n: int, days: int = 30) -> pd.DataFrame:
+    """Detections shaped like nasa_firms.process_firms_data output."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "latitude": rng.uniform(31.0, 49.0, n),
+        "longitude": rng.uniform(-125.0, -102.0, n),
+        "acquisition_datetime": pd.Timestamp("2023-07-01") + pd.to_timedelta(rng.integers(0, days * 1440, n), unit="min"),
+        "confidence": rng.choice(["l", "n", "h"], n),
+        "brightness": rng.uniform(300, 400, n).astype(np.float32),
+        "frp": rng.exponential(10, n).astype(np.float32),
+        "source": rng.choice(["VIIRS_SNPP", "VIIRS_NOAA", "MODIS"], n)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--detections", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = synthetic_detections(args.detections)
+    start = time.perf_counter()
+    index = fire_index.FireDetectionIndex.empty().extend(df)
+    print(f"Indexed {len(index)} detections in {time.perf_counter() - start:.2f} s")
+
+    rng = np.random.default_rng(1)
+    window_start = datetime(2023, 7, 24, tzinfo=timezone.utc)
+    window_end = datetime(2023, 7, 31, tzinfo=timezone.utc)
+    latencies = {"bbox": [], "radius": [], "bbox_page2": []}
+    for _ in range(args.queries):
+        lon, lat = rng.uniform(-124, -104), rng.uniform(32, 47)
+        size = rng.uniform(0.5, 4.0)
+        bbox = (lon, lat, lon + size, lat + size)
+
+        t0 = time.perf_counter()
+        positions, cursor = index.query(bbox=bbox, start=window_start, end=window_end, limit=args.limit)
+        index.records(positions)
+        latencies["bbox"].append(time.perf_counter() - t0)
+
+        if cursor is not None:
+            t0 = time.perf_counter()
+            positions, _ = index.query(bbox=bbox, start=window_start, end=window_end, cursor=cursor, limit=args.limit)
+            index.records(positions)
+            latencies["bbox_page2"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        positions, _ = index.query(center=(lat, lon), radius_km=rng.uniform(10, 200), min_confidence="nominal",
+                                   start=window_start, end=window_end, limit=args.limit)
+        index.records(positions)
+        latencies["radius"].append(time.perf_counter() - t0)
+
+    for name, values in latencies.items():
+        if values:
+            ms = np.array(values) * 1000
+            print(f"{name:>10}: p50 {np.percentile(ms, 50):6.2f} ms  p99 {np.percentile(ms, 99):6.2f} ms  ({len(ms)} queries)")
+
+
+if __name__ == "__main__":
+    main()
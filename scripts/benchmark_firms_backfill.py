@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark backfilling a year of FIRMS archive files.
+
+Writes a synthetic year of MODIS, VIIRS_SNPP and VIIRS_NOAA archive CSVs
+for the Western US (fires seen by several sensors, plus isolated
+detections), backfills them into local stores, and reports rows per second
+for the store stage and end to end, including fusion and fire events.
+
+Usage:
+    python scripts/benchmark_firms_backfill.py [--detections 3000000] [--workers 8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from data_pipeline import detection_store, firms_backfill  # noqa: E402
+
+COLUMNS = {
+    "MODIS": ["latitude", "longitude", "brightness", "scan", "track", "acq_date", "acq_time", "satellite",
+              "instrument", "confidence", "version", "bright_t31", "frp", "daynight", "type"],
+    "VIIRS": ["latitude", "longitude", "bright_ti4", "scan", "track", "acq_date", "acq_time", "satellite",
+              "instrument", "confidence", "version", "bright_ti5", "frp", "daynight", "type"]
+}
+
+
+def write_archives(directory: str, detections: int, seed: int = 0):
+    """Write one archive CSV per source, with fire pixels shared between sensors."""
+    rng = np.random.default_rng(seed)
+    fires = detections // 600
+    fire_lat, fire_lon = rng.uniform(32.0, 48.0, fires), rng.uniform(-124.0, -104.0, fires)
+    fire_day, fire_days = rng.integers(0, 365, fires), rng.integers(1, 20, fires)
+    for source, share in (("VIIRS_SNPP", 0.45), ("VIIRS_NOAA", 0.45), ("MODIS", 0.10)):
+        n = int(detections * share)
+        fire = rng.integers(0, fires, n)
+        day = np.minimum(fire_day[fire] + rng.integers(0, 20, n) % fire_days[fire], 364)
+        df = pd.DataFrame({
+            "latitude": np.round(fire_lat[fire] + rng.normal(0, 0.05, n), 5),
+            "longitude": np.round(fire_lon[fire] + rng.normal(0, 0.05, n), 5),
+            "brightness": np.round(rng.uniform(300, 380, n), 2),
+            "scan": 0.4, "track": 0.4,
+            "acq_date": (pd.Timestamp("2023-01-01") + pd.to_timedelta(day, unit="D")).strftime("%Y-%m-%d"),
+            "acq_time": rng.integers(0, 24, n) * 100 + rng.integers(0, 60, n),
+            "satellite": "N", "instrument": "VIIRS",
+            "confidence": rng.integers(0, 100, n) if source == "MODIS" else rng.choice(["l", "n", "h"], n),
+            "version": "2", "bright_t31": np.round(rng.uniform(270, 300, n), 2),
+            "frp": np.round(rng.exponential(10, n), 2), "daynight": "D", "type": 0
+        })
+        columns = COLUMNS["MODIS" if source == "MODIS" else "VIIRS"]
+        df.columns = columns
+        df.to_csv(os.path.join(directory, f"{source}_2023.csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--detections", type=int, default=3_000_000)
+    parser.add_argument("--workers", type=int, default=firms_backfill.BACKFILL_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        write_archives(directory, args.detections)
+        print(f"wrote {args.detections} archive rows in {time.perf_counter() - start:.1f} s")
+
+        archives = [(source, os.path.join(directory, f"{source}_2023.csv")) for source in ("MODIS", "VIIRS_SNPP", "VIIRS_NOAA")]
+        summary = firms_backfill.backfill(
+            "benchmark", archives, start="2023-01-01", end="2024-01-01",
+            store=detection_store.DetectionStore(os.path.join(directory, "detections")),
+            fused_store=detection_store.DetectionStore(os.path.join(directory, "fused")),
+            events_uri=os.path.join(directory, "events"), state_uri=os.path.join(directory, "state"),
+            workers=args.workers
+        )
+        print(f"stored {summary['rows_stored']} rows at {summary['store_rows_per_second']:,.0f} rows/s")
+        print(f"fused into {summary['fusion'].get('records', 0)} records, clustered {summary['chunks_clustered']} chunks")
+        print(f"end to end: {summary['elapsed_seconds']:.1f} s ({summary['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Benchmark process_firms_data on a synthetic VIIRS day.
+
+Compares the vectorized implementation with the previous per-row approach
+(Point() list comprehension and string-concatenated timestamps parsed with a
+format string) and reports the frame's memory footprint.
+
+Usage:
+    python scripts/benchmark_process_firms.py [--rows 1000000]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Point
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from data_pipeline import nasa_firms  # noqa: E402
+
+
+def synthetic_csv(rows: int) -> bytes:
+    """A VIIRS 24h CSV with the product's columns."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "latitude": rng.uniform(-60, 70, rows).round(5),
+        "longitude": rng.uniform(-180, 180, rows).round(5),
+        "bright_ti4": rng.uniform(300, 380, rows).round(2),
+        "scan": 0.39,
+        "track": 0.36,
+        "acq_date": rng.choice(["2023-07-01", "2023-07-02"], rows),
+        "acq_time": rng.integers(0, 24, rows) * 100 + rng.integers(0, 60, rows),
+        "satellite": "N",
+        "instrument": "VIIRS",
+        "confidence": rng.choice(["l", "n", "h"], rows),
+        "version": "2.0NRT",
+        "bright_ti5": rng.uniform(270, 300, rows).round(2),
+        "frp": rng.exponential(10, rows).round(2),
+        "daynight": rng.choice(["D", "N"], rows)
+    })
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def legacy_process(df: pd.DataFrame, source: str) -> gpd.GeoDataFrame:
+    """The previous per-row implementation, kept for comparison."""
+    cols = {"latitude": "latitude", "longitude": "longitude", "acq_date": "acq_date", "acq_time": "acq_time",
+            "confidence": "confidence", "bright_ti4": "brightness", "frp": "frp"}
+    df = df[list(cols.keys())].rename(columns=cols)
+    df["acquisition_datetime"] = pd.to_datetime(
+        df["acq_date"].astype(str) + " " + df["acq_time"].astype(str).str.zfill(4),
+        format="%Y-%m-%d %H%M"
+    )
+    df["source"] = source
+    geometry = [Point(xy) for xy in zip(df.longitude, df.latitude)]
+    return gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = synthetic_csv(args.rows)
+    legacy_input = pd.read_csv(io.BytesIO(data))
+    fast_input = nasa_firms.read_firms_csv(io.BytesIO(data), "VIIRS_SNPP")
+
+    start = time.perf_counter()
+    legacy = legacy_process(legacy_input, "VIIRS_SNPP")
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = nasa_firms.process_firms_data(fast_input, "VIIRS_SNPP")
+    fast_seconds = time.perf_counter() - start
+
+    assert (legacy["acquisition_datetime"].values == fast["acquisition_datetime"].values).all()
+
+    print(f"rows: {args.rows}")
+    print(f"per-row:    {legacy_seconds:6.2f} s  {legacy.drop(columns='geometry').memory_usage(deep=True).sum() / 1e6:7.1f} MB")
+    print(f"vectorized: {fast_seconds:6.2f} s  {fast.drop(columns='geometry').memory_usage(deep=True).sum() / 1e6:7.1f} MB")
+    print(f"speedup:    {legacy_seconds / fast_seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Benchmark response building for large fire spread simulation outputs.
+
+Compares validating results through the FireSpreadResponse Pydantic model and
+re-serializing them with the fast path that encodes trusted results straight
+to bytes, and reports body sizes with gzip and brotli compression.
+
+Usage:
+    python scripts/benchmark_serialization.py [--grid 200] [--steps 48] [--vertices 400]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from api import serialization  # noqa: E402
+from api.main import FireSpreadResponse  # noqa: E402
+
+
+def synthetic_results(grid: int, steps: int, vertices: int) -> dict:
+    """Build simulation results shaped like FireSpreadSimulator.generate_results output."""
+    rng = np.random.default_rng(0)
+    perimeters = {}
+    intensity_grid = {}
+    for step in range(steps):
+        time_str = f"2023-07-01T{step // 2:02d}:{30 * (step % 2):02d}:00"
+        angles = np.linspace(0, 2 * np.pi, vertices)
+        radius = 0.01 * (step + 1)
+        perimeters[time_str] = [[
+            {"latitude": float(37 + radius * np.sin(a)), "longitude": float(-120 + radius * np.cos(a))}
+            for a in angles
+        ]]
+        intensity_grid[time_str] = rng.random((grid, grid)).round(3).tolist()
+    return {"perimeters": perimeters, "intensity_grid": intensity_grid, "metadata": {"model_version": "1.0.0"}}
+
+
+def timed(func, repeat: int = 3) -> tuple:
+    """Best wall time over a few runs, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--grid", type=int, default=200, help="Intensity grid edge length")
+    parser.add_argument("--steps", type=int, default=48, help="Time points in the output")
+    parser.add_argument("--vertices", type=int, default=400, help="Vertices per perimeter")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.grid, args.steps, args.vertices)
+    print(f"Output: {args.steps} time points, {args.grid}x{args.grid} grid, {args.vertices} perimeter vertices")
+    print(f"orjson available: {serialization.ORJSON_AVAILABLE}, brotli available: {serialization.BROTLI_AVAILABLE}")
+
+    pydantic_time, pydantic_body = timed(lambda: FireSpreadResponse(**results).json().encode("utf-8"))
+    fast_time, fast_body = timed(lambda: serialization.dumps(results))
+    print(f"Pydantic validate + json: {pydantic_time * 1000:8.1f} ms  {len(pydantic_body):>12,} bytes")
+    print(f"Fast path bytes:          {fast_time * 1000:8.1f} ms  {len(fast_body):>12,} bytes")
+    print(f"Speedup: {pydantic_time / fast_time:.1f}x")
+
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and not serialization.BROTLI_AVAILABLE:
+            continue
+        compress_time, compressed = timed(lambda: serialization.compress(fast_body, encoding))
+        print(f"{encoding:<4} compression:         {compress_time * 1000:8.1f} ms  {len(compressed):>12,} bytes "
+              f"({len(compressed) / len(fast_body):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Shared test configuration.
+"""
+
+import os
+import sys
+import gzip
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+# Backend modules are imported the same way the Lambda runtime does,
+# with the backend directory as the import root.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "backend"))
+
+# Keep boto3 from probing for real credentials during tests
+os.environ.setdefault("AWS_EC2_METADATA_DISABLED", "true")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+# Tests run warm-up steps explicitly rather than on app startup
+os.environ.setdefault("WARMUP_STEPS", "")
+
+
+# Header of FIRMS VIIRS 24h CSV files
+VIIRS_HEADER = "latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_ti5,frp,daynight\n"
+
+# Feature columns of the small model trained for tests
+FEATURES = ["ndvi", "erc", "vpd", "pdsi", "temperature", "relative_humidity",
+            "wind_speed", "precipitation", "elevation", "slope", "aspect"]
+
+
+@pytest.fixture
+def trained_model(monkeypatch):
+    """Install a small trained booster in place of the S3 artifacts."""
+    import xgboost as xgb
+    from sklearn.preprocessing import StandardScaler
+    from models import risk_prediction
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, len(FEATURES))).astype(np.float32)
+    y = (X[:, 0] + X[:, 4] > 0).astype(int)
+    scaler = StandardScaler().fit(X)
+    booster = xgb.train(
+        {"objective": "binary:logistic", "max_depth": 2},
+        xgb.DMatrix(scaler.transform(X), label=y, feature_names=FEATURES),
+        num_boost_round=5
+    )
+    registry = risk_prediction.ModelRegistry("test-v1")
+    registry.register(
+        risk_prediction.ModelBundle("test-v1", booster, scaler, {name: 1.0 for name in FEATURES}),
+        activate=True
+    )
+    monkeypatch.setattr(risk_prediction, "model_registry", registry)
+    monkeypatch.setattr(risk_prediction, "MODEL_REFRESH_SECONDS", float("inf"))
+    return booster
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """
+    Serve a CSV with an ETag for every FIRMS path, answering 304 while it is unchanged.
+
+    Set "body" to change the CSV, "gzip" to send it gzip-encoded, and
+    "delays" and "errors" to slow down or fail paths by file name.
+    """
+    from data_pipeline import nasa_firms
+
+    served = {
+        "body": VIIRS_HEADER.encode("utf-8"), "gzip": False, "delays": {}, "errors": set(),
+        "requests": 0, "not_modified": 0
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            served["requests"] += 1
+            name = self.path.rsplit("/", 1)[-1]
+            time.sleep(served["delays"].get(name, 0))
+            if name in served["errors"]:
+                self.send_response(503)
+                self.end_headers()
+                return
+            etag = '"' + hashlib.sha1(served["body"]).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                served["not_modified"] += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            payload = gzip.compress(served["body"]) if served["gzip"] else served["body"]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("ETag", etag)
+            if served["gzip"]:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(nasa_firms, "FIRMS_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield served
+    server.shutdown()
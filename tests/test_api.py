@@ -0,0 +1,126 @@
+"""
+Tests for the FastAPI application.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main, workers
+from models import risk_prediction
+
+
+@pytest.fixture
+def client(trained_model):
+    risk_prediction.feature_cache.clear()
+    main.api_cache.clear()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+RISK_REQUEST = {
+    "location": {"latitude": 37.0, "longitude": -120.0},
+    "start_date": "2023-07-01",
+    "end_date": "2023-07-03",
+    "top_k_factors": 2
+}
+
+
+def test_predict_risk_scores_through_model(client):
+    response = client.post("/predict/risk", json=RISK_REQUEST)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["factors"]) == 2
+    assert body["forecast_dates"] == ["2023-07-01", "2023-07-02", "2023-07-03"]
+    assert set(body["metadata"]["sources"]) == {"weather", "terrain", "vegetation"}
+
+
+def test_micro_batcher_coalesces_concurrent_requests(trained_model):
+    batcher = main.RiskMicroBatcher(50, 8, workers.WorkerPool("test", 1, 8))
+    schema = risk_prediction.get_feature_schema()
+    rng = np.random.default_rng(2)
+    matrices = [rng.normal(size=(3, schema.n_features)).astype(np.float32) for _ in range(10)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(matrix, top_k=1) for matrix in matrices))
+
+    results = asyncio.run(run())
+    stats = batcher.stats()
+    assert stats["batches"] == 2
+    assert stats["batch_size_histogram"]["8"] == 1
+    assert stats["batch_size_histogram"]["2"] == 1
+
+    # Batched results match scoring each request on its own
+    for matrix, result in zip(matrices, results):
+        alone = risk_prediction.score_requests([matrix], [1])[0]
+        assert result["risk_score"] == pytest.approx(alone["risk_score"])
+        assert result["forecast_values"] == pytest.approx(alone["forecast_values"])
+        assert result["factors"] == alone["factors"]
+
+
+def test_micro_batcher_rejects_when_its_queue_is_full():
+    batcher = main.RiskMicroBatcher(50, 8, workers.WorkerPool("test", 1, 8), max_queue=1)
+    schema = risk_prediction.get_feature_schema()
+    matrix = np.zeros((3, schema.n_features), dtype=np.float32)
+
+    async def run():
+        batcher._ensure_running()
+        # Fill the queue before the collector gets to run
+        batcher._queue.put_nowait(None)
+        with pytest.raises(workers.PoolSaturated) as rejected:
+            await batcher.submit(matrix)
+        batcher._collector.cancel()
+        return rejected.value
+
+    assert asyncio.run(run()).status_code == 429
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_high_risk_areas_served_from_index(trained_model, tmp_path, monkeypatch):
+    from datetime import datetime
+    from models import risk_tiles
+
+    store = risk_tiles.open_tile_store(str(tmp_path))
+    cache = main.PrecomputedIndexCache(risk_tiles.load_latest_index, 300)
+    cache.store = store
+    monkeypatch.setattr(main, "high_risk_index", cache)
+    monkeypatch.setattr(main, "api_cache", main.response_cache.ResponseCache(100))
+    client = TestClient(main.app)
+
+    assert client.get("/data/high-risk-areas").status_code == 503
+
+    regions = [{"state": "CA", "name": "California", "bounds": (36.0, -122.0, 38.0, -119.0)}]
+    risk_tiles.build_risk_tiles(store, run_date=datetime(2023, 7, 1), resolution=0.02, regions=regions)
+    body = client.get("/data/high-risk-areas", params={"threshold": 0.5, "limit": 3}).json()
+    assert body["run_id"] == "20230701"
+    assert 0 < body["count"] <= 3
+
+    response = client.get("/data/high-risk-areas", params={"min_lon": -120.0})
+    assert response.status_code == 400
+
+
+def test_risk_stats_from_tile_rasters(trained_model, tmp_path, monkeypatch):
+    from datetime import datetime
+    from models import risk_tiles, zonal_stats
+
+    store = risk_tiles.open_tile_store(str(tmp_path))
+    cache = main.PrecomputedIndexCache(zonal_stats.load_latest_zonal_index, 300)
+    cache.store = store
+    monkeypatch.setattr(main, "zonal_index", cache)
+    client = TestClient(main.app)
+
+    bbox = {"min_lon": -121.0, "min_lat": 36.5, "max_lon": -120.0, "max_lat": 37.5}
+    assert client.get("/data/risk-stats", params=bbox).status_code == 503
+
+    regions = [{"state": "CA", "name": "California", "bounds": (36.0, -122.0, 38.0, -119.0)}]
+    risk_tiles.build_risk_tiles(store, run_date=datetime(2023, 7, 1), resolution=0.02, regions=regions)
+    body = client.get("/data/risk-stats", params=bbox).json()
+    assert set(body["stats"]) == {"risk", "fuel"}
+    assert body["stats"]["risk"]["count"] == 50 * 50
+
+    polygon = {"type": "Polygon", "coordinates": [[[-121, 36.5], [-120, 36.5], [-120, 37.5], [-121, 36.5]]]}
+    response = client.post("/data/risk-stats/polygon", json={"geometry": polygon, "layers": ["risk"]})
+    assert 0 < response.json()["stats"]["risk"]["count"] < 50 * 50
+    assert client.get("/data/risk-stats", params={**bbox, "layers": "slope"}).status_code == 400
@@ -0,0 +1,106 @@
+"""
+Tests for data pipeline schema migrations.
+"""
+
+import threading
+import time
+
+from data_pipeline import db
+
+
+class FakeCursor:
+    """Minimal psycopg2 cursor tracking schema_migrations rows."""
+
+    def __init__(self, applied, executed):
+        self.applied = applied
+        self.executed = executed
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql.startswith("SELECT version FROM schema_migrations"):
+            self.result = [(version,) for version in sorted(self.applied)]
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.applied.add(params[0])
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, applied):
+        self.applied = set(applied)
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.applied, self.executed)
+
+
+def test_migrate_applies_only_pending_versions_in_order():
+    conn = FakeConnection([1])
+    assert db.migrate(conn) == [version for version, _, _ in db.MIGRATIONS[1:]]
+    assert conn.executed[0].startswith("SELECT pg_advisory_xact_lock")
+    assert not any("CREATE TABLE IF NOT EXISTS fire_detections" in sql for sql in conn.executed)
+    assert any("uq_fire_detections_natural_key" in sql for sql in conn.executed)
+
+    conn.executed.clear()
+    assert db.migrate(conn) == []
+    assert not any(sql.startswith("INSERT INTO schema_migrations") for sql in conn.executed)
+
+
+def test_migration_versions_are_unique_and_increasing():
+    versions = [version for version, _, _ in db.MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_connection_waits_for_a_free_pooled_connection(monkeypatch):
+    class FakePool:
+        closed = False
+
+        def __init__(self, size):
+            self.free = size
+            self.lock = threading.Lock()
+
+        def getconn(self):
+            with self.lock:
+                if self.free == 0:
+                    raise db.PoolError("connection pool exhausted")
+                self.free -= 1
+            return FakePooledConnection()
+
+        def putconn(self, conn, close=False):
+            with self.lock:
+                self.free += 1
+
+    class FakePooledConnection:
+        closed = 0
+
+        def commit(self):
+            pass
+
+        def get_transaction_status(self):
+            return 0
+
+    monkeypatch.setattr(db, "_pool", FakePool(2))
+    monkeypatch.setattr(db, "_pool_slots", threading.BoundedSemaphore(2))
+    errors = []
+
+    def borrow():
+        try:
+            with db.connection():
+                time.sleep(0.05)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=borrow) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,101 @@
+"""
+Tests for fusing detections across sensors.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from data_pipeline import detection_fusion, detection_store
+
+
+def detections(source: str, lats, lons, times, frp: float = 5.0) -> pd.DataFrame:
+    """Detections from one sensor."""
+    n = len(lats)
+    return pd.DataFrame({
+        "latitude": np.asarray(lats, dtype=float),
+        "longitude": np.asarray(lons, dtype=float),
+        "acquisition_datetime": pd.to_datetime(times),
+        "confidence": "nominal",
+        "brightness": 330.0,
+        "frp": np.full(n, frp),
+        "source": source
+    })
+
+
+def test_overlapping_sensors_fuse_into_one_record():
+    fuser = detection_fusion.DetectionFuser(time_tolerance_minutes=60)
+    batch = pd.concat([
+        # One fire seen by all three sensors within minutes and a few hundred metres
+        detections("VIIRS_SNPP", [38.0], [-120.0], ["2023-07-01 10:00"], frp=4.0),
+        detections("VIIRS_NOAA", [38.001], [-120.001], ["2023-07-01 10:40"], frp=6.0),
+        detections("MODIS", [38.004], [-120.003], ["2023-07-01 10:20"], frp=20.0),
+        # Too far apart, and too late, to be the same observation
+        detections("MODIS", [38.05], [-120.0], ["2023-07-01 10:20"]),
+        detections("VIIRS_NOAA", [38.0], [-120.0], ["2023-07-01 13:00"])
+    ])
+    result = fuser.fuse(batch)
+
+    assert len(result.provenance) == 5
+    assert len(result.records) == 3
+    fused = result.records[result.records["n_sensors"] == 3].iloc[0]
+    assert fused["sensors"] == "MODIS+VIIRS_NOAA+VIIRS_SNPP"
+    assert fused["source"] == "VIIRS_SNPP"
+    assert fused["frp"] == 20.0
+    assert (result.provenance["fusion_id"] == fused["fusion_id"]).sum() == 3
+
+
+def test_batches_fuse_against_a_bounded_window(tmp_path):
+    store = detection_store.DetectionStore(str(tmp_path / "detections"))
+    fused_store = detection_store.DetectionStore(str(tmp_path / "fused"))
+
+    def ingest(df):
+        gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs="EPSG:4326")
+        keys = store.write(gdf, df["source"].iloc[0])
+        return detection_fusion.fuse_stored(keys, store=store, fused_store=fused_store)
+
+    viirs = detections("VIIRS_SNPP", [38.0, 39.0], [-120.0, -121.0], ["2023-07-01 10:00", "2023-07-01 10:00"])
+    keys, summary = ingest(viirs)
+    assert summary["records"] == 2 and len(keys) == 1
+
+    # A later run's MODIS pass joins a record from the earlier run, and
+    # re-delivered detections are skipped
+    modis = detections("MODIS", [38.002], [-120.002], ["2023-07-01 10:30"])
+    keys, summary = ingest(pd.concat([modis, viirs.iloc[[0]]]).assign(source="MODIS"))
+    assert summary == {"detections": 2, "records": 1, "merged": 1, "earlier_records_updated": 1}
+    keys, summary = ingest(modis)
+    assert summary["detections"] == 0 and keys == []
+
+    # The earlier record picks up the MODIS pass when read back
+    records = detection_fusion.read_fused(fused_store)
+    joined = records[records["latitude"] == 38.0].iloc[0]
+    assert joined["sensors"] == "MODIS+VIIRS_SNPP" and joined["n_sensors"] == 2
+    provenance = fused_store.read(sources=[detection_fusion.PROVENANCE_SOURCE])
+    assert len(provenance) == 4
+    assert set(provenance["fusion_id"]) == set(records["fusion_id"])
+
+    state = json.loads((tmp_path / "fused" / detection_fusion.STATE_KEY).read_text())
+    fuser = detection_fusion.DetectionFuser.from_state(state, window_minutes=180)
+    assert fuser.sensor_names(int(fuser.records["mask"].max())) == "MODIS+VIIRS_SNPP"
+
+    # Records older than the window are dropped from the state
+    later = detections("VIIRS_SNPP", [40.0], [-122.0], ["2023-07-02 10:00"])
+    fuser.fuse(later)
+    assert list(fuser.records["latitude"]) == [40.0]
+    assert len(fused_store.read(sources=[detection_fusion.FUSED_SOURCE])) == 3
+
+
+def test_redelivered_detections_are_skipped_beyond_the_match_window():
+    fuser = detection_fusion.DetectionFuser(window_minutes=180, seen_minutes=360)
+    early = detections("VIIRS_SNPP", [38.0], [-120.0], ["2023-07-01 06:00"])
+    fuser.fuse(early)
+    # MODIS runs ahead, and VIIRS moves on 5 hours: the early record leaves
+    # the match window but its detection is still inside the ingest lookback
+    fuser.fuse(detections("MODIS", [40.0], [-122.0], ["2023-07-01 14:00"]))
+    fuser.fuse(detections("VIIRS_SNPP", [39.0], [-121.0], ["2023-07-01 11:00"]))
+    assert 38.0 not in set(fuser.records["latitude"])
+
+    result = fuser.fuse(early)
+    assert len(result.records) == 0 and len(result.provenance) == 0
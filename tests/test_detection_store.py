@@ -0,0 +1,98 @@
+"""
+Tests for partitioned GeoParquet detection storage.
+"""
+
+import io
+
+import geopandas as gpd
+import pandas as pd
+
+from data_pipeline import detection_store, nasa_firms
+from tests.test_nasa_firms import viirs_csv
+
+
+def processed(n: int, seed: int, source: str = "VIIRS_SNPP") -> gpd.GeoDataFrame:
+    df = nasa_firms.read_firms_csv(io.BytesIO(viirs_csv(n, seed=seed, days=(1, 2, 3))), source)
+    return nasa_firms.process_firms_data(df, source)
+
+
+def test_write_partitions_by_source_and_date(tmp_path):
+    store = detection_store.DetectionStore(str(tmp_path))
+    snpp, noaa = processed(600, seed=1), processed(400, seed=2, source="VIIRS_NOAA")
+
+    keys = store.write(snpp, "VIIRS_SNPP") + store.write(noaa, "VIIRS_NOAA")
+    assert len(keys) == 6
+    assert all((tmp_path / key).exists() for key in keys)
+    assert sorted(store.sources()) == ["VIIRS_NOAA", "VIIRS_SNPP"]
+    assert sum(entry["rows"] for entry in store.manifest("VIIRS_SNPP")) == 600
+    assert {entry["date"] for entry in store.manifest("VIIRS_NOAA")} == {"2023-07-01", "2023-07-02", "2023-07-03"}
+
+    everything = store.read()
+    assert isinstance(everything, gpd.GeoDataFrame)
+    assert len(everything) == 1000
+    assert everything["confidence"].dtype == "category"
+    assert (everything.geometry.x == everything["longitude"]).all()
+
+
+def test_reads_prune_partitions_and_project_columns(tmp_path):
+    store = detection_store.DetectionStore(str(tmp_path))
+    gdf = processed(2000, seed=3)
+    store.write(gdf, "VIIRS_SNPP")
+
+    start, end = pd.Timestamp("2023-07-02 06:00"), pd.Timestamp("2023-07-02 18:00")
+    assert [entry["date"] for entry in store.files(start=start, end=end)] == ["2023-07-02"]
+    store.write(gdf[gdf["longitude"] < -100], "VIIRS_NOAA")
+    assert {entry["source"] for entry in store.files(bbox=(10.0, 10.0, 20.0, 20.0))} == {"VIIRS_SNPP"}
+    assert store.files(sources=["MODIS"]) == []
+
+    bbox = (-125.0, 20.0, -60.0, 55.0)
+    df = store.read(sources=["VIIRS_SNPP"], start="2023-07-02T06:00:00Z", end=end, bbox=bbox, columns=["latitude", "longitude", "acquisition_datetime"])
+    expected = gdf[
+        gdf["acquisition_datetime"].between(start, end)
+        & gdf["longitude"].between(bbox[0], bbox[2]) & gdf["latitude"].between(bbox[1], bbox[3])
+    ]
+    assert not isinstance(df, gpd.GeoDataFrame)
+    assert list(df.columns) == ["latitude", "longitude", "acquisition_datetime"]
+    assert len(df) == len(expected) > 0
+
+
+def test_filtered_reads_skip_unneeded_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(detection_store, "DETECTION_STORE_ROW_GROUP_ROWS", 1000)
+    store = detection_store.DetectionStore(str(tmp_path))
+    gdf = processed(30000, seed=4, source="VIIRS_SNPP")
+    key = store.write(gdf[gdf["acquisition_datetime"].dt.day == 2], "VIIRS_SNPP")[0]
+    size = (tmp_path / key).stat().st_size
+
+    read_bytes = []
+    open_input = store.storage.open_input
+
+    class CountingFile(io.RawIOBase):
+        def __init__(self, f):
+            self.f = f
+
+        def readable(self):
+            return True
+
+        def seekable(self):
+            return True
+
+        def seek(self, offset, whence=0):
+            return self.f.seek(offset, whence)
+
+        def tell(self):
+            return self.f.tell()
+
+        def readinto(self, buffer):
+            n = self.f.readinto(buffer)
+            read_bytes.append(n)
+            return n
+
+        def close(self):
+            self.f.close()
+            super().close()
+
+    monkeypatch.setattr(store.storage, "open_input", lambda k: CountingFile(open_input(k)))
+    df = store.read_file(key, columns=["frp"], start="2023-07-02 10:00", end="2023-07-02 11:00")
+    assert len(df) > 0
+    # Only the footer, one column and the matching row groups are read
+    assert 0 < sum(read_bytes) < size / 4
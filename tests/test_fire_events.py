@@ -0,0 +1,81 @@
+"""
+Tests for clustering detections into fire events.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+from data_pipeline import detection_store, fire_events
+
+
+def fire(lat: float, lon: float, n: int, start: str, hours: float, seed: int, spread_deg: float = 0.003) -> pd.DataFrame:
+    """A compact cluster of detections acquired over some hours."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "latitude": lat + rng.normal(0, spread_deg, n),
+        "longitude": lon + rng.normal(0, spread_deg, n),
+        "acquisition_datetime": pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, int(hours * 60), n), unit="min"),
+        "frp": rng.exponential(10, n),
+        "source": "VIIRS_SNPP"
+    })
+
+
+def test_clusters_split_by_distance_and_time():
+    tracker = fire_events.FireEventTracker(link_km=2.0, link_hours=48)
+    detections = pd.concat([
+        fire(38.0, -120.0, 200, "2023-07-01", 36, seed=1),
+        fire(38.5, -120.0, 100, "2023-07-01", 12, seed=2),
+        # Same place as the first fire, but long after it was last seen
+        fire(38.0, -120.0, 50, "2023-07-20", 12, seed=3)
+    ])
+    summary = tracker.update(detections)
+    assert summary["detections"] == 350
+    assert summary["events_created"] == 3
+
+    events = tracker.summaries()
+    assert sorted(event["detections"] for event in events) == [50, 100, 200]
+    first = max(events, key=lambda event: event["detections"])
+    assert abs(first["centroid"]["latitude"] - 38.0) < 0.01
+    assert first["hull"]["type"] == "Polygon"
+    assert first["frp_total"] > 0
+    assert [event["status"] for event in tracker.summaries()] == ["active", "inactive", "inactive"]
+
+
+def test_incremental_updates_extend_and_merge_events(tmp_path):
+    store = detection_store.DetectionStore(str(tmp_path / "detections"))
+    state_uri = str(tmp_path / "events")
+
+    def ingest(df):
+        gdf = gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs="EPSG:4326")
+        return fire_events.update_events(store.write(gdf, "VIIRS_SNPP"), store=store, uri=state_uri)
+
+    west, east = fire(38.0, -120.0, 80, "2023-07-01", 12, seed=4), fire(38.0, -119.95, 80, "2023-07-01", 12, seed=5)
+    assert ingest(pd.concat([west, east]))["events_created"] == 2
+
+    # Re-delivered detections are skipped; a line of new ones bridges the fires
+    bridge = pd.DataFrame({
+        "latitude": 38.0, "longitude": np.linspace(-120.0, -119.95, 40),
+        "acquisition_datetime": pd.Timestamp("2023-07-01 20:00"), "frp": 50.0, "source": "VIIRS_SNPP"
+    })
+    summary = ingest(pd.concat([east.iloc[:20], bridge]))
+    assert summary["detections"] == 40
+    assert summary["events_merged"] == 1
+    assert summary["events_tracked"] == 1
+
+    tracker = fire_events.load_tracker(state_uri)
+    [event] = tracker.summaries()
+    assert event["event_id"] == fire_events.format_event_id(1)
+    assert event["detections"] == 200
+    assert event["bbox"][0] < -119.99 and event["bbox"][2] > -119.96
+    # Ignition points use the simulator's schema, drawn from the latest detections
+    points = event["ignition_points"]
+    assert 0 < len(points) <= fire_events.FIRE_EVENT_MAX_IGNITION_POINTS
+    assert set(points[0]) == {"location", "intensity", "detection_time"}
+    assert points[0]["intensity"] == 50.0
+    assert all(point["detection_time"].endswith("Z") for point in points)
+
+    published = json.loads((tmp_path / "events" / fire_events.EVENTS_KEY).read_text())
+    assert [feature["id"] for feature in published["features"]] == [event["event_id"]]
@@ -0,0 +1,136 @@
+"""
+Tests for the recent fire detection index and endpoint.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main, response_cache
+from data_pipeline import detection_store, fire_index
+
+
+def synthetic_detections(n: int, seed: int = 0) -> pd.DataFrame:
+    """Detections shaped like nasa_firms.process_firms_data output."""
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 7 * 24 * 60, n)
+    return pd.DataFrame({
+        "latitude": rng.uniform(32.0, 49.0, n),
+        "longitude": rng.uniform(-125.0, -102.0, n),
+        "acquisition_datetime": pd.Timestamp("2023-07-01") + pd.to_timedelta(minutes, unit="min"),
+        "confidence": rng.choice(["l", "n", "h"], n),
+        "brightness": rng.uniform(300, 400, n),
+        "frp": rng.exponential(10, n),
+        "source": "VIIRS_SNPP"
+    })
+
+
+@pytest.fixture
+def feed(tmp_path):
+    feed = fire_index.FireIndexFeed(detection_store.DetectionStore(str(tmp_path)))
+    feed.add(synthetic_detections(5000))
+    return feed
+
+
+def test_bbox_and_radius_queries_match_brute_force(feed):
+    index = feed.index
+    c = index.columns
+    bbox = (-121.3, 36.2, -118.7, 39.9)
+    positions, cursor = index.query(bbox=bbox)
+    expected = ((c["longitude"] >= bbox[0]) & (c["longitude"] <= bbox[2]) &
+                (c["latitude"] >= bbox[1]) & (c["latitude"] <= bbox[3]))
+    assert cursor is None
+    assert sorted(positions.tolist()) == np.flatnonzero(expected).tolist()
+
+    positions, _ = index.query(center=(40.0, -115.0), radius_km=150, min_confidence="nominal", min_frp=5.0)
+    assert len(positions) > 0
+    for record in index.records(positions):
+        lat1, lon1, lat2, lon2 = map(np.radians, (40.0, -115.0, record["latitude"], record["longitude"]))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        assert 2 * fire_index.MEAN_EARTH_RADIUS_KM * np.arcsin(np.sqrt(a)) <= 150
+        assert record["confidence"] in ("nominal", "high")
+        assert record["frp"] >= 5.0
+
+
+def test_cursor_pagination_is_complete_and_newest_first(feed):
+    index = feed.index
+    seen, cursor, times = [], None, []
+    while True:
+        positions, cursor = index.query(bbox=(-125, 32, -102, 49), cursor=cursor, limit=700)
+        records = index.records(positions)
+        seen.extend(record["id"] for record in records)
+        times.extend(record["detection_time"] for record in records)
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == len(index)
+    assert times == sorted(times, reverse=True)
+
+
+def test_cursors_and_ids_survive_a_rebuilt_index():
+    detections = synthetic_detections(2000, seed=4)
+    # Same-minute detections exercise the tiebreak after acquisition time
+    detections.loc[:199, "acquisition_datetime"] = pd.Timestamp("2023-07-08")
+    first = fire_index.FireDetectionIndex.empty().extend(detections)
+    # Another instance that loaded the same detections in a different order
+    other = fire_index.FireDetectionIndex.empty().extend(detections.iloc[::-1])
+
+    positions, cursor = first.query(limit=150)
+    seen = [record["id"] for record in first.records(positions)]
+    while cursor is not None:
+        positions, cursor = other.query(cursor=cursor, limit=150)
+        seen.extend(record["id"] for record in other.records(positions))
+    everything, _ = first.query()
+    assert seen == [record["id"] for record in first.records(everything)]
+
+
+def test_refresh_indexes_new_files_once(tmp_path):
+    store = detection_store.DetectionStore(str(tmp_path))
+    feed = fire_index.FireIndexFeed(store, refresh_seconds=0)
+
+    def write(df):
+        store.write(gpd.GeoDataFrame(df, geometry=gpd.points_from_xy(df["longitude"], df["latitude"]), crs="EPSG:4326"), "VIIRS_SNPP")
+
+    first = synthetic_detections(100, seed=1)
+    write(first)
+    assert len(feed.get()) == 100
+    version = feed.index.version
+
+    # A re-ingested overlapping pull only adds the new detections
+    write(pd.concat([first.iloc[:50], synthetic_detections(30, seed=2)]))
+    assert len(feed.get()) == 130
+    assert feed.index.version == version + 1
+    assert len(feed.get()) == 130
+
+    # Files entirely outside the retention window are never read
+    stale = synthetic_detections(20, seed=3)
+    stale["acquisition_datetime"] -= pd.Timedelta(days=fire_index.FIRE_INDEX_RETENTION_DAYS + 10)
+    write(stale)
+    reads = []
+    read_file = store.read_file
+    store.read_file = lambda key, **kwargs: reads.append(key) or read_file(key, **kwargs)
+    assert len(feed.get()) == 130
+    assert reads == []
+
+
+def test_recent_fires_endpoint_pages_and_streams(feed, monkeypatch):
+    monkeypatch.setattr(main, "recent_fires", feed)
+    monkeypatch.setattr(main, "api_cache", response_cache.ResponseCache(10))
+    client = TestClient(main.app)
+    params = {"end": "2023-07-08T00:00:00Z", "days": 7, "min_lon": -122, "min_lat": 36, "max_lon": -118, "max_lat": 40}
+
+    first = client.get("/data/recent-fires", params={**params, "limit": 50}).json()
+    assert first["count"] == 50
+    second = client.get("/data/recent-fires", params={**params, "limit": 50, "cursor": first["next_cursor"]}).json()
+    assert not {f["id"] for f in first["fires"]} & {f["id"] for f in second["fires"]}
+
+    stream = client.get("/data/recent-fires", params={**params, "format": "ndjson"})
+    assert stream.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in stream.text.splitlines()]
+    assert [f["id"] for f in lines[:100]] == [f["id"] for f in first["fires"] + second["fires"]]
+
+    assert client.get("/data/recent-fires", params={"min_lon": -122}).status_code == 400
+    assert client.get("/data/recent-fires", params={"cursor": "not a cursor!"}).status_code == 400
@@ -0,0 +1,117 @@
+"""
+Tests for the FIRMS archive backfill.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline import detection_fusion, detection_store, fire_events, firms_backfill
+
+MODIS_HEADER = "latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight,type\n"
+VIIRS_HEADER = "latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_ti5,frp,daynight,type\n"
+
+
+def archive_csv(source: str, n: int, days: int, seed: int) -> str:
+    """A FIRMS archive CSV with n detections over the first days of June 2023."""
+    rng = np.random.default_rng(seed)
+    dates = (pd.Timestamp("2023-06-01") + pd.to_timedelta(rng.integers(0, days, n), unit="D")).strftime("%Y-%m-%d")
+    confidence = rng.integers(0, 100, n).astype(str) if source == "MODIS" else rng.choice(["l", "n", "h"], n)
+    header = MODIS_HEADER if source == "MODIS" else VIIRS_HEADER
+    lines = [header] + [
+        f"{rng.uniform(32, 48):.4f},{rng.uniform(-124, -104):.4f},{rng.uniform(300, 380):.2f},1.0,1.0,{date},"
+        f"{rng.integers(0, 24) * 100 + rng.integers(0, 60)},T,MODIS,{conf},6.1,290.0,{rng.uniform(0, 50):.2f},D,0\n"
+        for date, conf in zip(dates, confidence)
+    ]
+    return "".join(lines)
+
+
+def test_backfill_resumes_after_a_failed_chunk(tmp_path, monkeypatch):
+    (tmp_path / "archives").mkdir()
+    (tmp_path / "archives" / "modis_2023.csv").write_text(archive_csv("MODIS", 3000, 21, seed=1))
+    (tmp_path / "archives" / "viirs_2023_a.csv").write_text(archive_csv("VIIRS_SNPP", 4000, 21, seed=2))
+    (tmp_path / "archives" / "viirs_2023_b.csv").write_text(archive_csv("VIIRS_SNPP", 1000, 21, seed=3))
+    archives = [("MODIS", str(tmp_path / "archives" / "modis_*.csv")), ("VIIRS_SNPP", str(tmp_path / "archives" / "viirs_*.csv"))]
+    store = detection_store.DetectionStore(str(tmp_path / "detections"))
+
+    def run():
+        return firms_backfill.backfill(
+            "june", archives, start="2023-06-01", end="2023-06-15", store=store,
+            fused_store=detection_store.DetectionStore(str(tmp_path / "fused")),
+            events_uri=str(tmp_path / "events"), state_uri=str(tmp_path / "state"), chunk_days=7, workers=4
+        )
+
+    # One chunk fails to store the first time round
+    stored, failures = [], []
+    store_chunk = firms_backfill.store_chunk
+
+    def flaky_store_chunk(df, source, store):
+        if source == "MODIS" and df["acq_date"].astype(str).min() >= "2023-06-08" and not failures:
+            failures.append(source)
+            raise IOError("connection reset")
+        stored.append(source)
+        return store_chunk(df, source, store)
+
+    monkeypatch.setattr(firms_backfill, "store_chunk", flaky_store_chunk)
+    first = run()
+    assert list(first["failed"]) == [f"MODIS|{tmp_path / 'archives' / 'modis_2023.csv'}"]
+    assert first["chunks_clustered"] == 0
+    assert first["store_rows_per_second"] > 0
+
+    # The rerun stores only the failed chunk, then clusters every chunk in order
+    calls = len(stored)
+    second = run()
+    assert second["failed"] == {}
+    assert stored[calls:] == ["MODIS"]
+    assert second["chunks_clustered"] == 2
+    assert second["rows_total"] == len(store.read(columns=["latitude"]))
+    assert 0 < second["rows_total"] < 8000
+    assert second["fusion"]["detections"] == second["rows_total"]
+
+    state = json.loads((tmp_path / "state" / "june.json").read_text())
+    assert state["clustered"] == ["2023-06-01", "2023-06-08"]
+    assert (tmp_path / "events" / "state.json").exists()
+
+    # A finished job has nothing left to do
+    assert run()["rows_stored"] == 0
+
+
+def test_backfill_does_not_fuse_a_chunk_again_after_its_clustering_failed(tmp_path, monkeypatch):
+    (tmp_path / "archives").mkdir()
+    (tmp_path / "archives" / "modis_2023.csv").write_text(archive_csv("MODIS", 2000, 14, seed=4))
+    (tmp_path / "archives" / "viirs_2023.csv").write_text(archive_csv("VIIRS_SNPP", 2000, 14, seed=5))
+    archives = [("MODIS", str(tmp_path / "archives" / "modis_2023.csv")), ("VIIRS_SNPP", str(tmp_path / "archives" / "viirs_2023.csv"))]
+    fused_store = detection_store.DetectionStore(str(tmp_path / "fused"))
+
+    def run():
+        return firms_backfill.backfill(
+            "june", archives, start="2023-06-01", end="2023-06-15",
+            store=detection_store.DetectionStore(str(tmp_path / "detections")), fused_store=fused_store,
+            events_uri=str(tmp_path / "events"), state_uri=str(tmp_path / "state"), chunk_days=7, workers=2
+        )
+
+    # Clustering the second chunk fails the first time round, after it was fused
+    calls = []
+    update_events = fire_events.update_events
+
+    def flaky_update_events(keys, store=None, uri=None):
+        calls.append(list(keys))
+        if len(calls) == 2:
+            raise IOError("connection reset")
+        return update_events(keys, store=store, uri=uri)
+
+    monkeypatch.setattr(fire_events, "update_events", flaky_update_events)
+    first = run()
+    assert list(first["failed"]) == ["cluster|2023-06-08"]
+    assert first["chunks_clustered"] == 1
+
+    # The rerun clusters the checkpointed fused records without fusing them again
+    second = run()
+    assert second["failed"] == {}
+    assert second["chunks_clustered"] == 1
+    assert second["fusion"] == {}
+    assert calls[2] == calls[1]
+    provenance = fused_store.read([detection_fusion.PROVENANCE_SOURCE], columns=["latitude"])
+    assert len(provenance) == first["fusion"]["detections"] == second["rows_total"]
+    assert len(fused_store.read([detection_fusion.FUSED_SOURCE], columns=["latitude"])) == first["fusion"]["records"]
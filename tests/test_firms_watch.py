@@ -0,0 +1,88 @@
+"""
+Tests for the continuous FIRMS watch mode.
+"""
+
+import json
+import time
+import threading
+
+import numpy as np
+
+from data_pipeline import detection_store, firms_watch, nasa_firms
+from tests.conftest import VIIRS_HEADER
+
+
+def fire_csv(n: int, seed: int = 0) -> bytes:
+    """A VIIRS CSV with one compact fire of n detections."""
+    rng = np.random.default_rng(seed)
+    lines = [VIIRS_HEADER] + [
+        f"{38.0 + rng.normal(0, 0.003):.5f},{-120.0 + rng.normal(0, 0.003):.5f},350.0,0.39,0.36,"
+        f"2023-07-01,{1000 + i % 50},N,VIIRS,n,2.0NRT,290.0,{rng.uniform(1, 50):.2f},D\n"
+        for i in range(n)
+    ]
+    return "".join(lines).encode("utf-8")
+
+
+def test_new_fire_is_simulated_soon_after_it_is_published(stub_server, trained_model, tmp_path):
+    watcher = firms_watch.FirmsWatcher(
+        ["VIIRS_SNPP"], nasa_firms.IngestStateStore(str(tmp_path / "state")), region="global", interval=0.2,
+        store=detection_store.DetectionStore(str(tmp_path / "detections")),
+        fused_store=detection_store.DetectionStore(str(tmp_path / "fused")),
+        events_uri=str(tmp_path / "events"), output_uri=str(tmp_path / "watch")
+    )
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    try:
+        time.sleep(1.0)
+        assert watcher.polls >= 2 and watcher.handled == 0
+        assert stub_server["not_modified"] >= 1
+
+        # A new fire appears in the FIRMS file
+        published_at = time.time()
+        stub_server["body"] = fire_csv(40)
+        latest = tmp_path / "watch" / "events" / "FE0000001" / "latest.json"
+        deadline = published_at + 60
+        while not latest.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        assert latest.exists()
+        result = json.loads(latest.read_text())
+        latency = result["perimeter_at"] - published_at
+        # The poll that fetched the fire may have started just before it was published
+        assert 0 < latency < 30 and 0 < result["detection_to_perimeter_seconds"] < latency + watcher.interval
+        assert (tmp_path / "watch" / result["spread_key"]).exists()
+        assert 0.0 <= result["risk"]["max_risk"] <= 1.0
+
+        # Unchanged files are not fetched or simulated again
+        polls = watcher.polls
+        time.sleep(0.6)
+        assert watcher.polls > polls
+        assert watcher.stats()["handled"] == 1
+        assert watcher.stats()["latency_seconds"]["max"] == result["detection_to_perimeter_seconds"]
+    finally:
+        watcher.stop()
+        thread.join(5)
+
+
+def test_pending_work_is_coalesced_per_event_without_blocking(tmp_path):
+    watcher = firms_watch.FirmsWatcher(
+        ["VIIRS_SNPP"], nasa_firms.IngestStateStore(str(tmp_path / "state")),
+        store=detection_store.DetectionStore(str(tmp_path / "detections")),
+        fused_store=detection_store.DetectionStore(str(tmp_path / "fused")),
+        events_uri=str(tmp_path / "events"), output_uri=str(tmp_path / "watch"), queue_size=2
+    )
+
+    def publish(event_id, poll):
+        watcher._publish({"poll": poll, "observed_at": time.time(), "event": {"event_id": event_id}})
+
+    # No consumers are running, so nothing drains the queue
+    for poll in range(1, 50):
+        publish("FE1", poll)
+    publish("FE2", 1)
+    publish("FE3", 1)
+    stats = watcher.stats()
+    assert stats["queued"] == 2 and stats["superseded"] == 48 and stats["dropped"] == 1
+    assert list(watcher._pending) == ["FE2", "FE3"]
+
+    publish("FE2", 2)
+    assert list(watcher._pending) == ["FE2", "FE3"]
+    assert watcher._pending["FE2"]["poll"] == 2
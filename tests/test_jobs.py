@@ -0,0 +1,177 @@
+"""
+Tests for asynchronous simulation jobs.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import jobs, main
+
+
+SPREAD_REQUEST = {
+    "ignition_points": [{
+        "location": {"latitude": 37.0, "longitude": -120.0},
+        "intensity": 50.0,
+        "detection_time": "2023-07-01T12:00:00"
+    }],
+    "simulation_hours": 3,
+    "resolution_meters": 1000
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    store = jobs.JobStore(jobs.MemoryStore())
+    queue = jobs.LocalQueue()
+    runner = jobs.JobRunner(queue, store, concurrency=1)
+    job_service = jobs.JobService(queue, store, runner)
+    monkeypatch.setattr(main, "job_service", job_service)
+    yield job_service
+    runner.stop()
+
+
+def wait_for(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/simulate/spread/jobs/{job_id}").json()
+        if job["status"] in (jobs.SUCCEEDED, jobs.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_spread_job_lifecycle(service):
+    client = TestClient(main.app)
+    response = client.post("/simulate/spread/jobs", json=SPREAD_REQUEST)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = wait_for(client, job_id)
+    assert job["status"] == jobs.SUCCEEDED
+    assert job["progress"]["total_steps"] == 6
+    assert job["progress"]["percent"] == 100.0
+    assert "params" not in job
+
+    result = client.get(f"/simulate/spread/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert result.json()["metadata"]["fire_statistics"]["simulation_duration_hours"] == 3
+
+    # The stored encoding is served again without re-serializing
+    assert service.result(job_id) is service.result(job_id)
+    assert client.get("/simulate/spread/jobs/unknown").status_code == 404
+
+
+def test_unfinished_and_failed_jobs_have_no_result(service, monkeypatch):
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "spread", lambda params, progress: 1 / 0)
+    job = service.jobs.create("spread", {})
+    client = TestClient(main.app)
+    assert client.get(f"/simulate/spread/jobs/{job['job_id']}/result").status_code == 409
+
+    jobs.run_job(service.jobs, job["job_id"])
+    failed = client.get(f"/simulate/spread/jobs/{job['job_id']}").json()
+    assert failed["status"] == jobs.FAILED
+    assert "division by zero" in failed["error"]
+    assert client.get(f"/simulate/spread/jobs/{job['job_id']}/result").status_code == 409
+
+
+def test_progress_reports_step_and_eta():
+    store = jobs.JobStore(jobs.MemoryStore())
+    job = store.create("spread", {})
+    reporter = jobs.ProgressReporter(store, job, interval=0)
+    reporter.start -= 2.0
+    reporter(4, 10)
+    saved = store.get(job["job_id"])["progress"]
+    assert saved["step"] == 4 and saved["percent"] == 40.0
+    assert saved["eta_seconds"] == pytest.approx(3.0, abs=0.1)
+
+
+def test_local_queue_redelivers_unacknowledged_messages():
+    queue = jobs.LocalQueue(visibility_timeout=0)
+    queue.send_message(json.dumps({"job_id": "a"}))
+    first = queue.receive_messages()
+    assert json.loads(first[0]["Body"]) == {"job_id": "a"}
+
+    again = queue.receive_messages()
+    assert again[0]["MessageId"] == first[0]["MessageId"]
+    queue.delete_message(again[0]["ReceiptHandle"])
+    assert queue.receive_messages() == []
+    assert queue.depth() == 0
+
+
+def test_full_local_queue_rejects_submissions(monkeypatch):
+    store = jobs.JobStore(jobs.MemoryStore())
+    service = jobs.JobService(jobs.LocalQueue(max_depth=1), store)
+    monkeypatch.setattr(main, "job_service", service)
+    client = TestClient(main.app)
+    assert client.post("/simulate/spread/jobs", json=SPREAD_REQUEST).status_code == 202
+    response = client.post("/simulate/spread/jobs", json=SPREAD_REQUEST)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    # The rejected job leaves no record behind
+    assert len(store.store._objects) == 1
+
+
+def test_memory_store_expires_old_finished_jobs(monkeypatch):
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "spread", lambda params, progress: {"ok": True})
+    store = jobs.JobStore(jobs.MemoryStore(), max_finished=2, finished_ttl=60)
+    finished = [store.create("spread", {}) for _ in range(3)]
+    queued = store.create("spread", {})
+    for job in finished:
+        jobs.run_job(store, job["job_id"])
+
+    # Only the two most recent finished jobs are kept; queued jobs never expire
+    assert store.get(finished[0]["job_id"]) is None
+    assert store.get_result(finished[0]["job_id"]) is None
+    assert store.get_result(finished[2]["job_id"]) is not None
+    assert store.get(queued["job_id"])["status"] == jobs.QUEUED
+
+    store.finished_ttl = 0
+    store._expire_finished()
+    assert store.get(finished[2]["job_id"]) is None
+
+
+def test_heartbeat_keeps_long_jobs_from_running_twice(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_VISIBILITY_TIMEOUT_SECONDS", 0.3)
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.1)
+    runs = []
+
+    def slow(params, progress):
+        runs.append(threading.current_thread().name)
+        time.sleep(1.0)
+        return {"ok": True}
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "spread", slow)
+    store = jobs.JobStore(jobs.MemoryStore())
+    queue = jobs.LocalQueue(visibility_timeout=0.3)
+    runner = jobs.JobRunner(queue, store, concurrency=2, mode="thread")
+    service = jobs.JobService(queue, store, runner)
+    job = service.submit("spread", {})
+    try:
+        deadline = time.monotonic() + 5
+        while store.get(job["job_id"])["status"] != jobs.SUCCEEDED and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        runner.stop()
+    assert len(runs) == 1
+    assert queue.depth() == 0
+    assert "lease_expires_at" not in service.status(job["job_id"])
+
+
+def test_redelivered_message_skips_a_leased_job(monkeypatch):
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "spread", lambda params, progress: {"ok": True})
+    store = jobs.JobStore(jobs.MemoryStore())
+    job = store.create("spread", {})
+    job["status"] = jobs.RUNNING
+    job["lease_expires_at"] = time.time() + 60
+    store.save(job)
+    assert jobs.run_job(store, job["job_id"]) is False
+
+    # Once the lease lapses, e.g. after a worker crash, the job runs again
+    job["lease_expires_at"] = time.time() - 1
+    store.save(job)
+    assert jobs.run_job(store, job["job_id"]) is True
+    assert store.get(job["job_id"])["status"] == jobs.SUCCEEDED
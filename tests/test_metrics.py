@@ -0,0 +1,54 @@
+"""
+Tests for request metrics and Server-Timing headers.
+"""
+
+import re
+
+from fastapi.testclient import TestClient
+
+from api import main, metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.register(metrics.Histogram("latency_seconds", "Latency", [0.1, 1.0], ("route",)))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, route="/a")
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+
+
+def test_requests_are_recorded_by_route_template(trained_model):
+    main.api_cache.clear()
+    client = TestClient(main.app)
+    response = client.get("/simulate/spread/jobs/does-not-exist")
+    assert response.status_code == 404
+    assert re.fullmatch(r"total;dur=\d+\.\d", response.headers["Server-Timing"])
+
+    text = client.get("/metrics").text
+    assert 'api_request_duration_seconds_count{method="GET",route="/simulate/spread/jobs/{job_id}",status="404"}' in text
+    assert 'api_requests_in_flight{route="/simulate/spread/jobs/{job_id}"} 0' in text
+    assert 'worker_pool_in_flight{pool="simulation"}' in text
+
+
+def test_server_timing_breaks_down_phases(trained_model):
+    main.api_cache.clear()
+    client = TestClient(main.app)
+    response = client.post("/predict/risk", json={
+        "location": {"latitude": 36.0, "longitude": -119.0},
+        "start_date": "2023-07-01",
+        "end_date": "2023-07-02"
+    })
+    assert response.status_code == 200
+    phases = dict(entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", "))
+    assert {"feature-fetch", "model", "serialization", "total"} <= set(phases)
+    assert float(phases["total"]) >= float(phases["model"])
+
+    text = client.get("/metrics").text
+    assert 'api_phase_duration_seconds_count{route="/predict/risk",phase="model"}' in text
+    assert 'api_request_size_bytes_count{method="POST",route="/predict/risk"}' in text
@@ -0,0 +1,277 @@
+"""
+Tests for NASA FIRMS ingestion.
+"""
+
+import io
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_pipeline import nasa_firms
+from tests.conftest import VIIRS_HEADER
+
+
+def viirs_csv(n: int, seed: int = 0, days=(1, 2), header: bool = True) -> bytes:
+    """A global VIIRS 24h CSV with n detections acquired on the given July 2023 days."""
+    rng = np.random.default_rng(seed)
+    lines = [VIIRS_HEADER] if header else []
+    for _ in range(n):
+        lines.append(
+            f"{rng.uniform(-60, 70):.5f},{rng.uniform(-180, 180):.5f},{rng.uniform(300, 380):.2f},0.39,0.36,"
+            f"2023-07-0{rng.choice(days)},{rng.integers(0, 24) * 100 + rng.integers(0, 60):d},N,VIIRS,{rng.choice(['l', 'n', 'h'])},2.0NRT,"
+            f"{rng.uniform(270, 300):.2f},{rng.uniform(0, 50):.2f},{rng.choice(['D', 'N'])}\n"
+        )
+    return "".join(lines).encode("utf-8")
+
+
+@pytest.fixture
+def stub_server(stub_server):
+    """The shared stub FIRMS server, serving 2000 global detections gzip-encoded."""
+    stub_server.update(body=viirs_csv(2000), gzip=True)
+    return stub_server
+
+
+def test_streaming_fetch_filters_to_region(stub_server, monkeypatch):
+    monkeypatch.setattr(nasa_firms, "FIRMS_CSV_CHUNK_ROWS", 300)
+    bbox = nasa_firms.FIRMS_REGIONS["western_us"]
+    df = nasa_firms.fetch_firms_data("VIIRS_SNPP", region="western_us")
+
+    assert 0 < len(df) < 2000
+    assert df["longitude"].between(bbox[0], bbox[2]).all()
+    assert df["latitude"].between(bbox[1], bbox[3]).all()
+    assert df["latitude"].dtype == np.float32
+    assert df["confidence"].dtype == "category"
+    assert df["acq_time"].dtype == np.int16
+
+    everything = nasa_firms.fetch_firms_data("VIIRS_SNPP", region="global")
+    assert len(everything) == 2000
+
+
+def test_local_file_stands_in_for_firms_url(tmp_path, monkeypatch):
+    path = tmp_path / nasa_firms.FIRMS_SOURCES["VIIRS_SNPP"]
+    path.parent.mkdir(parents=True)
+    path.write_bytes(viirs_csv(500, seed=1))
+    monkeypatch.setattr(nasa_firms, "FIRMS_BASE_URL", f"file://{tmp_path}")
+
+    df = nasa_firms.fetch_firms_data("VIIRS_SNPP", bbox=(-130.0, 20.0, -60.0, 55.0))
+    assert len(df) > 0
+    assert df["longitude"].between(-130, -60).all()
+
+    assert len(nasa_firms.fetch_firms_data("VIIRS_SNPP", bbox=(0.0, 0.0, 0.0001, 0.0001))) == 0
+
+
+def test_process_firms_data_builds_times_and_geometry():
+    df = nasa_firms.read_firms_csv(io.BytesIO(viirs_csv(300, seed=2)), "VIIRS_SNPP")
+    gdf = nasa_firms.process_firms_data(df, "VIIRS_SNPP")
+
+    expected = pd.to_datetime(
+        df["acq_date"].astype(str) + " " + df["acq_time"].astype(str).str.zfill(4), format="%Y-%m-%d %H%M"
+    )
+    assert (gdf["acquisition_datetime"] == expected).all()
+    assert gdf["brightness"].dtype == np.float32
+    assert gdf["source"].dtype == "category"
+    assert gdf["confidence"].dtype == "category"
+    assert np.allclose(gdf.geometry.x, df["longitude"]) and np.allclose(gdf.geometry.y, df["latitude"])
+
+
+def test_incremental_ingest_skips_unchanged_files_and_old_detections(stub_server, tmp_path, monkeypatch):
+    stored = []
+    monkeypatch.setattr(nasa_firms, "store_in_s3", lambda gdf, source, store=None: stored.append(gdf) or [f"part-{len(stored)}.parquet"])
+    state_store = nasa_firms.IngestStateStore(str(tmp_path))
+
+    first = nasa_firms.ingest_source("VIIRS_SNPP", state_store, region="global")
+    assert first["status"] == "updated"
+    assert first["records_stored_s3"] == 2000
+    assert first["high_water_mark"].startswith("2023-07-02")
+
+    start = time.perf_counter()
+    unchanged = nasa_firms.ingest_source("VIIRS_SNPP", state_store, region="global")
+    assert unchanged["status"] == "not_modified"
+    assert time.perf_counter() - start < 0.5
+    assert len(stored) == 1
+
+    # The rolling file gains a day of detections and keeps the previous ones
+    stub_server["body"] += viirs_csv(500, seed=5, days=(3,), header=False)
+    updated = nasa_firms.ingest_source("VIIRS_SNPP", state_store, region="global")
+    cutoff = pd.Timestamp(first["high_water_mark"]) - pd.Timedelta(hours=nasa_firms.FIRMS_LOOKBACK_HOURS)
+    assert updated["records_processed"] == 2500
+    assert updated["records_stored_s3"] == len(stored[-1])
+    assert (stored[-1]["acquisition_datetime"] > cutoff).all()
+    assert 500 <= updated["records_stored_s3"] < 2500
+    assert updated["high_water_mark"].startswith("2023-07-03")
+
+
+class RecordingCursor:
+    """Records executed SQL and COPY payloads in place of a psycopg2 cursor."""
+
+    def __init__(self, log):
+        self.log = log
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append(("execute", " ".join(sql.split())))
+        if sql.lstrip().startswith("INSERT INTO fire_detections"):
+            self.rowcount = sum(payload.count("\n") for kind, payload in self.log if kind == "copy")
+
+    def copy_expert(self, sql, buffer):
+        self.log.append(("copy", buffer.read()))
+
+
+def test_insert_streams_copy_chunks_through_staging_table(monkeypatch):
+    from contextlib import contextmanager
+
+    log = []
+
+    class Connection:
+        def cursor(self):
+            return RecordingCursor(log)
+
+    @contextmanager
+    def connection():
+        yield Connection()
+
+    monkeypatch.setattr(nasa_firms, "DB_CONNECTION_STRING", "postgresql://stub")
+    monkeypatch.setattr(nasa_firms, "COPY_CHUNK_ROWS", 40)
+    monkeypatch.setattr(nasa_firms.db, "ensure_schema", lambda: None)
+    monkeypatch.setattr(nasa_firms.db, "connection", connection)
+
+    gdf = nasa_firms.process_firms_data(nasa_firms.read_firms_csv(io.BytesIO(viirs_csv(100, seed=3)), "VIIRS_SNPP"), "VIIRS_SNPP")
+    assert nasa_firms.insert_into_database(gdf) == 100
+
+    copies = [payload for kind, payload in log if kind == "copy"]
+    assert [payload.count("\n") for payload in copies] == [40, 40, 20]
+    first = copies[0].splitlines()[0].split(",")
+    assert len(first) == len(nasa_firms.COPY_COLUMNS)
+    assert float(first[0]) == pytest.approx(gdf["latitude"].iloc[0], abs=1e-5)
+    assert pd.Timestamp(first[7]) == gdf["acquisition_datetime"].iloc[0]
+    statements = [sql for kind, sql in log if kind == "execute"]
+    assert statements[0].startswith("CREATE TEMP TABLE fire_detections_stage")
+    assert "ON CONFLICT (source, latitude, longitude, acquisition_datetime) DO NOTHING" in statements[-1]
+
+
+def test_sources_ingest_concurrently_and_fail_independently(stub_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(nasa_firms, "store_in_s3", lambda gdf, source, store=None: [f"{source}.parquet"])
+    monkeypatch.setattr(nasa_firms, "host_limiter", nasa_firms.HostLimiter(concurrency=3, min_interval=0.05))
+    files = {source: path.rsplit("/", 1)[-1] for source, path in nasa_firms.FIRMS_SOURCES.items()}
+    stub_server["delays"] = {files["VIIRS_SNPP"]: 0.6, files["VIIRS_NOAA"]: 0.6}
+    stub_server["errors"] = {files["MODIS"]}
+    state_store = nasa_firms.IngestStateStore(str(tmp_path))
+
+    start = time.perf_counter()
+    results = nasa_firms.ingest_sources(["MODIS", "VIIRS_SNPP", "VIIRS_NOAA", "GOES"], state_store, region="global")
+    assert time.perf_counter() - start < 1.1
+    assert results["MODIS"]["status"] == "error" and "503" in results["MODIS"]["error"]
+    assert results["GOES"]["status"] == "error"
+    assert results["VIIRS_SNPP"]["status"] == results["VIIRS_NOAA"]["status"] == "updated"
+    assert state_store.get("MODIS") == {}
+
+    # A source overrunning the deadline is reported without holding up the others
+    stub_server["body"] += viirs_csv(10, seed=7, header=False)
+    stub_server["delays"] = {files["VIIRS_NOAA"]: 1.5}
+    noaa_state = state_store.get("VIIRS_NOAA")
+    start = time.perf_counter()
+    results = nasa_firms.ingest_sources(["VIIRS_SNPP", "VIIRS_NOAA"], state_store, region="global", timeout=0.5)
+    assert time.perf_counter() - start < 1.0
+    assert results["VIIRS_SNPP"]["status"] == "updated"
+    assert results["VIIRS_NOAA"] == {"status": "timeout"}
+    for thread in threading.enumerate():
+        if thread.name.startswith("firms-ingest"):
+            thread.join()
+    # The abandoned source stops without saving its state, so the next run refetches it
+    assert state_store.get("VIIRS_NOAA") == noaa_state
+
+
+def test_ingest_source_writes_nothing_after_its_deadline(tmp_path, monkeypatch):
+    path = tmp_path / nasa_firms.FIRMS_SOURCES["VIIRS_SNPP"]
+    path.parent.mkdir(parents=True)
+    path.write_bytes(viirs_csv(20, seed=5))
+    monkeypatch.setattr(nasa_firms, "FIRMS_BASE_URL", f"file://{tmp_path}")
+    writes = []
+    monkeypatch.setattr(nasa_firms, "store_in_s3", lambda gdf, source, store=None: writes.append(source) or ["key"])
+    monkeypatch.setattr(nasa_firms, "insert_into_database", lambda gdf: 0)
+    state_store = nasa_firms.IngestStateStore(str(tmp_path / "state"))
+
+    deadline = nasa_firms.IngestDeadline(60)
+    deadline.abandon()
+    with pytest.raises(nasa_firms.IngestDeadlineExceeded):
+        nasa_firms.ingest_source("VIIRS_SNPP", state_store, region="global", deadline=deadline)
+    assert writes == []
+    assert state_store.get("VIIRS_SNPP") == {}
+
+    # Once a source is saving its state it can no longer be abandoned
+    deadline = nasa_firms.IngestDeadline(60)
+    assert nasa_firms.ingest_source("VIIRS_SNPP", state_store, region="global", deadline=deadline)["status"] == "updated"
+    assert deadline.abandon() is False
+
+
+def test_host_limiter_caps_concurrency_and_spaces_starts():
+    limiter = nasa_firms.HostLimiter(concurrency=2, min_interval=0.05)
+    active, peak, starts = [0], [0], []
+    lock = threading.Lock()
+
+    def download():
+        with limiter.slot("https://firms.example/a.csv"):
+            with lock:
+                starts.append(time.monotonic())
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=download) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    starts.sort()
+    assert peak[0] == 2
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.045
+
+
+def test_handler_keeps_time_for_fusion_and_clustering(tmp_path, monkeypatch):
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 10000
+
+    timeouts = []
+
+    def ingest_sources(sources, state_store, bbox=None, region=None, timeout=None):
+        timeouts.append(timeout)
+        return {}
+
+    monkeypatch.setattr(nasa_firms, "ingest_sources", ingest_sources)
+    monkeypatch.setattr(nasa_firms, "FIRMS_STATE_URI", str(tmp_path))
+    monkeypatch.setattr(nasa_firms, "FIRMS_DEADLINE_MARGIN_SECONDS", 1.0)
+    monkeypatch.setattr(nasa_firms, "FIRMS_POST_INGEST_SECONDS", 3.0)
+    assert nasa_firms.handler({}, Context())["statusCode"] == 200
+    assert timeouts == [pytest.approx(6.0)]
+
+
+def test_handler_stores_partitions_and_clusters_events(stub_server, tmp_path, monkeypatch):
+    from data_pipeline import detection_fusion, detection_store, fire_events
+
+    monkeypatch.setattr(nasa_firms, "FIRMS_STATE_URI", str(tmp_path / "state"))
+    monkeypatch.setattr(detection_store, "DETECTION_STORE_URI", str(tmp_path / "detections"))
+    monkeypatch.setattr(detection_fusion, "FUSED_STORE_URI", str(tmp_path / "fused"))
+    monkeypatch.setattr(fire_events, "FIRE_EVENTS_URI", str(tmp_path / "events"))
+
+    response = nasa_firms.handler({"sources": ["VIIRS_SNPP"], "region": "global"}, None)
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200
+    assert body["total_records"] == 2000
+    assert body["fusion"]["detections"] == 2000
+    assert body["events"]["detections"] == body["fusion"]["records"]
+    assert body["events"]["events_tracked"] > 0
+    assert len(detection_store.DetectionStore(str(tmp_path / "detections")).files()) == 2
+    assert (tmp_path / "events" / fire_events.STATE_KEY).exists()
@@ -0,0 +1,149 @@
+"""
+Tests for the API response cache.
+"""
+
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from api import main, response_cache, serialization
+from data_pipeline import detection_store, fire_index
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis client calls the cache makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is None or value[1] <= time.time():
+            return None
+        return value[0]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = (value, time.time() + ex)
+
+
+def test_equivalent_parameters_share_a_key():
+    key = response_cache.ResponseCache.key
+    assert key("r", {"a": 1.0, "b": 37.00000001, "c": None}) == key("r", {"b": 37.0, "a": 1.0})
+    assert key("r", {"a": 1}) != key("other", {"a": 1})
+    assert key("r", {"a": 1}) != key("r", {"a": 2})
+
+
+def test_concurrent_misses_compute_once():
+    cache = response_cache.ResponseCache(10)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", 60, compute) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced"] * 4 + ["miss"]
+    assert len({entry.etag for entry, _ in results}) == 1
+    assert asyncio.run(cache.get_or_compute("k", 60, compute))[1] == "memory"
+
+
+def test_failures_reach_waiters_and_are_not_cached():
+    cache = response_cache.ResponseCache(10)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("k", 60, fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+    assert cache.stats()["entries"] == 0
+
+
+def test_waiters_get_a_response_when_the_leader_is_cancelled():
+    cache = response_cache.ResponseCache(10)
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute("k", 60, compute))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.get_or_compute("k", 60, compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter
+
+    entry, source = asyncio.run(run())
+    assert source == "coalesced"
+    assert entry.body == b'{"ok":true}'
+    assert cache.stats()["entries"] == 1
+
+
+def test_uncacheable_content_is_returned_but_not_stored():
+    cache = response_cache.ResponseCache(10)
+
+    async def compute():
+        return {"degraded": True}
+
+    entry, _ = asyncio.run(cache.get_or_compute("k", 60, compute, cacheable=lambda content: False))
+    assert entry.body == b'{"degraded":true}'
+    assert cache.stats()["entries"] == 0
+
+
+def test_shared_tier_serves_other_instances():
+    redis_client = FakeRedis()
+    first = response_cache.ResponseCache(10, response_cache.RedisResponseTier(redis_client))
+    second = response_cache.ResponseCache(10, response_cache.RedisResponseTier(redis_client))
+
+    async def compute():
+        return {"value": 1}
+
+    entry, _ = asyncio.run(first.get_or_compute("k", 60, compute))
+    shared, source = asyncio.run(second.get_or_compute("k", 60, compute))
+    assert source == "shared"
+    assert shared == entry
+
+
+def test_etag_revalidation_returns_304(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "api_cache", response_cache.ResponseCache(10))
+    monkeypatch.setattr(main, "recent_fires", fire_index.FireIndexFeed(detection_store.DetectionStore(str(tmp_path))))
+    client = TestClient(main.app)
+
+    first = client.get("/data/recent-fires", params={"days": 3})
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "miss"
+
+    again = client.get("/data/recent-fires", params={"days": 3}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["X-Cache"] == "memory"
+    assert again.content == b""
+
+    changed = client.get("/data/recent-fires", params={"days": 4}, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+
+
+def test_each_content_coding_has_its_own_etag(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "api_cache", response_cache.ResponseCache(10))
+    monkeypatch.setattr(main, "recent_fires", fire_index.FireIndexFeed(detection_store.DetectionStore(str(tmp_path))))
+    monkeypatch.setattr(serialization, "COMPRESSION_MIN_BYTES", 0)
+    client = TestClient(main.app)
+
+    plain = client.get("/data/recent-fires", params={"days": 3}, headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/data/recent-fires", params={"days": 3}, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert plain.headers["ETag"] != gzipped.headers["ETag"]
+
+    # A validator for one coding never revalidates another coding's body
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]}
+    assert client.get("/data/recent-fires", params={"days": 3}, headers=headers).status_code == 200
+    headers["If-None-Match"] = gzipped.headers["ETag"]
+    assert client.get("/data/recent-fires", params={"days": 3}, headers=headers).status_code == 304
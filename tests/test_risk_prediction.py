@@ -0,0 +1,317 @@
+"""
+Tests for the wildfire risk prediction model.
+"""
+
+import json
+import time
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from models import risk_prediction
+from tests.conftest import FEATURES
+
+
+@pytest.fixture(autouse=True)
+def empty_feature_cache():
+    risk_prediction.feature_cache.clear()
+    yield
+    risk_prediction.feature_cache.clear()
+
+
+def sample_inputs():
+    weather = risk_prediction.generate_simulated_weather_data("2023-07-01", "2023-07-03")
+    terrain = {"elevation": 1200.0, "slope": 12.0, "aspect": 200.0}
+    vegetation = {"ndvi": 0.4, "erc": 60.0, "vpd": 2.0, "pdsi": -2.0}
+    return weather, terrain, vegetation
+
+
+def test_feature_schema_orders_columns_and_zero_fills():
+    schema = risk_prediction.FeatureSchema(["b", "a", "c"])
+    row = schema.row({"a": 1.0, "b": 2.0, "unused": 9.0})
+    assert row.dtype == np.float32
+    assert row.tolist() == [[2.0, 1.0, 0.0]]
+    matrix = schema.matrix([{"c": 3.0}, {"a": 4.0}])
+    assert matrix.tolist() == [[0.0, 0.0, 3.0], [0.0, 4.0, 0.0]]
+
+
+def test_prepare_features_follows_model_column_order(trained_model):
+    weather, terrain, vegetation = sample_inputs()
+    features = risk_prediction.prepare_features(37.0, -120.0, 10.0, weather, terrain, vegetation)
+    assert features.shape == (1, len(FEATURES))
+    assert features[0, FEATURES.index("slope")] == pytest.approx(12.0)
+    assert features[0, FEATURES.index("ndvi")] == pytest.approx(0.4)
+
+
+def test_forecast_scores_match_single_row_predictions(trained_model):
+    weather, terrain, vegetation = sample_inputs()
+    dates, values = risk_prediction.generate_forecast(37.0, -120.0, weather, terrain, vegetation)
+    assert dates == ["2023-07-01", "2023-07-02", "2023-07-03"]
+
+    schema = risk_prediction.get_feature_schema()
+    for date_str, value in zip(dates, values):
+        items = [item for item in weather["forecast"] if item["datetime"].startswith(date_str)]
+        avg = {key: np.mean([item[key] for item in items])
+               for key in ("temperature", "relative_humidity", "wind_speed", "precipitation")}
+        row = schema.row(risk_prediction.build_feature_values(37.0, -120.0, avg, terrain, vegetation))
+        assert value == pytest.approx(float(risk_prediction.predict_risk_batch(row)[0]), abs=1e-6)
+
+
+def test_factors_are_per_location_contributions(trained_model):
+    schema = risk_prediction.get_feature_schema()
+    rng = np.random.default_rng(1)
+    features = rng.normal(size=(4, schema.n_features)).astype(np.float32)
+
+    scores, contributions = risk_prediction.score_features(features, explain=True)
+    margins = trained_model.predict(
+        xgb.DMatrix(risk_prediction.load_scaler().transform(features), feature_names=FEATURES),
+        output_margin=True
+    )
+    bias = trained_model.predict(
+        xgb.DMatrix(risk_prediction.load_scaler().transform(features), feature_names=FEATURES),
+        pred_contribs=True
+    )[:, -1]
+    np.testing.assert_allclose(contributions.sum(axis=1) + bias, margins, atol=1e-5)
+
+    _, factors = risk_prediction.explain_risk_batch(features, top_k=2)
+    assert all(len(row) == 2 for row in factors)
+    assert factors[0] != factors[1]
+    first = list(factors[0].values())
+    assert abs(first[0]) >= abs(first[1])
+
+
+def test_predict_risk_top_k(trained_model):
+    weather, terrain, vegetation = sample_inputs()
+    features = risk_prediction.prepare_features(37.0, -120.0, 10.0, weather, terrain, vegetation)
+    risk_score, _, factors = risk_prediction.predict_risk(features, top_k=3)
+    assert 0.0 <= risk_score <= 1.0
+    assert len(factors) == 3
+    assert set(factors) <= set(FEATURES)
+
+
+def test_feature_sources_are_fetched_concurrently(monkeypatch):
+    weather, terrain, vegetation = sample_inputs()
+
+    def slow(value, delay):
+        def fetch(*args, **kwargs):
+            time.sleep(delay)
+            return value
+        return fetch
+
+    monkeypatch.setattr(risk_prediction, "get_weather_data", slow(weather, 0.3))
+    monkeypatch.setattr(risk_prediction, "get_terrain_data", slow(terrain, 0.3))
+    monkeypatch.setattr(risk_prediction, "get_vegetation_indices", slow(vegetation, 0.3))
+
+    start = time.perf_counter()
+    data, sources = risk_prediction.acquire_features(37.0, -120.0, 10.0, "2023-07-01", "2023-07-03")
+    assert time.perf_counter() - start < 0.6
+    assert data["terrain"] is terrain
+    assert set(sources) == {"weather", "terrain", "vegetation"}
+    assert all(source["status"] == "ok" and source["latency_ms"] >= 290 for source in sources.values())
+
+
+def test_slow_weather_falls_back_at_deadline(monkeypatch):
+    _, terrain, vegetation = sample_inputs()
+    monkeypatch.setattr(risk_prediction, "get_weather_data", lambda *a, **k: time.sleep(1.0))
+    monkeypatch.setattr(risk_prediction, "get_terrain_data", lambda *a, **k: terrain)
+    monkeypatch.setattr(risk_prediction, "get_vegetation_indices", lambda *a, **k: vegetation)
+
+    start = time.perf_counter()
+    data, sources = risk_prediction.acquire_features(
+        37.0, -120.0, 10.0, "2023-07-01", "2023-07-03", deadline_seconds=0.2
+    )
+    assert time.perf_counter() - start < 0.5
+    assert sources["weather"]["status"] == "timeout_simulated"
+    assert len(data["weather"]["forecast"]) == 24
+
+    # Simulated weather is never cached, so real weather is fetched next time
+    calls = []
+
+    def failing_weather(*args, **kwargs):
+        calls.append(kwargs)
+        raise risk_prediction.WeatherUnavailable("API down")
+
+    monkeypatch.setattr(risk_prediction, "get_weather_data", failing_weather)
+    data, sources = risk_prediction.acquire_features(37.0, -120.0, 10.0, "2023-07-01", "2023-07-03")
+    assert sources["weather"]["status"] == "unavailable_simulated"
+    data, sources = risk_prediction.acquire_features(37.0, -120.0, 10.0, "2023-07-01", "2023-07-03")
+    assert sources["weather"]["cache"] == "miss"
+    assert [k["fallback"] for k in calls] == [False, False]
+
+    monkeypatch.setattr(risk_prediction, "get_terrain_data", lambda *a, **k: time.sleep(1.0))
+    with pytest.raises(risk_prediction.FeatureDeadlineExceeded):
+        risk_prediction.acquire_features(38.0, -121.0, 10.0, "2023-07-01", "2023-07-03", deadline_seconds=0.2)
+
+
+def test_handler_reports_source_latency(trained_model):
+    event = {"body": json.dumps({
+        "location": {"latitude": 37.0, "longitude": -120.0},
+        "start_date": "2023-07-01",
+        "end_date": "2023-07-03",
+        "top_k_factors": 3
+    })}
+    result = risk_prediction.handler(event, None)
+    assert result["statusCode"] == 200
+    body = json.loads(result["body"])
+    assert len(body["factors"]) == 3
+    assert len(body["forecast_values"]) == 3
+    assert set(body["metadata"]["sources"]) == {"weather", "terrain", "vegetation"}
+
+
+class FakeRedis:
+    """Local stand-in for a Redis client."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def test_feature_cache_shares_tiles_and_counts_hits(monkeypatch):
+    calls = []
+    weather, terrain, vegetation = sample_inputs()
+    monkeypatch.setattr(risk_prediction, "get_weather_data", lambda *a, **k: weather)
+    monkeypatch.setattr(risk_prediction, "get_terrain_data", lambda *a: calls.append(a) or terrain)
+    monkeypatch.setattr(risk_prediction, "get_vegetation_indices", lambda *a: vegetation)
+
+    risk_prediction.acquire_features(37.001, -120.001, 10.0, "2023-07-01", "2023-07-03")
+    _, sources = risk_prediction.acquire_features(37.004, -120.004, 10.0, "2023-07-01", "2023-07-03")
+    assert len(calls) == 1
+    assert sources["terrain"]["cache"] == "memory"
+
+    # A point in a neighbouring terrain tile is still inside the same weather tile
+    _, sources = risk_prediction.acquire_features(37.02, -120.004, 10.0, "2023-07-01", "2023-07-03")
+    assert len(calls) == 2
+    assert sources["weather"]["cache"] == "memory"
+
+    stats = risk_prediction.feature_cache.stats()["sources"]
+    assert stats["terrain"] == {"hits": 1, "shared_hits": 0, "misses": 2, "evictions": 0}
+    assert stats["weather"]["hits"] == 2
+
+
+def test_feature_cache_ttl_lru_and_shared_tier(monkeypatch):
+    config = {"terrain": {"tile_degrees": 0.01, "ttl_seconds": 60}}
+    shared = risk_prediction.RedisFeatureTier(FakeRedis())
+    cache = risk_prediction.FeatureCache(config, max_entries=2, shared_tier=shared)
+    keys = [cache.key("terrain", 37.0 + i * 0.01, -120.0) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set("terrain", key, {"elevation": i})
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["sources"]["terrain"]["evictions"] == 1
+
+    # The evicted entry is recovered from the shared tier
+    assert cache.get("terrain", keys[0]) == ({"elevation": 0}, "shared")
+    assert cache.get("terrain", keys[0]) == ({"elevation": 0}, "memory")
+
+    now = time.time()
+    monkeypatch.setattr(risk_prediction.time, "time", lambda: now + 120)
+    assert cache.get("terrain", keys[0]) == (None, None)
+
+
+def make_bundle(version, feature_names, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(100, len(feature_names))).astype(np.float32)
+    y = (X[:, 0] > 0).astype(int)
+    booster = xgb.train(
+        {"objective": "binary:logistic", "max_depth": 2},
+        xgb.DMatrix(X, label=y, feature_names=feature_names),
+        num_boost_round=3
+    )
+    scaler = risk_prediction.StandardScaler().fit(X)
+    return risk_prediction.ModelBundle(version, booster, scaler, {name: 1.0 for name in feature_names})
+
+
+def test_registry_hot_swap_and_lru(monkeypatch):
+    registry = risk_prediction.ModelRegistry("a", max_versions=2)
+    for version in ("a", "b", "c"):
+        registry.register(make_bundle(version, FEATURES, 0))
+    # The active version is never evicted
+    assert registry.versions() == ["a", "c"]
+
+    in_flight = registry.get()
+    monkeypatch.setattr(risk_prediction.ModelBundle, "load", classmethod(lambda cls, v, fallback=True: make_bundle(v, FEATURES, 1)))
+    registry.activate("d")
+    assert registry.active_version == "d"
+    assert registry.get().version == "d"
+    assert in_flight.version == "a"
+    assert "d" in registry.versions()
+
+
+def test_registry_rejects_unknown_versions(monkeypatch):
+    registry = risk_prediction.ModelRegistry("a", max_versions=2)
+    registry.register(make_bundle("a", FEATURES, 0))
+    monkeypatch.setattr(risk_prediction, "list_model_versions", lambda: ["a", "b"])
+    loads = []
+
+    def load(cls, version, fallback=True):
+        loads.append((version, fallback))
+        return make_bundle(version, FEATURES, 1)
+
+    monkeypatch.setattr(risk_prediction.ModelBundle, "load", classmethod(load))
+    with pytest.raises(risk_prediction.UnknownModelVersion):
+        registry.resolve("nope")
+    assert registry.resolve("b").version == "b"
+    # Unknown versions are never fetched, and published ones load without fallback
+    assert loads == [("b", False)]
+    assert registry.versions() == ["a", "b"]
+    assert "nope" not in registry._load_locks
+
+
+def test_shadow_scoring_reuses_feature_matrix(trained_model):
+    # The candidate was trained with a different column order
+    shadow = make_bundle("test-v2", list(reversed(FEATURES)), 3)
+    risk_prediction.model_registry.register(shadow)
+
+    weather, terrain, vegetation = sample_inputs()
+    features, _ = risk_prediction.build_request_features(37.0, -120.0, weather, terrain, vegetation)
+    result = risk_prediction.score_requests([features], shadow_version="test-v2")[0]
+
+    assert result["model_version"] == "test-v1"
+    assert result["shadow"]["model_version"] == "test-v2"
+    expected = risk_prediction.score_with_bundle(shadow, features[:, ::-1])[0]
+    assert result["shadow"]["risk_score"] == pytest.approx(float(expected[0]))
+    assert result["shadow"]["forecast_values"] == pytest.approx(expected[1:].tolist())
+
+
+def test_missing_shadow_version_is_skipped_not_faked(trained_model, monkeypatch):
+    loads = []
+
+    def load(cls, version, fallback=True):
+        loads.append((version, fallback))
+        raise FileNotFoundError(version)
+
+    monkeypatch.setattr(risk_prediction.ModelBundle, "load", classmethod(load))
+    weather, terrain, vegetation = sample_inputs()
+    features, _ = risk_prediction.build_request_features(37.0, -120.0, weather, terrain, vegetation)
+    result = risk_prediction.score_requests([features], shadow_version="test-v9")[0]
+
+    assert "shadow" not in result
+    assert loads == [("test-v9", False)]
+    assert "test-v9" not in risk_prediction.model_registry.versions()
+
+
+def test_batched_scoring_explains_only_current_conditions(trained_model, monkeypatch):
+    weather, terrain, vegetation = sample_inputs()
+    features, _ = risk_prediction.build_request_features(37.0, -120.0, weather, terrain, vegetation)
+    bundle = risk_prediction.model_registry.get()
+    _, contributions = risk_prediction.score_with_bundle(bundle, features, explain=True)
+    expected = risk_prediction.contributions_to_factors(contributions[:1], bundle.schema.feature_names)[0]
+
+    explained = []
+    score_with_bundle = risk_prediction.score_with_bundle
+
+    def recording(bundle, matrix, explain=False):
+        if explain:
+            explained.append(len(matrix))
+        return score_with_bundle(bundle, matrix, explain)
+
+    monkeypatch.setattr(risk_prediction, "score_with_bundle", recording)
+    results = risk_prediction.score_requests([features, features])
+    assert explained == [2]
+    assert results[0]["factors"] == pytest.approx(expected)
+    assert results[1]["forecast_values"] == results[0]["forecast_values"]
@@ -0,0 +1,70 @@
+"""
+Tests for the nightly risk tile build.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from models import risk_tiles
+
+
+REGIONS = [{"state": "CA", "name": "California", "bounds": (36.0, -122.0, 38.0, -119.0)}]
+
+
+def build(tmp_path):
+    store = risk_tiles.open_tile_store(str(tmp_path))
+    index = risk_tiles.build_risk_tiles(store, run_date=datetime(2023, 7, 1), resolution=0.01, regions=REGIONS)
+    return store, index
+
+
+def test_build_stores_pyramid_and_index(trained_model, tmp_path):
+    store, index = build(tmp_path)
+
+    assert index["shape"] == [200, 300]
+    assert [level["shape"] for level in index["pyramid"]] == [[200, 300], [100, 150]]
+    tile = risk_tiles.array_from_bytes(store.read("20230701/pyramid/1/0/0.npy"))
+    assert tile.shape == (100, 150)
+
+    # Coarse levels keep the peak risk of the cells they cover
+    risk = risk_tiles.array_from_bytes(store.read("20230701/rasters/risk.npy"))
+    assert np.isclose(np.nanmax(tile), np.nanmax(risk))
+    assert risk_tiles.load_latest_index(store).run_id == "20230701"
+
+
+def test_pyramid_pads_odd_shapes(monkeypatch):
+    monkeypatch.setattr(risk_tiles, "TILE_SIZE", 2)
+    risk = np.arange(15, dtype=np.float32).reshape(3, 5)
+    levels = risk_tiles.build_pyramid(risk)
+    assert levels[1].tolist() == [[6, 8, 9], [11, 13, 14]]
+
+
+def test_high_risk_regions_match_threshold_and_bbox(trained_model, tmp_path):
+    store, _ = build(tmp_path)
+    index = risk_tiles.load_latest_index(store)
+
+    areas = index.query(0.5)
+    assert areas
+    assert all(area["risk_score"] >= 0.5 for area in areas)
+    assert [area["risk_score"] for area in areas] == sorted((area["risk_score"] for area in areas), reverse=True)
+
+    west, south, east, north = areas[0]["bbox"]
+    inside = index.query(0.5, bbox=(west, south, east, north))
+    assert areas[0] in inside
+    assert index.query(0.5, bbox=(-100.0, 30.0, -99.0, 31.0)) == []
+    assert len(index.query(0.5, limit=1)) == 1
+
+
+def test_label_regions_in_known_raster():
+    grid = risk_tiles.RiskGrid(REGIONS, 0.5)
+    risk = np.zeros((grid.height, grid.width), dtype=np.float32)
+    risk[0:2, 0:2] = 0.9
+    risk[2:4, 4:6] = 0.6
+    contributions = np.zeros(risk.shape + (2,), dtype=np.float32)
+    contributions[..., 0] = 0.2
+
+    regions = risk_tiles.find_high_risk_regions(grid, risk, contributions, ["ndvi", "erc"], 0.5)
+    assert [region["risk_score"] for region in regions] == [0.9, 0.6]
+    assert regions[0]["bbox"] == [-122.0, 37.0, -121.0, 38.0]
+    assert regions[0]["name"] == "California"
+    assert list(regions[0]["factors"])[0] == "ndvi"
@@ -0,0 +1,63 @@
+"""
+Tests for the fast response serialization path.
+"""
+
+import gzip
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from api import main, serialization, workers
+
+
+def test_dumps_handles_numpy_values():
+    content = {"grid": np.arange(4, dtype=np.float32).reshape(2, 2), "value": np.float64(0.5), "count": np.int64(3)}
+    assert json.loads(serialization.dumps(content)) == {"grid": [[0.0, 1.0], [2.0, 3.0]], "value": 0.5, "count": 3}
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(serialization, "BROTLI_AVAILABLE", True)
+    assert serialization.negotiate_encoding("gzip, deflate, br") == "br"
+    assert serialization.negotiate_encoding("br;q=0, gzip;q=0.5") == "gzip"
+    assert serialization.negotiate_encoding("br;q=0.1, gzip;q=1.0") == "gzip"
+    assert serialization.negotiate_encoding("gzip;q=0.5, br;q=0.5") == "br"
+    assert serialization.negotiate_encoding("*") == "br"
+    assert serialization.negotiate_encoding("identity") is None
+    assert serialization.negotiate_encoding(None) is None
+
+    monkeypatch.setattr(serialization, "BROTLI_AVAILABLE", False)
+    assert serialization.negotiate_encoding("br, gzip") == "gzip"
+
+
+def test_spread_response_is_compressed_when_accepted(monkeypatch):
+    monkeypatch.setattr(workers, "simulation_pool", workers.WorkerPool("simulation", 1, 0))
+    client = TestClient(main.app)
+    request = {
+        "ignition_points": [{
+            "location": {"latitude": 37.0, "longitude": -120.0},
+            "intensity": 50.0,
+            "detection_time": "2023-07-01T12:00:00"
+        }],
+        "simulation_hours": 2,
+        "resolution_meters": 500
+    }
+
+    compressed = client.post("/simulate/spread", json=request, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    body = compressed.json()
+    assert set(body) == {"perimeters", "intensity_grid", "metadata"}
+
+    # Still a valid FireSpreadResponse, just not validated per element on the way out
+    main.FireSpreadResponse(**body)
+
+    plain = client.post("/simulate/spread", json=request, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.content) > int(compressed.headers["Content-Length"])
+
+
+def test_compress_round_trip():
+    body = serialization.dumps({"values": list(range(1000))})
+    assert gzip.decompress(serialization.compress(body, "gzip")) == body
+    assert serialization.compress(body, None) is body
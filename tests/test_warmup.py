@@ -0,0 +1,82 @@
+"""
+Tests for startup warm-up and the readiness endpoint.
+"""
+
+import sys
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from models import fire_spread, risk_prediction, warmup
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    """Give each test its own warm-up state."""
+    state = warmup.WarmupState(required=["models", "transformers", "risk", "spread"])
+    monkeypatch.setattr(warmup, "state", state)
+    return state
+
+
+def test_warm_up_loads_artifacts_and_reports_ready(trained_model, fresh_state, monkeypatch):
+    monkeypatch.setattr(risk_prediction.model_registry, "refresh_active", lambda force=False: "test-v1")
+    client = TestClient(main.app)
+    assert client.get("/ready").status_code == 503
+
+    result = warmup.warm_up(["models", "transformers", "risk", "spread"])
+
+    assert result["ready"]
+    assert all(step["ok"] for step in result["steps"].values())
+    assert fire_spread.get_utm_transformers.cache_info().currsize >= len(fire_spread.WESTERN_US_UTM_ZONES)
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert set(response.json()["steps"]) == {"models", "transformers", "risk", "spread"}
+
+
+def test_failed_step_is_reported_and_retried(fresh_state, monkeypatch):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("artifact missing")
+
+    monkeypatch.setitem(warmup.WARMUP_FUNCTIONS, "models", flaky)
+    monkeypatch.setitem(warmup.WARMUP_FUNCTIONS, "transformers", lambda: None)
+    fresh_state.required = ["models", "transformers"]
+
+    result = warmup.warm_up(["models", "transformers"])
+    assert not result["ready"]
+    assert result["steps"]["models"]["error"] == "artifact missing"
+    assert result["steps"]["transformers"]["ok"]
+
+    result = warmup.warm_up(["models", "transformers"])
+    assert result["ready"]
+    assert len(calls) == 2
+
+
+def test_lambda_entry_points_warm_during_init(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "warm_up", calls.append)
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", ["models", "transformers", "risk", "spread"])
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "simulateFireSpread")
+
+    # Model modules leave warm-up to the entry points
+    assert not any(hasattr(module, "warmup") for module in (fire_spread, risk_prediction))
+
+    monkeypatch.delitem(sys.modules, "lambdas.simulate_fire_spread", raising=False)
+    entry = importlib.import_module("lambdas.simulate_fire_spread")
+    assert calls == [["transformers", "spread"]]
+    assert entry.handler is fire_spread.handler
+
+
+def test_simulators_share_cached_transformers():
+    bounds = {"min_lat": 38.4, "max_lat": 38.6, "min_lon": -120.6, "max_lon": -120.4}
+    points = [{"location": {"latitude": 38.5, "longitude": -120.5}, "intensity": 1.0,
+               "detection_time": "2023-07-01T12:00:00Z"}]
+    first = fire_spread.FireSpreadSimulator(points, bounds, resolution_meters=1000, simulation_hours=1)
+    second = fire_spread.FireSpreadSimulator(points, bounds, resolution_meters=1000, simulation_hours=1)
+    assert first.transformer_to_utm is second.transformer_to_utm
@@ -0,0 +1,123 @@
+"""
+Tests for the API worker pools.
+"""
+
+import os
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main, workers
+
+
+def test_full_queue_rejects_with_429():
+    pool = workers.WorkerPool("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        queued = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(workers.PoolSaturated) as rejected:
+            await pool.run(release.wait, 5)
+        release.set()
+        await asyncio.gather(running, queued)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.status_code == 429
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["completed"] == 2
+
+
+def test_queue_timeout_rejects_with_503():
+    pool = workers.WorkerPool("test", max_workers=1, max_queue=1, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        try:
+            await pool.run(release.wait, 5)
+        finally:
+            release.set()
+            await running
+
+    with pytest.raises(workers.PoolSaturated) as timed_out:
+        asyncio.run(run())
+    assert timed_out.value.status_code == 503
+    assert pool.stats()["timed_out"] == 1
+
+
+def test_cancelled_call_holds_its_slot_until_it_finishes():
+    pool = workers.WorkerPool("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        await asyncio.sleep(0.01)
+        # The cancelled call is still running in the executor
+        assert pool.stats()["in_flight"] == 1
+        with pytest.raises(workers.PoolSaturated):
+            await pool.run(release.wait, 5)
+        release.set()
+        await asyncio.sleep(0.1)
+        assert pool.stats()["in_flight"] == 0
+        return await pool.run(divmod, 7, 2)
+
+    assert asyncio.run(run()) == (3, 1)
+
+
+def test_process_pool_runs_module_functions():
+    pool = workers.WorkerPool("test", max_workers=1, max_queue=0, mode="process")
+    try:
+        assert asyncio.run(pool.run(divmod, 7, 2)) == (3, 1)
+    finally:
+        pool.shutdown()
+
+
+def test_crashed_process_pool_is_shut_down_and_replaced():
+    pool = workers.WorkerPool("test", max_workers=1, max_queue=0, mode="process")
+    try:
+        broken = pool.executor()
+        calls = []
+        shutdown = broken.shutdown
+        broken.shutdown = lambda **kwargs: calls.append(kwargs) or shutdown(**kwargs)
+        with pytest.raises(workers.PoolSaturated) as restarted:
+            asyncio.run(pool.run(os._exit, 1))
+        assert restarted.value.status_code == 503
+        assert calls == [{"wait": False, "cancel_futures": True}]
+        assert asyncio.run(pool.run(divmod, 7, 2)) == (3, 1)
+        assert pool.executor() is not broken
+    finally:
+        pool.shutdown()
+
+
+def test_spread_endpoint_runs_in_simulation_pool(monkeypatch):
+    pool = workers.WorkerPool("simulation", max_workers=1, max_queue=0)
+    monkeypatch.setattr(workers, "simulation_pool", pool)
+    client = TestClient(main.app)
+    request = {
+        "ignition_points": [{
+            "location": {"latitude": 37.0, "longitude": -120.0},
+            "intensity": 50.0,
+            "detection_time": "2023-07-01T12:00:00"
+        }],
+        "simulation_hours": 2,
+        "resolution_meters": 1000
+    }
+
+    response = client.post("/simulate/spread", json=request)
+    assert response.status_code == 200
+    assert response.json()["metadata"]["fire_statistics"]["time_steps_simulated"] == 4
+    assert pool.stats()["completed"] == 1
+
+    # A saturated pool answers immediately instead of queueing
+    pool.max_workers = 0
+    response = client.post("/simulate/spread", json=request)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,55 @@
+"""
+Tests for zonal statistics over precomputed rasters.
+"""
+
+import numpy as np
+import pytest
+from rasterio.transform import Affine
+
+from models import zonal_stats
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(1)
+    risk = rng.random((150, 170)).astype(np.float32)
+    risk[10:20, 30:40] = np.nan
+    # 0.1 degree cells with the north-west corner at (-125, 49)
+    return zonal_stats.ZonalIndex({"risk": risk}, Affine(0.1, 0, -125.0, 0, -0.1, 49.0), "20230701")
+
+
+@pytest.mark.parametrize("window", [(0, 0, 150, 170), (5, 25, 131, 97), (70, 70, 71, 71), (64, 64, 128, 128)])
+def test_rectangle_stats_match_direct_computation(index, window):
+    row0, col0, row1, col1 = window
+    values = index.rasters["risk"][row0:row1, col0:col1]
+
+    stats = index.tables["risk"].stats(*window)
+    assert stats["count"] == np.count_nonzero(~np.isnan(values))
+    assert stats["sum"] == pytest.approx(np.nansum(values.astype(np.float64)))
+    assert stats["std"] == pytest.approx(np.nanstd(values.astype(np.float64)), abs=1e-6)
+    assert index.extrema["risk"].extrema(*window) == (
+        pytest.approx(np.nanmin(values)), pytest.approx(np.nanmax(values))
+    )
+
+
+def test_bbox_window_covers_intersecting_cells(index):
+    assert index.bbox_window((-124.0, 47.0, -123.0, 48.0)) == (10, 10, 20, 20)
+    assert index.bbox_window((-124.05, 47.0, -123.0, 48.0)) == (10, 9, 20, 20)
+    assert index.bbox_window((-140.0, 20.0, -130.0, 30.0))[2:] == (150, 0)
+
+
+def test_empty_window_has_no_statistics(index):
+    stats = index.rectangle_stats((-122.0, 47.1, -121.0, 48.0))
+    assert stats["risk"]["count"] == 0
+    assert stats["risk"]["mean"] is None and stats["risk"]["max"] is None
+
+
+def test_polygon_stats_use_cells_inside_polygon(index):
+    square = {"type": "Polygon", "coordinates": [[[-120, 40], [-119, 40], [-119, 41], [-120, 41], [-120, 40]]]}
+    polygon = index.polygon_stats(square)
+    rectangle = index.rectangle_stats((-120, 40, -119, 41))
+    assert polygon["risk"]["count"] == rectangle["risk"]["count"] == 100
+    assert polygon["risk"]["mean"] == pytest.approx(rectangle["risk"]["mean"])
+
+    with pytest.raises(ValueError):
+        index.polygon_stats(square, ["fuel"])